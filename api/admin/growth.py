@@ -4,9 +4,10 @@ Growth intelligence API - funnel analytics and referral ROI tracking.
 from flask import Blueprint, request, jsonify
 import os
 import sqlite3
-import time
 import logging
 
+from modules.growth import get_growth_by_source
+
 logger = logging.getLogger("levqor.growth_admin")
 bp = Blueprint("growth_admin", __name__)
 
@@ -35,38 +36,12 @@ def growth_analytics():
     
     try:
         conn = sqlite3.connect("levqor.db")
-        c = conn.cursor()
-        
-        # 30-day window for funnel analysis
-        window_start = int(time.time()) - (30 * 86400)
-        
-        # Visits by source
-        c.execute("""
-            SELECT source, COUNT(*) 
-            FROM growth_events 
-            WHERE event='visit' AND ts > ? 
-            GROUP BY source
-        """, [window_start])
-        visits = dict(c.fetchall())
-        
-        # Signups by source
-        c.execute("""
-            SELECT source, COUNT(*) 
-            FROM growth_events 
-            WHERE event='signup' AND ts > ? 
-            GROUP BY source
-        """, [window_start])
-        signups = dict(c.fetchall())
         
-        # Revenue by source
-        c.execute("""
-            SELECT source, SUM(revenue_cents) 
-            FROM growth_events 
-            WHERE event='paid' AND ts > ? 
-            GROUP BY source
-        """, [window_start])
-        revenue_raw = c.fetchall()
-        revenue = {k: int(v or 0) for k, v in revenue_raw}
+        # 30-day window for funnel analysis (daily rollups, one row per day/event/source)
+        by_source = get_growth_by_source(conn, days=30, events=("visit", "signup", "paid"))
+        visits = {k: v["events"] for k, v in by_source["visit"].items()}
+        signups = {k: v["events"] for k, v in by_source["signup"].items()}
+        revenue = {k: int(v["revenue_cents"] or 0) for k, v in by_source["paid"].items()}
         
         conn.close()
         
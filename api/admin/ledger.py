@@ -6,6 +6,9 @@ from flask import Blueprint, jsonify, request
 import sqlite3
 import os
 import logging
+from time import time
+
+from modules.kv import get_kv_store
 
 logger = logging.getLogger("levqor.ledger")
 bp = Blueprint("ledger", __name__)
@@ -46,18 +49,17 @@ def get_ledger():
         except sqlite3.OperationalError:
             partner_gross = 0.0
         
-        # Get costs and revenue from KV store
-        def get_kv(key, default):
-            try:
-                cursor.execute("SELECT value FROM kv WHERE key=?", (key,))
-                row = cursor.fetchone()
-                return float(row[0]) if row else default
-            except (sqlite3.OperationalError, ValueError, TypeError):
-                return default
+        conn.close()
         
-        openai_cost = get_kv("openai_cost_30d", 0.0)
-        infra_cost = get_kv("infra_cost_30d", 20.0)
-        stripe_revenue = get_kv("stripe_revenue_30d", 1.0)
+        # Get costs and revenue from KV store (one batched, cached read)
+        kv = get_kv_store().get_floats({
+            "openai_cost_30d": 0.0,
+            "infra_cost_30d": 20.0,
+            "stripe_revenue_30d": 1.0
+        })
+        openai_cost = kv["openai_cost_30d"]
+        infra_cost = kv["infra_cost_30d"]
+        stripe_revenue = kv["stripe_revenue_30d"]
         
         # Calculate partner payouts (20% of conversions)
         pending_partner = round(partner_gross * 0.20, 2)
@@ -66,8 +68,6 @@ def get_ledger():
         total_costs = openai_cost + infra_cost + pending_partner
         net = round(stripe_revenue - total_costs, 2)
         
-        conn.close()
-        
         return jsonify({
             "revenue_30d": stripe_revenue,
             "openai_cost_30d": openai_cost,
@@ -81,3 +81,51 @@ def get_ledger():
     except Exception as e:
         logger.exception("Ledger query failed")
         return jsonify({"error": "internal_error"}), 500
+
+
+@bp.get("/api/admin/ledger/history")
+def get_ledger_history():
+    """
+    GET /api/admin/ledger/history?days=30
+    
+    Requires: Authorization: Bearer <ADMIN_TOKEN>
+    
+    Returns the recorded revenue/cost snapshots for the window, oldest first,
+    plus the margin at each snapshot.
+    """
+    if not _is_authorized(request):
+        return jsonify({"error": "unauthorized"}), 401
+    
+    try:
+        days = max(1, min(int(request.args.get("days", 30)), 365))
+    except ValueError:
+        return jsonify({"error": "invalid_days"}), 400
+    
+    try:
+        keys = ("stripe_revenue_30d", "openai_cost_30d", "infra_cost_30d")
+        series = get_kv_store().history(keys, since=time() - days * 86400, cast=float)
+        
+        # Snapshots are written together by update_kv_costs, so group by timestamp
+        snapshots = {}
+        for key, points in series.items():
+            for recorded_at, value in points:
+                snapshots.setdefault(recorded_at, {})[key] = value
+        
+        points = []
+        for recorded_at in sorted(snapshots):
+            snap = snapshots[recorded_at]
+            revenue = snap.get("stripe_revenue_30d")
+            costs = snap.get("openai_cost_30d", 0.0) + snap.get("infra_cost_30d", 0.0)
+            points.append({
+                "ts": recorded_at,
+                "revenue_30d": revenue,
+                "openai_cost_30d": snap.get("openai_cost_30d"),
+                "infra_cost_30d": snap.get("infra_cost_30d"),
+                "margin_pct": round((revenue - costs) / revenue * 100, 1) if revenue else None
+            })
+        
+        return jsonify({"days": days, "count": len(points), "points": points})
+    
+    except Exception:
+        logger.exception("Ledger history query failed")
+        return jsonify({"error": "internal_error"}), 500
@@ -10,6 +10,8 @@ import random
 import string
 import logging
 
+from modules.growth import get_event_counts
+
 logger = logging.getLogger("levqor.discounts")
 bp = Blueprint("discounts", __name__)
 
@@ -50,22 +52,11 @@ def preview_discount():
     """
     try:
         conn = sqlite3.connect("levqor.db")
-        c = conn.cursor()
         
-        # Check signups in last 7 days
-        week_ago = int(time.time()) - (7 * 86400)
-        c.execute("""
-            SELECT COUNT(*) FROM growth_events 
-            WHERE event='signup' AND ts > ?
-        """, [week_ago])
-        recent_signups = c.fetchone()[0]
-        
-        # Check conversions in last 7 days
-        c.execute("""
-            SELECT COUNT(*) FROM growth_events 
-            WHERE event='paid' AND ts > ?
-        """, [week_ago])
-        recent_conversions = c.fetchone()[0]
+        # Signups and conversions in the last 7 days (daily rollups)
+        counts = get_event_counts(conn, ("signup", "paid"), days=7)
+        recent_signups = counts["signup"]
+        recent_conversions = counts["paid"]
         
         conn.close()
         
@@ -2,19 +2,61 @@
 Billing API: Adaptive pricing model endpoint
 """
 from flask import Blueprint, jsonify, request
-from services.pricing_model import suggest_price
+from services.pricing_model import AXES, PRICING_MAX_SCENARIOS, get_pricing_model, suggest_price
+import os
 import logging
 
+import numpy as np
+
 logger = logging.getLogger("levqor.billing")
 bp = Blueprint("pricing_model", __name__)
 
+# Query param -> model input
+_PARAMS = {
+    "runs": "monthly_runs",
+    "p95": "p95_ms",
+    "oc": "openai_cost",
+    "ic": "infra_cost",
+    "rf": "refunds"
+}
+
+# Public defaults; live values (real volume, latency, spend) are admin-only
+_PUBLIC_DEFAULTS = {
+    "monthly_runs": 0,
+    "p95_ms": 120,
+    "openai_cost": 0,
+    "infra_cost": 20,
+    "refunds": 0
+}
+
+
+def _check_admin(req):
+    """Validate admin token"""
+    auth_header = req.headers.get("Authorization", "")
+    token = auth_header.replace("Bearer ", "").strip()
+    admin_token = os.getenv("ADMIN_TOKEN", "")
+    return token == admin_token and admin_token != ""
+
+
+def _axis_values(spec):
+    """A number, a list of numbers, or {"start", "stop", "num"} (inclusive linspace)"""
+    if isinstance(spec, dict):
+        num = int(spec.get("num", 10))
+        if not 1 <= num <= PRICING_MAX_SCENARIOS:
+            raise ValueError("num out of range")
+        return np.linspace(float(spec["start"]), float(spec["stop"]), num)
+    if isinstance(spec, list):
+        return [float(v) for v in spec]
+    return float(spec)
+
 
 @bp.get("/billing/pricing/model")
 def pricing_model():
     """
     GET /billing/pricing/model
     
-    Query params:
+    Query params (omitted ones default to the live value for admins,
+    otherwise to the constants below):
         runs: Monthly job runs (default: 0)
         p95: P95 latency in ms (default: 120)
         oc: OpenAI costs (default: 0)
@@ -24,13 +66,17 @@ def pricing_model():
     Returns suggested pricing with rationale
     """
     try:
-        runs = int(float(request.args.get("runs", "0")))
-        p95 = float(request.args.get("p95", "120"))
-        oc = float(request.args.get("oc", "0"))
-        ic = float(request.args.get("ic", "20"))
-        rf = float(request.args.get("rf", "0"))
+        given = {name: float(request.args[param]) for param, name in _PARAMS.items() if param in request.args}
+        if len(given) == len(_PARAMS):
+            values = given
+        elif _check_admin(request):
+            values = dict(get_pricing_model().defaults(), **given)
+        else:
+            values = dict(_PUBLIC_DEFAULTS, **given)
+        runs = int(values["monthly_runs"])
         
-        price, rationale = suggest_price(runs, p95, oc, ic, rf)
+        price, rationale = suggest_price(runs, values["p95_ms"], values["openai_cost"],
+                                         values["infra_cost"], values["refunds"])
         
         return jsonify({
             "status": "ok",
@@ -52,3 +98,43 @@ def pricing_model():
             "status": "error",
             "error": "internal_error"
         }), 500
+
+
+@bp.post("/billing/pricing/model/grid")
+def pricing_model_grid():
+    """
+    POST /billing/pricing/model/grid (admin)
+    
+    JSON body, one optional entry per axis (omitted = live value):
+        monthly_runs, p95_ms, openai_cost, infra_cost, refunds:
+            number, list of numbers, or {"start", "stop", "num"}
+    
+    Returns prices for every combination (nested lists in axis order)
+    """
+    if not _check_admin(request):
+        return jsonify({"status": "error", "error": "unauthorized"}), 401
+    
+    try:
+        body = request.get_json(silent=True) or {}
+        unknown = set(body) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unknown pricing axes: {sorted(unknown)}")
+        axes = {axis: _axis_values(spec) for axis, spec in body.items() if spec is not None}
+        
+        result = get_pricing_model().evaluate_grid(**axes)
+        return jsonify(dict(result, status="ok"))
+    
+    except (ValueError, TypeError, KeyError) as e:
+        logger.error(f"Invalid pricing grid request: {e}")
+        return jsonify({
+            "status": "error",
+            "error": "bad_request",
+            "message": str(e)
+        }), 400
+    
+    except Exception as e:
+        logger.exception("Pricing grid error")
+        return jsonify({
+            "status": "error",
+            "error": "internal_error"
+        }), 500
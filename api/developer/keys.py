@@ -146,6 +146,10 @@ def create_api_key():
         db.commit()
         db.close()
         
+        # New key rows change the insights API-usage KPIs
+        from modules.data_insights.cache import invalidate_kpis
+        invalidate_kpis()
+        
         # Log to Notion if available
         if NOTION_AVAILABLE:
             try:
@@ -61,6 +61,11 @@ def require_dev_key():
         """, (new_reset_at, key_id))
         db.commit()
         calls_used = 0
+        
+        # A monthly reset drops the insights call totals; per-call increments
+        # are left to the KPI cache TTL
+        from modules.data_insights.cache import invalidate_kpis
+        invalidate_kpis()
     
     # Check quota
     if calls_used >= calls_limit:
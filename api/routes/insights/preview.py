@@ -2,14 +2,14 @@
 Insights Preview API
 Returns aggregated metrics without generating a report
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 import sys
 import os
 
 # Add modules to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from modules.data_insights.aggregator import aggregate
+from modules.data_insights.cache import get_kpis
 
 bp = Blueprint('insights_preview', __name__, url_prefix="/api/insights")
 
@@ -18,11 +18,14 @@ def preview():
     """
     Get insights preview (last 90 days)
     
+    Served from the KPI cache; ?refresh=1 recomputes.
+    
     Returns:
         JSON with aggregated KPIs
     """
     try:
-        kpis = aggregate(period_days=90)
+        refresh = request.args.get("refresh", "").lower() in ("1", "true", "yes")
+        kpis = get_kpis(period_days=90, refresh=refresh)
         return jsonify({
             "ok": True,
             "data": kpis
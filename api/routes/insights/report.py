@@ -1,47 +1,34 @@
 """
 Insights Report Generation API
-Generates PDF reports and uploads to Google Drive
+Queues PDF report jobs (built and uploaded to Google Drive in the background)
 """
-from flask import Blueprint, jsonify
-from datetime import datetime
+from flask import Blueprint, jsonify, Response
 import sys
 import os
 
 # Add modules to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from modules.data_insights.aggregator import aggregate
-from modules.data_insights.report_builder import build_pdf
-from modules.data_insights.uploader import upload_pdf
+from modules.data_insights.report_jobs import submit_report_job, get_report_job, get_report_pdf
 
 bp = Blueprint('insights_report', __name__, url_prefix="/api/insights")
 
 @bp.post("/report")
 def generate_report():
     """
-    Generate quarterly insights report
+    Queue a quarterly insights report
     
     Returns:
-        JSON with Drive link and KPIs
+        202 with a job handle; poll GET /api/insights/report/<job_id>
     """
     try:
-        # Aggregate data
-        kpis = aggregate(period_days=90)
-        
-        # Build PDF
-        pdf_bytes = build_pdf(kpis)
-        
-        # Upload to Drive
-        filename = f"Levqor_Insights_{datetime.utcnow().date().isoformat()}.pdf"
-        drive_link = upload_pdf(pdf_bytes, filename)
-        
+        job = submit_report_job(period_days=90)
         return jsonify({
             "ok": True,
-            "drive_link": drive_link,
-            "kpis": kpis,
-            "filename": filename,
-            "size_bytes": len(pdf_bytes)
-        }), 200
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/api/insights/report/{job['job_id']}"
+        }), 202
         
     except Exception as e:
         return jsonify({
@@ -49,3 +36,33 @@ def generate_report():
             "error": "report_generation_failed",
             "message": str(e)
         }), 500
+
+@bp.get("/report/<job_id>")
+def report_status(job_id):
+    """
+    Report job status
+    
+    Returns:
+        JSON with status; once completed also drive_link, kpis, filename,
+        size_bytes and pdf_url
+    """
+    job = get_report_job(job_id)
+    if not job:
+        return jsonify({"ok": False, "error": "not_found"}), 404
+    
+    if job["status"] == "completed":
+        job["pdf_url"] = f"/api/insights/report/{job_id}/pdf"
+    return jsonify({"ok": job["status"] != "failed", **job}), 200
+
+@bp.get("/report/<job_id>/pdf")
+def report_pdf(job_id):
+    """Download the PDF of a completed report job"""
+    pdf_bytes, filename = get_report_pdf(job_id)
+    if pdf_bytes is None:
+        return jsonify({"ok": False, "error": "not_ready"}), 404
+    
+    return Response(
+        pdf_bytes,
+        mimetype="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
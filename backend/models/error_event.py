@@ -5,10 +5,29 @@ Stores all frontend and backend errors for in-house monitoring (Sentry replaceme
 
 from app import db
 from datetime import datetime
+import logging
+
+from sqlalchemy import inspect, text
+
+log = logging.getLogger("levqor")
+
+# Columns added after error_events first shipped (migration 011), with the
+# DDL suffix each needs when added to an existing table
+_ADDED_COLUMNS = {
+    'fingerprint': '',
+    'count': ' NOT NULL DEFAULT 1',
+    'first_seen': '',
+    'last_seen': '',
+}
 
 
 class ErrorEvent(db.Model):
     __tablename__ = 'error_events'
+    __table_args__ = (
+        db.Index('ix_error_events_severity_created_at', 'severity', 'created_at'),
+        db.Index('ix_error_events_service_created_at', 'service', 'created_at'),
+        db.Index('ix_error_events_source_created_at', 'source', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -19,6 +38,11 @@ class ErrorEvent(db.Model):
     severity = db.Column(db.String(20), nullable=False, default='error', index=True)
     message = db.Column(db.Text, nullable=False)
     stack = db.Column(db.Text, nullable=True)
+    # Buffered ingestion collapses repeats into one row (backend.services.error_ingest)
+    fingerprint = db.Column(db.String(16), nullable=True, index=True)
+    count = db.Column(db.Integer, nullable=False, default=1)
+    first_seen = db.Column(db.DateTime, nullable=True)
+    last_seen = db.Column(db.DateTime, nullable=True)
     
     def to_dict(self):
         return {
@@ -30,5 +54,66 @@ class ErrorEvent(db.Model):
             'user_email': self.user_email,
             'severity': self.severity,
             'message': self.message,
-            'stack': self.stack
+            'stack': self.stack,
+            'fingerprint': self.fingerprint,
+            'count': self.count or 1,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None
         }
+
+
+
+def upgrade_error_events_table(engine):
+    """
+    Bring an existing error_events table up to the model
+
+    db.create_all() never alters existing tables, and migration 011 uses
+    Postgres-only ADD COLUMN IF NOT EXISTS, so SQLite deployments created
+    before it lack the grouping columns. Missing columns are added through
+    the inspector (works on every dialect), then missing indexes created.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(ErrorEvent.__tablename__):
+        return
+    
+    existing = {col['name'] for col in inspector.get_columns(ErrorEvent.__tablename__)}
+    table = ErrorEvent.__table__
+    with engine.begin() as conn:
+        for name, suffix in _ADDED_COLUMNS.items():
+            if name not in existing:
+                column_type = table.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE error_events ADD COLUMN {name} {column_type}{suffix}'))
+                log.info(f"error_events: added column {name}")
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+class ErrorEventRollup(db.Model):
+    """Per-minute event counts, maintained in the same transaction as each insert"""
+    __tablename__ = 'error_event_rollups'
+    
+    bucket = db.Column(db.DateTime, primary_key=True)  # created_at truncated to the minute
+    severity = db.Column(db.String(20), primary_key=True)
+    source = db.Column(db.String(50), primary_key=True)
+    service = db.Column(db.String(100), primary_key=True)
+    fingerprint = db.Column(db.String(16), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    sample_message = db.Column(db.String(300), nullable=True)
+
+
+class ErrorMonitorCursor(db.Model):
+    """High-water mark (last processed error_events.id) per consumer"""
+    __tablename__ = 'error_monitor_cursors'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ErrorMonitorSeen(db.Model):
+    """Events a consumer already returned inside its overlap window"""
+    __tablename__ = 'error_monitor_seen'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    event_id = db.Column(db.Integer, primary_key=True)
+    seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -42,32 +42,16 @@ def get_dashboard():
         if admin_token != os.environ.get("ADMIN_TOKEN"):
             return jsonify({"ok": False, "error": "Unauthorized"}), 403
         
-        db = get_db()
+        # Counters are maintained by triggers (compliance.counters); one read
+        from compliance.counters import get_compliance_counters
+        counters = get_compliance_counters(get_db(), risk_window_days=30)
         
-        # TOS Compliance
-        cursor = db.execute("SELECT COUNT(*) FROM users WHERE terms_accepted_at IS NOT NULL")
-        tos_accepted = cursor.fetchone()[0]
-        cursor = db.execute("SELECT COUNT(*) FROM users")
-        total_users = cursor.fetchone()[0]
-        
-        # Marketing Compliance
-        cursor = db.execute("SELECT COUNT(*) FROM users WHERE marketing_double_opt_in = 1")
-        marketing_consented = cursor.fetchone()[0]
-        
-        # GDPR Opt-outs
-        cursor = db.execute("SELECT COUNT(*) FROM users WHERE gdpr_opt_out_all = 1")
-        gdpr_opted_out = cursor.fetchone()[0]
-        
-        # High-Risk Blocks (last 30 days)
-        cursor = db.execute("""
-            SELECT COUNT(*) FROM risk_blocks 
-            WHERE created_at > ?
-        """, (time() - 30*24*60*60,))
-        recent_blocks = cursor.fetchone()[0]
-        
-        # DSAR Requests
-        cursor = db.execute("SELECT COUNT(*) FROM dsar_requests WHERE status = 'pending'")
-        pending_dsar = cursor.fetchone()[0]
+        total_users = counters["users_total"]
+        tos_accepted = counters["tos_accepted"]
+        marketing_consented = counters["marketing_consented"]
+        gdpr_opted_out = counters["gdpr_opted_out"]
+        recent_blocks = counters["risk_blocks_window"]
+        pending_dsar = counters["dsar_pending"]
         
         return jsonify({
             "ok": True,
@@ -109,6 +93,7 @@ def get_audit_trail():
         admin_token: Admin token
         limit: Number of events (default 100, max 1000)
         event_type: Filter by type (optional)
+        since, until: Epoch seconds bounds (optional)
     
     Returns:
         200: {"ok": true, "events": [...]}
@@ -123,26 +108,16 @@ def get_audit_trail():
         limit = min(int(request.args.get('limit', 100)), 1000)
         event_type = request.args.get('event_type')
         
-        # Read security logs from file
-        import os.path
-        import json
-        
-        events = []
-        log_file = os.path.join("logs", "audit.log")
+        since = request.args.get('since', type=float)
+        until = request.args.get('until', type=float)
         
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                for line in f.readlines()[-limit:]:
-                    try:
-                        event = json.loads(line.strip())
-                        if not event_type or event.get('event') == event_type:
-                            events.append(event)
-                    except:
-                        continue
+        # Indexed reverse tail: reads only blocks that can match
+        from modules.audit_log import get_audit_log
+        events = get_audit_log().query(limit=limit, event_type=event_type, since=since, until=until)
         
         return jsonify({
             "ok": True,
-            "events": events[-limit:],
+            "events": events,
             "count": len(events)
         }), 200
         
@@ -3,9 +3,12 @@ Error Logging API
 Endpoint for logging errors from frontend and backend
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from backend.models.error_event import ErrorEvent
+from backend.services.error_analytics import rollup_event, get_error_counts, get_error_timeseries
+from backend.services.error_ingest import ERROR_BUFFER_ENABLED, get_error_buffer, ingest_fingerprint
+from datetime import datetime, timedelta
 import logging
 import os
 
@@ -27,6 +30,8 @@ def log_error():
     - severity (string, optional): "info", "warning", "error", "critical" (default: "error")
     - message (string): error message
     - stack (string, optional): stack trace (will be truncated if very long)
+    
+    Returns 503 if the ingestion buffer is full and this is a new error.
     """
     try:
         data = request.get_json() or {}
@@ -45,18 +50,39 @@ def log_error():
         if stack and len(stack) > 5000:
             stack = '...(truncated)\n' + stack[-5000:]
         
+        if ERROR_BUFFER_ENABLED:
+            # Repeats are collapsed and written in batches off-thread
+            accepted = get_error_buffer().submit(
+                current_app._get_current_object(),
+                source=source,
+                service=service,
+                message=message[:2000],  # Truncate message to 2000 chars
+                severity=severity,
+                path_or_screen=data.get('path_or_screen'),
+                user_email=data.get('user_email'),
+                stack=stack
+            )
+            if not accepted:
+                return jsonify({'ok': False, 'error': 'error buffer full'}), 503
+            
+            log.debug(f"Error buffered: {severity} from {source}/{service}: {message[:100]}")
+            return jsonify({'ok': True}), 200
+        
         # Create error event
         error_event = ErrorEvent(
+            created_at=datetime.utcnow(),
             source=source,
             service=service,
             path_or_screen=data.get('path_or_screen'),
             user_email=data.get('user_email'),
             severity=severity,
             message=message[:2000],  # Truncate message to 2000 chars
-            stack=stack
+            stack=stack,
+            fingerprint=ingest_fingerprint(source, service, severity, message, stack)
         )
         
         db.session.add(error_event)
+        rollup_event(error_event)
         db.session.commit()
         
         log.info(f"Error logged: {severity} from {source}/{service}: {message[:100]}")
@@ -79,6 +105,10 @@ def get_recent_errors():
     - severity (string, optional): filter by severity
     - source (string, optional): filter by source
     - service (string, optional): filter by service
+    - before_id (int, optional): return errors older than this id (next page)
+    
+    Filters are served by the (severity|source|service, created_at) indexes;
+    pages are keyset-paginated on id so deep pages cost the same as the first.
     """
     try:
         # Verify internal secret for owner/admin access
@@ -90,6 +120,13 @@ def get_recent_errors():
         
         limit = min(int(request.args.get('limit', 50)), 500)  # Max 500
         
+        before_id = None
+        if request.args.get('before_id'):
+            try:
+                before_id = int(request.args.get('before_id'))
+            except ValueError:
+                return jsonify({'ok': False, 'error': 'before_id must be an integer'}), 400
+        
         # Build query
         query = ErrorEvent.query
         
@@ -102,15 +139,77 @@ def get_recent_errors():
         if request.args.get('service'):
             query = query.filter_by(service=request.args.get('service'))
         
+        if before_id is not None:
+            query = query.filter(ErrorEvent.id < before_id)
+        
         # Order by most recent first
-        errors = query.order_by(ErrorEvent.created_at.desc()).limit(limit).all()
+        errors = query.order_by(ErrorEvent.id.desc()).limit(limit).all()
         
         return jsonify({
             'ok': True,
             'errors': [err.to_dict() for err in errors],
-            'count': len(errors)
+            'count': len(errors),
+            'next_before_id': errors[-1].id if len(errors) == limit else None
         }), 200
         
     except Exception as e:
         log.exception("Failed to retrieve recent errors")
         return jsonify({'ok': False, 'error': str(e)}), 500
+
+
+@error_logging_bp.route('/stats', methods=['GET'])
+def get_error_stats():
+    """
+    Error counts from the per-minute rollups (owner/admin only)
+    
+    Query params:
+    - minutes (int, default 60, max 10080): lookback window
+    - by (string, default "severity"): severity, source, service or fingerprint
+    - severity / source / service (string, optional): filters
+    - series (bool, optional): include per-minute totals
+    """
+    try:
+        internal_secret = request.headers.get('X-Internal-Secret')
+        expected_secret = os.environ.get('INTERNAL_SECRET')
+        
+        if not internal_secret or not expected_secret or internal_secret != expected_secret:
+            return jsonify({'error': 'Unauthorized'}), 401
+        
+        minutes = max(1, min(int(request.args.get('minutes', 60)), 10080))
+        group_by = request.args.get('by', 'severity')
+        if group_by not in ('severity', 'source', 'service', 'fingerprint'):
+            return jsonify({'ok': False, 'error': 'by must be severity, source, service or fingerprint'}), 400
+        
+        since = datetime.utcnow() - timedelta(minutes=minutes)
+        counts = get_error_counts(
+            since,
+            group_by=group_by,
+            severity=request.args.get('severity'),
+            source=request.args.get('source'),
+            service=request.args.get('service')
+        )
+        
+        response = {
+            'ok': True,
+            'minutes': minutes,
+            'by': group_by,
+            'counts': [{group_by: value, 'count': count} for value, count in counts],
+            'total': sum(count for _, count in counts),
+            'ingest': get_error_buffer().stats()
+        }
+        
+        if request.args.get('series') in ('1', 'true'):
+            response['series'] = [
+                {'minute': bucket.isoformat(), 'count': count}
+                for bucket, count in get_error_timeseries(
+                    since,
+                    severity=request.args.get('severity'),
+                    service=request.args.get('service')
+                )
+            ]
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        log.exception("Failed to retrieve error stats")
+        return jsonify({'ok': False, 'error': str(e)}), 500
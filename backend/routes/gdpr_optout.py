@@ -184,6 +184,9 @@ def set_opt_out():
         final_state = cursor.fetchone()
         db.close()
         
+        from backend.services.gdpr_enforcement import refresh_opt_out_cache
+        refresh_opt_out_cache()
+        
         # Send confirmation email
         try:
             from backend.services.gdpr_emails import send_optout_confirmation
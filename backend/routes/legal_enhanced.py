@@ -258,6 +258,9 @@ def notify_tos_update():
     """
     Notify all users about TOS update (admin only).
     
+    Snapshots the recipients and sends in the background
+    (backend.services.tos_broadcast); poll the returned status_url.
+    
     Expected JSON body:
     {
         "admin_token": "...",
@@ -266,8 +269,10 @@ def notify_tos_update():
     }
     
     Returns:
-        200: {"ok": true, "emails_sent": 123}
+        202: {"ok": true, "broadcast": {...}, "status_url": "..."}
     """
+    from backend.services.tos_broadcast import start_broadcast
+    
     try:
         data = request.get_json() or {}
         admin_token = data.get('admin_token')
@@ -282,47 +287,54 @@ def notify_tos_update():
         if new_version not in TOS_VERSIONS:
             return jsonify({"ok": False, "error": "Invalid version"}), 400
         
-        db = get_db()
-        
-        # Get all users who need notification
-        cursor = db.execute("""
-            SELECT email, name
-            FROM users
-            WHERE terms_version != ? OR terms_version IS NULL
-        """, (new_version,))
-        
-        users = cursor.fetchall()
-        emails_sent = 0
-        
-        for email, name in users:
-            try:
-                send_tos_update_email(
-                    email=email,
-                    name=name or "User",
-                    new_version=new_version,
-                    requires_reaccept=requires_reaccept,
-                    changelog=TOS_VERSIONS[new_version]["changes"]
-                )
-                emails_sent += 1
-            except Exception as e:
-                log.error(f"Failed to send TOS update email to {email}: {e}")
+        broadcast = start_broadcast(new_version, requires_reaccept=requires_reaccept)
         
-        log.info(f"TOS update notifications sent: {emails_sent} users")
+        log.info(f"TOS update notification queued: {broadcast['total']} users (broadcast {broadcast['id']})")
         
         return jsonify({
             "ok": True,
-            "emails_sent": emails_sent,
-            "total_users": len(users)
-        }), 200
+            "broadcast": broadcast,
+            "total_users": broadcast["total"],
+            "status_url": f"/api/legal/v2/notify-tos-update/{broadcast['id']}"
+        }), 202
         
     except Exception as e:
         log.error(f"TOS notification error: {e}", exc_info=True)
         return jsonify({"ok": False, "error": "Internal server error"}), 500
 
 
+@legal_enhanced_bp.route('/notify-tos-update/<broadcast_id>', methods=['GET'])
+def notify_tos_update_status(broadcast_id):
+    """
+    Progress of a TOS update broadcast (admin only).
+    
+    Query params:
+        admin_token: Admin token
+    
+    Returns:
+        200: {"ok": true, "broadcast": {"status": "...", "sent": 10, "remaining": 90, ...}}
+    """
+    from backend.services.tos_broadcast import get_broadcast
+    
+    try:
+        import os
+        if request.args.get('admin_token') != os.environ.get("ADMIN_TOKEN"):
+            return jsonify({"ok": False, "error": "Unauthorized"}), 403
+        
+        broadcast = get_broadcast(broadcast_id)
+        if not broadcast:
+            return jsonify({"ok": False, "error": "Not found"}), 404
+        
+        return jsonify({"ok": True, "broadcast": broadcast}), 200
+        
+    except Exception as e:
+        log.error(f"TOS notification status error: {e}", exc_info=True)
+        return jsonify({"ok": False, "error": "Internal server error"}), 500
+
+
 def send_tos_update_email(email: str, name: str, new_version: str, 
-                          requires_reaccept: bool, changelog: list):
-    """Send TOS update notification email"""
+                          requires_reaccept: bool, changelog: list, session=None):
+    """Send TOS update notification email (False if the send failed)"""
     from billing.dunning_emails import send_billing_email
     import os
     
@@ -355,4 +367,4 @@ The Levqor Team
 This is an important service notification from levqor.ai
 """
     
-    send_billing_email(email, subject, body, is_transactional=True)
+    return send_billing_email(email, subject, body, is_transactional=True, session=session)
@@ -3,7 +3,8 @@ Support Chat API Routes
 Public and private support endpoints
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +12,29 @@ logger = logging.getLogger(__name__)
 support_chat_bp = Blueprint("support_chat", __name__)
 
 
+def _wants_stream(data):
+    """Stream when asked via body, query string or Accept header"""
+    if data.get('stream') or request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
+
+
+def _sse_response(events):
+    """Serialize (event, data) pairs as Server-Sent Events"""
+    def generate():
+        for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Don't let nginx buffer the stream
+        }
+    )
+
+
 @support_chat_bp.route('/public', methods=['POST'])
 def public_support():
     """
@@ -27,6 +51,9 @@ def public_support():
         "escalationSuggested": false,
         "conversationId": "..."
     }
+    
+    With "stream": true (or ?stream=1, or Accept: text/event-stream) the
+    reply is sent as Server-Sent Events: meta, escalation, token..., done.
     """
     try:
         data = request.get_json()
@@ -44,6 +71,12 @@ def public_support():
                 "error": "Message cannot be empty"
             }), 400
         
+        if _wants_stream(data):
+            from backend.services.support_ai import stream_public_chat
+            
+            logger.info(f"support_chat.public_stream message_len={len(message)}")
+            return _sse_response(stream_public_chat(message, conversation_id))
+        
         # Call public AI
         from backend.services.support_ai import run_public_chat
         
@@ -80,6 +113,9 @@ def private_support():
         "conversationId": "...",
         "ticketId": "abc123"  // If escalated
     }
+    
+    Supports the same streaming mode as /public; ticketId arrives in the
+    final "done" event.
     """
     try:
         data = request.get_json()
@@ -108,6 +144,12 @@ def private_support():
         from backend.utils.support_context import get_user_context
         user_context = get_user_context(email)
         
+        if _wants_stream(data):
+            from backend.services.support_ai import stream_private_chat
+            
+            logger.info(f"support_chat.private_stream email={email} message_len={len(message)}")
+            return _sse_response(stream_private_chat(user_context, message, conversation_id))
+        
         # Call private AI
         from backend.services.support_ai import run_private_chat
         result = run_private_chat(user_context, message, conversation_id)
@@ -255,6 +297,30 @@ def list_tickets():
         }), 500
 
 
+@support_chat_bp.route('/metrics', methods=['GET'])
+def support_metrics():
+    """
+    Support chat cache metrics (public replies and private user contexts)
+    
+    GET /api/support/metrics
+    
+    Returns: {
+        "public_cache": {"hits": 120, "misses": 30, "hit_rate": 0.8, "avg_hit_ms": 0.1, ...},
+        "context_cache": {"hits": 40, "misses": 10, ...},
+        "kb_version": 1
+    }
+    """
+    from backend.services.support_cache import get_public_response_cache
+    from backend.services.support_faq_loader import get_kb_version
+    from backend.utils.support_context import get_context_cache_stats
+    
+    return jsonify({
+        "public_cache": get_public_response_cache().stats(),
+        "context_cache": get_context_cache_stats(),
+        "kb_version": get_kb_version()
+    }), 200
+
+
 @support_chat_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -0,0 +1,244 @@
+"""
+Error Analytics
+Per-minute error_events rollups and high-water-mark cursors
+
+Every error_events insert also upserts a row in error_event_rollups
+(minute bucket x severity x source x service x fingerprint) in the same
+transaction. Summaries and dashboards read the rollups, so their cost
+depends on the time window, not on how many events the table holds.
+Consumers that need the events themselves (the critical-error alert job)
+keep a cursor on error_events.id and read only rows they have not seen,
+re-checking a short overlap window for ids that committed out of order.
+
+All functions use the Flask-SQLAlchemy session and need an app context.
+"""
+
+import os
+import re
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select
+
+from app import db
+from backend.models.error_event import ErrorEvent, ErrorEventRollup, ErrorMonitorCursor, ErrorMonitorSeen
+
+log = logging.getLogger("levqor")
+
+_DIGITS = re.compile(r"\d+")
+_HEX = re.compile(r"\b[0-9a-f]{8,}\b")
+
+ROLLUP_KEY = ("bucket", "severity", "source", "service", "fingerprint")
+
+ERROR_CURSOR_OVERLAP_SECONDS = float(os.environ.get("ERROR_CURSOR_OVERLAP_SECONDS", 300))
+
+
+def error_fingerprint(source, service, message):
+    """Stable id for "the same error": ids, hashes and numbers are masked"""
+    normalized = _DIGITS.sub("#", _HEX.sub("<id>", (message or "").lower()))[:500]
+    return hashlib.sha1(f"{source}|{service}|{normalized}".encode()).hexdigest()[:16]
+
+
+def minute_bucket(when):
+    return when.replace(second=0, microsecond=0)
+
+
+def record_rollup(created_at, source, service, severity, message, count=1, fingerprint=None):
+    """
+    Add `count` events to their minute bucket (upsert)
+
+    Executes on the current session without committing, so callers can
+    commit it atomically with the error_events insert.
+    """
+    values = {
+        "bucket": minute_bucket(created_at or datetime.utcnow()),
+        "severity": severity,
+        "source": source,
+        "service": service,
+        "fingerprint": fingerprint or error_fingerprint(source, service, message),
+        "count": count,
+        "sample_message": (message or "")[:300]
+    }
+    table = ErrorEventRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY),
+            set_={"count": table.c.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt)
+        return
+
+    # Other backends: update-then-insert
+    key = {k: values[k] for k in ROLLUP_KEY}
+    updated = db.session.execute(
+        table.update()
+        .where(*[table.c[k] == v for k, v in key.items()])
+        .values(count=table.c.count + count)
+    ).rowcount
+    if not updated:
+        db.session.execute(table.insert().values(**values))
+
+
+def rollup_event(event):
+    """
+    record_rollup() for a pending ErrorEvent, inside a savepoint
+
+    Buffered rows count every collapsed occurrence, attributed to the
+    minute of the first one (created_at). A rollup failure (e.g. migration 010 not
+    applied yet) is logged and rolled back to the savepoint, so the event
+    itself is still committed.
+    """
+    try:
+        with db.session.begin_nested():
+            record_rollup(
+                event.created_at, event.source, event.service,
+                event.severity, event.message, count=event.count or 1
+            )
+    except Exception as e:
+        log.warning(f"Error rollup skipped: {e}")
+
+
+def get_error_counts(since, group_by="severity", severity=None, source=None, service=None):
+    """
+    Event counts since a datetime, grouped by one rollup column
+
+    Returns:
+        list: [(value, count), ...] highest count first
+    """
+    column = getattr(ErrorEventRollup, group_by)
+    query = db.session.query(column, func.sum(ErrorEventRollup.count)).filter(ErrorEventRollup.bucket >= minute_bucket(since))
+    if severity:
+        query = query.filter(ErrorEventRollup.severity == severity)
+    if source:
+        query = query.filter(ErrorEventRollup.source == source)
+    if service:
+        query = query.filter(ErrorEventRollup.service == service)
+    rows = query.group_by(column).order_by(func.sum(ErrorEventRollup.count).desc()).all()
+    return [(value, int(count)) for value, count in rows]
+
+
+def get_error_timeseries(since, severity=None, service=None):
+    """Per-minute totals since a datetime: [(bucket, count), ...] oldest first"""
+    query = db.session.query(ErrorEventRollup.bucket, func.sum(ErrorEventRollup.count)).filter(
+        ErrorEventRollup.bucket >= minute_bucket(since)
+    )
+    if severity:
+        query = query.filter(ErrorEventRollup.severity == severity)
+    if service:
+        query = query.filter(ErrorEventRollup.service == service)
+    rows = query.group_by(ErrorEventRollup.bucket).order_by(ErrorEventRollup.bucket).all()
+    return [(bucket, int(count)) for bucket, count in rows]
+
+
+def fetch_new_events(cursor_name, severity=None, limit=500, initial_lookback_minutes=10):
+    """
+    Events added since this consumer's last call, oldest first
+
+    The cursor only moves past rows that were returned (or filtered out by
+    severity), so nothing is skipped if a run hits `limit`. On first use
+    the cursor starts at events from the last `initial_lookback_minutes`.
+
+    Ids are allocated before commit, so on Postgres a row can become
+    visible after a higher id already moved the cursor. Each call therefore
+    also re-reads events created in the last ERROR_CURSOR_OVERLAP_SECONDS;
+    ids already returned in that window are recorded in error_monitor_seen
+    and skipped.
+
+    Returns:
+        list: ErrorEvent rows
+    """
+    now = datetime.utcnow()
+    overlap_start = now - timedelta(seconds=ERROR_CURSOR_OVERLAP_SECONDS)
+
+    cursor = db.session.get(ErrorMonitorCursor, cursor_name)
+    if cursor is None:
+        cutoff = now - timedelta(minutes=initial_lookback_minutes)
+        first_recent = db.session.query(func.min(ErrorEvent.id)).filter(ErrorEvent.created_at > cutoff).scalar()
+        if first_recent is None:
+            first_recent = (db.session.query(func.max(ErrorEvent.id)).scalar() or 0) + 1
+        cursor = ErrorMonitorCursor(name=cursor_name, last_id=first_recent - 1)
+        db.session.add(cursor)
+        # Nothing at or below the starting point counts as a late commit
+        overlap_start = now
+
+    high_water = db.session.query(func.max(ErrorEvent.id)).scalar() or 0
+    seen = select(ErrorMonitorSeen.event_id).where(ErrorMonitorSeen.name == cursor_name)
+
+    query = ErrorEvent.query.filter(
+        ErrorEvent.id <= high_water,
+        or_(ErrorEvent.id > cursor.last_id, ErrorEvent.created_at >= overlap_start),
+        ~ErrorEvent.id.in_(seen)
+    )
+    if severity:
+        query = query.filter(ErrorEvent.severity == severity)
+    events = query.order_by(ErrorEvent.id).limit(limit).all()
+
+    cursor.last_id = events[-1].id if len(events) == limit else max(high_water, cursor.last_id)
+    # A row seen before the window can no longer match it, so its marker can go
+    db.session.query(ErrorMonitorSeen).filter(
+        ErrorMonitorSeen.name == cursor_name, ErrorMonitorSeen.seen_at < overlap_start
+    ).delete(synchronize_session=False)
+    db.session.add_all(ErrorMonitorSeen(name=cursor_name, event_id=event.id, seen_at=now) for event in events)
+    db.session.commit()
+    return events
+
+
+def get_recent_events(since, severities=None, limit=10):
+    """Newest events since a datetime (plain range on the indexed created_at)"""
+    query = ErrorEvent.query.filter(ErrorEvent.created_at > since)
+    if severities:
+        query = query.filter(ErrorEvent.severity.in_(severities))
+    return query.order_by(ErrorEvent.created_at.desc()).limit(limit).all()
+
+
+def backfill_rollups(since=None, batch_size=5000):
+    """
+    Rebuild rollups from error_events (for rows logged before rollups existed)
+
+    Clears rollup buckets from `since` onwards and recounts them.
+
+    Returns:
+        int: Number of events counted
+    """
+    if since is not None:
+        db.session.query(ErrorEventRollup).filter(ErrorEventRollup.bucket >= minute_bucket(since)).delete()
+    else:
+        db.session.query(ErrorEventRollup).delete()
+
+    counted = 0
+    last_id = 0
+    while True:
+        query = db.session.query(
+            ErrorEvent.id, ErrorEvent.created_at, ErrorEvent.source,
+            ErrorEvent.service, ErrorEvent.severity, ErrorEvent.message, ErrorEvent.count
+        ).filter(ErrorEvent.id > last_id)
+        if since is not None:
+            query = query.filter(ErrorEvent.created_at >= minute_bucket(since))
+        rows = query.order_by(ErrorEvent.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        grouped = {}
+        for row in rows:
+            fingerprint = error_fingerprint(row.source, row.service, row.message)
+            key = (minute_bucket(row.created_at), row.severity, row.source, row.service, fingerprint)
+            entry = grouped.setdefault(key, [0, row.message])
+            entry[0] += row.count or 1
+        for (bucket, severity, source, service, fingerprint), (count, message) in grouped.items():
+            record_rollup(bucket, source, service, severity, message, count=count, fingerprint=fingerprint)
+
+        db.session.commit()
+        counted += sum(row.count or 1 for row in rows)
+        last_id = rows[-1].id
+
+    db.session.commit()
+    log.info(f"Error rollups backfilled: {counted} events")
+    return counted
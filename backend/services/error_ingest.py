@@ -0,0 +1,224 @@
+"""
+Error Ingestion Buffer
+Collapses repeated errors in memory and writes them in batches off-thread
+
+log_error_event() and POST /api/errors/log hand events to the buffer
+instead of committing one row each. Events are grouped by fingerprint
+(source, service, severity, message template, top stack frames); a group
+becomes a single error_events row with count / first_seen / last_seen, and
+its rollup is added with the same count. A daemon thread flushes every
+ERROR_FLUSH_INTERVAL seconds, or straight away for critical errors so the
+alert cursor sees them promptly.
+
+The buffer holds at most ERROR_BUFFER_MAX_GROUPS distinct groups. Repeats
+of a buffered group are always merged; a new group that doesn't fit is
+dropped and counted, so an error storm costs memory and writes bounded by
+the number of distinct errors, not the number of occurrences.
+
+Set ERROR_BUFFER_ENABLED=false to write synchronously (scripts, tests).
+"""
+
+import os
+import re
+import atexit
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+log = logging.getLogger("levqor")
+
+ERROR_BUFFER_ENABLED = os.environ.get("ERROR_BUFFER_ENABLED", "true").lower() not in ("0", "false", "no")
+ERROR_BUFFER_MAX_GROUPS = int(os.environ.get("ERROR_BUFFER_MAX_GROUPS", 1000))
+ERROR_FLUSH_INTERVAL = float(os.environ.get("ERROR_FLUSH_INTERVAL", 2))
+ERROR_FLUSH_BATCH = int(os.environ.get("ERROR_FLUSH_BATCH", 200))
+
+STACK_FRAMES = 3
+
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+_HEX = re.compile(r"\b(?:0x)?[0-9a-f]{8,}\b")
+_DIGITS = re.compile(r"\d+")
+_FRAME = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+
+
+def message_template(message):
+    """Message with quoted values, ids and numbers masked"""
+    text = _QUOTED.sub("<str>", (message or "").lower())
+    return _DIGITS.sub("#", _HEX.sub("<id>", text))[:500]
+
+
+def top_frames(stack, limit=STACK_FRAMES):
+    """Innermost `limit` frames of a Python traceback as file:function (line numbers ignored)"""
+    frames = _FRAME.findall(stack or "")
+    return [f"{os.path.basename(path)}:{func}" for path, func in frames[-limit:]]
+
+
+def ingest_fingerprint(source, service, severity, message, stack=None):
+    """Key under which repeats of one error are collapsed"""
+    parts = [source, service, severity, message_template(message)] + top_frames(stack)
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:16]
+
+
+class ErrorIngestBuffer:
+    """Bounded, deduplicating error buffer with a background flusher"""
+
+    def __init__(self, max_groups=ERROR_BUFFER_MAX_GROUPS, flush_interval=ERROR_FLUSH_INTERVAL,
+                 batch_size=ERROR_FLUSH_BATCH):
+        self.max_groups = max_groups
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._groups = {}
+        self._app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stats = {"received": 0, "merged": 0, "dropped": 0, "rows_written": 0, "flushes": 0, "flush_errors": 0}
+
+    def submit(self, app, source, service, message, severity="error", path_or_screen=None,
+               user_email=None, stack=None):
+        """
+        Buffer one occurrence
+
+        Args:
+            app: Flask app whose database the event belongs to
+
+        Returns:
+            bool: False if the event was dropped (buffer full)
+        """
+        now = datetime.utcnow()
+        fingerprint = ingest_fingerprint(source, service, severity, message, stack)
+
+        with self._lock:
+            self._stats["received"] += 1
+            self._app = app
+            group = self._groups.get(fingerprint)
+            if group is not None:
+                group["count"] += 1
+                group["last_seen"] = now
+                # Keep the latest occurrence's details
+                group["message"] = message
+                group["path_or_screen"] = path_or_screen or group["path_or_screen"]
+                group["user_email"] = user_email or group["user_email"]
+                group["stack"] = stack or group["stack"]
+                self._stats["merged"] += 1
+            elif len(self._groups) >= self.max_groups:
+                self._stats["dropped"] += 1
+                self._wake.set()
+                return False
+            else:
+                self._groups[fingerprint] = {
+                    "fingerprint": fingerprint,
+                    "source": source,
+                    "service": service,
+                    "severity": severity,
+                    "message": message,
+                    "path_or_screen": path_or_screen,
+                    "user_email": user_email,
+                    "stack": stack,
+                    "count": 1,
+                    "first_seen": now,
+                    "last_seen": now
+                }
+            pending = len(self._groups)
+
+        self._ensure_flusher()
+        if severity == "critical" or pending >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """
+        Write buffered groups (one row each) and their rollups
+
+        Returns:
+            int: Rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                groups = list(self._groups.values())
+                self._groups = {}
+                app = self._app
+            if not groups or app is None:
+                return 0
+
+            from app import db
+            from backend.models.error_event import ErrorEvent
+            from backend.services.error_analytics import rollup_event
+
+            written = 0
+            with app.app_context():
+                for start in range(0, len(groups), self.batch_size):
+                    batch = groups[start:start + self.batch_size]
+                    try:
+                        for group in batch:
+                            event = ErrorEvent(
+                                created_at=group["first_seen"],
+                                source=group["source"],
+                                service=group["service"],
+                                path_or_screen=group["path_or_screen"],
+                                user_email=group["user_email"],
+                                severity=group["severity"],
+                                message=group["message"],
+                                stack=group["stack"],
+                                fingerprint=group["fingerprint"],
+                                count=group["count"],
+                                first_seen=group["first_seen"],
+                                last_seen=group["last_seen"]
+                            )
+                            db.session.add(event)
+                            rollup_event(event)
+                        db.session.commit()
+                        written += len(batch)
+                    except Exception as e:
+                        log.error(f"Error buffer flush failed ({len(batch)} group(s) lost): {e}")
+                        db.session.rollback()
+                        with self._lock:
+                            self._stats["flush_errors"] += 1
+
+            with self._lock:
+                self._stats["rows_written"] += written
+                self._stats["flushes"] += 1
+            return written
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending_groups=len(self._groups), max_groups=self.max_groups)
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="error-ingest", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                log.error(f"Error buffer flusher: {e}")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_error_buffer():
+    """Process-wide ingestion buffer"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ErrorIngestBuffer()
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def flush_error_buffer():
+    """Write everything buffered now (shutdown hooks, scripts)"""
+    return get_error_buffer().flush()
@@ -1,16 +1,119 @@
 """
 GDPR Opt-out Enforcement Helper Functions
 Provides centralized enforcement checks for all opt-out scopes.
+
+Per-user checks are answered from an in-memory set of opted-out user ids
+per scope, loaded with one query. refresh_opt_out_cache() reloads it, but
+only in the process that handled the opt-out request; other workers
+notice the new gdpr_objection_log row within OPT_OUT_CHECK_INTERVAL
+seconds. Writes that bypass the opt-out route (and so the log) are picked
+up within OPT_OUT_CACHE_TTL seconds. Bulk senders should use
+filter_allowed_users(), which checks a whole recipient list against the
+database in one query.
 """
 
 import sqlite3
 import os
 import logging
+import threading
+from time import monotonic
 
 log = logging.getLogger("levqor.gdpr")
 
 DB_PATH = os.environ.get("SQLITE_PATH", os.path.join(os.getcwd(), "levqor.db"))
 
+OPT_OUT_SCOPES = ('marketing', 'profiling', 'automation', 'analytics')
+OPT_OUT_CACHE_TTL = float(os.environ.get("GDPR_OPT_OUT_CACHE_TTL", 30))
+OPT_OUT_CHECK_INTERVAL = float(os.environ.get("GDPR_OPT_OUT_CHECK_INTERVAL", 1))
+
+_opt_out_lock = threading.Lock()
+_opt_out_sets = None
+_opt_out_marker = None
+_opt_out_loaded_at = 0.0
+_opt_out_checked_at = 0.0
+
+
+def _objection_marker(db):
+    """Newest gdpr_objection_log rowid; changes whenever any worker records an opt-out"""
+    try:
+        return db.execute("SELECT MAX(rowid) FROM gdpr_objection_log").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+
+def _load_opt_out_sets(db):
+    """One pass over opted-out users -> {scope: frozenset(user_ids)}"""
+    rows = db.execute("""
+        SELECT id, gdpr_opt_out_marketing, gdpr_opt_out_profiling,
+               gdpr_opt_out_automation, gdpr_opt_out_analytics,
+               gdpr_opt_out_all
+        FROM users
+        WHERE gdpr_opt_out_marketing = 1 OR gdpr_opt_out_profiling = 1
+           OR gdpr_opt_out_automation = 1 OR gdpr_opt_out_analytics = 1
+           OR gdpr_opt_out_all = 1
+    """).fetchall()
+    
+    opted_all = frozenset(str(row[0]) for row in rows if row[5])
+    sets = {'all': opted_all}
+    for index, scope in enumerate(OPT_OUT_SCOPES, start=1):
+        sets[scope] = opted_all | frozenset(str(row[0]) for row in rows if row[index])
+    return sets
+
+
+def _reload_locked(db):
+    global _opt_out_sets, _opt_out_marker, _opt_out_loaded_at, _opt_out_checked_at
+    # Read the marker first so a write landing mid-load triggers another reload
+    _opt_out_marker = _objection_marker(db)
+    _opt_out_sets = _load_opt_out_sets(db)
+    _opt_out_loaded_at = _opt_out_checked_at = monotonic()
+
+
+def _get_opt_out_sets():
+    global _opt_out_checked_at
+    sets = _opt_out_sets
+    if sets is not None and monotonic() - _opt_out_checked_at < OPT_OUT_CHECK_INTERVAL:
+        return sets
+    with _opt_out_lock:
+        now = monotonic()
+        if _opt_out_sets is not None and now - _opt_out_checked_at < OPT_OUT_CHECK_INTERVAL:
+            return _opt_out_sets
+        db = sqlite3.connect(DB_PATH)
+        try:
+            if (_opt_out_sets is None or now - _opt_out_loaded_at >= OPT_OUT_CACHE_TTL
+                    or _objection_marker(db) != _opt_out_marker):
+                _reload_locked(db)
+            else:
+                _opt_out_checked_at = now
+        finally:
+            db.close()
+        return _opt_out_sets
+
+
+def refresh_opt_out_cache():
+    """
+    Reload opted-out users now; call after any opt-out write
+    
+    Only affects this process. Other workers reload on their next lookup
+    after OPT_OUT_CHECK_INTERVAL, once they see the new objection log row.
+    """
+    global _opt_out_sets
+    with _opt_out_lock:
+        try:
+            db = sqlite3.connect(DB_PATH)
+            try:
+                _reload_locked(db)
+            finally:
+                db.close()
+        except Exception as e:
+            # Force a reload attempt on the next lookup
+            _opt_out_sets = None
+            log.error(f"Error refreshing GDPR opt-out cache: {e}")
+
+
+def _validate_scope(scope):
+    if scope != 'all' and scope not in OPT_OUT_SCOPES:
+        raise ValueError(f"unknown opt-out scope: {scope}")
+
 
 def check_opt_out(user_id, scope):
     """
@@ -27,29 +130,76 @@ def check_opt_out(user_id, scope):
         return False
     
     try:
-        db = sqlite3.connect(DB_PATH)
-        cursor = db.cursor()
-        
-        # Check both the specific scope and the "all" flag
+        _validate_scope(scope)
+        # Opted out if either the specific scope or "all" is set; ids are
+        # stored as TEXT, so int ids are normalised before the lookup
+        return str(user_id) in _get_opt_out_sets()[scope]
+    
+    except Exception as e:
+        log.error(f"Error checking GDPR opt-out for user {user_id}, scope {scope}: {e}")
+        # Fail safe: don't allow activity if we can't check
+        return True
+
+
+def filter_allowed_users(user_ids, scope, chunk_size=5000):
+    """
+    Bulk opt-out check for campaigns and batch jobs.
+    
+    Loads the candidate ids into a temp table and anti-joins them against
+    users in one query, so a 10k-recipient send costs one connection
+    instead of 10k. Unknown user ids are allowed (same as check_opt_out);
+    falsy ids are skipped. Ids are compared as TEXT, like check_opt_out,
+    and returned as they were passed in.
+    
+    Args:
+        user_ids: Iterable of user ids (list or iterator)
+        scope: One of 'marketing', 'profiling', 'automation', 'analytics', or 'all'
+        chunk_size: Rows per temp-table insert batch
+    
+    Returns:
+        Set of user ids allowed for the scope (empty set if the check fails)
+    """
+    try:
+        _validate_scope(scope)
         col_name = f'gdpr_opt_out_{scope}'
-        cursor.execute(f"""
-            SELECT {col_name}, gdpr_opt_out_all
-            FROM users WHERE id = ?
-        """, (user_id,))
-        
-        row = cursor.fetchone()
-        db.close()
+        originals = {}
         
-        if not row:
-            return False
+        db = sqlite3.connect(DB_PATH)
+        try:
+            db.execute("CREATE TEMP TABLE IF NOT EXISTS gdpr_candidates(id TEXT PRIMARY KEY)")
+            db.execute("DELETE FROM gdpr_candidates")
+            
+            batch = []
+            for user_id in user_ids:
+                if not user_id:
+                    continue
+                key = str(user_id)
+                if key not in originals:
+                    originals[key] = user_id
+                    batch.append((key,))
+                if len(batch) >= chunk_size:
+                    db.executemany("INSERT INTO gdpr_candidates (id) VALUES (?)", batch)
+                    batch = []
+            if batch:
+                db.executemany("INSERT INTO gdpr_candidates (id) VALUES (?)", batch)
+            
+            rows = db.execute(f"""
+                SELECT c.id
+                FROM gdpr_candidates c
+                LEFT JOIN users u ON u.id = c.id
+                WHERE COALESCE(u.{col_name}, 0) = 0
+                  AND COALESCE(u.gdpr_opt_out_all, 0) = 0
+            """).fetchall()
+            db.rollback()
+        finally:
+            db.close()
         
-        # User opted out if either the specific scope or "all" is True
-        return bool(row[0]) or bool(row[1])
+        return {originals[row[0]] for row in rows}
     
     except Exception as e:
-        log.error(f"Error checking GDPR opt-out for user {user_id}, scope {scope}: {e}")
+        log.error(f"Error bulk-checking GDPR opt-outs for scope {scope}: {e}")
         # Fail safe: don't allow activity if we can't check
-        return True
+        return set()
 
 
 def get_user_opt_outs(user_id):
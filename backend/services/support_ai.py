@@ -1,38 +1,306 @@
 """
 Support AI Engine
 OpenAI-powered support chatbot with public and private modes
+
+Each mode has a blocking variant (run_*_chat, returns the full reply) and
+a streaming variant (stream_*_chat, yields (event, data) pairs as tokens
+arrive). Both share a per-worker cap on in-flight LLM calls and a
+timeout, and fall back to a canned reply when either is hit.
 """
 
 import os
+import re
+import time
 import logging
 import json
+import threading
+from contextlib import contextmanager
 from backend.utils.error_logger import log_exception
 
 logger = logging.getLogger(__name__)
 
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 
+# In-flight LLM calls allowed per worker process, how long a request may
+# wait for a free slot, and the overall budget for one completion
+SUPPORT_LLM_CONCURRENCY = int(os.environ.get('SUPPORT_LLM_CONCURRENCY', 8))
+SUPPORT_LLM_QUEUE_TIMEOUT = float(os.environ.get('SUPPORT_LLM_QUEUE_TIMEOUT', 2))
+SUPPORT_LLM_TIMEOUT = float(os.environ.get('SUPPORT_LLM_TIMEOUT', 20))
+
+BUSY_REPLY = "We're handling a lot of conversations right now. Please try again in a moment or email support@levqor.ai"
+
 # Check if OpenAI is available (using new client API v1.x)
 OPENAI_AVAILABLE = False
 openai_client = None
 
 try:
     from openai import OpenAI
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
-    OPENAI_AVAILABLE = bool(OPENAI_API_KEY)
-    logger.info("support_ai.openai_initialized using client v1.x API")
+    if OPENAI_API_KEY:
+        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        OPENAI_AVAILABLE = True
+        logger.info("support_ai.openai_initialized using client v1.x API")
 except ImportError:
     logger.warning("support_ai.openai_not_installed")
 
+_llm_slots = threading.BoundedSemaphore(SUPPORT_LLM_CONCURRENCY)
+
+
+class SupportAIBusy(Exception):
+    """No LLM slot became free within SUPPORT_LLM_QUEUE_TIMEOUT"""
+
+
+@contextmanager
+def _llm_slot():
+    if not _llm_slots.acquire(timeout=SUPPORT_LLM_QUEUE_TIMEOUT):
+        raise SupportAIBusy("support AI at capacity")
+    try:
+        yield
+    finally:
+        _llm_slots.release()
+
+
+_ESCALATION_FIELD = re.compile(r'"escalationSuggested"\s*:\s*(true|false)')
+_REPLY_FIELD = re.compile(r'"reply"\s*:\s*"')
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class ReplyStreamParser:
+    """
+    Incrementally extract the reply from a streamed JSON completion
+
+    feed() returns the newly decoded part of the "reply" string value and
+    sets `escalation` as soon as the escalationSuggested field appears. If
+    the model answers in plain text instead of JSON, the text is passed
+    through unchanged.
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self.text = ""
+        self.escalation = None
+        self._mode = None
+        self._emitted = 0
+        self._pos = None
+        self._closed = False
+
+    def feed(self, chunk):
+        self.raw += chunk
+
+        if self._mode is None:
+            stripped = self.raw.lstrip()
+            if not stripped:
+                return ""
+            self._mode = "json" if stripped[0] in "{`" else "text"
+            self._emitted = len(self.raw) - len(stripped)
+
+        if self._mode == "text":
+            text = self.raw[self._emitted:]
+            self._emitted = len(self.raw)
+            return text
+
+        if self.escalation is None:
+            match = _ESCALATION_FIELD.search(self.raw)
+            if match:
+                self.escalation = match.group(1) == "true"
+
+        if self._pos is None:
+            match = _REPLY_FIELD.search(self.raw)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        return self._read_reply()
+
+    def _read_reply(self):
+        out = []
+        raw, i = self.raw, self._pos
+        while i < len(raw) and not self._closed:
+            char = raw[i]
+            if char == '"':
+                self._closed = True
+                i += 1
+            elif char == '\\':
+                # Wait for the rest of a split escape sequence
+                if i + 1 >= len(raw):
+                    break
+                if raw[i + 1] == 'u':
+                    if i + 6 > len(raw):
+                        break
+                    try:
+                        code = int(raw[i + 2:i + 6], 16)
+                    except ValueError:
+                        code = 0xFFFD
+                    if 0xD800 <= code < 0xDC00:
+                        # High surrogate: wait for its "\\uDCxx" pair
+                        if i + 12 > len(raw) and '\\u'.startswith(raw[i + 6:i + 8]):
+                            break
+                        try:
+                            low = int(raw[i + 8:i + 12], 16) if raw[i + 6:i + 8] == '\\u' else 0
+                        except ValueError:
+                            low = 0
+                        if 0xDC00 <= low < 0xE000:
+                            out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                            i += 12
+                            continue
+                        code = 0xFFFD
+                    elif 0xDC00 <= code < 0xE000:
+                        code = 0xFFFD
+                    out.append(chr(code))
+                    i += 6
+                else:
+                    out.append(_JSON_ESCAPES.get(raw[i + 1], raw[i + 1]))
+                    i += 2
+            else:
+                out.append(char)
+                i += 1
+        self._pos = i
+        text = "".join(out)
+        self.text += text
+        return text
+
+
+def _default_client(client):
+    return client or (openai_client if OPENAI_AVAILABLE else None)
+
+
+def _parse_reply(reply_text, message):
+    """Split a completion into (reply, escalationSuggested)"""
+    try:
+        result = json.loads(reply_text)
+        return result.get("reply", reply_text), result.get("escalationSuggested", False)
+    except:
+        # If not JSON, treat as plain text
+        return reply_text, _detect_escalation_keywords(message)
+
+
+def _public_prompt(message):
+    from backend.services.support_faq_loader import get_public_faq_summary
+    from backend.services.support_retrieval import retrieve_passages, format_passages
+
+    # Only the passages relevant to this question go into the prompt
+    faq_content = format_passages(retrieve_passages(message)) or get_public_faq_summary()
+
+    return f"""You are Levqor's public support assistant.
+
+Help website visitors with basic questions using ONLY the FAQ/knowledge base below. 
+
+Be concise (max 3 sentences), friendly, and helpful. If you cannot answer from the FAQ, suggest they contact support@levqor.ai or create a support ticket.
+
+If the user seems frustrated, angry, or explicitly asks for human help, set escalationSuggested to true.
+
+Knowledge Base:
+{faq_content}
+
+Response format: JSON object with keys "escalationSuggested" (boolean) first, then "reply" (string)"""
+
+
+def _private_prompt(user_context, message):
+    from backend.services.support_faq_loader import get_public_faq_summary
+    from backend.services.support_retrieval import retrieve_passages, format_passages
+
+    kb_content = format_passages(retrieve_passages(message)) or get_public_faq_summary()
+
+    return f"""You are Levqor's private support assistant for logged-in customers.
+
+You have access to the user's account context below. Use it to answer questions about their orders, status, delivery, etc.
+
+Be helpful, concise (max 4 sentences), and specific to their situation. If you cannot resolve the issue, set escalationSuggested to true.
+
+User Context:
+{json.dumps(user_context, indent=2)}
+
+Knowledge Base (passages relevant to this question):
+{kb_content}
+
+Response format: JSON object with keys "escalationSuggested" (boolean) first, then "reply" (string)"""
+
 
-def run_public_chat(message, conversation_id=None):
+def _public_cache_key(message):
+    from backend.services.support_faq_loader import get_kb_version
+    from backend.services.support_cache import get_public_response_cache, normalize_question
+
+    normalized = normalize_question(message)
+    cache_key = f"{get_kb_version()}:{normalized}" if normalized else None
+    return get_public_response_cache(), cache_key
+
+
+def _complete(client, system_prompt, message, max_tokens):
+    with _llm_slot():
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",  # Cost-efficient model
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": message}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.7,
+            timeout=SUPPORT_LLM_TIMEOUT
+        )
+    return _parse_reply(response.choices[0].message.content.strip(), message)
+
+
+def _stream_completion(client, system_prompt, message, max_tokens):
+    """
+    Stream a completion as ("escalation" | "token", data) events
+
+    The generator's return value is {"reply", "escalationSuggested"} parsed
+    from the full completion, which is authoritative over the streamed text.
+    """
+    parser = ReplyStreamParser()
+    announced = False
+    deadline = time.monotonic() + SUPPORT_LLM_TIMEOUT
+
+    with _llm_slot():
+        stream = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": message}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.7,
+            stream=True,
+            timeout=SUPPORT_LLM_TIMEOUT
+        )
+        try:
+            for chunk in stream:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"support AI stream exceeded {SUPPORT_LLM_TIMEOUT}s")
+                if not chunk.choices:
+                    continue
+                text = parser.feed(chunk.choices[0].delta.content or "")
+                if not announced and parser.escalation is not None:
+                    announced = True
+                    yield "escalation", {"escalationSuggested": parser.escalation}
+                if text:
+                    yield "token", {"text": text}
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+
+    reply, escalation = _parse_reply(parser.raw.strip(), message)
+    if parser._mode == "json" and reply == parser.raw.strip():
+        # Malformed JSON (e.g. truncated): keep the reply text decoded so far
+        reply = parser.text or reply
+    if not announced:
+        yield "escalation", {"escalationSuggested": escalation}
+    return {"reply": reply, "escalationSuggested": escalation}
+
+
+def run_public_chat(message, conversation_id=None, client=None):
     """
     Run public support chat (website visitors)
-    Uses only FAQ/public knowledge base
+    Uses only the knowledge base passages retrieved for the question
+    
+    Replies are cached by normalized question (see support_cache), keyed
+    on the knowledge base version, so repeated FAQ questions are answered
+    without an OpenAI round-trip until the TTL expires or the KB changes.
     
     Args:
         message: User message
         conversation_id: Optional conversation ID for context
+        client: Optional OpenAI-compatible client (defaults to the module client)
     
     Returns:
         dict: {
@@ -41,63 +309,51 @@ def run_public_chat(message, conversation_id=None):
             "conversationId": str
         }
     """
-    if not OPENAI_AVAILABLE:
+    client = _default_client(client)
+    if client is None:
         return {
             "reply": "I'm currently unavailable. Please email support@levqor.ai for assistance.",
             "escalationSuggested": True,
             "conversationId": conversation_id or "n/a"
         }
     
+    started = time.perf_counter()
+    
     try:
-        from backend.services.support_faq_loader import get_public_faq_summary
+        cache, cache_key = _public_cache_key(message)
         
-        faq_content = get_public_faq_summary()
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            cache.record(True, (time.perf_counter() - started) * 1000)
+            logger.info(f"support_ai.public_chat cache_hit=true conversation_id={conversation_id}")
+            return {
+                "reply": cached["reply"],
+                "escalationSuggested": cached["escalationSuggested"],
+                "conversationId": conversation_id or "public-" + os.urandom(4).hex()
+            }
         
-        system_prompt = f"""You are Levqor's public support assistant. 
-
-Help website visitors with basic questions using ONLY the FAQ/knowledge base below. 
-
-Be concise (max 3 sentences), friendly, and helpful. If you cannot answer from the FAQ, suggest they contact support@levqor.ai or create a support ticket.
-
-If the user seems frustrated, angry, or explicitly asks for human help, set escalationSuggested to true.
-
-Knowledge Base:
-{faq_content}
-
-Response format: JSON with keys "reply" (string) and "escalationSuggested" (boolean)"""
-
-        if not openai_client:
-            raise Exception("OpenAI client not available")
+        reply, escalation = _complete(client, _public_prompt(message), message, max_tokens=200)
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",  # Cost-efficient model
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ],
-            max_tokens=200,
-            temperature=0.7
-        )
+        # Escalations depend on the visitor's mood, not just the question
+        if cache_key and not escalation:
+            cache.put(cache_key, {"reply": reply, "escalationSuggested": escalation})
+        cache.record(False, (time.perf_counter() - started) * 1000)
         
-        reply_text = response.choices[0].message.content.strip()
-        
-        # Try to parse JSON response
-        try:
-            result = json.loads(reply_text)
-            reply = result.get("reply", reply_text)
-            escalation = result.get("escalationSuggested", False)
-        except:
-            # If not JSON, treat as plain text
-            reply = reply_text
-            escalation = _detect_escalation_keywords(message)
-        
-        logger.info(f"support_ai.public_chat conversation_id={conversation_id}")
+        logger.info(f"support_ai.public_chat cache_hit=false conversation_id={conversation_id}")
         
         return {
             "reply": reply,
             "escalationSuggested": escalation,
             "conversationId": conversation_id or "public-" + os.urandom(4).hex()
         }
+
+    except SupportAIBusy:
+        logger.warning("support_ai.public_busy")
+        return {
+            "reply": BUSY_REPLY,
+            "escalationSuggested": False,
+            "conversationId": conversation_id or "busy"
+        }
         
     except Exception as e:
         logger.error(f"support_ai.public_error error={str(e)}", exc_info=True)
@@ -115,15 +371,98 @@ Response format: JSON with keys "reply" (string) and "escalationSuggested" (bool
         }
 
 
-def run_private_chat(user_context, message, conversation_id=None):
+def stream_public_chat(message, conversation_id=None, client=None):
+    """
+    Streaming variant of run_public_chat
+
+    Yields (event, data) pairs:
+        ("meta", {"conversationId"}) first,
+        ("escalation", {"escalationSuggested"}) once the flag is known,
+        ("token", {"text"}) for each piece of the reply,
+        ("done", {...same dict run_public_chat returns...}) last.
+
+    On timeout, capacity or upstream errors the stream still ends with a
+    "done" event carrying the fallback reply.
+    """
+    conversation_id = conversation_id or "public-" + os.urandom(4).hex()
+    yield "meta", {"conversationId": conversation_id}
+
+    client = _default_client(client)
+    if client is None:
+        yield "done", {
+            "reply": "I'm currently unavailable. Please email support@levqor.ai for assistance.",
+            "escalationSuggested": True,
+            "conversationId": conversation_id
+        }
+        return
+
+    started = time.perf_counter()
+
+    try:
+        cache, cache_key = _public_cache_key(message)
+
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            cache.record(True, (time.perf_counter() - started) * 1000)
+            logger.info(f"support_ai.public_stream cache_hit=true conversation_id={conversation_id}")
+            yield "escalation", {"escalationSuggested": cached["escalationSuggested"]}
+            yield "token", {"text": cached["reply"]}
+            yield "done", dict(cached, conversationId=conversation_id)
+            return
+
+        result = yield from _stream_completion(client, _public_prompt(message), message, max_tokens=200)
+
+        if cache_key and not result["escalationSuggested"]:
+            cache.put(cache_key, result)
+        cache.record(False, (time.perf_counter() - started) * 1000)
+
+        logger.info(f"support_ai.public_stream cache_hit=false conversation_id={conversation_id}")
+        yield "done", dict(result, conversationId=conversation_id)
+
+    except SupportAIBusy:
+        logger.warning("support_ai.public_busy")
+        yield "done", {"reply": BUSY_REPLY, "escalationSuggested": False, "conversationId": conversation_id}
+
+    except Exception as e:
+        logger.error(f"support_ai.public_stream_error error={str(e)}", exc_info=True)
+        log_exception(
+            source="backend",
+            service="support_ai_public",
+            exc=e,
+            severity="error",
+            path_or_screen="/api/support/public"
+        )
+        yield "done", {
+            "reply": "I'm having trouble right now. Please email support@levqor.ai",
+            "escalationSuggested": True,
+            "conversationId": conversation_id
+        }
+
+
+def _escalate_private(user_context, message, result):
+    """Auto-create a ticket when the AI suggests escalation"""
+    from backend.services.support_tickets import create_ticket
+
+    ticket = create_ticket(
+        email=user_context.get("email", "unknown"),
+        message=message,
+        context={"ai_suggested_escalation": True}
+    )
+
+    if ticket:
+        result["ticketId"] = ticket.get("id")
+
+
+def run_private_chat(user_context, message, conversation_id=None, client=None):
     """
     Run private support chat (logged-in users)
-    Uses full knowledge base + user account context
+    Uses the top-ranked knowledge base passages + user account context
     
     Args:
         user_context: Dict with user's orders, tickets, account info
         message: User message
         conversation_id: Optional conversation ID
+        client: Optional OpenAI-compatible client (defaults to the module client)
     
     Returns:
         dict: {
@@ -133,7 +472,8 @@ def run_private_chat(user_context, message, conversation_id=None):
             "ticketId": str (if escalated)
         }
     """
-    if not OPENAI_AVAILABLE:
+    client = _default_client(client)
+    if client is None:
         return {
             "reply": "Support AI is currently unavailable. Please email support@levqor.ai",
             "escalationSuggested": True,
@@ -141,49 +481,7 @@ def run_private_chat(user_context, message, conversation_id=None):
         }
     
     try:
-        from backend.services.support_faq_loader import load_support_corpus
-        
-        corpus = load_support_corpus()
-        
-        system_prompt = f"""You are Levqor's private support assistant for logged-in customers.
-
-You have access to the user's account context below. Use it to answer questions about their orders, status, delivery, etc.
-
-Be helpful, concise (max 4 sentences), and specific to their situation. If you cannot resolve the issue, set escalationSuggested to true.
-
-User Context:
-{json.dumps(user_context, indent=2)}
-
-Knowledge Base:
-FAQ: {corpus.get('faq', 'N/A')[:500]}
-Pricing: {corpus.get('pricing', 'N/A')[:500]}
-Policies: {corpus.get('policies', 'N/A')[:500]}
-
-Response format: JSON with keys "reply" (string) and "escalationSuggested" (boolean)"""
-
-        if not openai_client:
-            raise Exception("OpenAI client not available")
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ],
-            max_tokens=300,
-            temperature=0.7
-        )
-        
-        reply_text = response.choices[0].message.content.strip()
-        
-        # Try to parse JSON response
-        try:
-            result = json.loads(reply_text)
-            reply = result.get("reply", reply_text)
-            escalation = result.get("escalationSuggested", False)
-        except:
-            reply = reply_text
-            escalation = _detect_escalation_keywords(message)
+        reply, escalation = _complete(client, _private_prompt(user_context, message), message, max_tokens=300)
         
         email = user_context.get("email", "unknown")
         logger.info(f"support_ai.private_chat email={email} conversation_id={conversation_id}")
@@ -196,18 +494,17 @@ Response format: JSON with keys "reply" (string) and "escalationSuggested" (bool
         
         # Auto-create ticket if escalation suggested
         if escalation:
-            from backend.services.support_tickets import create_ticket
-            
-            ticket = create_ticket(
-                email=email,
-                message=message,
-                context={"ai_suggested_escalation": True}
-            )
-            
-            if ticket:
-                result["ticketId"] = ticket.get("id")
+            _escalate_private(user_context, message, result)
         
         return result
+
+    except SupportAIBusy:
+        logger.warning("support_ai.private_busy")
+        return {
+            "reply": BUSY_REPLY,
+            "escalationSuggested": False,
+            "conversationId": conversation_id or "busy"
+        }
         
     except Exception as e:
         logger.error(f"support_ai.private_error error={str(e)}", exc_info=True)
@@ -226,6 +523,59 @@ Response format: JSON with keys "reply" (string) and "escalationSuggested" (bool
         }
 
 
+def stream_private_chat(user_context, message, conversation_id=None, client=None):
+    """
+    Streaming variant of run_private_chat
+
+    Same event sequence as stream_public_chat; when the AI suggests
+    escalation the ticket is created after the reply finishes and its id
+    is included in the "done" event.
+    """
+    conversation_id = conversation_id or "private-" + os.urandom(4).hex()
+    yield "meta", {"conversationId": conversation_id}
+
+    client = _default_client(client)
+    if client is None:
+        yield "done", {
+            "reply": "Support AI is currently unavailable. Please email support@levqor.ai",
+            "escalationSuggested": True,
+            "conversationId": conversation_id
+        }
+        return
+
+    try:
+        result = yield from _stream_completion(client, _private_prompt(user_context, message), message, max_tokens=300)
+        result["conversationId"] = conversation_id
+
+        email = user_context.get("email", "unknown")
+        logger.info(f"support_ai.private_stream email={email} conversation_id={conversation_id}")
+
+        if result["escalationSuggested"]:
+            _escalate_private(user_context, message, result)
+
+        yield "done", result
+
+    except SupportAIBusy:
+        logger.warning("support_ai.private_busy")
+        yield "done", {"reply": BUSY_REPLY, "escalationSuggested": False, "conversationId": conversation_id}
+
+    except Exception as e:
+        logger.error(f"support_ai.private_stream_error error={str(e)}", exc_info=True)
+        log_exception(
+            source="backend",
+            service="support_ai_private",
+            exc=e,
+            severity="error",
+            user_email=user_context.get("email") if user_context else None,
+            path_or_screen="/api/support/private"
+        )
+        yield "done", {
+            "reply": "I'm having trouble accessing your account info. Please email support@levqor.ai",
+            "escalationSuggested": True,
+            "conversationId": conversation_id
+        }
+
+
 def _detect_escalation_keywords(message):
     """Detect if message suggests need for human escalation"""
     message_lower = message.lower()
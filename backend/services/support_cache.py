@@ -0,0 +1,128 @@
+"""
+Support Response Cache
+Normalized-question cache for public support chat replies (TTL + LRU)
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+SUPPORT_CACHE_TTL_SECONDS = float(os.environ.get("SUPPORT_CACHE_TTL", 3600))
+SUPPORT_CACHE_MAX_ENTRIES = int(os.environ.get("SUPPORT_CACHE_MAX_ENTRIES", 1000))
+
+# Filler words that don't change what a visitor is asking
+_STOPWORDS = frozenset("""
+    a an the is are was were be am do does did can could would will should
+    i me my we our you your it its this that there please pls hi hello hey
+    thanks thank tell know want wanted like just about to of for on in
+""".split())
+
+_NON_WORD = re.compile(r"[^a-z0-9\s]+")
+
+
+def normalize_question(message):
+    """
+    Reduce a question to a cache key
+
+    Lowercases, strips punctuation, filler and repeated words, so "How
+    much does Levqor cost?" and "how much, how much Levqor cost" share one
+    entry. Word order is kept: "switch annual to monthly" and "switch
+    monthly to annual" ask different things.
+
+    Returns:
+        str: Normalized key ('' if nothing meaningful is left)
+    """
+    words = _NON_WORD.sub(" ", (message or "").lower()).split()
+    terms = dict.fromkeys(w for w in words if w not in _STOPWORDS)
+    return " ".join(terms)
+
+
+class ResponseCache:
+    """Thread-safe LRU with per-entry TTL and hit/miss latency metrics"""
+
+    def __init__(self, max_entries=SUPPORT_CACHE_MAX_ENTRIES, ttl_seconds=SUPPORT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._hit_ms = 0.0
+        self._miss_ms = 0.0
+
+    def get(self, key):
+        """Cached value for key, or None if absent or expired"""
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Store value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (value, monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key):
+        """Drop one entry (no-op if absent)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def record(self, hit, elapsed_ms):
+        """Account one lookup's outcome and end-to-end latency"""
+        with self._lock:
+            if hit:
+                self._hits += 1
+                self._hit_ms += elapsed_ms
+            else:
+                self._misses += 1
+                self._miss_ms += elapsed_ms
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "avg_hit_ms": round(self._hit_ms / self._hits, 2) if self._hits else 0.0,
+                "avg_miss_ms": round(self._miss_ms / self._misses, 2) if self._misses else 0.0
+            }
+
+
+_public_cache = None
+_public_cache_lock = threading.Lock()
+
+
+def get_public_response_cache():
+    """Process-wide cache for public chat replies"""
+    global _public_cache
+    if _public_cache is None:
+        with _public_cache_lock:
+            if _public_cache is None:
+                _public_cache = ResponseCache()
+    return _public_cache
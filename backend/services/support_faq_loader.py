@@ -1,36 +1,95 @@
 """
 Support FAQ/Knowledge Base Loader
 Loads markdown files for AI context
+
+The corpus is read once and kept in memory; file mtimes are re-checked at
+most every KB_RELOAD_CHECK_SECONDS and the corpus is reloaded when any
+file changes. get_kb_version() changes on every reload so caches built
+on the corpus know when to drop their entries.
 """
 
 import os
 import logging
+import threading
+from time import monotonic
 
 logger = logging.getLogger(__name__)
 
 KB_DIR = "knowledge-base"
 
+KB_FILES = {
+    "faq": "faq.md",
+    "pricing": "pricing.md",
+    "policies": "policies.md"
+}
+
+KB_RELOAD_CHECK_SECONDS = float(os.environ.get("KB_RELOAD_CHECK_SECONDS", 5))
+
+_kb_lock = threading.Lock()
+_kb_state = {
+    "corpus": None,
+    "mtimes": None,
+    "version": 0,
+    "checked_at": 0.0,
+    "public_summary": None
+}
+
+
+def _kb_mtimes():
+    mtimes = {}
+    for key, filename in KB_FILES.items():
+        try:
+            mtimes[key] = os.stat(os.path.join(KB_DIR, filename)).st_mtime_ns
+        except OSError:
+            mtimes[key] = None
+    return mtimes
+
+
+def _refresh_if_stale():
+    """Reload the corpus if it was never loaded or a file's mtime changed"""
+    now = monotonic()
+    with _kb_lock:
+        if _kb_state["corpus"] is not None and now - _kb_state["checked_at"] < KB_RELOAD_CHECK_SECONDS:
+            return
+        _kb_state["checked_at"] = now
+        mtimes = _kb_mtimes()
+        if _kb_state["corpus"] is not None and mtimes == _kb_state["mtimes"]:
+            return
+        _kb_state["corpus"] = _read_support_corpus()
+        _kb_state["mtimes"] = mtimes
+        _kb_state["version"] += 1
+        _kb_state["public_summary"] = None
+        logger.info(f"support_faq.reloaded version={_kb_state['version']}")
+
+
+def get_kb_version():
+    """Monotonic version of the loaded corpus (bumps on every reload)"""
+    _refresh_if_stale()
+    return _kb_state["version"]
+
 
 def load_support_corpus():
     """
     Load knowledge base content from markdown files
     
+    Served from memory; files are only re-read after they change on disk.
+    
     Returns:
         dict: Dictionary with 'faq', 'pricing', 'policies' keys
     """
+    _refresh_if_stale()
+    return dict(_kb_state["corpus"])
+
+
+def _read_support_corpus():
+    """Read every knowledge base file from disk"""
     corpus = {
         "faq": "",
         "pricing": "",
         "policies": ""
     }
     
-    files = {
-        "faq": "faq.md",
-        "pricing": "pricing.md",
-        "policies": "policies.md"
-    }
-    
-    for key, filename in files.items():
+    for key, filename in KB_FILES.items():
         filepath = os.path.join(KB_DIR, filename)
         
         if os.path.exists(filepath):
@@ -102,11 +161,18 @@ def get_public_faq_summary():
     Returns:
         str: Shortened FAQ content
     """
-    corpus = load_support_corpus()
-    faq_full = corpus.get("faq", "")
+    _refresh_if_stale()
+    summary = _kb_state["public_summary"]
+    if summary is not None:
+        return summary
+    
+    faq_full = _kb_state["corpus"].get("faq", "")
     
     # Extract first 1000 chars as summary
     if len(faq_full) > 1000:
-        return faq_full[:1000] + "\n\n[For more details, visit www.levqor.ai or contact support@levqor.ai]"
+        summary = faq_full[:1000] + "\n\n[For more details, visit www.levqor.ai or contact support@levqor.ai]"
+    else:
+        summary = faq_full
     
-    return faq_full
+    _kb_state["public_summary"] = summary
+    return summary
@@ -0,0 +1,179 @@
+"""
+Support Knowledge Base Retrieval
+Chunks the knowledge-base markdown and ranks passages with BM25 (NumPy, in-process)
+
+The index is built from the in-memory corpus held by support_faq_loader and
+rebuilt whenever the loader reports a new KB version, so edits to the
+markdown files are picked up without a restart.
+"""
+
+import os
+import re
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_TOP_K = int(os.environ.get("SUPPORT_RETRIEVAL_TOP_K", 4))
+MAX_CHUNK_CHARS = 800
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9£$%]+")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+
+_STOPWORDS = frozenset("""
+    a an the is are was were be been am do does did can could would will should
+    i me my we our you your it its this that these those there here what which
+    who how when where why please hi hello hey thanks to of for on in at by with
+    and or if as from about into any all
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords removed"""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def chunk_markdown(source, text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Split a markdown document into heading-scoped passages
+
+    Each passage carries its heading trail (e.g. "Pricing > DFY Starter") so a
+    sub-section keeps the context of its parent. Sections longer than
+    max_chars are split on paragraph boundaries.
+
+    Returns:
+        list: [{"source", "heading", "text"}, ...]
+    """
+    chunks = []
+    trail = []
+    body = []
+
+    def flush():
+        content = "\n".join(body).strip()
+        body.clear()
+        if not content:
+            return
+        heading = " > ".join(title for _, title in trail)
+        part = ""
+        for paragraph in re.split(r"\n\s*\n", content):
+            if part and len(part) + len(paragraph) > max_chars:
+                chunks.append({"source": source, "heading": heading, "text": part.strip()})
+                part = ""
+            part += paragraph + "\n\n"
+        if part.strip():
+            chunks.append({"source": source, "heading": heading, "text": part.strip()})
+
+    for line in text.splitlines():
+        match = _HEADING.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            while trail and trail[-1][0] >= level:
+                trail.pop()
+            trail.append((level, match.group(2).strip()))
+        elif line.strip() != "---":
+            body.append(line)
+    flush()
+
+    return chunks
+
+
+class SupportIndex:
+    """BM25 index over knowledge base passages"""
+
+    def __init__(self, corpus):
+        """
+        Args:
+            corpus: Dict of source name -> markdown text (as from load_support_corpus)
+        """
+        self.passages = []
+        for source, text in corpus.items():
+            self.passages.extend(chunk_markdown(source, text or ""))
+
+        docs = [tokenize(f"{p['heading']} {p['text']}") for p in self.passages]
+        self.vocab = {}
+        for tokens in docs:
+            for token in tokens:
+                self.vocab.setdefault(token, len(self.vocab))
+
+        tf = np.zeros((len(docs), len(self.vocab)), dtype=np.float32)
+        for row, tokens in enumerate(docs):
+            for token in tokens:
+                tf[row, self.vocab[token]] += 1
+
+        # Precompute per-(passage, term) BM25 weights so a query is a column gather + sum
+        n_docs = max(len(docs), 1)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        lengths = tf.sum(axis=1, keepdims=True)
+        avg_length = max(float(lengths.mean()), 1.0) if len(docs) else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+        self.weights = idf * (tf * (BM25_K1 + 1)) / (tf + norm)
+        self._sources = np.array([p["source"] for p in self.passages])
+
+    def search(self, question, k=RETRIEVAL_TOP_K, sources=None):
+        """
+        Top-k passages for a question
+
+        Args:
+            question: Free-text question
+            k: Maximum passages to return
+            sources: Optional iterable restricting results to these corpus keys
+
+        Returns:
+            list: Passage dicts with an added "score", best first (zero-score passages omitted)
+        """
+        term_ids = [self.vocab[t] for t in tokenize(question) if t in self.vocab]
+        if not term_ids or not self.passages:
+            return []
+
+        scores = self.weights[:, term_ids].sum(axis=1)
+        if sources is not None:
+            scores = np.where(np.isin(self._sources, list(sources)), scores, 0.0)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            dict(self.passages[i], score=round(float(scores[i]), 4))
+            for i in top if scores[i] > 0
+        ]
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_support_index():
+    """Index for the current KB version (rebuilt when the markdown changes)"""
+    global _index, _index_version
+    from backend.services.support_faq_loader import load_support_corpus, get_kb_version
+
+    version = get_kb_version()
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = SupportIndex(load_support_corpus())
+                _index_version = version
+                logger.info(f"support_retrieval.index_built version={version} passages={len(_index.passages)} terms={len(_index.vocab)}")
+    return _index
+
+
+def retrieve_passages(question, k=RETRIEVAL_TOP_K, sources=None):
+    """Top-k knowledge base passages for a question"""
+    return get_support_index().search(question, k=k, sources=sources)
+
+
+def format_passages(passages):
+    """Render passages as prompt context, labelled by source and heading"""
+    return "\n\n".join(
+        f"[{p['source']}: {p['heading']}]\n{p['text']}" if p["heading"] else f"[{p['source']}]\n{p['text']}"
+        for p in passages
+    )
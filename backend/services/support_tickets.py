@@ -1,50 +1,145 @@
 """
 Support Ticket Management
-Creates and manages support tickets (JSON-based storage)
+Creates and manages support tickets (SQLite storage, indexed by email/status/created_at)
 """
 
 import os
 import json
+import sqlite3
 import logging
+import threading
 from datetime import datetime
 from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
+DB_PATH = os.environ.get("SQLITE_PATH", os.path.join(os.getcwd(), "levqor.db"))
+
+# Legacy JSON store, imported once into the support_tickets table
 TICKETS_FILE = "data/support_tickets.json"
 
+_COLUMNS = "id, email, message, context, status, created_at, updated_at, assigned_to, resolution, notes"
+
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
 
-def _ensure_data_dir():
-    """Ensure data directory exists"""
-    os.makedirs("data", exist_ok=True)
+def init_support_ticket_tables(db_connection):
+    """Initialize the support tickets table"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS support_tickets(
+            id TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            message TEXT NOT NULL,
+            context TEXT,
+            status TEXT NOT NULL DEFAULT 'open',
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            assigned_to TEXT,
+            resolution TEXT,
+            notes TEXT
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_support_tickets_email ON support_tickets(email, created_at)")
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_support_tickets_status ON support_tickets(status, created_at)")
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_support_tickets_created ON support_tickets(created_at)")
 
 
-def _load_tickets():
-    """Load all tickets from JSON file"""
-    _ensure_data_dir()
+def _get_db():
+    """
+    Open a connection to the ticket store
     
-    if not os.path.exists(TICKETS_FILE):
-        return []
+    WAL mode plus a busy timeout lets several Gunicorn workers write
+    concurrently; the first connection per process also runs the one-shot
+    JSON migration.
+    """
+    db = sqlite3.connect(DB_PATH, timeout=10)
+    db.row_factory = sqlite3.Row
+    if DB_PATH not in _initialized_paths:
+        with _init_lock:
+            if DB_PATH not in _initialized_paths:
+                db.execute("PRAGMA journal_mode=WAL")
+                init_support_ticket_tables(db)
+                db.commit()
+                migrate_json_tickets(db)
+                _initialized_paths.add(DB_PATH)
+    return db
+
+
+def migrate_json_tickets(db_connection, path=TICKETS_FILE):
+    """
+    Import tickets from the legacy JSON file
+    
+    Safe to run repeatedly: existing ids are skipped, and the file is
+    renamed to <name>.migrated afterwards so later starts don't re-read it.
+    
+    Returns:
+        int: Number of tickets imported
+    """
+    if not os.path.exists(path):
+        return 0
     
     try:
-        with open(TICKETS_FILE, 'r') as f:
-            return json.load(f)
+        with open(path, 'r') as f:
+            tickets = json.load(f)
     except Exception as e:
-        logger.error(f"support_tickets.load_error error={str(e)}")
-        return []
-
-
-def _save_tickets(tickets):
-    """Save tickets to JSON file"""
-    _ensure_data_dir()
+        logger.error(f"support_tickets.migrate_load_error error={str(e)}")
+        return 0
+    
+    rows = [
+        (
+            t.get("id") or str(uuid4())[:8],
+            t.get("email", ""),
+            t.get("message", ""),
+            json.dumps(t.get("context") or {}),
+            t.get("status", "open"),
+            t.get("created_at") or datetime.utcnow().isoformat(),
+            t.get("updated_at") or t.get("created_at") or datetime.utcnow().isoformat(),
+            t.get("assigned_to"),
+            t.get("resolution"),
+            json.dumps(t.get("notes") or [])
+        )
+        for t in tickets
+    ]
     
     try:
-        with open(TICKETS_FILE, 'w') as f:
-            json.dump(tickets, f, indent=2)
-        return True
+        before = db_connection.total_changes
+        db_connection.executemany(f"""
+            INSERT OR IGNORE INTO support_tickets ({_COLUMNS})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        db_connection.commit()
+        imported = db_connection.total_changes - before
+        os.replace(path, f"{path}.migrated")
+        logger.info(f"support_tickets.migrated count={imported} source={path}")
+        return imported
     except Exception as e:
-        logger.error(f"support_tickets.save_error error={str(e)}")
-        return False
+        db_connection.rollback()
+        logger.error(f"support_tickets.migrate_error error={str(e)}")
+        return 0
+
+
+def _invalidate_context(email):
+    """Drop the cached private-chat context for this customer"""
+    from backend.utils.support_context import invalidate_user_context
+    invalidate_user_context(email)
+
+
+def _row_to_ticket(row):
+    ticket = {
+        "id": row["id"],
+        "email": row["email"],
+        "message": row["message"],
+        "context": json.loads(row["context"]) if row["context"] else {},
+        "status": row["status"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "assigned_to": row["assigned_to"],
+        "notes": json.loads(row["notes"]) if row["notes"] else []
+    }
+    if row["resolution"] is not None:
+        ticket["resolution"] = row["resolution"]
+    return ticket
 
 
 def create_ticket(email, message, context=None):
@@ -59,28 +154,39 @@ def create_ticket(email, message, context=None):
     Returns:
         dict: Created ticket object with id
     """
-    tickets = _load_tickets()
-    
+    now = datetime.utcnow().isoformat()
     ticket = {
         "id": str(uuid4())[:8],  # Short ID like "a1b2c3d4"
         "email": email,
         "message": message,
         "context": context or {},
         "status": "open",
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat(),
+        "created_at": now,
+        "updated_at": now,
         "assigned_to": None,
         "notes": []
     }
     
-    tickets.append(ticket)
-    
-    if _save_tickets(tickets):
-        logger.info(f"support_tickets.created id={ticket['id']} email={email}")
-        return ticket
-    else:
-        logger.error(f"support_tickets.create_failed email={email}")
+    try:
+        db = _get_db()
+        try:
+            db.execute(f"""
+                INSERT INTO support_tickets ({_COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+            """, (
+                ticket["id"], email, message, json.dumps(ticket["context"]),
+                "open", now, now, None, "[]"
+            ))
+            db.commit()
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"support_tickets.create_failed email={email} error={str(e)}")
         return None
+    
+    _invalidate_context(email)
+    logger.info(f"support_tickets.created id={ticket['id']} email={email}")
+    return ticket
 
 
 def list_tickets(limit=50, status=None):
@@ -92,19 +198,54 @@ def list_tickets(limit=50, status=None):
         status: Filter by status ('open', 'closed', None for all)
     
     Returns:
-        list: List of ticket dicts
+        list: List of ticket dicts, newest first
     """
-    tickets = _load_tickets()
-    
-    # Filter by status if specified
+    query = f"SELECT {_COLUMNS} FROM support_tickets"
+    params = []
     if status:
-        tickets = [t for t in tickets if t.get("status") == status]
+        query += " WHERE status = ?"
+        params.append(status)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+    
+    try:
+        db = _get_db()
+        try:
+            return [_row_to_ticket(row) for row in db.execute(query, params).fetchall()]
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"support_tickets.list_error error={str(e)}")
+        return []
+
+
+def get_tickets_for_email(email, limit=5):
+    """
+    Most recent tickets for a customer email (index lookup)
     
-    # Sort by created_at descending (newest first)
-    tickets.sort(key=lambda t: t.get("created_at", ""), reverse=True)
+    Args:
+        email: Customer email
+        limit: Maximum number of tickets to return
     
-    # Limit results
-    return tickets[:limit]
+    Returns:
+        list: Ticket dicts, oldest first (matching the order they were filed)
+    """
+    try:
+        db = _get_db()
+        try:
+            rows = db.execute(f"""
+                SELECT {_COLUMNS} FROM support_tickets
+                WHERE email = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (email, limit)).fetchall()
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"support_tickets.email_lookup_error error={str(e)}")
+        return []
+    
+    return [_row_to_ticket(row) for row in reversed(rows)]
 
 
 def get_ticket(ticket_id):
@@ -117,13 +258,28 @@ def get_ticket(ticket_id):
     Returns:
         dict: Ticket object or None
     """
-    tickets = _load_tickets()
-    
-    for ticket in tickets:
-        if ticket.get("id") == ticket_id:
-            return ticket
+    try:
+        db = _get_db()
+        try:
+            row = db.execute(f"SELECT {_COLUMNS} FROM support_tickets WHERE id = ?", (ticket_id,)).fetchone()
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"support_tickets.get_error id={ticket_id} error={str(e)}")
+        return None
     
-    return None
+    return _row_to_ticket(row) if row else None
+
+
+_UPDATABLE = {
+    "email": lambda v: v,
+    "message": lambda v: v,
+    "status": lambda v: v,
+    "assigned_to": lambda v: v,
+    "resolution": lambda v: v,
+    "context": lambda v: json.dumps(v or {}),
+    "notes": lambda v: json.dumps(v or []),
+}
 
 
 def update_ticket(ticket_id, updates):
@@ -137,20 +293,36 @@ def update_ticket(ticket_id, updates):
     Returns:
         dict: Updated ticket or None
     """
-    tickets = _load_tickets()
+    fields = {k: _UPDATABLE[k](v) for k, v in updates.items() if k in _UPDATABLE}
+    fields["updated_at"] = datetime.utcnow().isoformat()
+    assignments = ", ".join(f"{k} = ?" for k in fields)
     
-    for i, ticket in enumerate(tickets):
-        if ticket.get("id") == ticket_id:
-            ticket.update(updates)
-            ticket["updated_at"] = datetime.utcnow().isoformat()
-            tickets[i] = ticket
+    # Moving a ticket to another email also changes the old address's context
+    previous = get_ticket(ticket_id) if "email" in fields else None
             
-            if _save_tickets(tickets):
-                logger.info(f"support_tickets.updated id={ticket_id}")
-                return ticket
-            break
+    try:
+        db = _get_db()
+        try:
+            cursor = db.execute(
+                f"UPDATE support_tickets SET {assignments} WHERE id = ?",
+                list(fields.values()) + [ticket_id]
+            )
+            db.commit()
+            if cursor.rowcount == 0:
+                return None
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"support_tickets.update_error id={ticket_id} error={str(e)}")
+        return None
     
-    return None
+    logger.info(f"support_tickets.updated id={ticket_id}")
+    ticket = get_ticket(ticket_id)
+    if ticket:
+        _invalidate_context(ticket["email"])
+    if previous and (not ticket or previous["email"] != ticket["email"]):
+        _invalidate_context(previous["email"])
+    return ticket
 
 
 def close_ticket(ticket_id, resolution=None):
@@ -176,6 +348,9 @@ def add_ticket_note(ticket_id, note, author="system"):
     """
     Add a note to a ticket
     
+    The read-modify-write runs inside one IMMEDIATE transaction so notes
+    added concurrently from different workers are not lost.
+    
     Args:
         ticket_id: Ticket ID
         note: Note text
@@ -184,24 +359,34 @@ def add_ticket_note(ticket_id, note, author="system"):
     Returns:
         bool: Success status
     """
-    ticket = get_ticket(ticket_id)
-    
-    if not ticket:
-        return False
-    
     note_entry = {
         "author": author,
         "note": note,
         "created_at": datetime.utcnow().isoformat()
     }
     
-    if "notes" not in ticket:
-        ticket["notes"] = []
-    
-    ticket["notes"].append(note_entry)
+    try:
+        db = _get_db()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT notes FROM support_tickets WHERE id = ?", (ticket_id,)).fetchone()
+            if not row:
+                db.rollback()
+                return False
+            notes = json.loads(row["notes"]) if row["notes"] else []
+            notes.append(note_entry)
+            db.execute(
+                "UPDATE support_tickets SET notes = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(notes), datetime.utcnow().isoformat(), ticket_id)
+            )
+            db.commit()
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"support_tickets.note_error id={ticket_id} error={str(e)}")
+        return False
     
-    updated = update_ticket(ticket_id, {"notes": ticket["notes"]})
-    return updated is not None
+    return True
 
 
 def get_ticket_stats():
@@ -211,12 +396,20 @@ def get_ticket_stats():
     Returns:
         dict: Stats including total, open, closed counts
     """
-    tickets = _load_tickets()
+    counts = {}
+    try:
+        db = _get_db()
+        try:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM support_tickets GROUP BY status").fetchall())
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"support_tickets.stats_error error={str(e)}")
     
     stats = {
-        "total": len(tickets),
-        "open": len([t for t in tickets if t.get("status") == "open"]),
-        "closed": len([t for t in tickets if t.get("status") == "closed"]),
+        "total": sum(counts.values()),
+        "open": counts.get("open", 0),
+        "closed": counts.get("closed", 0),
         "avg_response_time_hours": 0  # TODO: Calculate if we track response times
     }
     
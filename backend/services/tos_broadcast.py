@@ -0,0 +1,405 @@
+"""
+TOS Update Broadcasts
+Background, resumable TOS-update email fan-out
+
+start_broadcast() snapshots the recipients (users whose terms_version
+differs) into tos_broadcast_recipients and returns straight away; a
+background thread then works through the snapshot in chunks of
+TOS_BROADCAST_CHUNK. Each chunk is sent concurrently on a small pool
+sharing one keep-alive session, paced by a process-wide rate limiter
+(TOS_BROADCAST_RATE_PER_SEC, Resend's default account limit is 2/s).
+After every chunk the per-recipient outcomes, counters and the cursor
+(last processed recipient seq) are committed, so a restarted or crashed
+worker resumes where it stopped instead of re-sending. A broadcast is
+leased to one process at a time and the lease is renewed while a chunk
+is still sending; resume_broadcasts() (scheduler) picks up broadcasts
+whose lease has lapsed. A broadcast interrupted TOS_BROADCAST_MAX_ATTEMPTS
+times in a row is marked failed instead of being retried forever.
+
+A send the provider refuses with 429 or a 5xx is not a final failure: the
+recipient stays pending with a retry_at (Retry-After, or exponential
+backoff from TOS_BROADCAST_RETRY_SECONDS), a 429 also pauses the shared
+rate limiter, and the broadcast retries it after the first pass. Only
+after TOS_BROADCAST_MAX_ATTEMPTS refusals is the recipient marked failed.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from time import time, sleep
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger("levqor.legal")
+
+TOS_BROADCAST_CHUNK = int(os.environ.get("TOS_BROADCAST_CHUNK", 200))
+TOS_BROADCAST_WORKERS = int(os.environ.get("TOS_BROADCAST_WORKERS", 4))
+TOS_BROADCAST_RATE_PER_SEC = float(os.environ.get("TOS_BROADCAST_RATE_PER_SEC", 2))
+TOS_BROADCAST_LEASE_SECONDS = float(os.environ.get("TOS_BROADCAST_LEASE_SECONDS", 300))
+TOS_BROADCAST_MAX_ATTEMPTS = int(os.environ.get("TOS_BROADCAST_MAX_ATTEMPTS", 5))
+TOS_BROADCAST_RETRY_SECONDS = float(os.environ.get("TOS_BROADCAST_RETRY_SECONDS", 30))
+
+
+def init_tos_broadcast_tables(db_connection):
+    """Initialize broadcast job and recipient snapshot tables"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS tos_broadcasts(
+            id TEXT PRIMARY KEY,
+            tos_version TEXT NOT NULL,
+            requires_reaccept INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            cursor INTEGER NOT NULL DEFAULT 0,
+            lease_until REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            updated_at REAL,
+            finished_at REAL
+        )
+    """)
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS tos_broadcast_recipients(
+            broadcast_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            email TEXT NOT NULL,
+            name TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            error TEXT,
+            sent_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            retry_at REAL,
+            PRIMARY KEY (broadcast_id, seq),
+            FOREIGN KEY (broadcast_id) REFERENCES tos_broadcasts(id)
+        )
+    """)
+    # Migration: consecutive interrupted runs, for giving up on broken broadcasts
+    columns = [col[1] for col in db_connection.execute("PRAGMA table_info(tos_broadcasts)").fetchall()]
+    if 'attempts' not in columns:
+        db_connection.execute("ALTER TABLE tos_broadcasts ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    # Migration: per-recipient retries after provider rate limits / 5xx
+    columns = [col[1] for col in db_connection.execute("PRAGMA table_info(tos_broadcast_recipients)").fetchall()]
+    if 'attempts' not in columns:
+        db_connection.execute("ALTER TABLE tos_broadcast_recipients ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    if 'retry_at' not in columns:
+        db_connection.execute("ALTER TABLE tos_broadcast_recipients ADD COLUMN retry_at REAL")
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_tos_broadcasts_status ON tos_broadcasts(status)")
+
+
+def _connect(db_path=None):
+    db = sqlite3.connect(db_path or os.environ.get("SQLITE_PATH", "levqor.db"), check_same_thread=False, timeout=30)
+    init_tos_broadcast_tables(db)
+    return db
+
+
+class RateLimiter:
+    """Blocking limiter: spaces acquire() calls at least 1/rate seconds apart across threads"""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            sleep(slot - now)
+
+    def pause(self, seconds):
+        """Hold every caller back for `seconds` (provider asked us to slow down)"""
+        with self._lock:
+            self._next = max(self._next, time() + seconds)
+
+
+_rate_limiter = RateLimiter(TOS_BROADCAST_RATE_PER_SEC)
+
+# Status and Retry-After of the last provider response on this thread
+_last_response = threading.local()
+
+
+def _record_response(response, *args, **kwargs):
+    _last_response.status = response.status_code
+    _last_response.retry_after = response.headers.get("Retry-After")
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=TOS_BROADCAST_WORKERS)
+    session.mount("https://", adapter)
+    # send_billing_email only returns a bool; the hook tells 429/5xx apart
+    session.hooks["response"].append(_record_response)
+    return session
+
+
+def _retry_delay(attempts, retry_after):
+    """Seconds before the next try: the provider's Retry-After, else exponential backoff"""
+    backoff = TOS_BROADCAST_RETRY_SECONDS * 2 ** (attempts - 1)
+    try:
+        return max(float(retry_after), 0.0) if retry_after else backoff
+    except ValueError:
+        return backoff
+
+
+def start_broadcast(tos_version, requires_reaccept=False, db_path=None, run=True):
+    """
+    Snapshot recipients and start sending in the background
+
+    Returns:
+        dict: Broadcast status (see get_broadcast)
+    """
+    broadcast_id = uuid4().hex
+    now = time()
+
+    db = _connect(db_path)
+    try:
+        db.execute("""
+            INSERT INTO tos_broadcasts (id, tos_version, requires_reaccept, status, created_at, updated_at)
+            VALUES (?, ?, ?, 'queued', ?, ?)
+        """, (broadcast_id, tos_version, 1 if requires_reaccept else 0, now, now))
+        # rowid gives a stable, unique processing order for the cursor
+        cursor = db.execute("""
+            INSERT INTO tos_broadcast_recipients (broadcast_id, seq, email, name)
+            SELECT ?, rowid, email, name
+            FROM users
+            WHERE terms_version != ? OR terms_version IS NULL
+        """, (broadcast_id, tos_version))
+        db.execute("UPDATE tos_broadcasts SET total = ? WHERE id = ?", (cursor.rowcount, broadcast_id))
+        db.commit()
+        status = get_broadcast(broadcast_id, db=db)
+    finally:
+        db.close()
+
+    log.info(f"TOS broadcast {broadcast_id} queued: version={tos_version}, recipients={status['total']}")
+    if run:
+        _spawn(broadcast_id, db_path)
+    return status
+
+
+def get_broadcast(broadcast_id, db=None, db_path=None):
+    """Progress of one broadcast, or None"""
+    own = db is None
+    db = db or _connect(db_path)
+    try:
+        row = db.execute("""
+            SELECT id, tos_version, requires_reaccept, status, total, sent, failed,
+                   cursor, attempts, error, created_at, started_at, updated_at, finished_at
+            FROM tos_broadcasts WHERE id = ?
+        """, (broadcast_id,)).fetchone()
+    finally:
+        if own:
+            db.close()
+    if not row:
+        return None
+    (bid, version, reaccept, status, total, sent, failed,
+     cursor, attempts, error, created_at, started_at, updated_at, finished_at) = row
+    processed = sent + failed
+    return {
+        "id": bid,
+        "tos_version": version,
+        "requires_reaccept": bool(reaccept),
+        "status": status,
+        "total": total,
+        "sent": sent,
+        "failed": failed,
+        "remaining": max(0, total - processed),
+        "progress": round(processed / total, 4) if total else 1.0,
+        "attempts": attempts,
+        "error": error,
+        "created_at": created_at,
+        "started_at": started_at,
+        "updated_at": updated_at,
+        "finished_at": finished_at
+    }
+
+
+def _spawn(broadcast_id, db_path=None):
+    thread = threading.Thread(
+        target=run_broadcast, args=(broadcast_id, db_path),
+        name=f"tos-broadcast-{broadcast_id[:8]}", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _claim(db, broadcast_id):
+    """Take (or renew) the lease; False if another process holds it"""
+    now = time()
+    cursor = db.execute("""
+        UPDATE tos_broadcasts
+        SET lease_until = ?, status = 'running', started_at = COALESCE(started_at, ?), updated_at = ?
+        WHERE id = ? AND status IN ('queued', 'running')
+          AND (lease_until IS NULL OR lease_until < ?)
+    """, (now + TOS_BROADCAST_LEASE_SECONDS, now, now, broadcast_id, now))
+    db.commit()
+    return cursor.rowcount == 1
+
+
+def _renew(db, broadcast_id):
+    """Push the lease out again; sending a chunk can take longer than one lease"""
+    now = time()
+    db.execute("UPDATE tos_broadcasts SET lease_until = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+               (now + TOS_BROADCAST_LEASE_SECONDS, now, broadcast_id))
+    db.commit()
+    return now
+
+
+def run_broadcast(broadcast_id, db_path=None):
+    """
+    Send a broadcast to completion, chunk by chunk (resumes from its cursor)
+
+    Returns:
+        dict: Final status, or None if another process holds the lease
+    """
+    from backend.routes.legal_enhanced import TOS_VERSIONS, send_tos_update_email
+
+    db = _connect(db_path)
+    if not _claim(db, broadcast_id):
+        db.close()
+        return None
+
+    version, reaccept, cursor = db.execute(
+        "SELECT tos_version, requires_reaccept, cursor FROM tos_broadcasts WHERE id = ?", (broadcast_id,)
+    ).fetchone()
+    changelog = TOS_VERSIONS.get(version, {}).get("changes", [])
+    session = _build_session()
+
+    def send_one(recipient):
+        """-> (seq, outcome, error, retry delay); outcome is sent, failed or retry"""
+        seq, email, name, attempts = recipient
+        _rate_limiter.acquire()
+        _last_response.status = _last_response.retry_after = None
+        try:
+            ok = send_tos_update_email(
+                email=email,
+                name=name or "User",
+                new_version=version,
+                requires_reaccept=bool(reaccept),
+                changelog=changelog,
+                session=session
+            )
+        except Exception as e:
+            return seq, "failed", str(e)[:500], None
+        if ok is not False:
+            return seq, "sent", None, None
+
+        status = _last_response.status
+        if status == 429 or (status or 0) >= 500:
+            if attempts + 1 < TOS_BROADCAST_MAX_ATTEMPTS:
+                delay = _retry_delay(attempts + 1, _last_response.retry_after)
+                if status == 429:
+                    _rate_limiter.pause(delay)
+                return seq, "retry", f"HTTP {status}", delay
+            return seq, "failed", f"HTTP {status} after {attempts + 1} attempts", None
+        return seq, "failed", f"HTTP {status}" if status else None, None
+
+    try:
+        with ThreadPoolExecutor(max_workers=TOS_BROADCAST_WORKERS, thread_name_prefix="tos-email") as pool:
+            while True:
+                # New recipients past the cursor, plus refused ones whose retry is due
+                chunk = db.execute("""
+                    SELECT seq, email, name, attempts FROM tos_broadcast_recipients
+                    WHERE broadcast_id = ? AND status = 'pending'
+                      AND ((retry_at IS NULL AND seq > ?) OR retry_at <= ?)
+                    ORDER BY seq LIMIT ?
+                """, (broadcast_id, cursor, time(), TOS_BROADCAST_CHUNK)).fetchall()
+                if not chunk:
+                    next_retry = db.execute("""
+                        SELECT MIN(retry_at) FROM tos_broadcast_recipients
+                        WHERE broadcast_id = ? AND status = 'pending' AND retry_at IS NOT NULL
+                    """, (broadcast_id,)).fetchone()[0]
+                    if next_retry is None:
+                        break
+                    # Only backed-off recipients left: wait, keeping the lease
+                    sleep(max(0.0, min(next_retry - time(), TOS_BROADCAST_LEASE_SECONDS / 2)))
+                    _renew(db, broadcast_id)
+                    continue
+
+                # Collect results as they finish, renewing the lease halfway through it
+                results = []
+                renewed = time()
+                for result in pool.map(send_one, chunk):
+                    results.append(result)
+                    if time() - renewed >= TOS_BROADCAST_LEASE_SECONDS / 2:
+                        renewed = _renew(db, broadcast_id)
+                now = time()
+                db.executemany("""
+                    UPDATE tos_broadcast_recipients
+                    SET status = ?, error = ?, sent_at = ?, attempts = attempts + 1, retry_at = ?
+                    WHERE broadcast_id = ? AND seq = ?
+                """, [
+                    ("pending" if outcome == "retry" else outcome, error, now if outcome == "sent" else None,
+                     now + delay if outcome == "retry" else None, broadcast_id, seq)
+                    for seq, outcome, error, delay in results
+                ])
+                sent = sum(1 for _, outcome, _, _ in results if outcome == "sent")
+                failed = sum(1 for _, outcome, _, _ in results if outcome == "failed")
+                cursor = max(cursor, chunk[-1][0])
+                db.execute("""
+                    UPDATE tos_broadcasts
+                    SET sent = sent + ?, failed = failed + ?, cursor = ?, updated_at = ?, lease_until = ?,
+                        attempts = 0
+                    WHERE id = ?
+                """, (sent, failed, cursor, now, now + TOS_BROADCAST_LEASE_SECONDS, broadcast_id))
+                db.commit()
+
+        now = time()
+        db.execute("""
+            UPDATE tos_broadcasts SET status = 'completed', finished_at = ?, updated_at = ?, lease_until = NULL
+            WHERE id = ?
+        """, (now, now, broadcast_id))
+        db.commit()
+        status = get_broadcast(broadcast_id, db=db)
+        log.info(f"TOS broadcast {broadcast_id} completed: sent={status['sent']}, failed={status['failed']}")
+        return status
+
+    except Exception as e:
+        log.error(f"TOS broadcast {broadcast_id} interrupted: {e}", exc_info=True)
+        # Drop the lease so resume_broadcasts() picks it up, unless it keeps failing
+        db.rollback()
+        now = time()
+        db.execute("""
+            UPDATE tos_broadcasts
+            SET error = ?, lease_until = NULL, updated_at = ?, attempts = attempts + 1,
+                status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END,
+                finished_at = CASE WHEN attempts + 1 >= ? THEN ? ELSE finished_at END
+            WHERE id = ?
+        """, (str(e)[:500], now, TOS_BROADCAST_MAX_ATTEMPTS, TOS_BROADCAST_MAX_ATTEMPTS, now, broadcast_id))
+        db.commit()
+        status = get_broadcast(broadcast_id, db=db)
+        if status["status"] == "failed":
+            log.error(f"TOS broadcast {broadcast_id} gave up after {TOS_BROADCAST_MAX_ATTEMPTS} interrupted runs")
+        return status
+    finally:
+        session.close()
+        db.close()
+
+
+def resume_broadcasts(db_path=None):
+    """
+    Restart queued/running broadcasts whose lease has lapsed (scheduler entry point)
+
+    Returns:
+        int: Broadcasts resumed
+    """
+    db = _connect(db_path)
+    try:
+        rows = db.execute("""
+            SELECT id FROM tos_broadcasts
+            WHERE status IN ('queued', 'running') AND (lease_until IS NULL OR lease_until < ?)
+        """, (time(),)).fetchall()
+    finally:
+        db.close()
+    for (broadcast_id,) in rows:
+        log.info(f"Resuming TOS broadcast {broadcast_id}")
+        _spawn(broadcast_id, db_path)
+    return len(rows)
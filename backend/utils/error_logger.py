@@ -3,8 +3,11 @@ Error Logging Utility
 Helper function to log errors to the database
 """
 
+from flask import current_app, has_app_context
 from app import db
 from backend.models.error_event import ErrorEvent
+from backend.services.error_analytics import rollup_event
+from backend.services.error_ingest import ERROR_BUFFER_ENABLED, get_error_buffer, ingest_fingerprint
 from datetime import datetime
 import logging
 import traceback
@@ -24,6 +27,11 @@ def log_error_event(
     """
     Log an error event to the database
     
+    Events go through the ingestion buffer (backend.services.error_ingest):
+    repeats are collapsed and written off-thread in batches. With
+    ERROR_BUFFER_ENABLED=false, or outside an app context, the row is
+    written immediately.
+    
     Args:
         source: "backend" or "frontend"
         service: Service name (e.g. "support_ai", "webhook_checkout")
@@ -34,13 +42,25 @@ def log_error_event(
         stack: Stack trace (optional)
     
     Returns:
-        bool: True if logged successfully, False otherwise
+        bool: True if logged (or buffered), False otherwise
     """
     try:
         # Truncate stack trace if very long
         if stack and len(stack) > 5000:
             stack = '...(truncated)\n' + stack[-5000:]
         
+        if ERROR_BUFFER_ENABLED and has_app_context():
+            return get_error_buffer().submit(
+                current_app._get_current_object(),
+                source=source,
+                service=service,
+                message=message[:2000],
+                severity=severity,
+                path_or_screen=path_or_screen,
+                user_email=user_email,
+                stack=stack
+            )
+        
         # Create error event
         error_event = ErrorEvent(
             created_at=datetime.utcnow(),
@@ -50,10 +70,12 @@ def log_error_event(
             user_email=user_email,
             severity=severity,
             message=message[:2000],  # Truncate to 2000 chars
-            stack=stack
+            stack=stack,
+            fingerprint=ingest_fingerprint(source, service, severity, message, stack)
         )
         
         db.session.add(error_event)
+        rollup_event(error_event)
         db.session.commit()
         
         log.debug(f"Error logged: {severity} from {source}/{service}")
@@ -1,13 +1,35 @@
 """
 Support Context Builder
 Gathers user context for private support conversations
+
+Contexts are cached per email, so follow-up chat turns don't touch the
+database. Entries are dropped when that customer's DFY orders are
+committed (SQLAlchemy session events) or their tickets change
+(support_tickets calls invalidate_user_context). SUPPORT_CONTEXT_TTL
+bounds staleness for writes made by other worker processes.
 """
 
+import os
+import copy
+import time
 import logging
+import threading
 from datetime import datetime
 
+from backend.services.support_cache import ResponseCache
+
 logger = logging.getLogger(__name__)
 
+SUPPORT_CONTEXT_TTL = float(os.environ.get("SUPPORT_CONTEXT_TTL", 300))
+
+_context_cache = ResponseCache(
+    max_entries=int(os.environ.get("SUPPORT_CONTEXT_MAX_ENTRIES", 2000)),
+    ttl_seconds=SUPPORT_CONTEXT_TTL
+)
+
+_listeners_registered = False
+_listeners_lock = threading.Lock()
+
 
 def get_user_context(email):
     """
@@ -17,41 +39,36 @@ def get_user_context(email):
         email: User email address
     
     Returns:
-        dict: User context with orders, tickets, account info
+        dict: User context with orders, tickets, account info (a copy,
+        so callers may modify it without touching the cached entry)
     """
+    started = time.perf_counter()
+    
+    cached = _context_cache.get(email)
+    if cached is not None:
+        _context_cache.record(True, (time.perf_counter() - started) * 1000)
+        return copy.deepcopy(cached)
+    
     try:
-        from app import db
-        from backend.models.sales_models import DFYOrder
+        _register_order_listeners()
         
         context = {
             "email": email,
-            "orders": [],
+            "orders": _get_orders_for_email(email),
             "tickets": [],
             "account_age_days": 0,
             "last_activity": None
         }
         
-        # Get DFY orders
-        orders = DFYOrder.query.filter_by(customer_email=email).all()
-        
-        for order in orders:
-            context["orders"].append({
-                "id": order.id,
-                "tier": order.tier,
-                "status": order.status,
-                "created_at": order.created_at.isoformat() if order.created_at else None,
-                "updated_at": order.updated_at.isoformat() if order.updated_at else None,
-                "deadline": order.deadline.isoformat() if order.deadline else None,
-                "revisions_left": order.revisions_left,
-                "files_url": order.files_url
-            })
-        
         # Calculate account age
-        if orders:
-            oldest_order = min(orders, key=lambda o: o.created_at)
-            account_age = datetime.utcnow() - oldest_order.created_at
-            context["account_age_days"] = account_age.days
-            context["last_activity"] = orders[-1].updated_at.isoformat()
+        created = [o["_created_at"] for o in context["orders"] if o["_created_at"]]
+        updated = [o["_updated_at"] for o in context["orders"] if o["_updated_at"]]
+        if created:
+            context["account_age_days"] = (datetime.utcnow() - min(created)).days
+        if updated:
+            context["last_activity"] = max(updated).isoformat()
+        for order in context["orders"]:
+            del order["_created_at"], order["_updated_at"]
         
         # Get support tickets (if ticket model exists)
         try:
@@ -61,8 +78,11 @@ def get_user_context(email):
             # Tickets table might not exist yet
             pass
         
+        _context_cache.put(email, context)
+        _context_cache.record(False, (time.perf_counter() - started) * 1000)
+        
         logger.info(f"support_context.built email={email} orders={len(context['orders'])}")
-        return context
+        return copy.deepcopy(context)
         
     except Exception as e:
         logger.error(f"support_context.error email={email} error={str(e)}", exc_info=True)
@@ -74,25 +94,103 @@ def get_user_context(email):
         }
 
 
-def _get_tickets_for_email(email):
-    """Load support tickets for email (helper function)"""
-    import json
-    import os
+def invalidate_user_context(email):
+    """Drop the cached context for a customer after their orders/tickets change"""
+    if email:
+        _context_cache.invalidate(email)
+
+
+def get_context_cache_stats():
+    """Hit/miss counters for the user-context cache"""
+    return _context_cache.stats()
+
+
+def _get_orders_for_email(email):
+    """
+    Load a customer's DFY orders as plain dicts
     
-    tickets_file = 'data/support_tickets.json'
+    One query projecting only the columns the context needs, so no ORM
+    objects are hydrated.
+    """
+    from app import db
+    from backend.models.sales_models import DFYOrder
     
-    if not os.path.exists(tickets_file):
-        return []
+    rows = db.session.query(
+        DFYOrder.id,
+        DFYOrder.tier,
+        DFYOrder.status,
+        DFYOrder.created_at,
+        DFYOrder.updated_at,
+        DFYOrder.deadline,
+        DFYOrder.revisions_left,
+        DFYOrder.files_url
+    ).filter(DFYOrder.customer_email == email).order_by(DFYOrder.id).all()
     
-    try:
-        with open(tickets_file, 'r') as f:
-            all_tickets = json.load(f)
+    return [
+        {
+            "id": row.id,
+            "tier": row.tier,
+            "status": row.status,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+            "deadline": row.deadline.isoformat() if row.deadline else None,
+            "revisions_left": row.revisions_left,
+            "files_url": row.files_url,
+            "_created_at": row.created_at,
+            "_updated_at": row.updated_at
+        }
+        for row in rows
+    ]
+
+
+def _register_order_listeners():
+    """
+    Invalidate cached contexts when DFY orders are committed
+    
+    Mapper events note the affected emails on the session; they are only
+    invalidated after the commit succeeds, so a concurrent read can't
+    re-cache uncommitted state.
+    """
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    
+    with _listeners_lock:
+        if _listeners_registered:
+            return
         
-        user_tickets = [
-            t for t in all_tickets 
-            if t.get('email') == email
-        ]
+        from sqlalchemy import event, inspect
+        from sqlalchemy.orm import Session
+        from backend.models.sales_models import DFYOrder
         
+        def _mark_dirty(mapper, connection, target):
+            state = inspect(target)
+            if state.session is None:
+                return
+            emails = state.session.info.setdefault("support_context_dirty", set())
+            emails.add(target.customer_email)
+            emails.update(state.attrs.customer_email.history.deleted or ())
+        
+        def _after_commit(session):
+            for email in session.info.pop("support_context_dirty", ()):
+                invalidate_user_context(email)
+        
+        def _after_rollback(session):
+            session.info.pop("support_context_dirty", None)
+        
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(DFYOrder, name, _mark_dirty)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+        
+        _listeners_registered = True
+
+
+def _get_tickets_for_email(email):
+    """Load support tickets for email (helper function)"""
+    from backend.services.support_tickets import get_tickets_for_email
+    
+    try:
         # Return last 5 tickets with basic info
         return [
             {
@@ -101,7 +199,7 @@ def _get_tickets_for_email(email):
                 "status": t.get("status", "unknown"),
                 "created_at": t.get("created_at")
             }
-            for t in user_tickets[-5:]
+            for t in get_tickets_for_email(email, limit=5)
         ]
         
     except Exception as e:
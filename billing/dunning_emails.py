@@ -15,7 +15,7 @@ def get_billing_url():
     return f"{base_url}/billing"
 
 
-def send_billing_email(to: str, subject: str, body: str, user_id=None, is_transactional=True):
+def send_billing_email(to: str, subject: str, body: str, user_id=None, is_transactional=True, session=None):
     """
     Send billing email via Resend (or log if not configured)
     
@@ -25,6 +25,10 @@ def send_billing_email(to: str, subject: str, body: str, user_id=None, is_transa
         body: Email body
         user_id: Optional user ID for GDPR enforcement
         is_transactional: If True, bypasses marketing opt-out (default True for billing)
+        session: Optional requests.Session to reuse connections (bulk senders)
+    
+    Returns:
+        bool: False if the send failed; True if sent, logged or skipped
     
     TODO: Wire up to actual Resend API when RESEND_API_KEY is configured
     """
@@ -33,7 +37,7 @@ def send_billing_email(to: str, subject: str, body: str, user_id=None, is_transa
         from backend.services.gdpr_enforcement import should_send_marketing_email
         if not should_send_marketing_email(user_id):
             log.info(f"[GDPR] Skipping non-transactional email to {to} - user opted out of marketing")
-            return
+            return True
     
     resend_key = os.environ.get("RESEND_API_KEY")
     
@@ -41,12 +45,12 @@ def send_billing_email(to: str, subject: str, body: str, user_id=None, is_transa
         log.warning(f"[BILLING_EMAIL] No RESEND_API_KEY - would send to {to}")
         log.info(f"Subject: {subject}")
         log.info(f"Body:\n{body}")
-        return
+        return True
     
     try:
         import requests
         
-        response = requests.post(
+        response = (session or requests).post(
             "https://api.resend.com/emails",
             headers={
                 "Authorization": f"Bearer {resend_key}",
@@ -63,11 +67,13 @@ def send_billing_email(to: str, subject: str, body: str, user_id=None, is_transa
         
         if response.status_code == 200:
             log.info(f"[BILLING_EMAIL] Sent to {to}: {subject}")
-        else:
-            log.error(f"[BILLING_EMAIL] Failed to send to {to}: {response.text}")
+            return True
+        log.error(f"[BILLING_EMAIL] Failed to send to {to}: {response.text}")
+        return False
             
     except Exception as e:
         log.error(f"[BILLING_EMAIL] Error sending to {to}: {e}")
+        return False
 
 
 def send_day1_notice(email: str, customer_name: str = None):
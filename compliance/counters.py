@@ -0,0 +1,202 @@
+"""
+Compliance counters
+Incrementally maintained totals for the compliance dashboard
+
+SQLite triggers on users, dsar_requests and risk_blocks keep the rows of
+compliance_counters current in the same transaction as every write, so
+all write paths (TOS acceptance, marketing double opt-in, GDPR opt-out,
+DSAR requests, high-risk blocks, erasure and retention deletes) are
+covered without touching each call site. Risk blocks are counted per UTC
+day ("risk_blocks:YYYY-MM-DD") so the dashboard can sum a trailing window.
+
+reconcile_compliance_counters() recomputes everything from the source
+tables and corrects drift (e.g. rows written before the triggers existed
+or with triggers disabled); the scheduler runs it hourly.
+"""
+import logging
+from time import time, strftime, gmtime
+
+log = logging.getLogger("levqor.compliance")
+
+USER_COUNTERS = ("users_total", "tos_accepted", "marketing_consented", "gdpr_opted_out")
+COUNTERS = USER_COUNTERS + ("dsar_pending",)
+RISK_BLOCK_PREFIX = "risk_blocks:"
+RISK_BLOCK_DAYS_KEPT = 400
+
+# Epoch seconds inside SQL (unixepoch() needs SQLite 3.38+)
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def _user_delta(row, sign):
+    """CASE expression adding (sign) a users row's contribution to each counter"""
+    return f"""
+        CASE name
+            WHEN 'users_total' THEN {sign}1
+            WHEN 'tos_accepted' THEN {sign}({row}.terms_accepted_at IS NOT NULL)
+            WHEN 'marketing_consented' THEN {sign}(COALESCE({row}.marketing_double_opt_in, 0) = 1)
+            WHEN 'gdpr_opted_out' THEN {sign}(COALESCE({row}.gdpr_opt_out_all, 0) = 1)
+        END
+    """
+
+
+def init_compliance_counters(db_connection):
+    """Create the counters table and triggers (run after users/dsar/risk_blocks migrations)"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS compliance_counters(
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL
+        )
+    """)
+    seeded = db_connection.execute("SELECT COUNT(*) FROM compliance_counters").fetchone()[0]
+    db_connection.executemany(
+        "INSERT OR IGNORE INTO compliance_counters (name, value, updated_at) VALUES (?, 0, ?)",
+        [(name, time()) for name in COUNTERS]
+    )
+
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_users_ai AFTER INSERT ON users BEGIN
+            UPDATE compliance_counters SET value = value + {_user_delta('new', '+')}, updated_at = {_NOW}
+            WHERE name IN {USER_COUNTERS};
+        END
+    """)
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_users_ad AFTER DELETE ON users BEGIN
+            UPDATE compliance_counters SET value = value + {_user_delta('old', '-')}, updated_at = {_NOW}
+            WHERE name IN {USER_COUNTERS};
+        END
+    """)
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_users_au
+        AFTER UPDATE OF terms_accepted_at, marketing_double_opt_in, gdpr_opt_out_all ON users
+        WHEN (old.terms_accepted_at IS NULL) != (new.terms_accepted_at IS NULL)
+          OR COALESCE(old.marketing_double_opt_in, 0) != COALESCE(new.marketing_double_opt_in, 0)
+          OR COALESCE(old.gdpr_opt_out_all, 0) != COALESCE(new.gdpr_opt_out_all, 0)
+        BEGIN
+            UPDATE compliance_counters
+            SET value = value + {_user_delta('new', '+')} + {_user_delta('old', '-')}, updated_at = {_NOW}
+            WHERE name IN ('tos_accepted', 'marketing_consented', 'gdpr_opted_out');
+        END
+    """)
+
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_dsar_ai AFTER INSERT ON dsar_requests
+        WHEN new.status = 'pending' BEGIN
+            UPDATE compliance_counters SET value = value + 1, updated_at = {_NOW} WHERE name = 'dsar_pending';
+        END
+    """)
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_dsar_ad AFTER DELETE ON dsar_requests
+        WHEN old.status = 'pending' BEGIN
+            UPDATE compliance_counters SET value = value - 1, updated_at = {_NOW} WHERE name = 'dsar_pending';
+        END
+    """)
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_dsar_au AFTER UPDATE OF status ON dsar_requests
+        WHEN (old.status = 'pending') != (new.status = 'pending') BEGIN
+            UPDATE compliance_counters
+            SET value = value + (new.status = 'pending') - (old.status = 'pending'), updated_at = {_NOW}
+            WHERE name = 'dsar_pending';
+        END
+    """)
+
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_risk_ai AFTER INSERT ON risk_blocks BEGIN
+            INSERT INTO compliance_counters (name, value, updated_at)
+            VALUES ('{RISK_BLOCK_PREFIX}' || date(new.created_at, 'unixepoch'), 1, {_NOW})
+            ON CONFLICT(name) DO UPDATE SET value = value + 1, updated_at = excluded.updated_at;
+        END
+    """)
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS compliance_counters_risk_ad AFTER DELETE ON risk_blocks BEGIN
+            UPDATE compliance_counters SET value = value - 1, updated_at = {_NOW}
+            WHERE name = '{RISK_BLOCK_PREFIX}' || date(old.created_at, 'unixepoch');
+        END
+    """)
+
+    if not seeded:
+        # First run on an existing database: start from the real totals
+        reconcile_compliance_counters(db_connection)
+
+
+def get_compliance_counters(db_connection, risk_window_days=30):
+    """
+    All dashboard counters in one indexed read
+
+    Returns:
+        dict: counter name -> value, plus "risk_blocks_window" (trailing
+        `risk_window_days` UTC days, including today)
+    """
+    first_day = strftime("%Y-%m-%d", gmtime(time() - (risk_window_days - 1) * 86400))
+    rows = db_connection.execute("""
+        SELECT name, value FROM compliance_counters
+        WHERE name IN ({}) OR (name >= ? AND name < ?)
+    """.format(",".join("?" * len(COUNTERS))), (*COUNTERS, RISK_BLOCK_PREFIX + first_day, RISK_BLOCK_PREFIX + "~")).fetchall()
+
+    counters = {name: 0 for name in COUNTERS}
+    counters["risk_blocks_window"] = 0
+    for name, value in rows:
+        if name.startswith(RISK_BLOCK_PREFIX):
+            counters["risk_blocks_window"] += value
+        else:
+            counters[name] = value
+    return counters
+
+
+def reconcile_compliance_counters(db_connection):
+    """
+    Recompute counters from the source tables and fix any drift
+
+    Runs in one write transaction so trigger updates from concurrent
+    writers can't interleave with the recount. It commits whatever is
+    pending on `db_connection` first, so outside of startup pass a
+    dedicated connection, not the shared request one.
+
+    Returns:
+        dict: counter name -> (stored, actual) for counters that drifted
+    """
+    db_connection.commit()
+    db_connection.execute("BEGIN IMMEDIATE")
+    try:
+        actual = dict(zip(COUNTERS, db_connection.execute("""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(terms_accepted_at IS NOT NULL), 0),
+                COALESCE(SUM(COALESCE(marketing_double_opt_in, 0) = 1), 0),
+                COALESCE(SUM(COALESCE(gdpr_opt_out_all, 0) = 1), 0),
+                (SELECT COUNT(*) FROM dsar_requests WHERE status = 'pending')
+            FROM users
+        """).fetchone()))
+        cutoff = time() - RISK_BLOCK_DAYS_KEPT * 86400
+        for day, count in db_connection.execute("""
+            SELECT date(created_at, 'unixepoch'), COUNT(*) FROM risk_blocks
+            WHERE created_at >= ? GROUP BY 1
+        """, (cutoff,)):
+            actual[RISK_BLOCK_PREFIX + day] = count
+
+        stored = dict(db_connection.execute("SELECT name, value FROM compliance_counters").fetchall())
+        drift = {
+            name: (stored.get(name, 0), value)
+            for name, value in actual.items()
+            if stored.get(name, 0) != value
+        }
+        # Day buckets with no rows left (or past the kept range)
+        stale = [
+            name for name in stored
+            if name.startswith(RISK_BLOCK_PREFIX) and name not in actual
+        ]
+
+        now = time()
+        db_connection.executemany("""
+            INSERT INTO compliance_counters (name, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+        """, [(name, value, now) for name, value in actual.items()])
+        db_connection.executemany("DELETE FROM compliance_counters WHERE name = ?", [(name,) for name in stale])
+        db_connection.commit()
+    except Exception:
+        db_connection.rollback()
+        raise
+
+    if drift:
+        log.warning(f"Compliance counters reconciled, drift corrected: {drift}")
+    return drift
@@ -0,0 +1,11 @@
+-- KV value history for time-range ledger/margin queries
+-- Written in the same transaction as the kv upsert by modules.kv.KVStore.set_many
+
+CREATE TABLE IF NOT EXISTS kv_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_kv_history_key_recorded ON kv_history(key, recorded_at);
@@ -0,0 +1,23 @@
+-- Error analytics: per-minute rollups, consumer cursors and composite indexes
+-- Rollups are upserted alongside each error_events insert by backend.services.error_analytics
+
+CREATE TABLE IF NOT EXISTS error_event_rollups (
+    bucket TIMESTAMP NOT NULL,
+    severity VARCHAR(20) NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    service VARCHAR(100) NOT NULL,
+    fingerprint VARCHAR(16) NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    sample_message VARCHAR(300),
+    PRIMARY KEY (bucket, severity, source, service, fingerprint)
+);
+
+CREATE TABLE IF NOT EXISTS error_monitor_cursors (
+    name VARCHAR(50) PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_error_events_severity_created_at ON error_events(severity, created_at);
+CREATE INDEX IF NOT EXISTS ix_error_events_service_created_at ON error_events(service, created_at);
+CREATE INDEX IF NOT EXISTS ix_error_events_source_created_at ON error_events(source, created_at);
@@ -0,0 +1,12 @@
+-- Buffered error ingestion: one error_events row per collapsed group of repeats
+-- Written by backend.services.error_ingest; existing rows count as a single occurrence
+
+ALTER TABLE error_events ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(16);
+ALTER TABLE error_events ADD COLUMN IF NOT EXISTS count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE error_events ADD COLUMN IF NOT EXISTS first_seen TIMESTAMP;
+ALTER TABLE error_events ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_error_events_fingerprint ON error_events(fingerprint);
+
+-- SQLite has no ADD COLUMN IF NOT EXISTS; there the columns are added at
+-- startup by backend.models.error_event.upgrade_error_events_table
@@ -0,0 +1,12 @@
+-- Error cursors re-read a recent overlap window, because ids can commit out
+-- of order on Postgres. This table dedupes events a consumer already returned.
+-- Rows older than the window are pruned by backend.services.error_analytics.fetch_new_events
+
+CREATE TABLE IF NOT EXISTS error_monitor_seen (
+    name VARCHAR(50) NOT NULL,
+    event_id INTEGER NOT NULL,
+    seen_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (name, event_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_error_monitor_seen_seen_at ON error_monitor_seen(seen_at);
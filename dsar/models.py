@@ -39,10 +39,18 @@ def init_dsar_tables(db_connection):
             otp_expires_at REAL NOT NULL,
             downloaded_at REAL,
             data_categories TEXT,
+            otp_attempts INTEGER NOT NULL DEFAULT 0,
+            otp_locked_until REAL,
             FOREIGN KEY (request_id) REFERENCES dsar_requests(id),
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
     """)
+    # Migration: OTP attempt limiting (dsar.security) on existing tables
+    columns = [col[1] for col in db_connection.execute("PRAGMA table_info(dsar_exports)").fetchall()]
+    if 'otp_attempts' not in columns:
+        db_connection.execute("ALTER TABLE dsar_exports ADD COLUMN otp_attempts INTEGER NOT NULL DEFAULT 0")
+    if 'otp_locked_until' not in columns:
+        db_connection.execute("ALTER TABLE dsar_exports ADD COLUMN otp_locked_until REAL")
     db_connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_dsar_exports_download_token ON dsar_exports(download_token)")
     db_connection.execute("CREATE INDEX IF NOT EXISTS idx_dsar_exports_user_id ON dsar_exports(user_id)")
     db_connection.execute("CREATE INDEX IF NOT EXISTS idx_dsar_exports_expires_at ON dsar_exports(expires_at)")
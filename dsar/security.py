@@ -1,17 +1,43 @@
 """
 DSAR Security Layer
 Handles download tokens and OTP generation/verification for secure data access
+
+OTPs are stored as HMAC-SHA256(server key, per-export salt + token + OTP),
+encoded as "hmac-sha256$<salt>$<mac>". Verifying one costs microseconds;
+brute force is bounded by the per-export attempt counter instead: after
+DSAR_OTP_MAX_ATTEMPTS wrong codes the export is locked for
+DSAR_OTP_LOCKOUT_SECONDS. Hashes from the old PBKDF2 scheme (plain hex)
+still verify until those exports expire.
 """
+import os
 import secrets
 import hashlib
 import hmac
 from time import time
 
+OTP_SCHEME = "hmac-sha256"
+
+DSAR_OTP_MAX_ATTEMPTS = int(os.environ.get("DSAR_OTP_MAX_ATTEMPTS", 5))
+DSAR_OTP_LOCKOUT_SECONDS = float(os.environ.get("DSAR_OTP_LOCKOUT_SECONDS", 15 * 60))
+
+
+def _otp_key():
+    secret = os.environ.get("DSAR_OTP_SECRET") or os.environ.get("JWT_SECRET", "dev-secret-change-in-prod")
+    return secret.encode('utf-8')
+
+
+def _otp_mac(otp, salt, download_token):
+    message = f"{salt}:{download_token}:{otp}".encode('utf-8')
+    return hmac.new(_otp_key(), message, hashlib.sha256).hexdigest()
+
 
 def create_download_token_and_otp(salt_secret="levqor-dsar"):
     """
     Generate a secure download token and one-time passcode
     
+    Args:
+        salt_secret: Unused; kept for callers of the old PBKDF2 scheme
+    
     Returns:
         tuple: (download_token: str, otp: str, otp_hash: str)
     """
@@ -21,25 +47,22 @@ def create_download_token_and_otp(salt_secret="levqor-dsar"):
     # Generate 6-digit OTP
     otp = str(secrets.randbelow(1000000)).zfill(6)
     
-    # Hash the OTP with HMAC-SHA256
-    otp_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        otp.encode('utf-8'),
-        salt_secret.encode('utf-8'),
-        100000  # 100k iterations
-    ).hex()
+    # Keyed MAC with a random per-export salt, bound to this token
+    salt = secrets.token_hex(16)
+    otp_hash = f"{OTP_SCHEME}${salt}${_otp_mac(otp, salt, download_token)}"
     
     return download_token, otp, otp_hash
 
 
-def verify_otp(otp_input, otp_hash_stored, salt_secret="levqor-dsar"):
+def verify_otp(otp_input, otp_hash_stored, download_token=None, salt_secret="levqor-dsar"):
     """
     Verify an OTP against its stored hash
     
     Args:
         otp_input: The OTP entered by the user
         otp_hash_stored: The hash stored in the database
-        salt_secret: Salt for hashing (should match creation)
+        download_token: Token the OTP was issued with (current scheme)
+        salt_secret: Salt for legacy PBKDF2 hashes
     
     Returns:
         bool: True if OTP is valid, False otherwise
@@ -47,7 +70,14 @@ def verify_otp(otp_input, otp_hash_stored, salt_secret="levqor-dsar"):
     if not otp_input or not otp_hash_stored:
         return False
     
-    # Hash the input OTP
+    otp_input = "".join(str(otp_input).split())
+    
+    if otp_hash_stored.startswith(OTP_SCHEME + "$"):
+        _, salt, mac = otp_hash_stored.split("$", 2)
+        otp_hash_input = _otp_mac(otp_input, salt, download_token or "")
+        return hmac.compare_digest(otp_hash_input, mac)
+    
+    # Legacy: exports issued before the HMAC scheme
     otp_hash_input = hashlib.pbkdf2_hmac(
         'sha256',
         otp_input.encode('utf-8'),
@@ -61,7 +91,12 @@ def verify_otp(otp_input, otp_hash_stored, salt_secret="levqor-dsar"):
 
 def verify_download_token_and_otp(db_connection, token, otp_input):
     """
-    Verify both token and OTP, check expiry
+    Verify both token and OTP, check expiry and the attempt limit
+    
+    Every OTP check first claims an attempt with a conditional UPDATE, so
+    concurrent guesses can't exceed DSAR_OTP_MAX_ATTEMPTS. The counter
+    resets on success; reaching the limit locks the export for
+    DSAR_OTP_LOCKOUT_SECONDS.
     
     Returns:
         tuple: (export_dict or None, error_reason or None)
@@ -71,7 +106,7 @@ def verify_download_token_and_otp(db_connection, token, otp_input):
     cursor = db_connection.cursor()
     cursor.execute("""
         SELECT id, user_id, storage_path, download_token_expires_at, 
-               otp_hash, otp_expires_at, downloaded_at
+               otp_hash, otp_expires_at, downloaded_at, otp_locked_until
         FROM dsar_exports
         WHERE download_token = ?
     """, (token,))
@@ -81,7 +116,7 @@ def verify_download_token_and_otp(db_connection, token, otp_input):
     if not row:
         return None, "INVALID_TOKEN"
     
-    export_id, user_id, storage_path, token_expires_at, otp_hash, otp_expires_at, downloaded_at = row
+    export_id, user_id, storage_path, token_expires_at, otp_hash, otp_expires_at, downloaded_at, locked_until = row
     
     # Check if token expired
     if now > token_expires_at:
@@ -91,10 +126,37 @@ def verify_download_token_and_otp(db_connection, token, otp_input):
     if now > otp_expires_at:
         return None, "OTP_EXPIRED"
     
+    if locked_until and now < locked_until:
+        return None, "OTP_LOCKED"
+    
+    # Claim an attempt (clears an expired lockout)
+    cursor.execute("""
+        UPDATE dsar_exports
+        SET otp_attempts = CASE WHEN otp_locked_until IS NOT NULL AND otp_locked_until <= ? THEN 1
+                                ELSE COALESCE(otp_attempts, 0) + 1 END,
+            otp_locked_until = CASE WHEN otp_locked_until <= ? THEN NULL ELSE otp_locked_until END
+        WHERE id = ?
+          AND (otp_locked_until IS NULL OR otp_locked_until <= ?)
+          AND (COALESCE(otp_attempts, 0) < ? OR otp_locked_until <= ?)
+    """, (now, now, export_id, now, DSAR_OTP_MAX_ATTEMPTS, now))
+    claimed = cursor.rowcount == 1
+    db_connection.commit()
+    
+    if not claimed:
+        return None, "OTP_LOCKED"
+    
     # Verify OTP
-    if not verify_otp(otp_input, otp_hash):
+    if not verify_otp(otp_input, otp_hash, download_token=token):
+        cursor.execute("""
+            UPDATE dsar_exports SET otp_locked_until = ?
+            WHERE id = ? AND otp_attempts >= ? AND otp_locked_until IS NULL
+        """, (now + DSAR_OTP_LOCKOUT_SECONDS, export_id, DSAR_OTP_MAX_ATTEMPTS))
+        db_connection.commit()
         return None, "INVALID_OTP"
     
+    cursor.execute("UPDATE dsar_exports SET otp_attempts = 0, otp_locked_until = NULL WHERE id = ?", (export_id,))
+    db_connection.commit()
+    
     # Optional: Check if already downloaded (one-time use)
     # Uncomment if you want strict one-time downloads
     # if downloaded_at:
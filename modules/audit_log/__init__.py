@@ -0,0 +1,11 @@
+"""
+Audit Log Module
+Buffered, rotating JSON-lines audit log with a sidecar block index
+"""
+from .store import AuditLog, get_audit_log, write_audit_event
+
+__all__ = [
+    "AuditLog",
+    "get_audit_log",
+    "write_audit_event"
+]
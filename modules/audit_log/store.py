@@ -0,0 +1,492 @@
+"""
+Audit log store: JSON-lines segments with a sidecar block index
+
+Layout (all next to AUDIT_LOG_PATH, default logs/audit.log):
+    audit.log                       active segment, one JSON event per line
+    audit.log.idx                   one JSON line per block of audit.log
+    audit.log.<stamp>[.gz]          sealed segments (compressed after a grace period)
+    audit.log.<stamp>[.gz].idx      their indexes
+    audit.log.lock                  flock: shared for appends, exclusive for rotation
+
+Writes are buffered in memory and appended from a long-lived O_APPEND
+descriptor every AUDIT_LOG_FLUSH_INTERVAL seconds (or when a block fills).
+A crash (anything atexit does not run for) loses at most that interval of
+buffered events, except for the security-relevant types in
+AUDIT_LOG_FLUSH_EVENTS, which are appended as soon as they are written.
+Each flushed block gets an index entry: byte offset/length, min/max `ts`
+(ms) and the event types it contains. Queries walk the indexes newest
+first and only read - and, for compressed segments, only decompress - the
+blocks that can match, so a tail is a few small reads however much
+history there is.
+
+Each block of a compressed segment is its own gzip member, so the file is
+still a normal .gz (zcat works) and blocks can be decompressed on their own.
+
+Several worker processes may share one log: appends are single write()
+calls on O_APPEND descriptors, writers reopen when the active segment has
+been rotated by another process, and sealed segments are only compressed
+once no writer can still hold them. Events buffered in another process
+become visible to queries after that process's next flush.
+"""
+import os
+import json
+import glob
+import gzip
+import fcntl
+import atexit
+import logging
+import threading
+from time import time, sleep, strftime, gmtime
+
+log = logging.getLogger("levqor.audit")
+
+AUDIT_LOG_PATH = os.environ.get("AUDIT_LOG_PATH", os.path.join("logs", "audit.log"))
+AUDIT_LOG_MAX_BYTES = int(os.environ.get("AUDIT_LOG_MAX_BYTES", 64 * 1024 * 1024))
+AUDIT_LOG_MAX_AGE = float(os.environ.get("AUDIT_LOG_MAX_AGE", 24 * 3600))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get("AUDIT_LOG_FLUSH_INTERVAL", 1.0))
+AUDIT_LOG_BLOCK_BYTES = int(os.environ.get("AUDIT_LOG_BLOCK_BYTES", 256 * 1024))
+AUDIT_LOG_COMPRESS_GRACE = float(os.environ.get("AUDIT_LOG_COMPRESS_GRACE", 60))
+AUDIT_LOG_FLUSH_EVENTS = frozenset(
+    t.strip() for t in os.environ.get("AUDIT_LOG_FLUSH_EVENTS", "admin_impersonate,auth_failed").split(",") if t.strip()
+)
+
+
+def _event_ts(event, default):
+    """Event timestamp in ms (`ts` field), falling back to `default`"""
+    try:
+        return int(event.get("ts", default))
+    except (TypeError, ValueError, AttributeError):
+        return default
+
+
+def _block_entry(offset, lines, now_ms):
+    """Index entry for a block of raw JSON lines"""
+    t0 = t1 = None
+    types = set()
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        ts = _event_ts(event, now_ms)
+        t0 = ts if t0 is None else min(t0, ts)
+        t1 = ts if t1 is None else max(t1, ts)
+        if isinstance(event, dict) and event.get("event") is not None:
+            types.add(str(event["event"]))
+    return {
+        "o": offset,
+        "n": sum(len(line) for line in lines),
+        "t0": t0 if t0 is not None else now_ms,
+        "t1": t1 if t1 is not None else now_ms,
+        "c": len(lines),
+        "e": sorted(types)
+    }
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+class AuditLog:
+    """Buffered, rotating, indexed audit log"""
+
+    def __init__(self, path=AUDIT_LOG_PATH, max_bytes=AUDIT_LOG_MAX_BYTES, max_age=AUDIT_LOG_MAX_AGE,
+                 flush_interval=AUDIT_LOG_FLUSH_INTERVAL, block_bytes=AUDIT_LOG_BLOCK_BYTES,
+                 compress_grace=AUDIT_LOG_COMPRESS_GRACE, flush_events=AUDIT_LOG_FLUSH_EVENTS):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.lock_path = path + ".lock"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.block_bytes = block_bytes
+        self.compress_grace = compress_grace
+        self.flush_events = frozenset(flush_events)
+
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._lock = threading.RLock()
+        self._fd = None
+        self._idx_fd = None
+        self._lock_fd = None
+        self._segment_started = None
+        self._index_cache = {}
+        self._thread = None
+        self._closed = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._open()
+
+    # Files
+
+    def _open(self):
+        self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._file_lock(fcntl.LOCK_EX):
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._idx_fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            new_entries = self._scan_unindexed(self.path, self._load_index(self.index_path))
+            if new_entries:
+                _write_all(self._idx_fd, b"".join(
+                    (json.dumps(e, separators=(',', ':')) + "\n").encode() for e in new_entries
+                ))
+                log.info(f"Audit log: indexed {len(new_entries)} block(s) of {self.path}")
+            self._segment_started = self._first_block_time()
+
+    def _reopen(self):
+        for fd in (self._fd, self._idx_fd):
+            if fd is not None:
+                os.close(fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._idx_fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._segment_started = self._first_block_time()
+
+    def _rotated_elsewhere(self):
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _file_lock(self, mode):
+        lock_fd = self._lock_fd
+
+        class _Held:
+            def __enter__(self_inner):
+                fcntl.flock(lock_fd, mode)
+
+            def __exit__(self_inner, *exc):
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+
+        return _Held()
+
+    def _first_block_time(self):
+        try:
+            with open(self.index_path, "rb") as f:
+                first = f.readline()
+            return json.loads(first)["t0"] / 1000.0 if first.endswith(b"\n") else None
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _scan_unindexed(self, data_path, entries):
+        """Index entries for complete lines past the last indexed block (e.g. pre-index logs)"""
+        start = entries[-1]["o"] + entries[-1]["n"] if entries else 0
+        size = os.path.getsize(data_path)
+        if size <= start:
+            return []
+        now_ms = int(time() * 1000)
+        new_entries = []
+        with open(data_path, "rb") as f:
+            f.seek(start)
+            offset = start
+            block, block_bytes = [], 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                block.append(line)
+                block_bytes += len(line)
+                if block_bytes >= self.block_bytes:
+                    new_entries.append(_block_entry(offset, block, now_ms))
+                    offset += block_bytes
+                    block, block_bytes = [], 0
+            if block:
+                new_entries.append(_block_entry(offset, block, now_ms))
+        return new_entries
+
+    # Writing
+
+    def write(self, event):
+        """
+        Buffer one event (a dict; `ts` in ms is added if missing)
+
+        Event types in flush_events are appended (with whatever is buffered
+        before them) before write() returns.
+        """
+        if "ts" not in event:
+            event = dict(event, ts=int(time() * 1000))
+        line = (json.dumps(event, separators=(',', ':'), default=str) + "\n").encode("utf-8")
+        with self._lock:
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            if self._buffered_bytes >= self.block_bytes or event.get("event") in self.flush_events:
+                self._flush_locked()
+        self._ensure_flusher()
+
+    def flush(self):
+        """Append buffered events and their index entries"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer or self._closed:
+            return
+        lines, self._buffer, self._buffered_bytes = self._buffer, [], 0
+        now_ms = int(time() * 1000)
+
+        with self._file_lock(fcntl.LOCK_SH):
+            if self._rotated_elsewhere():
+                self._reopen()
+            block, block_bytes = [], 0
+            for line in lines:
+                block.append(line)
+                block_bytes += len(line)
+                if block_bytes >= self.block_bytes:
+                    self._append_block(block, now_ms)
+                    block, block_bytes = [], 0
+            if block:
+                self._append_block(block, now_ms)
+
+    def _append_block(self, lines, now_ms):
+        data = b"".join(lines)
+        _write_all(self._fd, data)
+        # O_APPEND leaves our offset at the end of what we just wrote
+        end = os.lseek(self._fd, 0, os.SEEK_CUR)
+        entry = _block_entry(end - len(data), lines, now_ms)
+        _write_all(self._idx_fd, (json.dumps(entry, separators=(',', ':')) + "\n").encode())
+        if self._segment_started is None:
+            self._segment_started = entry["t0"] / 1000.0
+
+    # Rotation and compression
+
+    def maybe_rotate(self):
+        """Seal the active segment if it is over AUDIT_LOG_MAX_BYTES or AUDIT_LOG_MAX_AGE"""
+        with self._lock:
+            if self._closed:
+                return None
+            self._flush_locked()
+            if not self._needs_rotation():
+                return None
+            with self._file_lock(fcntl.LOCK_EX):
+                if self._rotated_elsewhere():
+                    self._reopen()
+                    return None
+                if not self._needs_rotation():
+                    return None
+                sealed = f"{self.path}.{strftime('%Y%m%dT%H%M%S', gmtime())}{int(time() * 1000) % 1000:03d}"
+                os.rename(self.path, sealed)
+                os.rename(self.index_path, sealed + ".idx")
+                self._reopen()
+            log.info(f"Audit log rotated to {sealed}")
+            return sealed
+
+    def _needs_rotation(self):
+        size = os.fstat(self._fd).st_size
+        if size >= self.max_bytes:
+            return True
+        return bool(size and self._segment_started and time() - self._segment_started >= self.max_age)
+
+    def compress_sealed(self):
+        """
+        Gzip sealed segments older than the grace period, one member per block
+
+        Returns:
+            list: Compressed segment paths
+        """
+        # Leftovers from a process that died mid-compression
+        for tmp in glob.glob(glob.escape(self.path) + ".*.tmp"):
+            try:
+                if time() - os.path.getmtime(tmp) >= max(self.compress_grace, 600):
+                    os.remove(tmp)
+            except FileNotFoundError:
+                pass
+
+        done = []
+        for segment in self._segments():
+            if segment == self.path or segment.endswith(".gz"):
+                continue
+            try:
+                if time() - os.path.getmtime(segment) < self.compress_grace:
+                    continue
+            except FileNotFoundError:
+                continue
+            try:
+                target = self._compress_segment(segment)
+            except FileNotFoundError:
+                continue  # another process got there first
+            if target:
+                done.append(target)
+        return done
+
+    def _compress_segment(self, segment):
+        """Write <segment>.gz(.idx) beside the segment, then swap them in under the exclusive lock"""
+        entries = self._load_index(segment + ".idx")
+        entries = entries + self._scan_unindexed(segment, entries)
+        target = segment + ".gz"
+        tmp = f".{os.getpid()}.tmp"
+
+        new_entries = []
+        with open(segment, "rb") as src, open(target + tmp, "wb") as dst:
+            for entry in entries:
+                src.seek(entry["o"])
+                member = gzip.compress(src.read(entry["n"]), compresslevel=6, mtime=0)
+                new_entries.append(dict(entry, o=dst.tell(), n=len(member), u=entry["n"]))
+                dst.write(member)
+        with open(target + ".idx" + tmp, "w") as f:
+            f.write("".join(json.dumps(e, separators=(',', ':')) + "\n" for e in new_entries))
+
+        with self._file_lock(fcntl.LOCK_EX):
+            if not os.path.exists(segment) or os.path.exists(target):
+                os.remove(target + tmp)
+                os.remove(target + ".idx" + tmp)
+                return None
+            os.rename(target + ".idx" + tmp, target + ".idx")
+            os.rename(target + tmp, target)
+            os.remove(segment)
+            os.remove(segment + ".idx")
+        self._index_cache.pop(segment + ".idx", None)
+        log.info(f"Audit log compressed {segment} ({len(new_entries)} blocks)")
+        return target
+
+    def _segments(self):
+        """Segment data files, newest first (active segment first)"""
+        sealed = [
+            p for p in glob.glob(glob.escape(self.path) + ".*")
+            if not p.endswith((".idx", ".lock", ".tmp"))
+        ]
+        return [self.path] + sorted(sealed, reverse=True)
+
+    # Reading
+
+    def _load_index(self, index_path):
+        """Parsed index entries; reads only what was appended since the last call"""
+        try:
+            st = os.stat(index_path)
+        except FileNotFoundError:
+            self._index_cache.pop(index_path, None)
+            return []
+        size = st.st_size
+        inode, offset, entries = self._index_cache.get(index_path, (st.st_ino, 0, []))
+        if inode != st.st_ino or size < offset:
+            offset, entries = 0, []
+        if size > offset:
+            with open(index_path, "rb") as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+            complete = data[:data.rfind(b"\n") + 1]
+            entries = entries + [json.loads(line) for line in complete.splitlines() if line]
+            offset += len(complete)
+        self._index_cache[index_path] = (st.st_ino, offset, entries)
+        return entries
+
+    def query(self, limit=100, event_type=None, since=None, until=None):
+        """
+        Most recent events, oldest first (like the tail of the file)
+
+        Args:
+            limit: Max events
+            event_type: Only events whose "event" field matches
+            since, until: Epoch seconds bounds on the event `ts`
+
+        Returns:
+            list: Event dicts
+        """
+        self.flush()
+        since_ms = since * 1000 if since is not None else None
+        until_ms = until * 1000 if until is not None else None
+
+        found = []
+        for segment in self._segments():
+            entries = self._load_index(segment + ".idx")
+            if not entries:
+                continue
+            if since_ms is not None and max(e["t1"] for e in entries) < since_ms:
+                continue
+            compressed = segment.endswith(".gz")
+            try:
+                f = open(segment, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                for entry in reversed(entries):
+                    if event_type and event_type not in entry["e"]:
+                        continue
+                    if since_ms is not None and entry["t1"] < since_ms:
+                        continue
+                    if until_ms is not None and entry["t0"] > until_ms:
+                        continue
+                    f.seek(entry["o"])
+                    data = f.read(entry["n"])
+                    if compressed:
+                        data = gzip.decompress(data)
+                    for line in reversed(data.splitlines()):
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue
+                        if event_type and event.get("event") != event_type:
+                            continue
+                        ts = _event_ts(event, entry["t1"])
+                        if (since_ms is not None and ts < since_ms) or (until_ms is not None and ts > until_ms):
+                            continue
+                        found.append(event)
+                        if len(found) >= limit:
+                            return found[::-1]
+        return found[::-1]
+
+    def stats(self):
+        segments = self._segments()
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            "segments": len(segments),
+            "compressed_segments": sum(1 for s in segments if s.endswith(".gz")),
+            "bytes": sum(os.path.getsize(s) for s in segments if os.path.exists(s)),
+            "buffered_events": buffered
+        }
+
+    # Background maintenance
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        last_compress = 0.0
+        while not self._closed:
+            sleep(self.flush_interval)
+            try:
+                self.maybe_rotate()
+                if time() - last_compress >= self.compress_grace:
+                    last_compress = time()
+                    self.compress_sealed()
+            except Exception as e:
+                log.error(f"Audit log maintenance failed: {e}")
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._closed = True
+            for fd in (self._fd, self._idx_fd, self._lock_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._fd = self._idx_fd = self._lock_fd = None
+
+
+_audit_log = None
+_audit_log_lock = threading.Lock()
+
+
+def get_audit_log():
+    """Process-wide audit log at AUDIT_LOG_PATH"""
+    global _audit_log
+    if _audit_log is None:
+        with _audit_log_lock:
+            if _audit_log is None:
+                _audit_log = AuditLog()
+                atexit.register(_audit_log.flush)
+    return _audit_log
+
+
+def write_audit_event(event):
+    """Buffer an audit event; never raises (audit logging must not break requests)"""
+    try:
+        get_audit_log().write(event)
+        return True
+    except Exception as e:
+        log.warning(f"Failed to write audit log: {e}")
+        return False
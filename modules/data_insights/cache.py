@@ -0,0 +1,142 @@
+"""
+Insights KPI Cache
+Per-period cache of aggregate() results with TTL, background refresh and invalidation
+
+A fresh entry (younger than INSIGHTS_KPI_TTL) is served from memory. A
+stale one (within another INSIGHTS_KPI_STALE_TTL) is still served while a
+single background refresh recomputes it; anything older is recomputed in
+the request. Concurrent misses for the same period share one aggregate()
+call.
+
+invalidate_kpis() is called after writes that change the aggregates
+(developer key creation, monthly usage resets and account deletion).
+Per-call usage increments are too frequent for that and are picked up
+within the TTL; invalidation is per process, so other workers also rely
+on the TTL.
+"""
+import os
+import logging
+import threading
+from time import monotonic
+from typing import Any, Dict, Optional
+
+from .aggregator import aggregate
+
+log = logging.getLogger("levqor.insights")
+
+INSIGHTS_KPI_TTL = float(os.environ.get("INSIGHTS_KPI_TTL", 300))
+INSIGHTS_KPI_STALE_TTL = float(os.environ.get("INSIGHTS_KPI_STALE_TTL", 900))
+
+
+class KPICache:
+    """Thread-safe KPI cache keyed by period_days"""
+
+    def __init__(self, ttl: float = INSIGHTS_KPI_TTL, stale_ttl: float = INSIGHTS_KPI_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[int, tuple] = {}
+        self._locks: Dict[int, threading.Lock] = {}
+        self._refreshing = set()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def _period_lock(self, period_days: int) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(period_days, threading.Lock())
+
+    def get(self, period_days: int = 90, refresh: bool = False) -> Dict[str, Any]:
+        """KPIs for `period_days`, computing them if absent, expired or `refresh`"""
+        if not refresh:
+            stale = None
+            with self._lock:
+                entry = self._entries.get(period_days)
+                if entry is not None:
+                    age = monotonic() - entry[1]
+                    if age < self.ttl:
+                        self._stats["hits"] += 1
+                        return entry[0]
+                    if age < self.ttl + self.stale_ttl:
+                        self._stats["stale_hits"] += 1
+                        stale = entry[0]
+                        spawn = period_days not in self._refreshing
+                        self._refreshing.add(period_days)
+            if stale is not None:
+                if spawn:
+                    threading.Thread(
+                        target=self._background_refresh, args=(period_days,),
+                        name=f"insights-kpi-{period_days}", daemon=True
+                    ).start()
+                return stale
+
+        return self._compute(period_days, force=refresh)
+
+    def _compute(self, period_days: int, force: bool = False) -> Dict[str, Any]:
+        with self._period_lock(period_days):
+            if not force:
+                # Another request may have filled it while we waited
+                with self._lock:
+                    entry = self._entries.get(period_days)
+                    if entry is not None and monotonic() - entry[1] < self.ttl:
+                        self._stats["hits"] += 1
+                        return entry[0]
+                    self._stats["misses"] += 1
+            with self._lock:
+                generation = self._generation
+            started = monotonic()
+            kpis = aggregate(period_days=period_days)
+            with self._lock:
+                # Don't resurrect data computed before an invalidate()
+                if generation == self._generation:
+                    self._entries[period_days] = (kpis, started)
+            return kpis
+
+    def _background_refresh(self, period_days: int) -> None:
+        try:
+            self._compute(period_days, force=True)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        except Exception as e:
+            log.error(f"Insights KPI refresh failed (period={period_days}): {e}")
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(period_days)
+
+    def invalidate(self, period_days: Optional[int] = None) -> None:
+        """Drop one period (or all) so the next read recomputes"""
+        with self._lock:
+            self._generation += 1
+            if period_days is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(period_days, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, periods=sorted(self._entries), ttl=self.ttl, stale_ttl=self.stale_ttl)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_kpi_cache() -> KPICache:
+    """Process-wide KPI cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = KPICache()
+    return _cache
+
+
+def get_kpis(period_days: int = 90, refresh: bool = False) -> Dict[str, Any]:
+    """Cached aggregate(period_days)"""
+    return get_kpi_cache().get(period_days, refresh=refresh)
+
+
+def invalidate_kpis(period_days: Optional[int] = None) -> None:
+    """Invalidate cached KPIs for one period, or all periods"""
+    get_kpi_cache().invalidate(period_days)
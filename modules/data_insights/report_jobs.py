@@ -0,0 +1,276 @@
+"""
+Insights Report Jobs
+Background PDF report generation with content-addressed artifacts
+
+submit_report_job() records a queued job and returns at once; a small
+worker pool then builds the PDF (reportlab) and uploads it to Drive off
+the request thread.
+
+Artifacts are stored once per KPI set: the KPIs (minus generated_at) are
+hashed, and a job whose KPIs match an existing artifact reuses its PDF
+bytes and Drive link instead of rebuilding and re-uploading. The PDF
+itself is addressed by the SHA-256 of its bytes.
+
+A job is claimed with a conditional UPDATE before it runs, so when
+resume_report_jobs() (scheduler) re-submits jobs orphaned by a restart,
+each is picked up by one worker only.
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from time import time
+from uuid import uuid4
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from .cache import get_kpis
+from .report_builder import build_pdf
+from .uploader import upload_pdf
+
+log = logging.getLogger("levqor.insights")
+
+INSIGHTS_REPORT_WORKERS = int(os.environ.get("INSIGHTS_REPORT_WORKERS", 1))
+INSIGHTS_REPORT_TIMEOUT = float(os.environ.get("INSIGHTS_REPORT_TIMEOUT", 600))
+
+
+def init_insights_report_tables(db_connection):
+    """Initialize report job and artifact tables"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS insights_report_artifacts(
+            sha256 TEXT PRIMARY KEY,
+            kpi_hash TEXT NOT NULL UNIQUE,
+            content BLOB NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            drive_link TEXT,
+            created_at REAL NOT NULL
+        )
+    """)
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS insights_report_jobs(
+            id TEXT PRIMARY KEY,
+            period_days INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            kpis_json TEXT,
+            kpi_hash TEXT,
+            artifact_sha256 TEXT,
+            reused_artifact INTEGER NOT NULL DEFAULT 0,
+            filename TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            FOREIGN KEY (artifact_sha256) REFERENCES insights_report_artifacts(sha256)
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_insights_report_jobs_status ON insights_report_jobs(status)")
+
+
+def _connect(db_path=None):
+    db = sqlite3.connect(db_path or os.environ.get("SQLITE_PATH", "levqor.db"), check_same_thread=False, timeout=30)
+    init_insights_report_tables(db)
+    return db
+
+
+def kpi_hash(kpis: Dict[str, Any]) -> str:
+    """Stable hash of a KPI set (generated_at excluded)"""
+    content = {k: v for k, v in kpis.items() if k != "generated_at"}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=INSIGHTS_REPORT_WORKERS, thread_name_prefix="insights-report")
+    return _executor
+
+
+def submit_report_job(period_days: int = 90, db_path=None, run: bool = True) -> Dict[str, Any]:
+    """
+    Queue a report and start it in the background
+
+    Returns:
+        dict: Job status (see get_report_job)
+    """
+    job_id = uuid4().hex
+    db = _connect(db_path)
+    try:
+        db.execute("""
+            INSERT INTO insights_report_jobs (id, period_days, status, created_at)
+            VALUES (?, ?, 'queued', ?)
+        """, (job_id, period_days, time()))
+        db.commit()
+        job = get_report_job(job_id, db=db)
+    finally:
+        db.close()
+
+    if run:
+        _get_executor().submit(run_report_job, job_id, db_path)
+    return job
+
+
+def get_report_job(job_id: str, db=None, db_path=None, include_kpis: bool = True) -> Optional[Dict[str, Any]]:
+    """Status of one job (with artifact details once completed), or None"""
+    own = db is None
+    db = db or _connect(db_path)
+    try:
+        row = db.execute("""
+            SELECT j.id, j.period_days, j.status, j.kpis_json, j.artifact_sha256, j.reused_artifact,
+                   j.filename, j.error, j.created_at, j.started_at, j.finished_at,
+                   a.size_bytes, a.drive_link
+            FROM insights_report_jobs j
+            LEFT JOIN insights_report_artifacts a ON a.sha256 = j.artifact_sha256
+            WHERE j.id = ?
+        """, (job_id,)).fetchone()
+    finally:
+        if own:
+            db.close()
+    if not row:
+        return None
+    (jid, period_days, status, kpis_json, sha256, reused, filename, error,
+     created_at, started_at, finished_at, size_bytes, drive_link) = row
+    job = {
+        "job_id": jid,
+        "period_days": period_days,
+        "status": status,
+        "filename": filename,
+        "sha256": sha256,
+        "reused_artifact": bool(reused),
+        "size_bytes": size_bytes,
+        "drive_link": drive_link,
+        "error": error,
+        "created_at": created_at,
+        "started_at": started_at,
+        "finished_at": finished_at
+    }
+    if include_kpis:
+        job["kpis"] = json.loads(kpis_json) if kpis_json else None
+    return job
+
+
+def get_report_pdf(job_id: str, db_path=None):
+    """
+    PDF bytes of a completed job
+
+    Returns:
+        tuple: (bytes, filename), or (None, None) if not available
+    """
+    db = _connect(db_path)
+    try:
+        row = db.execute("""
+            SELECT a.content, j.filename
+            FROM insights_report_jobs j
+            JOIN insights_report_artifacts a ON a.sha256 = j.artifact_sha256
+            WHERE j.id = ? AND j.status = 'completed'
+        """, (job_id,)).fetchone()
+    finally:
+        db.close()
+    return (bytes(row[0]), row[1]) if row else (None, None)
+
+
+def _claim(db, job_id) -> bool:
+    """Mark the job running; False if it is finished or another worker has it"""
+    now = time()
+    cursor = db.execute("""
+        UPDATE insights_report_jobs SET status = 'running', started_at = ?
+        WHERE id = ?
+          AND (status = 'queued' OR (status = 'running' AND started_at < ?))
+    """, (now, job_id, now - INSIGHTS_REPORT_TIMEOUT))
+    db.commit()
+    return cursor.rowcount == 1
+
+
+def run_report_job(job_id: str, db_path=None) -> Optional[Dict[str, Any]]:
+    """
+    Build (or reuse) the artifact for one job and upload it
+
+    Returns:
+        dict: Final job status, or None if the job couldn't be claimed
+    """
+    db = _connect(db_path)
+    try:
+        if not _claim(db, job_id):
+            return None
+
+        try:
+            period_days = db.execute(
+                "SELECT period_days FROM insights_report_jobs WHERE id = ?", (job_id,)
+            ).fetchone()[0]
+            kpis = get_kpis(period_days)
+            digest = kpi_hash(kpis)
+            filename = f"Levqor_Insights_{datetime.utcnow().date().isoformat()}.pdf"
+
+            artifact = db.execute(
+                "SELECT sha256, content, drive_link FROM insights_report_artifacts WHERE kpi_hash = ?", (digest,)
+            ).fetchone()
+            reused = artifact is not None
+            if reused:
+                sha256, pdf_bytes, drive_link = artifact[0], bytes(artifact[1]), artifact[2]
+            else:
+                pdf_bytes = build_pdf(kpis)
+                sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+                drive_link = None
+                db.execute("""
+                    INSERT OR IGNORE INTO insights_report_artifacts (sha256, kpi_hash, content, size_bytes, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (sha256, digest, sqlite3.Binary(pdf_bytes), len(pdf_bytes), time()))
+                db.commit()
+                # A concurrent job may have stored this KPI set first
+                sha256 = db.execute(
+                    "SELECT sha256 FROM insights_report_artifacts WHERE kpi_hash = ?", (digest,)
+                ).fetchone()[0]
+
+            if not drive_link:
+                drive_link = upload_pdf(pdf_bytes, filename)
+                if drive_link:
+                    db.execute("UPDATE insights_report_artifacts SET drive_link = ? WHERE sha256 = ?", (drive_link, sha256))
+
+            db.execute("""
+                UPDATE insights_report_jobs
+                SET status = 'completed', kpis_json = ?, kpi_hash = ?, artifact_sha256 = ?, reused_artifact = ?,
+                    filename = ?, finished_at = ?
+                WHERE id = ?
+            """, (json.dumps(kpis, default=str), digest, sha256, 1 if reused else 0, filename, time(), job_id))
+            db.commit()
+            log.info(f"Insights report {job_id} completed: sha256={sha256[:12]}, reused={reused}")
+
+        except Exception as e:
+            log.error(f"Insights report {job_id} failed: {e}", exc_info=True)
+            db.rollback()
+            db.execute("""
+                UPDATE insights_report_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?
+            """, (str(e)[:500], time(), job_id))
+            db.commit()
+
+        return get_report_job(job_id, db=db)
+    finally:
+        db.close()
+
+
+def resume_report_jobs(db_path=None) -> int:
+    """
+    Re-submit jobs left queued, or running past INSIGHTS_REPORT_TIMEOUT (scheduler entry point)
+
+    Returns:
+        int: Jobs re-submitted
+    """
+    db = _connect(db_path)
+    try:
+        rows = db.execute("""
+            SELECT id FROM insights_report_jobs
+            WHERE status = 'queued' OR (status = 'running' AND started_at < ?)
+        """, (time() - INSIGHTS_REPORT_TIMEOUT,)).fetchall()
+    finally:
+        db.close()
+    for (job_id,) in rows:
+        _get_executor().submit(run_report_job, job_id, db_path)
+    return len(rows)
@@ -4,9 +4,10 @@ Conducts regular security and compliance audits of partners
 """
 import sqlite3
 import os
+import threading
 from time import time
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
 import json
 
 def get_db():
@@ -14,69 +15,90 @@ def get_db():
     db_path = os.environ.get("SQLITE_PATH", "levqor.db")
     return sqlite3.connect(db_path, check_same_thread=False)
 
+_policy_cache = {"mtime": None, "policy": None}
+_policy_lock = threading.Lock()
+
+AUDIT_RESULTS_MAX_AGE = float(os.environ.get("GOVERNANCE_AUDIT_MAX_AGE", 24 * 3600))
+AUDIT_RESULTS_KEEP = int(os.environ.get("GOVERNANCE_AUDIT_KEEP", 30))
+
 def load_policy() -> Dict[str, Any]:
-    """Load governance policy"""
+    """Load governance policy (cached; re-read only when policy.json changes)"""
     policy_path = os.path.join(os.path.dirname(__file__), "policy.json")
-    with open(policy_path, 'r') as f:
-        return json.load(f)
+    mtime = os.path.getmtime(policy_path)
+    if _policy_cache["mtime"] != mtime:
+        with _policy_lock:
+            if _policy_cache["mtime"] != mtime:
+                with open(policy_path, 'r') as f:
+                    _policy_cache["policy"] = json.load(f)
+                _policy_cache["mtime"] = mtime
+    return _policy_cache["policy"]
 
-def audit_partner(partner_id: str) -> Dict[str, Any]:
+def init_audit_results_table(db_connection) -> None:
+    """Per-partner results of each audit run (read by review_cycle and governance_ai)"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS audit_results(
+            audit_id TEXT NOT NULL,
+            partner_id TEXT NOT NULL,
+            partner_name TEXT,
+            email TEXT,
+            webhook_url TEXT,
+            is_verified INTEGER NOT NULL,
+            is_active INTEGER NOT NULL,
+            total_listings INTEGER NOT NULL,
+            total_downloads INTEGER NOT NULL,
+            avg_rating REAL,
+            total_sales INTEGER NOT NULL,
+            total_revenue_cents INTEGER NOT NULL,
+            days_since_creation INTEGER NOT NULL,
+            last_review_at REAL,
+            days_since_review INTEGER NOT NULL,
+            review_due INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            compliance_issues TEXT,
+            warnings TEXT,
+            audited_at REAL NOT NULL,
+            PRIMARY KEY (audit_id, partner_id)
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_audit_results_audited_at ON audit_results(audited_at)")
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_audit_results_partner ON audit_results(partner_id)")
+
+def _partner_stats(cursor, partner_id: Optional[str] = None) -> List[tuple]:
     """
-    Audit a single partner for compliance
-    
-    Args:
-        partner_id: Partner UUID
-        
-    Returns:
-        Audit report dict
+    Partner rows with listing and sales aggregates, one grouped join pass
+
+    Each of listings and marketplace_orders is scanned once and grouped by
+    partner, instead of two queries per partner.
     """
-    db = get_db()
-    cursor = db.cursor()
-    
-    # Get partner info
-    cursor.execute("""
-        SELECT id, name, email, webhook_url, is_verified,
-               is_active, created_at
-        FROM partners
-        WHERE id = ?
-    """, (partner_id,))
-    
-    partner = cursor.fetchone()
-    
-    if not partner:
-        return {"error": "partner_not_found"}
-    
-    pid, name, email, webhook_url, is_verified, is_active, created_at = partner
-    
-    # Get partner's listings
-    cursor.execute("""
-        SELECT COUNT(*), SUM(downloads), AVG(rating)
-        FROM listings
-        WHERE partner_id = ? AND is_active = 1
-    """, (partner_id,))
-    
-    listings_stats = cursor.fetchone()
-    total_listings = listings_stats[0] or 0
-    total_downloads = listings_stats[1] or 0
-    avg_rating = listings_stats[2]
-    
-    # Get sales history
-    cursor.execute("""
-        SELECT COUNT(*), SUM(amount_cents)
-        FROM marketplace_orders
-        WHERE partner_id = ?
-    """, (partner_id,))
-    
-    sales_stats = cursor.fetchone()
-    total_sales = sales_stats[0] or 0
-    total_revenue_cents = sales_stats[1] or 0
-    
-    db.close()
-    
-    # Load policy for compliance checks
-    policy = load_policy()
+    partner_filter = "AND partner_id = ?" if partner_id else ""
+    params = [partner_id, partner_id, partner_id] if partner_id else []
+    cursor.execute(f"""
+        SELECT p.id, p.name, p.email, p.webhook_url, p.is_verified, p.is_active,
+               p.created_at, p.updated_at,
+               COALESCE(l.listing_count, 0), COALESCE(l.downloads, 0), l.avg_rating,
+               COALESCE(o.order_count, 0), COALESCE(o.revenue_cents, 0)
+        FROM partners p
+        LEFT JOIN (
+            SELECT partner_id, COUNT(*) AS listing_count, SUM(downloads) AS downloads, AVG(rating) AS avg_rating
+            FROM listings
+            WHERE is_active = 1 {partner_filter}
+            GROUP BY partner_id
+        ) l ON l.partner_id = p.id
+        LEFT JOIN (
+            SELECT partner_id, COUNT(*) AS order_count, SUM(amount_cents) AS revenue_cents
+            FROM marketplace_orders
+            WHERE 1 = 1 {partner_filter}
+            GROUP BY partner_id
+        ) o ON o.partner_id = p.id
+        WHERE {"p.id = ?" if partner_id else "p.is_active = 1"}
+    """, params)
+    return cursor.fetchall()
+
+def _evaluate(row: tuple, policy: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Compliance checks for one partner stats row"""
+    (pid, name, email, webhook_url, is_verified, is_active, created_at, updated_at,
+     total_listings, total_downloads, avg_rating, total_sales, total_revenue_cents) = row
     
-    # Compliance checks
     issues = []
     warnings = []
     
@@ -92,90 +114,178 @@ def audit_partner(partner_id: str) -> Dict[str, Any]:
     if avg_rating and avg_rating < policy["auto_suspend_threshold"]["low_rating"]:
         issues.append(f"Low average rating: {avg_rating:.1f}")
     
-    # Check if review is due
+    # Review is due a full cycle after the last review (or creation)
     review_cycle_days = policy["review_cycle_days"]
-    created_dt = datetime.fromtimestamp(created_at)
-    days_since_creation = (datetime.now() - created_dt).days
-    review_due = days_since_creation >= review_cycle_days
+    days_since_creation = (now - datetime.fromtimestamp(created_at)).days
+    last_review_at = updated_at or created_at
+    days_since_review = (now - datetime.fromtimestamp(last_review_at)).days
     
-    audit_report = {
+    return {
         "partner_id": pid,
         "partner_name": name,
         "email": email,
+        "webhook_url": webhook_url,
         "is_verified": bool(is_verified),
         "is_active": bool(is_active),
         "total_listings": total_listings,
         "total_downloads": int(total_downloads),
         "avg_rating": float(avg_rating) if avg_rating else None,
         "total_sales": total_sales,
-        "total_revenue": total_revenue_cents / 100.0,
+        "total_revenue": (total_revenue_cents or 0) / 100.0,
+        "total_revenue_cents": int(total_revenue_cents or 0),
         "days_since_creation": days_since_creation,
-        "review_due": review_due,
+        "last_review_at": last_review_at,
+        "days_since_review": days_since_review,
+        "review_due": days_since_review >= review_cycle_days,
         "compliance_issues": issues,
         "warnings": warnings,
         "audit_timestamp": datetime.utcnow().isoformat(),
         "status": "compliant" if not issues else "issues_found"
     }
-    
-    return audit_report
 
-def run_full_audit() -> Dict[str, Any]:
+def audit_partner(partner_id: str) -> Dict[str, Any]:
     """
-    Run audit on all verified partners
+    Audit a single partner for compliance
     
+    Args:
+        partner_id: Partner UUID
+        
     Returns:
-        Audit summary
+        Audit report dict
     """
     db = get_db()
-    cursor = db.cursor()
+    rows = _partner_stats(db.cursor(), partner_id)
+    db.close()
     
-    # Get all verified active partners
-    cursor.execute("""
-        SELECT id, name
-        FROM partners
-        WHERE is_verified = 1 AND is_active = 1
-    """)
+    if not rows:
+        return {"error": "partner_not_found"}
     
-    partners = cursor.fetchall()
+    return _evaluate(rows[0], load_policy(), datetime.now())
+
+def compute_audit_results(db, audit_id: Optional[str] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Audit every active partner in one pass and store the results
     
-    audit_results = []
-    issues_count = 0
-    compliant_count = 0
+    Returns:
+        (audit_id, list of per-partner reports)
+    """
+    init_audit_results_table(db)
+    audit_id = audit_id or f"audit_{int(time() * 1000)}"
+    policy = load_policy()
+    now = datetime.now()
+    audited_at = time()
+    
+    reports = [_evaluate(row, policy, now) for row in _partner_stats(db.cursor())]
+    
+    db.executemany("""
+        INSERT OR REPLACE INTO audit_results (
+            audit_id, partner_id, partner_name, email, webhook_url, is_verified, is_active,
+            total_listings, total_downloads, avg_rating, total_sales, total_revenue_cents,
+            days_since_creation, last_review_at, days_since_review, review_due, status,
+            compliance_issues, warnings, audited_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (
+            audit_id, r["partner_id"], r["partner_name"], r["email"], r["webhook_url"],
+            int(r["is_verified"]), int(r["is_active"]), r["total_listings"], r["total_downloads"],
+            r["avg_rating"], r["total_sales"], r["total_revenue_cents"], r["days_since_creation"],
+            r["last_review_at"], r["days_since_review"], int(r["review_due"]), r["status"],
+            json.dumps(r["compliance_issues"]), json.dumps(r["warnings"]), audited_at
+        )
+        for r in reports
+    ])
+    
+    # Keep the most recent AUDIT_RESULTS_KEEP runs
+    db.execute("""
+        DELETE FROM audit_results WHERE audit_id NOT IN (
+            SELECT audit_id FROM audit_results
+            GROUP BY audit_id ORDER BY MAX(audited_at) DESC LIMIT ?
+        )
+    """, (AUDIT_RESULTS_KEEP,))
+    db.commit()
     
-    for partner_id, partner_name in partners:
-        report = audit_partner(partner_id)
-        audit_results.append(report)
-        
-        if report.get("status") == "compliant":
-            compliant_count += 1
+    return audit_id, reports
+
+def get_latest_audit_results(db=None, max_age: float = AUDIT_RESULTS_MAX_AGE) -> List[Dict[str, Any]]:
+    """
+    Per-partner results of the latest audit, recomputed if older than `max_age`
+    
+    Returns:
+        List of dicts (columns of audit_results, issues/warnings decoded)
+    """
+    own = db is None
+    db = db or get_db()
+    try:
+        init_audit_results_table(db)
+        latest = db.execute("""
+            SELECT audit_id, audited_at FROM audit_results ORDER BY audited_at DESC LIMIT 1
+        """).fetchone()
+        if not latest or time() - latest[1] > max_age:
+            audit_id, _ = compute_audit_results(db)
         else:
-            issues_count += 1
+            audit_id = latest[0]
         
-        # Send audit notification to partner
+        cursor = db.execute("SELECT * FROM audit_results WHERE audit_id = ?", (audit_id,))
+        columns = [c[0] for c in cursor.description]
+        results = []
+        for row in cursor.fetchall():
+            result = dict(zip(columns, row))
+            result["compliance_issues"] = json.loads(result["compliance_issues"] or "[]")
+            result["warnings"] = json.loads(result["warnings"] or "[]")
+            results.append(result)
+        return results
+    finally:
+        if own:
+            db.close()
+
+def _notify_partners(reports: List[Dict[str, Any]]) -> None:
+    """Send audit.completed to partners with webhooks, one concurrent fan-out per distinct payload"""
+    from modules.partner_api.delivery import get_delivery_engine
+    
+    audit_date = datetime.utcnow().isoformat()
+    groups: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+    for report in reports:
+        if report["webhook_url"]:
+            key = (report["status"], len(report["compliance_issues"]))
+            groups.setdefault(key, []).append({
+                "id": report["partner_id"],
+                "name": report["partner_name"],
+                "webhook_url": report["webhook_url"]
+            })
+    
+    for (status, issues_count), partners in groups.items():
         try:
-            from modules.partner_api.hooks import trigger_partner_event
-            cursor.execute("""
-                SELECT id, name, webhook_url
-                FROM partners
-                WHERE id = ?
-            """, (partner_id,))
-            p = cursor.fetchone()
-            if p and p[2]:  # Has webhook
-                partner_dict = {"id": p[0], "name": p[1], "webhook_url": p[2]}
-                trigger_partner_event(
-                    partner_dict,
-                    "audit.completed",
-                    {
-                        "audit_date": datetime.utcnow().isoformat(),
-                        "status": report["status"],
-                        "issues_count": len(report["compliance_issues"])
-                    }
-                )
+            get_delivery_engine().deliver_many(partners, "audit.completed", {
+                "audit_date": audit_date,
+                "status": status,
+                "issues_count": issues_count
+            })
         except Exception as e:
-            print(f"⚠️ Failed to notify partner {partner_name}: {e}")
+            print(f"⚠️ Failed to notify {len(partners)} partner(s) of audit: {e}")
+
+def run_full_audit() -> Dict[str, Any]:
+    """
+    Run audit on all verified partners
+    
+    Stats for every active partner come from one grouped join pass and are
+    stored in audit_results; the summary and notifications cover verified
+    partners as before.
+    
+    Returns:
+        Audit summary
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    audit_id, reports = compute_audit_results(db)
+    audit_results = [r for r in reports if r["is_verified"] and r["is_active"]]
+    compliant_count = sum(1 for r in audit_results if r["status"] == "compliant")
+    issues_count = len(audit_results) - compliant_count
+    
+    # Send audit notification to partners
+    _notify_partners(audit_results)
     
     # Log audit to database
-    audit_id = f"audit_{int(time())}"
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS audit_logs(
             id TEXT PRIMARY KEY,
@@ -193,7 +303,7 @@ def run_full_audit() -> Dict[str, Any]:
     """, (
         audit_id,
         time(),
-        len(partners),
+        len(audit_results),
         issues_count,
         compliant_count,
         json.dumps(audit_results)
@@ -205,7 +315,7 @@ def run_full_audit() -> Dict[str, Any]:
     summary = {
         "audit_id": audit_id,
         "timestamp": datetime.utcnow().isoformat(),
-        "total_partners_audited": len(partners),
+        "total_partners_audited": len(audit_results),
         "compliant": compliant_count,
         "issues_found": issues_count,
         "audit_results": audit_results
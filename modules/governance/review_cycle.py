@@ -4,68 +4,45 @@ Identifies partners due for quarterly review
 """
 import sqlite3
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Any
-import json
+
+from .audit import load_policy, get_latest_audit_results
 
 def get_db():
     """Get database connection"""
     db_path = os.environ.get("SQLITE_PATH", "levqor.db")
     return sqlite3.connect(db_path, check_same_thread=False)
 
-def load_policy() -> Dict[str, Any]:
-    """Load governance policy"""
-    policy_path = os.path.join(os.path.dirname(__file__), "policy.json")
-    with open(policy_path, 'r') as f:
-        return json.load(f)
-
 def get_partners_due_for_review() -> List[Dict[str, Any]]:
     """
     Get partners due for quarterly review
     
+    Reads the latest stored audit results (recomputed if stale) rather than
+    re-querying partners.
+    
     Returns:
         List of partners needing review
     """
     policy = load_policy()
     review_cycle_days = policy["review_cycle_days"]
     
-    db = get_db()
-    cursor = db.cursor()
-    
-    # Calculate cutoff timestamp
-    cutoff_dt = datetime.now() - timedelta(days=review_cycle_days)
-    cutoff_ts = cutoff_dt.timestamp()
-    
-    cursor.execute("""
-        SELECT id, name, email, created_at, updated_at
-        FROM partners
-        WHERE is_active = 1
-          AND (
-            created_at < ?
-            OR (updated_at IS NOT NULL AND updated_at < ?)
-          )
-    """, (cutoff_ts, cutoff_ts))
-    
     partners = []
-    for row in cursor.fetchall():
-        pid, name, email, created_at, updated_at = row
-        
-        # Determine which timestamp to use
-        last_review_ts = updated_at if updated_at else created_at
-        last_review_dt = datetime.fromtimestamp(last_review_ts)
-        days_since_review = (datetime.now() - last_review_dt).days
+    for result in get_latest_audit_results():
+        if not result["is_active"] or not result["review_due"]:
+            continue
         
+        days_since_review = result["days_since_review"]
         partners.append({
-            "id": pid,
-            "name": name,
-            "email": email,
-            "last_review_date": last_review_dt.isoformat(),
+            "id": result["partner_id"],
+            "name": result["partner_name"],
+            "email": result["email"],
+            "webhook_url": result["webhook_url"],
+            "last_review_date": datetime.fromtimestamp(result["last_review_at"]).isoformat(),
             "days_since_review": days_since_review,
             "review_overdue_by_days": days_since_review - review_cycle_days
         })
     
-    db.close()
-    
     return partners
 
 def mark_partner_reviewed(partner_id: str) -> bool:
@@ -80,6 +57,7 @@ def mark_partner_reviewed(partner_id: str) -> bool:
     """
     from time import time
     
+    now = time()
     db = get_db()
     cursor = db.cursor()
     
@@ -87,10 +65,22 @@ def mark_partner_reviewed(partner_id: str) -> bool:
         UPDATE partners
         SET updated_at = ?
         WHERE id = ?
-    """, (time(), partner_id))
+    """, (now, partner_id))
     
     success = cursor.rowcount > 0
     
+    if success:
+        # Keep the stored audit results in step so the partner drops off the due list
+        try:
+            cursor.execute("""
+                UPDATE audit_results
+                SET last_review_at = ?, days_since_review = 0, review_due = 0
+                WHERE partner_id = ?
+                  AND audit_id = (SELECT audit_id FROM audit_results ORDER BY audited_at DESC LIMIT 1)
+            """, (now, partner_id))
+        except sqlite3.OperationalError:
+            pass  # No audit has run yet
+    
     db.commit()
     db.close()
     
@@ -142,24 +132,13 @@ def send_review_notifications() -> int:
         print("✅ No partners due for review")
         return 0
     
-    db = get_db()
-    cursor = db.cursor()
     sent_count = 0
     
     for partner in due_partners:
-        # Get partner webhook for notification
-        cursor.execute("""
-            SELECT id, name, webhook_url
-            FROM partners
-            WHERE id = ?
-        """, (partner["id"],))
-        
-        p = cursor.fetchone()
-        
-        if p and p[2]:  # Has webhook
+        if partner["webhook_url"]:  # Has webhook
             try:
                 from modules.partner_api.hooks import trigger_partner_event
-                partner_dict = {"id": p[0], "name": p[1], "webhook_url": p[2]}
+                partner_dict = {"id": partner["id"], "name": partner["name"], "webhook_url": partner["webhook_url"]}
                 
                 success = trigger_partner_event(
                     partner_dict,
@@ -177,7 +156,5 @@ def send_review_notifications() -> int:
             except Exception as e:
                 print(f"⚠️ Failed to notify partner {partner['name']}: {e}")
     
-    db.close()
-    
     print(f"📧 Sent {sent_count} review notifications")
     return sent_count
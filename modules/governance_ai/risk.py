@@ -43,23 +43,19 @@ def evaluate_risk() -> Dict:
             risk_factors.append(f"High audit activity: {audit_count} events")
     
     # Check partner verification status
-    cursor.execute("""
-        SELECT COUNT(*), SUM(CASE WHEN is_verified = 0 THEN 1 ELSE 0 END)
-        FROM partners
-        WHERE is_active = 1
-    """)
+    # (from the latest stored partner audit; recomputed if stale)
+    from modules.governance.audit import get_latest_audit_results
     
-    partner_row = cursor.fetchone()
-    if partner_row and partner_row[0]:
-        total = partner_row[0]
-        unverified = partner_row[1] or 0
+    active = [r for r in get_latest_audit_results(db) if r["is_active"]]
+    if active:
+        total = len(active)
+        unverified = sum(1 for r in active if not r["is_verified"])
         
-        if total > 0:
-            unverified_pct = (unverified / total) * 100
-            if unverified_pct > 30:
-                deduction = min(15, unverified_pct * 0.5)
-                risk_score -= deduction
-                risk_factors.append(f"{unverified_pct:.0f}% partners unverified")
+        unverified_pct = (unverified / total) * 100
+        if unverified_pct > 30:
+            deduction = min(15, unverified_pct * 0.5)
+            risk_score -= deduction
+            risk_factors.append(f"{unverified_pct:.0f}% partners unverified")
     
     # Check for marketplace compliance
     cursor.execute("""
@@ -84,7 +80,7 @@ def evaluate_risk() -> Dict:
         FROM intel_events
         WHERE timestamp > ?
           AND event IN ('latency_spike', 'backend_failures')
-    """, (datetime.now() - timedelta(days=7).isoformat(),))
+    """, ((datetime.now() - timedelta(days=7)).isoformat(),))
     
     incident_row = cursor.fetchone()
     if incident_row and incident_row[0]:
@@ -0,0 +1,17 @@
+"""
+Growth Module
+Trigger-maintained daily rollups of growth_events for funnel and ROI queries
+"""
+from .rollups import (
+    init_growth_rollups,
+    rebuild_growth_rollups,
+    get_growth_by_source,
+    get_event_counts
+)
+
+__all__ = [
+    "init_growth_rollups",
+    "rebuild_growth_rollups",
+    "get_growth_by_source",
+    "get_event_counts"
+]
@@ -0,0 +1,191 @@
+"""
+Growth Event Rollups
+Daily (event, source) counts and revenue sums over growth_events
+
+A trigger on growth_events upserts into growth_daily in the same
+transaction as every insert (and reverses deletes/updates), so writers
+need no changes. Funnel and discount queries then read one row per
+(day, event, source) instead of scanning raw events: a 30-day funnel is
+at most 30 x sources rows per event, whatever the traffic.
+
+Days are UTC dates of the event's `ts` (epoch seconds). Windows are
+whole days: the last `days` UTC days, including today.
+
+rebuild_growth_rollups() recomputes growth_daily from the raw events
+(backfill, or repair after writes made with triggers disabled); see
+scripts/backfill_growth_rollups.py.
+"""
+import calendar
+import logging
+import sqlite3
+from datetime import datetime
+from time import time, strftime, gmtime
+from typing import Dict, Iterable, Optional
+
+log = logging.getLogger("levqor.growth")
+
+# Epoch seconds inside SQL (unixepoch() needs SQLite 3.38+)
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def _apply(row, sign):
+    """Statement adding (sign) one growth_events row to its daily bucket"""
+    return f"""
+        INSERT INTO growth_daily (day, event, source, events, revenue_cents, updated_at)
+        VALUES (date({row}.ts, 'unixepoch'), COALESCE({row}.event, ''), COALESCE({row}.source, ''),
+                {sign}1, {sign}COALESCE({row}.revenue_cents, 0), {_NOW})
+        ON CONFLICT(day, event, source) DO UPDATE SET
+            events = events + excluded.events,
+            revenue_cents = revenue_cents + excluded.revenue_cents,
+            updated_at = excluded.updated_at;
+    """
+
+
+def init_growth_rollups(db_connection):
+    """Create growth_events (if missing), the rollup table and its triggers"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS growth_events(
+            id INTEGER PRIMARY KEY,
+            ts INTEGER, user_id TEXT, event TEXT, source TEXT, campaign TEXT, plan TEXT,
+            revenue_cents INTEGER DEFAULT 0
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_growth_events_ts ON growth_events(ts)")
+    exists = db_connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'growth_daily'"
+    ).fetchone()
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS growth_daily(
+            day TEXT NOT NULL,
+            event TEXT NOT NULL,
+            source TEXT NOT NULL,
+            events INTEGER NOT NULL DEFAULT 0,
+            revenue_cents INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            PRIMARY KEY (day, event, source)
+        )
+    """)
+    # Window reads filter by event and day range
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_growth_daily_event_day ON growth_daily(event, day)")
+
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS growth_daily_ai AFTER INSERT ON growth_events BEGIN
+            {_apply('new', '+')}
+        END
+    """)
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS growth_daily_ad AFTER DELETE ON growth_events BEGIN
+            {_apply('old', '-')}
+        END
+    """)
+    db_connection.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS growth_daily_au
+        AFTER UPDATE OF ts, event, source, revenue_cents ON growth_events BEGIN
+            {_apply('old', '-')}
+            {_apply('new', '+')}
+        END
+    """)
+
+    if not exists:
+        # First run on an existing database: backfill from the raw events
+        rebuild_growth_rollups(db_connection)
+
+
+def _day_start(day: str) -> int:
+    """Epoch seconds at the start of a YYYY-MM-DD UTC date"""
+    parsed = datetime.strptime(day, "%Y-%m-%d")
+    # strptime also accepts '2026-10-1', which would not compare as a day string
+    if parsed.strftime("%Y-%m-%d") != day:
+        raise ValueError(f"since_day must be YYYY-MM-DD, got {day!r}")
+    return calendar.timegm(parsed.timetuple())
+
+
+def rebuild_growth_rollups(db_connection, since_day: Optional[str] = None) -> int:
+    """
+    Recompute growth_daily from growth_events
+
+    Runs in one write transaction so trigger updates from concurrent
+    inserts can't interleave with the recount.
+
+    Args:
+        since_day: Only rebuild days >= this UTC date (YYYY-MM-DD)
+
+    Returns:
+        int: Rollup rows written
+
+    Raises:
+        ValueError: since_day is not a valid YYYY-MM-DD date (nothing is deleted)
+    """
+    since_ts = _day_start(since_day) if since_day else 0
+
+    started = time()
+    db_connection.commit()
+    db_connection.execute("BEGIN IMMEDIATE")
+    try:
+        db_connection.execute("DELETE FROM growth_daily WHERE day >= ?", (since_day or "",))
+        cursor = db_connection.execute(f"""
+            INSERT INTO growth_daily (day, event, source, events, revenue_cents, updated_at)
+            SELECT date(ts, 'unixepoch'), COALESCE(event, ''), COALESCE(source, ''),
+                   COUNT(*), COALESCE(SUM(revenue_cents), 0), {_NOW}
+            FROM growth_events
+            WHERE ts >= ?
+            GROUP BY 1, 2, 3
+        """, (since_ts,))
+        db_connection.commit()
+    except Exception:
+        db_connection.rollback()
+        raise
+
+    log.info(f"Growth rollups rebuilt from {since_day or 'start'}: {cursor.rowcount} rows in {time() - started:.1f}s")
+    return cursor.rowcount
+
+
+def _first_day(days: int) -> str:
+    return strftime("%Y-%m-%d", gmtime(time() - (days - 1) * 86400))
+
+
+def _read(db_connection, sql, params):
+    try:
+        return db_connection.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        # Database not initialised by run.get_db() yet
+        init_growth_rollups(db_connection)
+        db_connection.commit()
+        return db_connection.execute(sql, params).fetchall()
+
+
+def get_growth_by_source(db_connection, days: int = 30,
+                         events: Iterable[str] = ("visit", "signup", "paid")) -> Dict[str, Dict[Optional[str], Dict[str, int]]]:
+    """
+    Event counts and revenue per source over the last `days` UTC days
+
+    Returns:
+        dict: event -> {source: {"events": n, "revenue_cents": n}}
+              (source None for events recorded without one)
+    """
+    events = tuple(events)
+    rows = _read(db_connection, """
+        SELECT event, source, SUM(events), SUM(revenue_cents)
+        FROM growth_daily
+        WHERE event IN ({}) AND day >= ?
+        GROUP BY event, source
+        HAVING SUM(events) != 0
+    """.format(",".join("?" * len(events))), (*events, _first_day(days)))
+
+    totals = {event: {} for event in events}
+    for event, source, count, revenue_cents in rows:
+        totals[event][source or None] = {"events": count, "revenue_cents": revenue_cents}
+    return totals
+
+
+def get_event_counts(db_connection, events: Iterable[str], days: int = 7) -> Dict[str, int]:
+    """Total events of each type over the last `days` UTC days"""
+    events = tuple(events)
+    counts = dict(_read(db_connection, """
+        SELECT event, SUM(events) FROM growth_daily
+        WHERE event IN ({}) AND day >= ?
+        GROUP BY event
+    """.format(",".join("?" * len(events))), (*events, _first_day(days))))
+    return {event: counts.get(event) or 0 for event in events}
@@ -1,11 +1,27 @@
 """
 Evidence Exporter - PDF Report Generation
 Converts integrity test results to professional PDF reports
+
+The PDF is built incrementally: sections and result tables are produced
+by generators and handed to reportlab through a lazily filled flowable
+list, and result tables are cut into page-sized chunks as rows stream in.
+Only the flowables on the page being laid out are held in memory, so
+peak memory stays flat as the number of checks grows. Paragraph styles
+are built once per process.
+
+export_to_json / export_to_html write the same evidence as cheap
+quick-view formats (no reportlab needed), also streamed row by row.
 """
 import os
 import json
+import html
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from collections.abc import Sequence
 from datetime import datetime
-from typing import Dict, Any
+from itertools import groupby, islice
+from typing import Dict, Any, IO, Iterable, Iterator, List, Tuple, Union
 
 try:
     from reportlab.lib.pagesizes import letter
@@ -18,85 +34,263 @@ try:
 except ImportError:
     REPORTLAB_AVAILABLE = False
 
+# Result rows per table chunk (about one page at 9pt)
+TABLE_CHUNK_ROWS = int(os.environ.get("EVIDENCE_TABLE_CHUNK_ROWS", 40))
+
+# Flowables generated ahead of the one being laid out (keepWithNext lookahead)
+FLOWABLE_LOOKAHEAD = 8
+
+STATUS_EMOJI = {
+    'passed': '✅',
+    'failed': '❌',
+    'warning': '⚠️',
+    'skipped': '⏭️'
+}
+
+_styles = None
+_styles_lock = threading.Lock()
+
+
+def get_styles():
+    """Sample stylesheet plus the report's custom styles, built once per process"""
+    global _styles
+    if _styles is None:
+        with _styles_lock:
+            if _styles is None:
+                styles = getSampleStyleSheet()
+                _add_custom_styles(styles)
+                _styles = styles
+    return _styles
+
+
+def _add_custom_styles(styles):
+    """Add custom paragraph styles"""
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#333333'),
+        spaceAfter=12,
+        spaceBefore=12
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='Status',
+        parent=styles['Normal'],
+        fontSize=10,
+        alignment=TA_LEFT
+    ))
+
+
+@lru_cache(maxsize=None)
+def _table_style(header_color: str):
+    """Shared style for result tables with the given header colour"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ])
+
+
+class _FlowableStream:
+    """
+    List-like view over a flowable generator for reportlab's doc.build()
+
+    build() only ever looks at, deletes from and inserts at the front of
+    its list, so items are pulled from the generator on demand and
+    dropped once laid out.
+    """
+    
+    def __init__(self, flowables: Iterable):
+        self._source = iter(flowables)
+        self._buffer: List = []
+    
+    def _fill(self, n: int):
+        while len(self._buffer) < n:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                return
+    
+    def __len__(self):
+        self._fill(FLOWABLE_LOOKAHEAD)
+        return len(self._buffer)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None else FLOWABLE_LOOKAHEAD)
+        else:
+            self._fill(index + 1)
+        return self._buffer[index]
+    
+    def __setitem__(self, index, value):
+        self._buffer[index] = value
+    
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None else FLOWABLE_LOOKAHEAD)
+        else:
+            self._fill(index + 1)
+        del self._buffer[index]
+    
+    def insert(self, index, value):
+        self._buffer.insert(index, value)
+
+
+def _by_category(rows: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+    """
+    (category, rows) groups in first-seen category order
+
+    Lists are grouped via row indexes (no copies); other iterables are
+    grouped by consecutive category as they stream.
+    """
+    if isinstance(rows, Sequence):
+        indexes: Dict[str, List[int]] = {}
+        for i, row in enumerate(rows):
+            indexes.setdefault(row.get("category", "other"), []).append(i)
+        for category, idx in indexes.items():
+            yield category, (rows[i] for i in idx)
+    else:
+        yield from groupby(rows, key=lambda row: row.get("category", "other"))
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _integrity_row(test: Dict[str, Any]) -> List[str]:
+    status_emoji = STATUS_EMOJI.get(test.get('status'), '❓')
+    details = []
+    if 'latency_ms' in test:
+        details.append(f"{test['latency_ms']}ms")
+    if 'error' in test:
+        details.append(test['error'][:50])
+    if 'reason' in test:
+        details.append(test['reason'][:50])
+    return [
+        test.get('test', 'Unknown'),
+        f"{status_emoji} {test.get('status', 'unknown').upper()}",
+        ', '.join(details) if details else 'OK'
+    ]
+
+
+def _finalizer_row(check: Dict[str, Any]) -> List[str]:
+    status_emoji = {
+        'passed': '✅',
+        'failed': '❌',
+        'warning': '⚠️'
+    }.get(check.get('status'), '❓')
+    return [
+        check.get('check', 'Unknown'),
+        f"{status_emoji} {check.get('status', 'unknown').upper()}",
+        check.get('purpose', check.get('reason', 'N/A'))[:40]
+    ]
+
+
+def _recommendations(integrity: Dict, finalizer: Dict) -> List[str]:
+    recommendations = []
+    
+    # Check for failures
+    integrity_failed = integrity.get("summary", {}).get("failed", 0)
+    finalizer_failed = finalizer.get("summary", {}).get("failed", 0)
+    
+    if integrity_failed > 0:
+        recommendations.append(f"• Address {integrity_failed} failed integrity test(s) before deployment")
+    
+    if finalizer_failed > 0:
+        recommendations.append(f"• Fix {finalizer_failed} finalizer validation error(s)")
+    
+    if integrity_failed == 0 and finalizer_failed == 0:
+        recommendations.append("• ✅ All checks passed - system is production-ready")
+        recommendations.append("• Schedule regular integrity tests (weekly recommended)")
+        recommendations.append("• Monitor uptime and performance metrics")
+    else:
+        recommendations.append("• Review detailed error logs above")
+        recommendations.append("• Re-run integrity test after fixes")
+        recommendations.append("• Contact support if issues persist")
+    return recommendations
+
+
+def _overall_passed(integrity: Dict, finalizer: Dict) -> bool:
+    return (
+        integrity.get("summary", {}).get("failed", 0) == 0 and
+        finalizer.get("summary", {}).get("deployment_ready", False)
+    )
+
 
 class EvidenceExporter:
-    """Exports integrity test results as PDF evidence reports"""
+    """Exports integrity test results as PDF, JSON or HTML evidence reports"""
     
-    def __init__(self):
-        if not REPORTLAB_AVAILABLE:
-            raise ImportError("reportlab not installed. Run: pip install reportlab")
-        
-        self.styles = getSampleStyleSheet()
-        self._add_custom_styles()
-    
-    def _add_custom_styles(self):
-        """Add custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#333333'),
-            spaceAfter=12,
-            spaceBefore=12
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Status',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            alignment=TA_LEFT
-        ))
-    
-    def export_to_pdf(self, integrity_results: Dict[str, Any], finalizer_results: Dict[str, Any], output_path: str) -> str:
+    @property
+    def styles(self):
+        return get_styles()
+    
+    def export_to_pdf(self, integrity_results: Dict[str, Any], finalizer_results: Dict[str, Any],
+                      output_path: Union[str, IO[bytes]]) -> Union[str, IO[bytes]]:
         """
         Generate PDF report from integrity and finalizer results
         
+        Result rows are laid out as they are read, so `results` /
+        `validations` may also be iterators (grouped by consecutive
+        category in that case).
+        
         Args:
             integrity_results: Results from IntegrityTester
             finalizer_results: Results from Finalizer
-            output_path: Path to save PDF file
+            output_path: Path to save PDF file, or a binary stream
         
         Returns:
-            Path to generated PDF file
+            Path (or stream) the PDF was written to
         """
+        if not REPORTLAB_AVAILABLE:
+            raise ImportError("reportlab not installed. Run: pip install reportlab")
+        
         print(f"📄 Generating PDF report...")
         
         doc = SimpleDocTemplate(output_path, pagesize=letter)
-        story = []
+        doc.build(_FlowableStream(self._story(integrity_results, finalizer_results)))
         
+        print(f"✅ PDF report generated: {output_path}")
+        return output_path
+    
+    def _story(self, integrity: Dict, finalizer: Dict) -> Iterator:
+        """All report flowables, in order, generated lazily"""
         # Title Page
-        story.extend(self._create_title_page(integrity_results, finalizer_results))
-        story.append(PageBreak())
+        yield from self._create_title_page(integrity, finalizer)
+        yield PageBreak()
         
         # Executive Summary
-        story.extend(self._create_executive_summary(integrity_results, finalizer_results))
-        story.append(PageBreak())
+        yield from self._create_executive_summary(integrity, finalizer)
+        yield PageBreak()
         
         # Integrity Test Results
-        story.extend(self._create_integrity_section(integrity_results))
-        story.append(PageBreak())
+        yield from self._create_integrity_section(integrity)
+        yield PageBreak()
         
         # Finalizer Validation Results
-        story.extend(self._create_finalizer_section(finalizer_results))
-        story.append(PageBreak())
+        yield from self._create_finalizer_section(finalizer)
+        yield PageBreak()
         
         # Recommendations
-        story.extend(self._create_recommendations(integrity_results, finalizer_results))
-        
-        # Build PDF
-        doc.build(story)
-        
-        print(f"✅ PDF report generated: {output_path}")
-        return output_path
+        yield from self._create_recommendations(integrity, finalizer)
     
     def _create_title_page(self, integrity: Dict, finalizer: Dict) -> list:
         """Create title page"""
@@ -115,9 +309,7 @@ class EvidenceExporter:
         elements.append(Spacer(1, 1*inch))
         
         # Overall Status
-        integrity_passed = integrity.get("summary", {}).get("failed", 0) == 0
-        finalizer_passed = finalizer.get("summary", {}).get("deployment_ready", False)
-        overall_status = "✅ PASSED" if (integrity_passed and finalizer_passed) else "⚠️ NEEDS ATTENTION"
+        overall_status = "✅ PASSED" if _overall_passed(integrity, finalizer) else "⚠️ NEEDS ATTENTION"
         
         status_text = f"<b>Overall Status:</b> {overall_status}"
         status = Paragraph(status_text, self.styles['Heading2'])
@@ -176,119 +368,38 @@ class EvidenceExporter:
         
         return elements
     
-    def _create_integrity_section(self, integrity: Dict) -> list:
+    def _create_integrity_section(self, integrity: Dict) -> Iterator:
         """Create integrity test results section"""
-        elements = []
+        yield Paragraph("Integrity Test Results", self.styles['CustomHeading'])
+        yield Spacer(1, 12)
         
-        elements.append(Paragraph("Integrity Test Results", self.styles['CustomHeading']))
-        elements.append(Spacer(1, 12))
-        
-        # Group results by category
-        results = integrity.get("results", [])
-        categories = {}
-        for result in results:
-            cat = result.get("category", "other")
-            if cat not in categories:
-                categories[cat] = []
-            categories[cat].append(result)
-        
-        # Create tables for each category
-        for category, tests in categories.items():
-            cat_title = category.replace("_", " ").title()
-            elements.append(Paragraph(cat_title, self.styles['Heading3']))
-            elements.append(Spacer(1, 6))
-            
-            # Build table data
-            data = [['Test', 'Status', 'Details']]
-            for test in tests:
-                status_emoji = {
-                    'passed': '✅',
-                    'failed': '❌',
-                    'warning': '⚠️',
-                    'skipped': '⏭️'
-                }.get(test.get('status'), '❓')
-                
-                test_name = test.get('test', 'Unknown')
-                status = f"{status_emoji} {test.get('status', 'unknown').upper()}"
-                
-                details = []
-                if 'latency_ms' in test:
-                    details.append(f"{test['latency_ms']}ms")
-                if 'error' in test:
-                    details.append(test['error'][:50])
-                if 'reason' in test:
-                    details.append(test['reason'][:50])
-                
-                data.append([test_name, status, ', '.join(details) if details else 'OK'])
-            
-            table = Table(data, colWidths=[2.5*inch, 1.5*inch, 2.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4CAF50')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 18))
-        
-        return elements
+        yield from self._category_tables(
+            integrity.get("results", []), ['Test', 'Status', 'Details'], _integrity_row, '#4CAF50'
+        )
     
-    def _create_finalizer_section(self, finalizer: Dict) -> list:
+    def _create_finalizer_section(self, finalizer: Dict) -> Iterator:
         """Create finalizer validation section"""
-        elements = []
+        yield Paragraph("Finalizer Validation Results", self.styles['CustomHeading'])
+        yield Spacer(1, 12)
         
-        elements.append(Paragraph("Finalizer Validation Results", self.styles['CustomHeading']))
-        elements.append(Spacer(1, 12))
-        
-        # Group validations by category
-        validations = finalizer.get("validations", [])
-        categories = {}
-        for val in validations:
-            cat = val.get("category", "other")
-            if cat not in categories:
-                categories[cat] = []
-            categories[cat].append(val)
-        
-        # Create tables for each category
-        for category, checks in categories.items():
+        yield from self._category_tables(
+            finalizer.get("validations", []), ['Check', 'Status', 'Purpose'], _finalizer_row, '#2196F3'
+        )
+    
+    def _category_tables(self, rows: Iterable[Dict[str, Any]], header: List[str], to_row, header_color: str) -> Iterator:
+        """
+        One titled table per category, split into TABLE_CHUNK_ROWS-row
+        tables (header repeated) so no table holds more than about a page
+        """
+        style = _table_style(header_color)
+        for category, items in _by_category(rows):
             cat_title = category.replace("_", " ").title()
-            elements.append(Paragraph(cat_title, self.styles['Heading3']))
-            elements.append(Spacer(1, 6))
-            
-            # Build table data
-            data = [['Check', 'Status', 'Purpose']]
-            for check in checks:
-                status_emoji = {
-                    'passed': '✅',
-                    'failed': '❌',
-                    'warning': '⚠️'
-                }.get(check.get('status'), '❓')
-                
-                check_name = check.get('check', 'Unknown')
-                status = f"{status_emoji} {check.get('status', 'unknown').upper()}"
-                purpose = check.get('purpose', check.get('reason', 'N/A'))[:40]
-                
-                data.append([check_name, status, purpose])
+            yield Paragraph(cat_title, self.styles['Heading3'])
+            yield Spacer(1, 6)
             
-            table = Table(data, colWidths=[2.5*inch, 1.5*inch, 2.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2196F3')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 18))
-        
-        return elements
+            for chunk in _chunks(map(to_row, items), TABLE_CHUNK_ROWS):
+                yield Table([header] + chunk, colWidths=[2.5*inch, 1.5*inch, 2.5*inch], style=style, repeatRows=1)
+            yield Spacer(1, 18)
     
     def _create_recommendations(self, integrity: Dict, finalizer: Dict) -> list:
         """Create recommendations section"""
@@ -297,67 +408,154 @@ class EvidenceExporter:
         elements.append(Paragraph("Recommendations", self.styles['CustomHeading']))
         elements.append(Spacer(1, 12))
         
-        recommendations = []
-        
-        # Check for failures
-        integrity_failed = integrity.get("summary", {}).get("failed", 0)
-        finalizer_failed = finalizer.get("summary", {}).get("failed", 0)
+        for rec in _recommendations(integrity, finalizer):
+            elements.append(Paragraph(rec, self.styles['Normal']))
+            elements.append(Spacer(1, 6))
         
-        if integrity_failed > 0:
-            recommendations.append(f"• Address {integrity_failed} failed integrity test(s) before deployment")
+        return elements
+    
+    def export_to_json(self, integrity_results: Dict[str, Any], finalizer_results: Dict[str, Any],
+                       output_path: Union[str, IO[str]]) -> Union[str, IO[str]]:
+        """
+        Write the evidence as one JSON document (quick-view format)
         
-        if finalizer_failed > 0:
-            recommendations.append(f"• Fix {finalizer_failed} finalizer validation error(s)")
+        Result rows are serialised one at a time as they are read.
         
-        if integrity_failed == 0 and finalizer_failed == 0:
-            recommendations.append("• ✅ All checks passed - system is production-ready")
-            recommendations.append("• Schedule regular integrity tests (weekly recommended)")
-            recommendations.append("• Monitor uptime and performance metrics")
-        else:
-            recommendations.append("• Review detailed error logs above")
-            recommendations.append("• Re-run integrity test after fixes")
-            recommendations.append("• Contact support if issues persist")
+        Returns:
+            Path (or stream) the JSON was written to
+        """
+        with _open_text(output_path) as out:
+            out.write('{"report": "Levqor Integrity Report"')
+            out.write(f', "generated_at": {json.dumps(datetime.utcnow().isoformat())}')
+            out.write(f', "overall_passed": {json.dumps(_overall_passed(integrity_results, finalizer_results))}')
+            for name, section, key in (("integrity", integrity_results, "results"),
+                                       ("finalizer", finalizer_results, "validations")):
+                out.write(f', {json.dumps(name)}: {{"summary": {json.dumps(section.get("summary", {}), default=str)}')
+                out.write(f', {json.dumps(key)}: [')
+                for i, row in enumerate(section.get(key, [])):
+                    out.write((", " if i else "") + json.dumps(row, default=str))
+                out.write("]}")
+            recommendations = [rec.lstrip("• ") for rec in _recommendations(integrity_results, finalizer_results)]
+            out.write(f', "recommendations": {json.dumps(recommendations)}}}\n')
+        return output_path
+    
+    def export_to_html(self, integrity_results: Dict[str, Any], finalizer_results: Dict[str, Any],
+                       output_path: Union[str, IO[str]]) -> Union[str, IO[str]]:
+        """
+        Write the evidence as a self-contained HTML page (quick-view format)
         
-        for rec in recommendations:
-            elements.append(Paragraph(rec, self.styles['Normal']))
-            elements.append(Spacer(1, 6))
+        Same sections and tables as the PDF, streamed row by row.
         
-        return elements
+        Returns:
+            Path (or stream) the HTML was written to
+        """
+        esc = html.escape
+        with _open_text(output_path) as out:
+            overall = "✅ PASSED" if _overall_passed(integrity_results, finalizer_results) else "⚠️ NEEDS ATTENTION"
+            out.write(_HTML_HEAD)
+            out.write(f"<h1>Levqor Integrity Report</h1>\n<p>Generated: {esc(datetime.utcnow().strftime('%B %d, %Y at %I:%M %p UTC'))}</p>\n")
+            out.write(f"<h2>Overall Status: {overall}</h2>\n")
+            
+            out.write("<h2>Executive Summary</h2>\n<table><tr><th>Category</th><th>Total</th><th>Passed</th><th>Failed</th><th>Success Rate</th></tr>\n")
+            for label, section in (("Integrity Tests", integrity_results), ("Finalizer Checks", finalizer_results)):
+                summary = section.get("summary", {})
+                cells = [label] + [str(summary.get(k, 0)) for k in ("total", "passed", "failed")] + [f"{summary.get('success_rate', 0)}%"]
+                out.write("<tr>" + "".join(f"<td>{esc(c)}</td>" for c in cells) + "</tr>\n")
+            out.write("</table>\n")
+            
+            for title, rows, header, to_row in (
+                ("Integrity Test Results", integrity_results.get("results", []), ['Test', 'Status', 'Details'], _integrity_row),
+                ("Finalizer Validation Results", finalizer_results.get("validations", []), ['Check', 'Status', 'Purpose'], _finalizer_row),
+            ):
+                out.write(f"<h2>{title}</h2>\n")
+                for category, items in _by_category(rows):
+                    out.write(f"<h3>{esc(category.replace('_', ' ').title())}</h3>\n<table><tr>")
+                    out.write("".join(f"<th>{h}</th>" for h in header) + "</tr>\n")
+                    for item in items:
+                        out.write("<tr>" + "".join(f"<td>{esc(str(c))}</td>" for c in to_row(item)) + "</tr>\n")
+                    out.write("</table>\n")
+            
+            out.write("<h2>Recommendations</h2>\n<ul>\n")
+            for rec in _recommendations(integrity_results, finalizer_results):
+                out.write(f"<li>{esc(rec.lstrip('• '))}</li>\n")
+            out.write("</ul>\n</body>\n</html>\n")
+        return output_path
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Levqor Integrity Report</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #999; padding: 4px 8px; font-size: 13px; text-align: left; }
+th { background: #444; color: #fff; }
+tr:nth-child(even) td { background: #eee; }
+</style>
+</head>
+<body>
+"""
+
+
+@contextmanager
+def _open_text(output: Union[str, IO[str]]):
+    """Open `output` for writing if it is a path; pass streams through unclosed"""
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "w", encoding="utf-8") as f:
+            yield f
+    else:
+        yield output
 
 
-def generate_evidence_report(integrity_results: Dict[str, Any], finalizer_results: Dict[str, Any], output_dir: str = ".") -> str:
+EXPORT_FORMATS = {
+    "pdf": EvidenceExporter.export_to_pdf,
+    "json": EvidenceExporter.export_to_json,
+    "html": EvidenceExporter.export_to_html,
+}
+
+
+def generate_evidence_report(integrity_results: Dict[str, Any], finalizer_results: Dict[str, Any],
+                             output_dir: str = ".", fmt: str = "pdf") -> str:
     """
-    Convenience function to generate evidence PDF report
+    Convenience function to generate an evidence report file
     
     Args:
         integrity_results: Results from IntegrityTester
         finalizer_results: Results from Finalizer
-        output_dir: Directory to save PDF file
+        output_dir: Directory to save the report in
+        fmt: "pdf", or "json" / "html" for the quick-view formats
     
     Returns:
-        Path to generated PDF file
+        Path to generated report file
     """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown evidence format {fmt!r}, expected one of {sorted(EXPORT_FORMATS)}")
+    
     timestamp = int(datetime.utcnow().timestamp())
-    filename = f"integrity_evidence_{timestamp}.pdf"
+    filename = f"integrity_evidence_{timestamp}.{fmt}"
     output_path = os.path.join(output_dir, filename)
     
-    exporter = EvidenceExporter()
-    return exporter.export_to_pdf(integrity_results, finalizer_results, output_path)
+    return EXPORT_FORMATS[fmt](EvidenceExporter(), integrity_results, finalizer_results, output_path)
 
 
 if __name__ == "__main__":
     # Example usage - load from JSON files
-    import sys
+    import argparse
     
-    if len(sys.argv) < 3:
-        print("Usage: python evidence_export.py <integrity_report.json> <finalizer_report.json>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Build an evidence report from saved integrity/finalizer JSON")
+    parser.add_argument("integrity_report", help="integrity_report_*.json")
+    parser.add_argument("finalizer_report", help="finalizer_report_*.json")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="pdf", help="Report format")
+    parser.add_argument("--output-dir", default=".", help="Directory for the report")
+    args = parser.parse_args()
     
-    with open(sys.argv[1], 'r') as f:
+    with open(args.integrity_report, 'r') as f:
         integrity_data = json.load(f)
     
-    with open(sys.argv[2], 'r') as f:
+    with open(args.finalizer_report, 'r') as f:
         finalizer_data = json.load(f)
     
-    pdf_path = generate_evidence_report(integrity_data, finalizer_data)
-    print(f"\n✅ Evidence report generated: {pdf_path}")
+    report_path = generate_evidence_report(integrity_data, finalizer_data, args.output_dir, args.format)
+    print(f"\n✅ Evidence report generated: {report_path}")
@@ -2,283 +2,357 @@
 Integrity Test Engine
 Runs E2E verification of workflows, DB writes, external API calls
 Produces JSON summary of test results
+
+Checks are declared with their dependencies and run concurrently: a
+check starts as soon as everything it depends on has passed (dependents
+of a failed check are skipped), and each one has its own timeout, so a
+run takes about as long as its slowest dependency chain.
+
+The target is https://api.levqor.ai / https://levqor.ai by default, or
+any base URL (e.g. http://localhost:8000), or a Flask app served through
+its test client (no network). With offline=True checks that need the
+internet (Stripe) are skipped, so the pack can run in CI.
 """
 import os
 import sys
 import time
 import json
-import requests
+import argparse
 import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, List, Any, Optional
+
+import requests
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
+BACKEND_URL = os.getenv("INTEGRITY_BACKEND_URL", "https://api.levqor.ai")
+FRONTEND_URL = os.getenv("INTEGRITY_FRONTEND_URL", "https://levqor.ai")
+CHECK_TIMEOUT_SECONDS = float(os.getenv("INTEGRITY_CHECK_TIMEOUT", 10))
+MAX_WORKERS = int(os.getenv("INTEGRITY_MAX_WORKERS", 8))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one check"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.samples: List[float] = []
+
+    def observe(self, latency_ms: float):
+        self.samples.append(latency_ms)
+        for i, bound in enumerate(self.buckets):
+            if latency_ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 2)
+
+        labels = [f"le_{b}ms" for b in self.buckets] + [f"gt_{self.buckets[-1]}ms"]
+        return {
+            "count": len(ordered),
+            "min_ms": round(ordered[0], 2) if ordered else None,
+            "p50_ms": pct(50) if ordered else None,
+            "p95_ms": pct(95) if ordered else None,
+            "max_ms": round(ordered[-1], 2) if ordered else None,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class Check:
+    """
+    One integrity check
+
+    `fn()` returns a result dict (or a list of them) with at least
+    "status"; "test" and "category" default to the check's own.
+    """
+
+    def __init__(self, name: str, category: str, fn: Callable, depends_on: Iterable[str] = (),
+                 timeout: float = CHECK_TIMEOUT_SECONDS, needs_network: bool = False):
+        self.name = name
+        self.category = category
+        self.fn = fn
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.needs_network = needs_network
+
+
+class HttpTarget:
+    """GETs against a base URL, or against a Flask app through its test client"""
+
+    def __init__(self, base_url: Optional[str] = None, app=None):
+        self.base_url = (base_url or "").rstrip("/")
+        self.app = app
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def get(self, path: str, timeout: float = CHECK_TIMEOUT_SECONDS, headers=None):
+        """Returns (status_code, headers)"""
+        if self.app is not None:
+            # Test clients aren't shared between threads
+            response = self.app.test_client().get(path, headers=headers)
+            return response.status_code, response.headers
+        response = self._session().get(f"{self.base_url}{path}", timeout=timeout, headers=headers)
+        return response.status_code, response.headers
+
+    def describe(self) -> str:
+        return f"flask:{self.app.name}" if self.app is not None else self.base_url
+
 
 class IntegrityTester:
     """E2E integrity verification for Levqor platform"""
-    
-    def __init__(self):
+
+    HEALTH_ENDPOINTS = [
+        ("Main Health", "/health"),
+        ("Public Metrics", "/public/metrics"),
+        ("Ops Uptime", "/ops/uptime"),
+        ("Queue Health", "/ops/queue_health"),
+        ("Billing Health", "/billing/health"),
+    ]
+
+    SECURITY_HEADERS = {
+        "Strict-Transport-Security": "HSTS",
+        "X-Content-Type-Options": "Content Type Protection",
+        "X-Frame-Options": "Clickjacking Protection",
+    }
+
+    def __init__(self, base_url: Optional[str] = None, frontend_url: Optional[str] = None, app=None,
+                 db_path: Optional[str] = None, offline: bool = False, max_workers: int = MAX_WORKERS):
+        """
+        Args:
+            base_url: Backend to test (default INTEGRITY_BACKEND_URL)
+            frontend_url: Site checked for security headers; defaults to
+                the backend when base_url or app is given
+            app: Flask app to test in-process via its test client
+            db_path: SQLite database (default from DATABASE_URL)
+            offline: Skip checks that need internet access
+        """
+        self.backend = HttpTarget(base_url or BACKEND_URL, app=app)
+        if frontend_url:
+            self.frontend = HttpTarget(frontend_url)
+        elif app is not None or base_url is not None:
+            self.frontend = self.backend
+        else:
+            self.frontend = HttpTarget(FRONTEND_URL)
+        self.db_path = db_path
+        self.offline = offline
+        self.max_workers = max_workers
+        self.checks = self.default_checks()
+        self.histograms: Dict[str, LatencyHistogram] = {}
         self.results = []
         self.start_time = None
         self.end_time = None
-        
+
+    def default_checks(self) -> List[Check]:
+        """The standard integrity suite"""
+        checks = []
+        for name, path in self.HEALTH_ENDPOINTS:
+            checks.append(Check(
+                f"Backend: {name}", "backend_health", self._endpoint_check(path),
+                # Skip the rest if the backend isn't up at all
+                depends_on=() if path == "/health" else ("Backend: Main Health",)
+            ))
+        checks += [
+            Check("Database: Connectivity", "database", self.check_database_read),
+            Check("Database: Schema Validation", "database", self.check_database_schema,
+                  depends_on=("Database: Connectivity",)),
+            Check("External API: Stripe", "external_api", self.check_stripe, needs_network=True),
+            Check("Workflow: APScheduler Status", "workflow", self.check_scheduler),
+            Check("Security: Headers Check", "security", self.check_security_headers),
+        ]
+        return checks
+
     def run_all_tests(self) -> Dict[str, Any]:
         """Run complete integrity test suite"""
         self.start_time = datetime.utcnow()
-        
-        print("🔍 Starting Integrity Test Suite...")
-        
-        # Test categories
-        self.test_backend_health()
-        self.test_database_connectivity()
-        self.test_external_apis()
-        self.test_workflow_execution()
-        self.test_security_headers()
-        
+        self.results = []
+
+        print(f"🔍 Starting Integrity Test Suite against {self.backend.describe()}...")
+        self._run_checks(self.checks)
+
         self.end_time = datetime.utcnow()
-        
+
         return self.generate_summary()
-    
-    def test_backend_health(self):
-        """Test all backend health endpoints"""
-        print("\n📋 Testing Backend Health Endpoints...")
-        
-        endpoints = [
-            {"name": "Main Health", "url": "https://api.levqor.ai/health"},
-            {"name": "Public Metrics", "url": "https://api.levqor.ai/public/metrics"},
-            {"name": "Ops Uptime", "url": "https://api.levqor.ai/ops/uptime"},
-            {"name": "Queue Health", "url": "https://api.levqor.ai/ops/queue_health"},
-            {"name": "Billing Health", "url": "https://api.levqor.ai/billing/health"},
-        ]
-        
-        for endpoint in endpoints:
-            start = time.time()
-            try:
-                response = requests.get(endpoint["url"], timeout=10)
-                latency = int((time.time() - start) * 1000)
-                
-                result = {
-                    "test": f"Backend: {endpoint['name']}",
-                    "category": "backend_health",
-                    "status": "passed" if response.status_code == 200 else "failed",
-                    "latency_ms": latency,
-                    "status_code": response.status_code,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
-                
-                if response.status_code == 200:
-                    print(f"  ✅ {endpoint['name']}: OK ({latency}ms)")
-                else:
-                    print(f"  ❌ {endpoint['name']}: HTTP {response.status_code}")
-                    result["error"] = f"HTTP {response.status_code}"
-                
-                self.results.append(result)
-                
-            except Exception as e:
-                print(f"  ❌ {endpoint['name']}: {str(e)}")
-                self.results.append({
-                    "test": f"Backend: {endpoint['name']}",
-                    "category": "backend_health",
-                    "status": "failed",
-                    "error": str(e),
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-    
-    def test_database_connectivity(self):
-        """Test database connectivity and operations"""
-        print("\n📋 Testing Database Connectivity...")
-        
+
+    def _run_checks(self, checks: List[Check]):
+        by_name = {c.name: c for c in checks}
+        unknown = {d for c in checks for d in c.depends_on if d not in by_name}
+        if unknown:
+            raise ValueError(f"Unknown check dependencies: {sorted(unknown)}")
+
+        outcome: Dict[str, str] = {}
+        pending = list(checks)
+        running = {}  # future -> (check, started, deadline)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="integrity")
+        try:
+            while pending or running:
+                progressed = False
+                for check in list(pending):
+                    if self.offline and check.needs_network:
+                        pending.remove(check)
+                        progressed = True
+                        outcome[check.name] = "skipped"
+                        self._record(check, {"status": "skipped", "reason": "offline mode"}, None)
+                        continue
+                    failed_deps = [d for d in check.depends_on if d in outcome and outcome[d] != "passed"]
+                    if failed_deps:
+                        pending.remove(check)
+                        progressed = True
+                        outcome[check.name] = "skipped"
+                        self._record(check, {"status": "skipped", "reason": f"dependency not passed: {', '.join(failed_deps)}"}, None)
+                        continue
+                    if all(d in outcome for d in check.depends_on):
+                        pending.remove(check)
+                        progressed = True
+                        started = time.perf_counter()
+                        running[executor.submit(check.fn)] = (check, started, started + check.timeout)
+
+                if not running:
+                    if not progressed:
+                        raise ValueError(f"Circular check dependencies: {sorted(c.name for c in pending)}")
+                    continue
+
+                now = time.perf_counter()
+                next_deadline = min(deadline for _, _, deadline in running.values())
+                done, _ = wait(list(running), timeout=max(0, next_deadline - now), return_when=FIRST_COMPLETED)
+                now = time.perf_counter()
+
+                for future in list(running):
+                    check, started, deadline = running[future]
+                    if future in done:
+                        latency_ms = (now - started) * 1000
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            results = {"status": "failed", "error": str(e)}
+                    elif now >= deadline:
+                        # The worker thread can't be interrupted; its late result is discarded
+                        latency_ms = check.timeout * 1000
+                        results = {"status": "failed", "error": f"Timed out after {check.timeout:g}s"}
+                    else:
+                        continue
+                    del running[future]
+                    results = results if isinstance(results, list) else [results]
+                    statuses = [r["status"] for r in results]
+                    if "failed" in statuses:
+                        outcome[check.name] = "failed"
+                    elif all(status == "skipped" for status in statuses):
+                        outcome[check.name] = "skipped"
+                    else:
+                        outcome[check.name] = "passed"
+                    for result in results:
+                        self._record(check, result, latency_ms)
+        finally:
+            executor.shutdown(wait=False)
+
+    def _record(self, check: Check, result: Dict[str, Any], latency_ms: Optional[float]):
+        result = dict(result)
+        result.setdefault("test", check.name)
+        result.setdefault("category", check.category)
+        if latency_ms is not None:
+            result.setdefault("latency_ms", int(latency_ms))
+            self.histograms.setdefault(check.name, LatencyHistogram()).observe(latency_ms)
+        result["timestamp"] = datetime.utcnow().isoformat()
+
+        icon = {"passed": "✅", "failed": "❌", "warning": "⚠️ ", "skipped": "⏭️ "}.get(result["status"], "•")
+        detail = result.get("error") or result.get("reason") or f"{result.get('latency_ms', 0)}ms"
+        print(f"  {icon} {result['test']}: {detail}")
+        self.results.append(result)
+
+    # Checks
+
+    def _endpoint_check(self, path: str) -> Callable:
+        def check():
+            status_code, _ = self.backend.get(path, timeout=CHECK_TIMEOUT_SECONDS)
+            result = {"status": "passed" if status_code == 200 else "failed", "status_code": status_code}
+            if status_code != 200:
+                result["error"] = f"HTTP {status_code}"
+            return result
+        return check
+
+    def _db_file(self) -> Optional[str]:
+        if self.db_path:
+            return self.db_path
         db_path = os.getenv("DATABASE_URL", "levqor.db")
-        
-        # For SQLite
         if db_path.startswith("sqlite") or db_path.endswith(".db"):
-            db_file = db_path.replace("sqlite:///", "")
-            try:
-                conn = sqlite3.connect(db_file)
-                cursor = conn.cursor()
-                
-                # Test read
-                cursor.execute("SELECT COUNT(*) FROM users")
-                user_count = cursor.fetchone()[0]
-                
-                print(f"  ✅ Database Read: {user_count} users")
-                self.results.append({
-                    "test": "Database: Read Users",
-                    "category": "database",
-                    "status": "passed",
-                    "user_count": user_count,
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-                
-                # Test tables exist
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [row[0] for row in cursor.fetchall()]
-                
-                required_tables = ["users", "sessions", "referrals"]
-                missing = [t for t in required_tables if t not in tables]
-                
-                if not missing:
-                    print(f"  ✅ Schema Validation: All tables exist")
-                    self.results.append({
-                        "test": "Database: Schema Validation",
-                        "category": "database",
-                        "status": "passed",
-                        "tables": tables,
-                        "timestamp": datetime.utcnow().isoformat(),
-                    })
-                else:
-                    print(f"  ❌ Schema Validation: Missing tables {missing}")
-                    self.results.append({
-                        "test": "Database: Schema Validation",
-                        "category": "database",
-                        "status": "failed",
-                        "error": f"Missing tables: {missing}",
-                        "timestamp": datetime.utcnow().isoformat(),
-                    })
-                
-                conn.close()
-                
-            except Exception as e:
-                print(f"  ❌ Database Connection: {str(e)}")
-                self.results.append({
-                    "test": "Database: Connectivity",
-                    "category": "database",
-                    "status": "failed",
-                    "error": str(e),
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-    
-    def test_external_apis(self):
-        """Test external API integrations"""
-        print("\n📋 Testing External API Integrations...")
-        
-        # Test Stripe
-        stripe_key = os.getenv("STRIPE_SECRET_KEY", "").strip()
-        if stripe_key and stripe_key.startswith("sk_"):
-            try:
-                headers = {"Authorization": f"Bearer {stripe_key}"}
-                response = requests.get("https://api.stripe.com/v1/balance", headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    print("  ✅ Stripe API: Connected")
-                    self.results.append({
-                        "test": "External API: Stripe",
-                        "category": "external_api",
-                        "status": "passed",
-                        "timestamp": datetime.utcnow().isoformat(),
-                    })
-                else:
-                    print(f"  ❌ Stripe API: HTTP {response.status_code}")
-                    self.results.append({
-                        "test": "External API: Stripe",
-                        "category": "external_api",
-                        "status": "failed",
-                        "error": f"HTTP {response.status_code}",
-                        "timestamp": datetime.utcnow().isoformat(),
-                    })
-            except Exception as e:
-                print(f"  ❌ Stripe API: {str(e)}")
-                self.results.append({
-                    "test": "External API: Stripe",
-                    "category": "external_api",
-                    "status": "failed",
-                    "error": str(e),
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-        else:
-            print("  ⚠️  Stripe API: Not configured")
-            self.results.append({
-                "test": "External API: Stripe",
-                "category": "external_api",
-                "status": "skipped",
-                "reason": "API key not configured",
-                "timestamp": datetime.utcnow().isoformat(),
-            })
-    
-    def test_workflow_execution(self):
-        """Test workflow execution capabilities"""
-        print("\n📋 Testing Workflow Execution...")
-        
-        # Test scheduler status
+            return db_path.replace("sqlite:///", "")
+        return None
+
+    def check_database_read(self):
+        """Test database connectivity and reads"""
+        db_file = self._db_file()
+        if not db_file:
+            return {"status": "skipped", "reason": "Non-SQLite DATABASE_URL"}
+        conn = sqlite3.connect(db_file, timeout=CHECK_TIMEOUT_SECONDS)
         try:
-            from monitors.scheduler import get_scheduler
-            
-            scheduler = get_scheduler()
-            if scheduler and scheduler.running:
-                jobs = scheduler.get_jobs()
-                print(f"  ✅ APScheduler: {len(jobs)} jobs running")
-                self.results.append({
-                    "test": "Workflow: APScheduler Status",
-                    "category": "workflow",
-                    "status": "passed",
-                    "job_count": len(jobs),
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-            else:
-                print("  ❌ APScheduler: Not running")
-                self.results.append({
-                    "test": "Workflow: APScheduler Status",
-                    "category": "workflow",
-                    "status": "failed",
-                    "error": "Scheduler not running",
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-        except Exception as e:
-            print(f"  ❌ Workflow Test: {str(e)}")
-            self.results.append({
-                "test": "Workflow: APScheduler Status",
-                "category": "workflow",
-                "status": "failed",
-                "error": str(e),
-                "timestamp": datetime.utcnow().isoformat(),
-            })
-    
-    def test_security_headers(self):
-        """Test security headers on frontend"""
-        print("\n📋 Testing Security Headers...")
-        
+            user_count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        finally:
+            conn.close()
+        return {"test": "Database: Read Users", "status": "passed", "user_count": user_count}
+
+    def check_database_schema(self):
+        """Test required tables exist"""
+        conn = sqlite3.connect(self._db_file(), timeout=CHECK_TIMEOUT_SECONDS)
         try:
-            response = requests.get("https://levqor.ai", timeout=10)
-            headers = response.headers
-            
-            security_checks = {
-                "Strict-Transport-Security": "HSTS",
-                "X-Content-Type-Options": "Content Type Protection",
-                "X-Frame-Options": "Clickjacking Protection",
-            }
-            
-            for header, name in security_checks.items():
-                if header in headers:
-                    print(f"  ✅ {name}: Present")
-                    self.results.append({
-                        "test": f"Security: {name}",
-                        "category": "security",
-                        "status": "passed",
-                        "header": header,
-                        "value": headers[header],
-                        "timestamp": datetime.utcnow().isoformat(),
-                    })
-                else:
-                    print(f"  ⚠️  {name}: Missing")
-                    self.results.append({
-                        "test": f"Security: {name}",
-                        "category": "security",
-                        "status": "warning",
-                        "header": header,
-                        "reason": "Header not present",
-                        "timestamp": datetime.utcnow().isoformat(),
-                    })
-        except Exception as e:
-            print(f"  ❌ Security Headers Test: {str(e)}")
-            self.results.append({
-                "test": "Security: Headers Check",
-                "category": "security",
-                "status": "failed",
-                "error": str(e),
-                "timestamp": datetime.utcnow().isoformat(),
-            })
-    
+            tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        finally:
+            conn.close()
+
+        required_tables = ["users", "sessions", "referrals"]
+        missing = [t for t in required_tables if t not in tables]
+        if missing:
+            return {"status": "failed", "error": f"Missing tables: {missing}"}
+        return {"status": "passed", "tables": tables}
+
+    def check_stripe(self):
+        """Test the Stripe API key"""
+        stripe_key = os.getenv("STRIPE_SECRET_KEY", "").strip()
+        if not (stripe_key and stripe_key.startswith("sk_")):
+            return {"status": "skipped", "reason": "API key not configured"}
+
+        headers = {"Authorization": f"Bearer {stripe_key}"}
+        response = requests.get("https://api.stripe.com/v1/balance", headers=headers, timeout=CHECK_TIMEOUT_SECONDS)
+        if response.status_code == 200:
+            return {"status": "passed"}
+        return {"status": "failed", "error": f"HTTP {response.status_code}"}
+
+    def check_scheduler(self):
+        """Test workflow execution (scheduler in this process)"""
+        from monitors.scheduler import get_scheduler
+
+        scheduler = get_scheduler()
+        if scheduler and scheduler.running:
+            return {"status": "passed", "job_count": len(scheduler.get_jobs())}
+        return {"status": "failed", "error": "Scheduler not running"}
+
+    def check_security_headers(self):
+        """Test security headers on the frontend"""
+        _, headers = self.frontend.get("/", timeout=CHECK_TIMEOUT_SECONDS)
+
+        results = []
+        for header, name in self.SECURITY_HEADERS.items():
+            if header in headers:
+                results.append({"test": f"Security: {name}", "status": "passed", "header": header, "value": headers[header]})
+            else:
+                results.append({"test": f"Security: {name}", "status": "warning", "header": header, "reason": "Header not present"})
+        return results
+
     def generate_summary(self) -> Dict[str, Any]:
         """Generate JSON summary of test results"""
         passed = sum(1 for r in self.results if r["status"] == "passed")
@@ -286,9 +360,9 @@ class IntegrityTester:
         warnings = sum(1 for r in self.results if r["status"] == "warning")
         skipped = sum(1 for r in self.results if r["status"] == "skipped")
         total = len(self.results)
-        
+
         duration = (self.end_time - self.start_time).total_seconds() if self.end_time and self.start_time else 0
-        
+
         summary = {
             "test_run_id": f"integrity_{int(time.time())}",
             "timestamp": self.start_time.isoformat() if self.start_time else None,
@@ -302,13 +376,15 @@ class IntegrityTester:
                 "success_rate": round((passed / total * 100) if total > 0 else 0, 2),
             },
             "results": self.results,
+            # Accumulated over every run of this tester
+            "latency_histograms": {name: h.to_dict() for name, h in self.histograms.items()},
             "platform": {
-                "backend": "api.levqor.ai",
-                "frontend": "levqor.ai",
+                "backend": self.backend.describe(),
+                "frontend": self.frontend.describe(),
                 "database": "PostgreSQL/SQLite",
             }
         }
-        
+
         print(f"\n" + "="*60)
         print(f"📊 INTEGRITY TEST SUMMARY")
         print("="*60)
@@ -320,21 +396,45 @@ class IntegrityTester:
         print(f"Success Rate: {summary['summary']['success_rate']}%")
         print(f"Duration: {duration:.2f}s")
         print("="*60)
-        
+
         return summary
 
 
+def build_tester(args) -> IntegrityTester:
+    """IntegrityTester from parsed CLI arguments"""
+    app = None
+    if args.local_app:
+        from run import app
+    return IntegrityTester(base_url=args.base_url, frontend_url=args.frontend_url, app=app,
+                           db_path=args.db_path, offline=args.offline)
+
+
+def add_target_arguments(parser: argparse.ArgumentParser):
+    """CLI options selecting what the integrity tests run against"""
+    parser.add_argument("--base-url", help="Backend base URL (default INTEGRITY_BACKEND_URL)")
+    parser.add_argument("--frontend-url", help="Site checked for security headers")
+    parser.add_argument("--local-app", action="store_true", help="Test run.app in-process via the Flask test client")
+    parser.add_argument("--db-path", help="SQLite database to check")
+    parser.add_argument("--offline", action="store_true", help="Skip checks that need internet access")
+
+
 if __name__ == "__main__":
-    tester = IntegrityTester()
-    summary = tester.run_all_tests()
-    
+    parser = argparse.ArgumentParser(description="Run the Levqor integrity test suite")
+    add_target_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=1, help="Repeat the suite to build latency histograms")
+    args = parser.parse_args()
+
+    tester = build_tester(args)
+    for _ in range(args.iterations):
+        summary = tester.run_all_tests()
+
     # Save to file
     output_file = f"integrity_report_{int(time.time())}.json"
     with open(output_file, 'w') as f:
         json.dump(summary, f, indent=2)
-    
+
     print(f"\n💾 Report saved to: {output_file}")
-    
+
     # Exit with error code if tests failed
     exit_code = 0 if summary["summary"]["failed"] == 0 else 1
     exit(exit_code)
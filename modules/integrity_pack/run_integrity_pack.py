@@ -6,11 +6,12 @@ Runs integrity tests, finalizer validation, and generates PDF evidence report
 import os
 import sys
 import json
+import argparse
 from datetime import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from modules.integrity_pack.integrity_test import IntegrityTester
+from modules.integrity_pack.integrity_test import IntegrityTester, add_target_arguments, build_tester
 from modules.integrity_pack.finalizer import Finalizer
 from modules.integrity_pack.evidence_export import generate_evidence_report
 
@@ -73,12 +74,13 @@ PDF Report: {pdf_path}
         return False
 
 
-def run_full_integrity_pack(output_dir: str = ".") -> dict:
+def run_full_integrity_pack(output_dir: str = ".", tester: IntegrityTester = None) -> dict:
     """
     Run complete Integrity Pack suite
     
     Args:
         output_dir: Directory to save reports
+        tester: Configured IntegrityTester (default: production targets)
     
     Returns:
         Dict with paths to generated files and summary
@@ -92,7 +94,7 @@ def run_full_integrity_pack(output_dir: str = ".") -> dict:
     # Step 1: Run Integrity Tests
     print("STEP 1: Running Integrity Tests...")
     print("-"*70)
-    tester = IntegrityTester()
+    tester = tester or IntegrityTester()
     integrity_results = tester.run_all_tests()
     
     # Save integrity results
@@ -120,6 +122,8 @@ def run_full_integrity_pack(output_dir: str = ".") -> dict:
     print("STEP 3: Generating PDF Evidence Report...")
     print("-"*70)
     pdf_path = generate_evidence_report(integrity_results, finalizer_results, output_dir)
+    html_path = generate_evidence_report(integrity_results, finalizer_results, output_dir, fmt="html")
+    print(f"✅ HTML quick view saved: {html_path}")
     print()
     
     # Step 4: Log to Notion (if configured)
@@ -147,6 +151,7 @@ def run_full_integrity_pack(output_dir: str = ".") -> dict:
     print(f"  • Integrity JSON: {integrity_json}")
     print(f"  • Finalizer JSON: {finalizer_json}")
     print(f"  • Evidence PDF:   {pdf_path}")
+    print(f"  • Evidence HTML:  {html_path}")
     print("="*70)
     
     return {
@@ -154,6 +159,7 @@ def run_full_integrity_pack(output_dir: str = ".") -> dict:
         "integrity_json": integrity_json,
         "finalizer_json": finalizer_json,
         "evidence_pdf": pdf_path,
+        "evidence_html": html_path,
         "summary": {
             "integrity": integrity_results["summary"],
             "finalizer": finalizer_results["summary"],
@@ -162,12 +168,17 @@ def run_full_integrity_pack(output_dir: str = ".") -> dict:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Levqor Integrity + Finalizer Pack")
+    add_target_arguments(parser)
+    parser.add_argument("--output-dir", default="integrity_reports", help="Directory for reports")
+    args = parser.parse_args()
+    
     # Create reports directory if it doesn't exist
-    reports_dir = "integrity_reports"
+    reports_dir = args.output_dir
     os.makedirs(reports_dir, exist_ok=True)
     
     # Run the full pack
-    results = run_full_integrity_pack(reports_dir)
+    results = run_full_integrity_pack(reports_dir, tester=build_tester(args))
     
     # Exit with appropriate code
     exit_code = 0 if results["overall_passed"] else 1
@@ -0,0 +1,11 @@
+"""
+KV Store Module
+Cached, batched access to runtime cost/revenue metrics in the `kv` table
+"""
+from .store import KVStore, get_kv_store, init_kv_tables
+
+__all__ = [
+    "KVStore",
+    "get_kv_store",
+    "init_kv_tables"
+]
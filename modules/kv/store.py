@@ -0,0 +1,250 @@
+"""
+KV Store - Typed access to the `kv` runtime table
+Batched reads, write-through caching and a value history for time-range queries
+"""
+import os
+import sqlite3
+import logging
+import threading
+from time import time, monotonic
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger("levqor.kv")
+
+DEFAULT_TTL_SECONDS = float(os.environ.get("KV_CACHE_TTL", 60))
+
+_MISSING = object()
+
+
+def init_kv_tables(db_connection):
+    """Initialize the kv table and its append-only history"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS kv(
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS kv_history(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            recorded_at REAL NOT NULL
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_kv_history_key_recorded ON kv_history(key, recorded_at)")
+
+
+class KVStore:
+    """
+    Process-local view of the `kv` table.
+
+    Reads are served from an in-memory cache for `ttl` seconds; writes go to
+    the database first and then update the cache (write-through). Every
+    write is also appended to `kv_history` in the same transaction.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl: float = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path or os.environ.get("SQLITE_PATH", "levqor.db")
+        self.ttl = ttl
+        self._conn = None
+        self._lock = threading.RLock()
+        self._cache: Dict[str, Tuple[Optional[str], float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            init_kv_tables(self._conn)
+            self._conn.commit()
+        return self._conn
+
+    def _cached(self, key: str, now: float):
+        entry = self._cache.get(key)
+        if entry is None or entry[1] <= now:
+            return _MISSING
+        return entry[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Fetch several keys at once.
+
+        Cached keys are answered from memory; the rest are loaded with a
+        single SELECT. Keys absent from the table map to None (and that
+        absence is cached too).
+        """
+        keys = list(dict.fromkeys(keys))
+        result: Dict[str, Optional[str]] = {}
+        with self._lock:
+            now = monotonic()
+            pending = []
+            for key in keys:
+                value = self._cached(key, now)
+                if value is _MISSING:
+                    pending.append(key)
+                else:
+                    result[key] = value
+            self.hits += len(keys) - len(pending)
+            self.misses += len(pending)
+
+            if pending:
+                placeholders = ",".join("?" * len(pending))
+                rows = self._get_conn().execute(
+                    f"SELECT key, value FROM kv WHERE key IN ({placeholders})",
+                    pending
+                ).fetchall()
+                found = dict(rows)
+                expires = now + self.ttl
+                for key in pending:
+                    value = found.get(key)
+                    self._cache[key] = (value, expires)
+                    result[key] = value
+        return result
+
+    def get(self, key: str, default: Any = None, cast: Optional[Callable[[str], Any]] = None) -> Any:
+        """Fetch a single key, optionally converting it with `cast`"""
+        return self.get_typed({key: default}, cast=cast)[key]
+
+    def get_typed(self, defaults: Dict[str, Any], cast: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+        """
+        Fetch every key in `defaults` in one round trip.
+
+        Missing keys, or values that `cast` rejects, fall back to the
+        default for that key.
+        """
+        raw = self.get_many(defaults.keys())
+        typed = {}
+        for key, default in defaults.items():
+            value = raw.get(key)
+            if value is None:
+                typed[key] = default
+                continue
+            try:
+                typed[key] = cast(value) if cast else value
+            except (ValueError, TypeError):
+                log.warning(f"KV value for {key!r} is not valid: {value!r}")
+                typed[key] = default
+        return typed
+
+    def get_floats(self, defaults: Dict[str, float]) -> Dict[str, float]:
+        """Shorthand for numeric cost/revenue keys"""
+        return self.get_typed(defaults, cast=float)
+
+    def set_many(self, values: Dict[str, Any]) -> None:
+        """
+        Write several keys atomically.
+
+        All upserts and history rows are committed in one transaction; the
+        cache is only updated once the commit succeeds.
+        """
+        if not values:
+            return
+        now = time()
+        rows = [(key, str(value)) for key, value in values.items()]
+        with self._lock:
+            conn = self._get_conn()
+            try:
+                conn.executemany("""
+                    INSERT INTO kv (key, value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(key) DO UPDATE SET
+                        value = excluded.value,
+                        updated_at = CURRENT_TIMESTAMP
+                """, rows)
+                conn.executemany(
+                    "INSERT INTO kv_history (key, value, recorded_at) VALUES (?, ?, ?)",
+                    [(key, value, now) for key, value in rows]
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            expires = monotonic() + self.ttl
+            for key, value in rows:
+                self._cache[key] = (value, expires)
+
+    def set(self, key: str, value: Any) -> None:
+        """Write a single key"""
+        self.set_many({key: value})
+
+    def history(
+        self,
+        keys: Iterable[str],
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cast: Optional[Callable[[str], Any]] = None
+    ) -> Dict[str, List[Tuple[float, Any]]]:
+        """
+        Return recorded values for `keys` between `since` and `until`
+        (unix timestamps, both inclusive), oldest first, in one query.
+        """
+        keys = list(dict.fromkeys(keys))
+        series: Dict[str, List[Tuple[float, Any]]] = {key: [] for key in keys}
+        if not keys:
+            return series
+
+        placeholders = ",".join("?" * len(keys))
+        query = f"SELECT key, value, recorded_at FROM kv_history WHERE key IN ({placeholders})"
+        params: List[Any] = list(keys)
+        if since is not None:
+            query += " AND recorded_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND recorded_at <= ?"
+            params.append(until)
+        query += " ORDER BY key, recorded_at"
+
+        with self._lock:
+            rows = self._get_conn().execute(query, params).fetchall()
+
+        for key, value, recorded_at in rows:
+            if cast:
+                try:
+                    value = cast(value)
+                except (ValueError, TypeError):
+                    continue
+            series[key].append((recorded_at, value))
+        return series
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> None:
+        """Drop cached entries (all of them if `keys` is None)"""
+        with self._lock:
+            if keys is None:
+                self._cache.clear()
+            else:
+                for key in keys:
+                    self._cache.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "cached_keys": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cache.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_kv_store() -> KVStore:
+    """Singleton store instance"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KVStore()
+    return _store
@@ -9,6 +9,8 @@ import sqlite3
 import os
 import json
 
+from .search import search_listings, invalidate_listing_counts
+
 bp = Blueprint("marketplace_listings", __name__, url_prefix="/api/marketplace")
 
 def get_db():
@@ -25,85 +27,40 @@ def get_listings():
     - category: Filter by category
     - partner_id: Filter by partner
     - verified_only: Only show verified listings (default: true)
+    - q: Full-text search over name and description
     - limit: Max results (default: 50)
-    - offset: Pagination offset (default: 0)
+    - cursor: Keyset cursor from a previous page's next_cursor
+    - offset: Pagination offset (default: 0, ignored when cursor is set)
     
     Response:
     {
       "ok": true,
       "listings": [...],
       "count": 10,
-      "total": 100
+      "total": 100,
+      "next_cursor": "..." | null
     }
     """
     try:
-        category = request.args.get("category")
-        partner_id = request.args.get("partner_id")
-        verified_only = request.args.get("verified_only", "true") == "true"
-        limit = min(int(request.args.get("limit", 50)), 100)
-        offset = int(request.args.get("offset", 0))
-        
-        db = get_db()
-        cursor = db.cursor()
-        
-        # Build query
-        query = """
-            SELECT l.id, l.partner_id, l.name, l.description, l.category,
-                   l.price_cents, l.is_verified, l.is_active, l.downloads,
-                   l.rating, l.created_at, p.name as partner_name
-            FROM listings l
-            JOIN partners p ON l.partner_id = p.id
-            WHERE l.is_active = 1
-        """
-        params = []
-        
-        if verified_only:
-            query += " AND l.is_verified = 1 AND p.is_verified = 1"
-        
-        if category:
-            query += " AND l.category = ?"
-            params.append(category)
-        
-        if partner_id:
-            query += " AND l.partner_id = ?"
-            params.append(partner_id)
-        
-        # Get total count
-        count_query = query.replace("SELECT l.id, l.partner_id, l.name, l.description, l.category, l.price_cents, l.is_verified, l.is_active, l.downloads, l.rating, l.created_at, p.name as partner_name", "SELECT COUNT(*)")
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()[0]
-        
-        # Add ordering and pagination
-        query += " ORDER BY l.downloads DESC, l.created_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        listings = []
-        for row in rows:
-            listings.append({
-                "id": row[0],
-                "partner_id": row[1],
-                "name": row[2],
-                "description": row[3],
-                "category": row[4],
-                "price": row[5] / 100.0,  # Convert to dollars
-                "is_verified": bool(row[6]),
-                "is_active": bool(row[7]),
-                "downloads": row[8],
-                "rating": row[9],
-                "created_at": row[10],
-                "partner_name": row[11]
-            })
-        
-        db.close()
+        try:
+            page = search_listings(
+                category=request.args.get("category"),
+                partner_id=request.args.get("partner_id"),
+                verified_only=request.args.get("verified_only", "true") == "true",
+                q=(request.args.get("q") or "").strip() or None,
+                limit=max(1, min(int(request.args.get("limit", 50)), 100)),
+                cursor=request.args.get("cursor"),
+                offset=max(0, int(request.args.get("offset", 0)))
+            )
+        except ValueError as e:
+            return jsonify({"error": "invalid_pagination", "message": str(e)}), 400
         
         return jsonify({
             "ok": True,
-            "listings": listings,
-            "count": len(listings),
-            "total": total
+            "listings": page["listings"],
+            "count": len(page["listings"]),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"]
         }), 200
         
     except Exception as e:
@@ -189,6 +146,7 @@ def create_listing():
         
         db.commit()
         db.close()
+        invalidate_listing_counts()
         
         # Log to Notion if available
         try:
@@ -337,6 +295,7 @@ def update_listing(listing_id):
         
         db.commit()
         db.close()
+        invalidate_listing_counts()
         
         return jsonify({
             "ok": True,
@@ -376,6 +335,7 @@ def delete_listing(listing_id):
         
         db.commit()
         db.close()
+        invalidate_listing_counts()
         
         return jsonify({
             "ok": True,
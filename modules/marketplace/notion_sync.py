@@ -1,12 +1,14 @@
 """
 Notion Marketplace Sync
 Logs marketplace listings and sales to Notion for transparency
+Writes go through the Notion write-behind queue (server.notion_queue)
 """
 import os
-import requests
 from datetime import datetime
 from typing import Optional
 
+from server.notion_queue import enqueue_create
+
 NOTION_TOKEN = os.getenv("NOTION_TOKEN", "").strip()
 NOTION_MARKETPLACE_CATALOG_DB_ID = os.getenv("NOTION_MARKETPLACE_CATALOG_DB_ID", "").strip()
 NOTION_MARKETPLACE_SALES_DB_ID = os.getenv("NOTION_MARKETPLACE_SALES_DB_ID", "").strip()
@@ -29,18 +31,12 @@ def log_new_listing(
         price: Price in dollars
         
     Returns:
-        Notion page ID if successful, None otherwise
+        Sync queue entry ID if queued, None otherwise
     """
     if not NOTION_TOKEN or not NOTION_MARKETPLACE_CATALOG_DB_ID:
         print("⚠️ Notion credentials not configured for marketplace catalog")
         return None
     
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     data = {
         "parent": {"database_id": NOTION_MARKETPLACE_CATALOG_DB_ID},
         "properties": {
@@ -68,24 +64,12 @@ def log_new_listing(
         }
     }
     
-    try:
-        response = requests.post(
-            "https://api.notion.com/v1/pages",
-            headers=headers,
-            json=data
-        )
-        
-        if response.status_code == 200:
-            page_id = response.json().get("id")
-            print(f"✅ Logged listing {name} to Notion: {page_id}")
-            return page_id
-        else:
-            print(f"❌ Failed to log to Notion: {response.text}")
-            return None
-            
-    except Exception as e:
-        print(f"❌ Notion logging error: {e}")
-        return None
+    return enqueue_create(
+        NOTION_MARKETPLACE_CATALOG_DB_ID,
+        data["properties"],
+        lookup_property="Listing ID",
+        lookup_value=listing_id
+    )
 
 def log_marketplace_sale(
     order_id: str,
@@ -103,17 +87,11 @@ def log_marketplace_sale(
         partner_name: Partner name
         
     Returns:
-        Notion page ID if successful, None otherwise
+        Sync queue entry ID if queued, None otherwise
     """
     if not NOTION_TOKEN or not NOTION_MARKETPLACE_SALES_DB_ID:
         return None
     
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     data = {
         "parent": {"database_id": NOTION_MARKETPLACE_SALES_DB_ID},
         "properties": {
@@ -135,19 +113,4 @@ def log_marketplace_sale(
         }
     }
     
-    try:
-        response = requests.post(
-            "https://api.notion.com/v1/pages",
-            headers=headers,
-            json=data
-        )
-        
-        if response.status_code == 200:
-            print(f"✅ Logged sale {order_id} to Notion")
-            return response.json().get("id")
-        
-        return None
-        
-    except Exception as e:
-        print(f"❌ Notion sale logging error: {e}")
-        return None
+    return enqueue_create(NOTION_MARKETPLACE_SALES_DB_ID, data["properties"])
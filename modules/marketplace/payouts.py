@@ -6,10 +6,16 @@ import os
 import stripe
 from time import time
 import sqlite3
-from typing import Optional, Dict, Any
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 
 stripe.api_key = os.environ.get("STRIPE_SECRET_KEY", "").strip()
 
+# Point at a local Stripe stub (e.g. stripe-mock) in tests
+if os.environ.get("STRIPE_API_BASE"):
+    stripe.api_base = os.environ["STRIPE_API_BASE"]
+
 def get_db():
     """Get database connection"""
     db_path = os.environ.get("SQLITE_PATH", "levqor.db")
@@ -37,10 +43,43 @@ def calculate_revenue_split(
         "platform_fee_cents": platform_fee_cents
     }
 
+def init_payout_tables(db_connection):
+    """Initialize the payout ledger and its order links"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS marketplace_payouts(
+            id TEXT PRIMARY KEY,
+            partner_id TEXT NOT NULL,
+            stripe_connect_id TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL,
+            order_count INTEGER NOT NULL,
+            idempotency_key TEXT UNIQUE NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            stripe_transfer_id TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at REAL NOT NULL,
+            completed_at REAL,
+            FOREIGN KEY (partner_id) REFERENCES partners(id)
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_marketplace_payouts_partner ON marketplace_payouts(partner_id)")
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_marketplace_payouts_status ON marketplace_payouts(status)")
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS marketplace_payout_orders(
+            order_id TEXT PRIMARY KEY,
+            payout_id TEXT NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES marketplace_orders(id),
+            FOREIGN KEY (payout_id) REFERENCES marketplace_payouts(id)
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_marketplace_payout_orders_payout ON marketplace_payout_orders(payout_id)")
+
 def create_payout(
     partner_account_id: str,
     amount_cents: int,
-    description: str = "Levqor Marketplace Payout"
+    description: str = "Levqor Marketplace Payout",
+    idempotency_key: Optional[str] = None,
+    metadata: Optional[Dict[str, str]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Create a Stripe Connect transfer to partner
@@ -49,6 +88,9 @@ def create_payout(
         partner_account_id: Partner's Stripe Connect account ID
         amount_cents: Amount to transfer in cents
         description: Transfer description
+        idempotency_key: Stripe idempotency key; retries with the same key
+            return the original transfer instead of paying twice
+        metadata: Extra Stripe metadata
         
     Returns:
         Stripe Transfer object or None if failed
@@ -58,21 +100,23 @@ def create_payout(
         return None
     
     try:
-        transfer = stripe.Transfer.create(
+        transfer = _transfer_create(
             amount=amount_cents,
             currency="usd",
             destination=partner_account_id,
-            description=description
+            description=description,
+            idempotency_key=idempotency_key,
+            metadata=metadata or {}
         )
         
         print(f"✅ Payout created: ${amount_cents/100:.2f} to {partner_account_id}")
         
         return {
-            "id": transfer.id,
-            "amount_cents": transfer.amount,
-            "destination": transfer.destination,
-            "status": transfer.status,
-            "created": transfer.created
+            "id": transfer["id"],
+            "amount_cents": transfer["amount"],
+            "destination": transfer["destination"],
+            "status": transfer.get("status"),
+            "created": transfer["created"]
         }
         
     except stripe.error.StripeError as e:
@@ -82,71 +126,191 @@ def create_payout(
         print(f"❌ Payout error: {e}")
         return None
 
-def process_pending_payouts() -> Dict[str, Any]:
+def _transfer_create(**params):
+    """Indirection so tests can point payouts at a local Stripe stub"""
+    return stripe.Transfer.create(**params)
+
+def _claim_pending_orders(db) -> List[Dict[str, Any]]:
     """
-    Process all pending payouts for completed orders
+    Group unpaid completed orders into one payout per Connect account
     
-    Returns:
-        Summary of processed payouts
+    Runs in a single IMMEDIATE transaction so concurrent runners can't
+    claim the same orders. Payouts left 'pending' by an interrupted run
+    are returned too, so they are retried with their original
+    idempotency key.
     """
-    db = get_db()
     cursor = db.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            SELECT o.id, o.partner_id, o.partner_share_cents, p.stripe_connect_id
+            FROM marketplace_orders o
+            JOIN partners p ON o.partner_id = p.id
+            WHERE o.status = 'completed'
+              AND p.stripe_connect_id IS NOT NULL
+              AND p.is_active = 1
+              AND p.is_verified = 1
+              AND o.partner_share_cents > 0
+            ORDER BY p.stripe_connect_id, o.id
+        """)
+        
+        groups: Dict[str, Dict[str, Any]] = {}
+        for order_id, partner_id, share_cents, connect_id in cursor.fetchall():
+            group = groups.setdefault(connect_id, {
+                "partner_id": partner_id,
+                "stripe_connect_id": connect_id,
+                "order_ids": [],
+                "amount_cents": 0
+            })
+            group["order_ids"].append(order_id)
+            group["amount_cents"] += share_cents
+        
+        now = time()
+        for group in groups.values():
+            payout_id = str(uuid4())
+            cursor.execute("""
+                INSERT INTO marketplace_payouts (
+                    id, partner_id, stripe_connect_id, amount_cents, order_count,
+                    idempotency_key, status, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)
+            """, (
+                payout_id, group["partner_id"], group["stripe_connect_id"],
+                group["amount_cents"], len(group["order_ids"]),
+                f"levqor-payout-{payout_id}", now
+            ))
+            cursor.executemany(
+                "INSERT INTO marketplace_payout_orders (order_id, payout_id) VALUES (?, ?)",
+                [(order_id, payout_id) for order_id in group["order_ids"]]
+            )
+            cursor.executemany(
+                "UPDATE marketplace_orders SET status = 'payout_pending' WHERE id = ?",
+                [(order_id,) for order_id in group["order_ids"]]
+            )
+        
+        cursor.execute("""
+            SELECT id, partner_id, stripe_connect_id, amount_cents, order_count, idempotency_key
+            FROM marketplace_payouts
+            WHERE status = 'pending'
+        """)
+        payouts = [
+            {
+                "id": row[0],
+                "partner_id": row[1],
+                "stripe_connect_id": row[2],
+                "amount_cents": row[3],
+                "order_count": row[4],
+                "idempotency_key": row[5]
+            }
+            for row in cursor.fetchall()
+        ]
+        
+        db.commit()
+        return payouts
+    except Exception:
+        db.rollback()
+        raise
+
+def _send_transfer(payout: Dict[str, Any]) -> Dict[str, Any]:
+    """Create the Stripe transfer for one claimed payout"""
+    try:
+        transfer = _transfer_create(
+            amount=payout["amount_cents"],
+            currency="usd",
+            destination=payout["stripe_connect_id"],
+            description=f"Levqor Marketplace Payout ({payout['order_count']} orders)",
+            transfer_group=payout["id"],
+            metadata={"payout_id": payout["id"], "partner_id": payout["partner_id"]},
+            idempotency_key=payout["idempotency_key"]
+        )
+        return {"payout": payout, "status": "paid", "transfer_id": transfer["id"], "error": None}
+    except (stripe.error.APIConnectionError, stripe.error.RateLimitError, stripe.error.APIError) as e:
+        # Outcome unknown or transient: keep pending, the next run retries with the same key
+        return {"payout": payout, "status": "pending", "transfer_id": None, "error": str(e)}
+    except stripe.error.StripeError as e:
+        return {"payout": payout, "status": "failed", "transfer_id": None, "error": str(e)}
+    except Exception as e:
+        return {"payout": payout, "status": "pending", "transfer_id": None, "error": str(e)}
+
+def process_pending_payouts(max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Process all pending payouts for completed orders
     
-    # Get completed orders that haven't been paid out
-    cursor.execute("""
-        SELECT o.id, o.partner_id, o.partner_share_cents, o.listing_id,
-               p.stripe_connect_id, p.name, l.name
-        FROM marketplace_orders o
-        JOIN partners p ON o.partner_id = p.id
-        JOIN listings l ON o.listing_id = l.id
-        WHERE o.status = 'completed'
-          AND p.stripe_connect_id IS NOT NULL
-          AND p.is_active = 1
-          AND p.is_verified = 1
-    """)
-    
-    pending = cursor.fetchall()
+    Orders are aggregated into one transfer per partner Connect account,
+    and transfers run concurrently (PAYOUT_CONCURRENCY, default 4). Each
+    payout carries a stable idempotency key, so re-running after a crash
+    or network error never pays a partner twice. Definitive Stripe
+    rejections release the orders back to 'completed'.
     
+    Returns:
+        Summary of processed payouts
+    """
     results = {
-        "total_orders": len(pending),
+        "total_orders": 0,
+        "transfers": 0,
         "successful": 0,
         "failed": 0,
+        "deferred": 0,
         "total_paid_cents": 0,
         "errors": []
     }
     
-    for order in pending:
-        order_id, partner_id, amount_cents, listing_id, connect_id, partner_name, listing_name = order
-        
-        if amount_cents <= 0:
-            results["failed"] += 1
-            results["errors"].append(f"Order {order_id}: Invalid amount")
-            continue
-        
-        payout = create_payout(
-            connect_id,
-            amount_cents,
-            f"Marketplace sale: {listing_name}"
-        )
-        
-        if payout:
-            # Update order status to paid
+    if not stripe.api_key:
+        print("⚠️ Stripe API key not configured")
+        return results
+    
+    db = get_db()
+    init_payout_tables(db)
+    payouts = _claim_pending_orders(db)
+    results["transfers"] = len(payouts)
+    results["total_orders"] = sum(p["order_count"] for p in payouts)
+    
+    workers = max_workers or int(os.environ.get("PAYOUT_CONCURRENCY", 4))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        outcomes = list(pool.map(_send_transfer, payouts))
+    
+    now = time()
+    cursor = db.cursor()
+    for outcome in outcomes:
+        payout = outcome["payout"]
+        if outcome["status"] == "paid":
             cursor.execute("""
-                UPDATE marketplace_orders
-                SET status = 'paid_out'
+                UPDATE marketplace_payouts
+                SET status = 'paid', stripe_transfer_id = ?, attempts = attempts + 1,
+                    error = NULL, completed_at = ?
                 WHERE id = ?
-            """, (order_id,))
-            
-            results["successful"] += 1
-            results["total_paid_cents"] += amount_cents
+            """, (outcome["transfer_id"], now, payout["id"]))
+            cursor.execute("""
+                UPDATE marketplace_orders SET status = 'paid_out'
+                WHERE id IN (SELECT order_id FROM marketplace_payout_orders WHERE payout_id = ?)
+            """, (payout["id"],))
+            results["successful"] += payout["order_count"]
+            results["total_paid_cents"] += payout["amount_cents"]
+        elif outcome["status"] == "failed":
+            cursor.execute("""
+                UPDATE marketplace_payouts
+                SET status = 'failed', attempts = attempts + 1, error = ?, completed_at = ?
+                WHERE id = ?
+            """, (outcome["error"], now, payout["id"]))
+            cursor.execute("""
+                UPDATE marketplace_orders SET status = 'completed'
+                WHERE id IN (SELECT order_id FROM marketplace_payout_orders WHERE payout_id = ?)
+            """, (payout["id"],))
+            cursor.execute("DELETE FROM marketplace_payout_orders WHERE payout_id = ?", (payout["id"],))
+            results["failed"] += payout["order_count"]
+            results["errors"].append(f"Payout {payout['id']} ({payout['stripe_connect_id']}): {outcome['error']}")
         else:
-            results["failed"] += 1
-            results["errors"].append(f"Order {order_id}: Payout failed")
+            cursor.execute("""
+                UPDATE marketplace_payouts SET attempts = attempts + 1, error = ?
+                WHERE id = ?
+            """, (outcome["error"], payout["id"]))
+            results["deferred"] += payout["order_count"]
+            results["errors"].append(f"Payout {payout['id']} deferred: {outcome['error']}")
     
     db.commit()
     db.close()
     
-    print(f"📊 Payout summary: {results['successful']} successful, {results['failed']} failed")
+    print(f"📊 Payout summary: {results['transfers']} transfers, {results['successful']} orders paid, "
+          f"{results['failed']} failed, {results['deferred']} deferred")
     print(f"💰 Total paid out: ${results['total_paid_cents']/100:.2f}")
     
     return results
@@ -169,7 +333,7 @@ def get_partner_earnings(partner_id: str) -> Dict[str, Any]:
             COUNT(*) as total_sales,
             SUM(partner_share_cents) as total_earned_cents,
             SUM(CASE WHEN status = 'paid_out' THEN partner_share_cents ELSE 0 END) as paid_out_cents,
-            SUM(CASE WHEN status = 'completed' THEN partner_share_cents ELSE 0 END) as pending_cents
+            SUM(CASE WHEN status IN ('completed', 'payout_pending') THEN partner_share_cents ELSE 0 END) as pending_cents
         FROM marketplace_orders
         WHERE partner_id = ?
     """, (partner_id,))
@@ -225,7 +389,6 @@ def create_marketplace_order(
     split = calculate_revenue_split(price_cents, revenue_share)
     
     # Create order
-    from uuid import uuid4
     order_id = str(uuid4())
     now = time()
     
@@ -0,0 +1,253 @@
+"""
+Marketplace Listing Search
+Index-backed listing queries with keyset cursors, cached counts and FTS5 search
+"""
+import os
+import json
+import base64
+import sqlite3
+import logging
+import threading
+from time import monotonic
+from typing import Dict, Any, List, Optional, Tuple
+
+log = logging.getLogger("levqor.marketplace.search")
+
+COUNT_CACHE_TTL_SECONDS = float(os.environ.get("MARKETPLACE_COUNT_CACHE_TTL", 60))
+
+LISTING_COLUMNS = """
+    l.id, l.partner_id, l.name, l.description, l.category,
+    l.price_cents, l.is_verified, l.is_active, l.downloads,
+    l.rating, l.created_at, p.name as partner_name
+"""
+
+_local = threading.local()
+_schema_ready = False
+_fts_available = False
+_count_cache: Dict[Tuple, Tuple[int, float]] = {}
+_count_lock = threading.Lock()
+
+
+def init_listing_search(db_connection) -> bool:
+    """
+    Create the ranking indexes and the FTS5 mirror of listings
+
+    Returns True if FTS5 is available in this SQLite build.
+    """
+    # Ranking order is downloads DESC, created_at DESC, id DESC; each index
+    # leads with the equality filters the listing endpoint supports.
+    db_connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_listings_rank
+        ON listings(is_active, is_verified, downloads DESC, created_at DESC, id DESC)
+    """)
+    db_connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_listings_category_rank
+        ON listings(category, is_active, is_verified, downloads DESC, created_at DESC, id DESC)
+    """)
+    db_connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_listings_partner_rank
+        ON listings(partner_id, is_active, is_verified, downloads DESC, created_at DESC, id DESC)
+    """)
+
+    try:
+        exists = db_connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'listings_fts'"
+        ).fetchone()
+        db_connection.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts
+            USING fts5(name, description, content='listings', content_rowid='rowid')
+        """)
+        db_connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS listings_fts_ai AFTER INSERT ON listings BEGIN
+                INSERT INTO listings_fts(rowid, name, description)
+                VALUES (new.rowid, new.name, new.description);
+            END
+        """)
+        db_connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS listings_fts_ad AFTER DELETE ON listings BEGIN
+                INSERT INTO listings_fts(listings_fts, rowid, name, description)
+                VALUES ('delete', old.rowid, old.name, old.description);
+            END
+        """)
+        db_connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS listings_fts_au AFTER UPDATE OF name, description ON listings BEGIN
+                INSERT INTO listings_fts(listings_fts, rowid, name, description)
+                VALUES ('delete', old.rowid, old.name, old.description);
+                INSERT INTO listings_fts(rowid, name, description)
+                VALUES (new.rowid, new.name, new.description);
+            END
+        """)
+        if not exists:
+            # First run: index listings that predate the triggers
+            db_connection.execute("INSERT INTO listings_fts(listings_fts) VALUES ('rebuild')")
+        db_connection.commit()
+        return True
+    except sqlite3.OperationalError as e:
+        log.warning(f"FTS5 unavailable, falling back to LIKE search: {e}")
+        db_connection.commit()
+        return False
+
+
+def get_db():
+    """Per-thread connection with the search schema in place"""
+    global _schema_ready, _fts_available
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        db_path = os.environ.get("SQLITE_PATH", "levqor.db")
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        _local.conn = conn
+    if not _schema_ready:
+        _fts_available = init_listing_search(conn)
+        _schema_ready = True
+    return conn
+
+
+def encode_cursor(row: Tuple) -> str:
+    """Opaque cursor from the sort key of the last row on a page"""
+    downloads, created_at, listing_id = row
+    raw = json.dumps([downloads, created_at, listing_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, float, str]:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        downloads, created_at, listing_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(downloads), float(created_at), str(listing_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def _fts_query(text: str) -> str:
+    """Quote each term so user input can't inject FTS syntax; prefix-match the terms"""
+    terms = [t.replace('"', '""') for t in text.split() if t.strip()]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _build_filters(
+    category: Optional[str],
+    partner_id: Optional[str],
+    verified_only: bool,
+    q: Optional[str]
+) -> Tuple[str, str, List[Any]]:
+    joins = "JOIN partners p ON l.partner_id = p.id"
+    where = ["l.is_active = 1"]
+    params: List[Any] = []
+
+    if verified_only:
+        where.append("l.is_verified = 1 AND p.is_verified = 1")
+    if category:
+        where.append("l.category = ?")
+        params.append(category)
+    if partner_id:
+        where.append("l.partner_id = ?")
+        params.append(partner_id)
+    if q:
+        if _fts_available:
+            where.append("l.rowid IN (SELECT rowid FROM listings_fts WHERE listings_fts MATCH ?)")
+            params.append(_fts_query(q))
+        else:
+            where.append("(l.name LIKE ? OR l.description LIKE ?)")
+            params.extend([f"%{q}%", f"%{q}%"])
+
+    return joins, " AND ".join(where), params
+
+
+def count_listings(
+    category: Optional[str] = None,
+    partner_id: Optional[str] = None,
+    verified_only: bool = True,
+    q: Optional[str] = None
+) -> int:
+    """Total matching listings, cached per filter until a write or the TTL"""
+    key = (category, partner_id, verified_only, (q or "").strip().lower())
+    now = monotonic()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    db = get_db()
+    joins, where, params = _build_filters(category, partner_id, verified_only, q)
+    total = db.execute(f"SELECT COUNT(*) FROM listings l {joins} WHERE {where}", params).fetchone()[0]
+
+    with _count_lock:
+        _count_cache[key] = (total, now + COUNT_CACHE_TTL_SECONDS)
+    return total
+
+
+def invalidate_listing_counts() -> None:
+    """Drop cached counts; call after any listing or partner verification write"""
+    with _count_lock:
+        _count_cache.clear()
+
+
+def search_listings(
+    category: Optional[str] = None,
+    partner_id: Optional[str] = None,
+    verified_only: bool = True,
+    q: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    One page of listings ordered by downloads DESC, created_at DESC
+
+    With `cursor` the page starts strictly after the cursor's sort key,
+    so deep pages cost the same as the first. `offset` is kept for older
+    clients and ignored when a cursor is given.
+
+    Returns:
+        {"listings": [...], "next_cursor": str | None, "total": int}
+    """
+    db = get_db()
+    joins, where, params = _build_filters(category, partner_id, verified_only, q)
+
+    if cursor:
+        where += " AND (l.downloads, l.created_at, l.id) < (?, ?, ?)"
+        params.extend(decode_cursor(cursor))
+        offset = 0
+
+    query = f"""
+        SELECT {LISTING_COLUMNS}
+        FROM listings l
+        {joins}
+        WHERE {where}
+        ORDER BY l.downloads DESC, l.created_at DESC, l.id DESC
+        LIMIT ? OFFSET ?
+    """
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(query, params + [limit + 1, offset]).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    listings = [
+        {
+            "id": row[0],
+            "partner_id": row[1],
+            "name": row[2],
+            "description": row[3],
+            "category": row[4],
+            "price": row[5] / 100.0,  # Convert to dollars
+            "is_verified": bool(row[6]),
+            "is_active": bool(row[7]),
+            "downloads": row[8],
+            "rating": row[9],
+            "created_at": row[10],
+            "partner_name": row[11]
+        }
+        for row in rows
+    ]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor((last[8], last[10], last[0]))
+
+    return {
+        "listings": listings,
+        "next_cursor": next_cursor,
+        "total": count_listings(category, partner_id, verified_only, q)
+    }
@@ -4,7 +4,8 @@ Enables third-party partner registration, webhooks, and revenue sharing
 """
 from .registry import bp as registry_bp
 from .hooks import trigger_partner_event, notify_all_partners
-from .auth import generate_partner_token, verify_partner_token, issue_partner_credentials
+from .auth import generate_partner_token, verify_partner_token, issue_partner_credentials, get_webhook_secret
+from .delivery import WebhookDeliveryEngine, get_delivery_engine, get_delivery_stats
 
 __all__ = [
     "registry_bp",
@@ -12,5 +13,9 @@ __all__ = [
     "notify_all_partners",
     "generate_partner_token",
     "verify_partner_token",
-    "issue_partner_credentials"
+    "issue_partner_credentials",
+    "get_webhook_secret",
+    "WebhookDeliveryEngine",
+    "get_delivery_engine",
+    "get_delivery_stats"
 ]
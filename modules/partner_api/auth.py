@@ -58,6 +58,53 @@ def verify_partner_token(token: str) -> tuple[bool, str | None]:
     except Exception:
         return False, None
 
+def get_webhook_secret(partner_id: str) -> str:
+    """
+    Per-partner webhook signing secret
+    
+    Derived from PARTNER_API_SECRET with a separate "webhook:" label, so
+    it can be handed to the partner without exposing the key that mints
+    API tokens (and one partner's secret says nothing about another's).
+    
+    Args:
+        partner_id: Partner UUID
+        
+    Returns:
+        Secret in format "whsec_<hex>"
+    """
+    secret = hmac.new(
+        PARTNER_API_SECRET.encode(),
+        f"webhook:{partner_id}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+    
+    return f"whsec_{secret}"
+
+def sign_webhook_payload(body: bytes, timestamp: int, partner_id: str) -> str:
+    """
+    Sign an outgoing partner webhook body
+    
+    Partners verify by recomputing HMAC-SHA256 over "<timestamp>.<body>"
+    with their webhook secret (see issue_partner_credentials) and
+    comparing against the v1 value.
+    
+    Args:
+        body: Exact request body bytes being sent
+        timestamp: Unix timestamp included in the signature header
+        partner_id: Receiving partner (selects the signing secret)
+        
+    Returns:
+        Header value in format "t=<timestamp>,v1=<hex signature>"
+    """
+    message = str(timestamp).encode() + b"." + body
+    signature = hmac.new(
+        get_webhook_secret(partner_id).encode(),
+        message,
+        hashlib.sha256
+    ).hexdigest()
+    
+    return f"t={timestamp},v1={signature}"
+
 def require_partner_auth(f):
     """
     Decorator to require partner authentication
@@ -97,13 +144,15 @@ def issue_partner_credentials(partner_id: str) -> dict:
         partner_id: Partner UUID
         
     Returns:
-        Dict with token and usage instructions
+        Dict with token, webhook secret and usage instructions
     """
     token = generate_partner_token(partner_id)
     
     return {
         "partner_id": partner_id,
         "api_token": token,
+        "webhook_secret": get_webhook_secret(partner_id),
+        "webhook_verification": "HMAC-SHA256 of '<t>.<body>' with webhook_secret must equal v1 in X-Levqor-Signature",
         "usage": "Include in requests as: Authorization: Bearer <token>",
         "example": f"curl -H 'Authorization: Bearer {token}' https://api.levqor.ai/api/partner/..."
     }
@@ -0,0 +1,343 @@
+"""
+Partner Webhook Delivery Engine
+Concurrent, signed webhook fan-out with retries, circuit breakers and a delivery log
+"""
+import os
+import json
+import random
+import sqlite3
+import logging
+import threading
+from time import time, sleep, perf_counter
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .auth import sign_webhook_payload
+
+log = logging.getLogger("levqor.partner_webhooks")
+
+MAX_WORKERS = int(os.environ.get("PARTNER_WEBHOOK_WORKERS", 16))
+MAX_ATTEMPTS = int(os.environ.get("PARTNER_WEBHOOK_MAX_ATTEMPTS", 3))
+REQUEST_TIMEOUT = float(os.environ.get("PARTNER_WEBHOOK_TIMEOUT", 5))
+BACKOFF_BASE_SECONDS = float(os.environ.get("PARTNER_WEBHOOK_BACKOFF", 1.0))
+BREAKER_THRESHOLD = int(os.environ.get("PARTNER_WEBHOOK_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get("PARTNER_WEBHOOK_BREAKER_COOLDOWN", 300))
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def init_webhook_delivery_tables(db_connection):
+    """Initialize the partner webhook delivery log"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS partner_webhook_deliveries(
+            id TEXT PRIMARY KEY,
+            partner_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            attempt INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            http_status INTEGER,
+            latency_ms INTEGER,
+            error TEXT,
+            created_at REAL NOT NULL,
+            FOREIGN KEY (partner_id) REFERENCES partners(id)
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_partner_webhook_deliveries_partner ON partner_webhook_deliveries(partner_id, created_at)")
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_partner_webhook_deliveries_created ON partner_webhook_deliveries(created_at)")
+
+
+class CircuitBreaker:
+    """
+    Per-partner breaker: opens after `threshold` consecutive failed
+    deliveries and lets a single probe through once `cooldown` has passed.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, partner_id: str) -> bool:
+        with self._lock:
+            opened_at = self._opened_at.get(partner_id)
+            if opened_at is None:
+                return True
+            if time() - opened_at >= self.cooldown:
+                # Half-open: re-arm the timer so only one probe goes out
+                self._opened_at[partner_id] = time()
+                return True
+            return False
+
+    def record_success(self, partner_id: str) -> None:
+        with self._lock:
+            self._failures.pop(partner_id, None)
+            self._opened_at.pop(partner_id, None)
+
+    def record_failure(self, partner_id: str) -> None:
+        with self._lock:
+            count = self._failures.get(partner_id, 0) + 1
+            self._failures[partner_id] = count
+            if count >= self.threshold:
+                if partner_id not in self._opened_at:
+                    log.warning(f"Circuit opened for partner {partner_id} after {count} failures")
+                self._opened_at[partner_id] = time()
+
+    def is_open(self, partner_id: str) -> bool:
+        with self._lock:
+            return partner_id in self._opened_at
+
+
+class WebhookDeliveryEngine:
+    """
+    Delivers partner webhooks over a shared keep-alive session.
+
+    `deliver_many` sends every partner's first attempt concurrently on a
+    bounded thread pool; failures that are worth retrying go back on a
+    retry queue and are re-sent together after an exponential backoff.
+    Every attempt is recorded in `partner_webhook_deliveries`.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = MAX_WORKERS,
+        max_attempts: int = MAX_ATTEMPTS,
+        timeout: float = REQUEST_TIMEOUT,
+        backoff_base: float = BACKOFF_BASE_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+        session: Optional[requests.Session] = None,
+        db_path: Optional[str] = None
+    ):
+        self.max_workers = max_workers
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.breaker = breaker or CircuitBreaker()
+        self.db_path = db_path or os.environ.get("SQLITE_PATH", "levqor.db")
+        self.session = session or self._build_session()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="partner-webhook")
+
+    def _build_session(self) -> requests.Session:
+        # urllib3 keeps one keep-alive pool per host; size them for the worker count
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=256, pool_maxsize=self.max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Content-Type": "application/json",
+            "User-Agent": "Levqor-Partner-Webhook/1.0"
+        })
+        return session
+
+    def _send(self, partner: Dict[str, Any], event: str, body: bytes, attempt: int) -> Dict[str, Any]:
+        """Send one attempt and describe the outcome"""
+        partner_id = partner.get("id")
+        record = {
+            "id": str(uuid4()),
+            "partner_id": partner_id,
+            "event": event,
+            "attempt": attempt,
+            "status": "failed",
+            "http_status": None,
+            "latency_ms": None,
+            "error": None,
+            "created_at": time(),
+            "retryable": False
+        }
+
+        if not self.breaker.allow(partner_id):
+            record["status"] = "circuit_open"
+            return record
+
+        timestamp = int(time())
+        started = perf_counter()
+        try:
+            response = self.session.post(
+                partner["webhook_url"],
+                data=body,
+                headers={
+                    "X-Levqor-Event": event,
+                    "X-Levqor-Signature": sign_webhook_payload(body, timestamp, partner_id)
+                },
+                timeout=self.timeout
+            )
+            record["http_status"] = response.status_code
+            if 200 <= response.status_code < 300:
+                record["status"] = "delivered"
+            else:
+                record["error"] = f"HTTP {response.status_code}"
+                record["retryable"] = response.status_code in RETRYABLE_STATUS
+        except requests.exceptions.Timeout:
+            record["error"] = "timeout"
+            record["retryable"] = True
+        except requests.exceptions.RequestException as e:
+            record["error"] = str(e)[:500]
+            record["retryable"] = isinstance(e, requests.exceptions.ConnectionError)
+        except Exception as e:
+            record["error"] = f"unexpected: {e}"[:500]
+        record["latency_ms"] = int((perf_counter() - started) * 1000)
+
+        if record["status"] == "delivered":
+            self.breaker.record_success(partner_id)
+        else:
+            self.breaker.record_failure(partner_id)
+        return record
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given attempt number"""
+        return random.uniform(0, self.backoff_base * (2 ** (attempt - 1)))
+
+    def deliver_many(self, partners: List[Dict[str, Any]], event: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fan an event out to `partners` and wait for the final outcome.
+
+        Returns a summary with per-partner final status.
+        """
+        bodies = {}
+        queue = []
+        for partner in partners:
+            if not partner.get("webhook_url"):
+                continue
+            bodies[partner["id"]] = json.dumps({
+                "event": event,
+                "partner_id": partner["id"],
+                "timestamp": payload.get("timestamp", ""),
+                "payload": payload
+            }, default=str).encode()
+            queue.append(partner)
+
+        final: Dict[str, Dict[str, Any]] = {}
+        records: List[Dict[str, Any]] = []
+        attempt = 1
+        while queue:
+            results = list(self._executor.map(
+                lambda p: self._send(p, event, bodies[p["id"]], attempt),
+                queue
+            ))
+            records.extend(results)
+
+            retry_queue = []
+            for partner, result in zip(queue, results):
+                final[partner["id"]] = result
+                if result["retryable"] and attempt < self.max_attempts:
+                    retry_queue.append(partner)
+
+            queue = retry_queue
+            if queue:
+                sleep(self._backoff(attempt))
+                attempt += 1
+
+        self._log_deliveries(records)
+
+        delivered = sum(1 for r in final.values() if r["status"] == "delivered")
+        return {
+            "event": event,
+            "total": len(final),
+            "delivered": delivered,
+            "failed": len(final) - delivered,
+            "attempts": len(records),
+            "results": {
+                pid: {"status": r["status"], "http_status": r["http_status"], "attempt": r["attempt"]}
+                for pid, r in final.items()
+            }
+        }
+
+    def deliver(self, partner: Dict[str, Any], event: str, payload: Dict[str, Any]) -> bool:
+        """Deliver to a single partner; True if it was eventually accepted"""
+        summary = self.deliver_many([partner], event, payload)
+        return summary["delivered"] == 1
+
+    def _log_deliveries(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        try:
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            init_webhook_delivery_tables(db)
+            db.executemany("""
+                INSERT INTO partner_webhook_deliveries (
+                    id, partner_id, event, attempt, status,
+                    http_status, latency_ms, error, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (r["id"], r["partner_id"], r["event"], r["attempt"], r["status"],
+                 r["http_status"], r["latency_ms"], r["error"], r["created_at"])
+                for r in records
+            ])
+            db.commit()
+            db.close()
+        except Exception as e:
+            log.error(f"Failed to record webhook deliveries: {e}")
+
+
+def get_delivery_stats(since: Optional[float] = None, partner_id: Optional[str] = None, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Delivery success rate and latency percentiles per partner
+
+    Args:
+        since: Unix timestamp lower bound (default: last 24 hours)
+        partner_id: Restrict to one partner
+    """
+    db_path = db_path or os.environ.get("SQLITE_PATH", "levqor.db")
+    since = since if since is not None else time() - 86400
+
+    query = """
+        SELECT partner_id, status, latency_ms
+        FROM partner_webhook_deliveries
+        WHERE created_at >= ?
+    """
+    params: List[Any] = [since]
+    if partner_id:
+        query += " AND partner_id = ?"
+        params.append(partner_id)
+
+    db = sqlite3.connect(db_path, check_same_thread=False)
+    init_webhook_delivery_tables(db)
+    rows = db.execute(query, params).fetchall()
+    db.close()
+
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for pid, status, latency_ms in rows:
+        entry = grouped.setdefault(pid, {"attempts": 0, "delivered": 0, "latencies": []})
+        entry["attempts"] += 1
+        if status == "delivered":
+            entry["delivered"] += 1
+        if latency_ms is not None:
+            entry["latencies"].append(latency_ms)
+
+    def _pct(values, pct):
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * pct))]
+
+    partners = {}
+    for pid, entry in grouped.items():
+        latencies = sorted(entry["latencies"])
+        partners[pid] = {
+            "attempts": entry["attempts"],
+            "delivered": entry["delivered"],
+            "success_rate": round(entry["delivered"] / entry["attempts"], 3),
+            "p50_ms": _pct(latencies, 0.50),
+            "p95_ms": _pct(latencies, 0.95),
+            "max_ms": latencies[-1] if latencies else None
+        }
+
+    return {"since": since, "partners": partners}
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_delivery_engine() -> WebhookDeliveryEngine:
+    """Singleton engine instance (shares its session and breaker state)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = WebhookDeliveryEngine()
+    return _engine
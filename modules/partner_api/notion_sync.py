@@ -1,12 +1,14 @@
 """
 Notion Partner Registry Sync
 Logs partner registrations and updates to Notion for transparency
+Writes go through the Notion write-behind queue (server.notion_queue)
 """
 import os
-import requests
 from datetime import datetime
 from typing import Optional
 
+from server.notion_queue import enqueue_create, enqueue_update
+
 NOTION_TOKEN = os.getenv("NOTION_TOKEN", "").strip()
 NOTION_PARTNER_REGISTRY_DB_ID = os.getenv("NOTION_PARTNER_REGISTRY_DB_ID", "").strip()
 
@@ -26,60 +28,39 @@ def log_partner_registration(
         revenue_share: Revenue share percentage
         
     Returns:
-        Notion page ID if successful, None otherwise
+        Sync queue entry ID if queued, None otherwise
     """
     if not NOTION_TOKEN or not NOTION_PARTNER_REGISTRY_DB_ID:
         print("⚠️ Notion credentials not configured for partner registry")
         return None
     
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    data = {
-        "parent": {"database_id": NOTION_PARTNER_REGISTRY_DB_ID},
-        "properties": {
-            "Name": {
-                "title": [{"text": {"content": name}}]
-            },
-            "Partner ID": {
-                "rich_text": [{"text": {"content": partner_id}}]
-            },
-            "Email": {
-                "email": email
-            },
-            "Revenue Share": {
-                "number": revenue_share * 100  # Convert to percentage
-            },
-            "Status": {
-                "select": {"name": "Pending Approval"}
-            },
-            "Registered At": {
-                "date": {"start": datetime.utcnow().isoformat()}
-            }
+    properties = {
+        "Name": {
+            "title": [{"text": {"content": name}}]
+        },
+        "Partner ID": {
+            "rich_text": [{"text": {"content": partner_id}}]
+        },
+        "Email": {
+            "email": email
+        },
+        "Revenue Share": {
+            "number": revenue_share * 100  # Convert to percentage
+        },
+        "Status": {
+            "select": {"name": "Pending Approval"}
+        },
+        "Registered At": {
+            "date": {"start": datetime.utcnow().isoformat()}
         }
     }
     
-    try:
-        response = requests.post(
-            "https://api.notion.com/v1/pages",
-            headers=headers,
-            json=data
-        )
-        
-        if response.status_code == 200:
-            page_id = response.json().get("id")
-            print(f"✅ Logged partner {name} to Notion: {page_id}")
-            return page_id
-        else:
-            print(f"❌ Failed to log to Notion: {response.text}")
-            return None
-            
-    except Exception as e:
-        print(f"❌ Notion logging error: {e}")
-        return None
+    return enqueue_create(
+        NOTION_PARTNER_REGISTRY_DB_ID,
+        properties,
+        lookup_property="Partner ID",
+        lookup_value=partner_id
+    )
 
 def update_partner_status(
     partner_id: str,
@@ -93,63 +74,15 @@ def update_partner_status(
         status: New status (e.g., "Verified", "Rejected", "Suspended")
         
     Returns:
-        True if successful, False otherwise
+        True if the update was queued, False otherwise
     """
     if not NOTION_TOKEN or not NOTION_PARTNER_REGISTRY_DB_ID:
         return False
     
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    # Query for the partner page
-    query_data = {
-        "database_id": NOTION_PARTNER_REGISTRY_DB_ID,
-        "filter": {
-            "property": "Partner ID",
-            "rich_text": {
-                "equals": partner_id
-            }
-        }
-    }
-    
-    try:
-        query_response = requests.post(
-            "https://api.notion.com/v1/databases/query",
-            headers=headers,
-            json=query_data
-        )
-        
-        if query_response.status_code != 200:
-            return False
-        
-        results = query_response.json().get("results", [])
-        if not results:
-            return False
-        
-        page_id = results[0]["id"]
-        
-        # Update the page
-        update_data = {
-            "properties": {
-                "Status": {"select": {"name": status}}
-            }
-        }
-        
-        update_response = requests.patch(
-            f"https://api.notion.com/v1/pages/{page_id}",
-            headers=headers,
-            json=update_data
-        )
-        
-        if update_response.status_code == 200:
-            print(f"✅ Updated partner {partner_id} status to {status} in Notion")
-            return True
-        
-        return False
-        
-    except Exception as e:
-        print(f"❌ Error updating Notion: {e}")
-        return False
+    entry_id = enqueue_update(
+        NOTION_PARTNER_REGISTRY_DB_ID,
+        "Partner ID",
+        partner_id,
+        {"Status": {"select": {"name": status}}}
+    )
+    return entry_id is not None
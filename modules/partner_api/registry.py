@@ -226,6 +226,42 @@ def get_partner(partner_id):
             "message": str(e)
         }), 500
 
+@bp.get("/<partner_id>/webhooks/stats")
+def get_partner_webhook_stats(partner_id):
+    """
+    Webhook delivery stats for a partner
+
+    Query params:
+      hours: Lookback window (default 24, max 720)
+
+    Response:
+    {
+      "ok": true,
+      "stats": {"attempts": 10, "delivered": 9, "success_rate": 0.9, "p50_ms": 120, ...},
+      "circuit_open": false
+    }
+    """
+    try:
+        from .delivery import get_delivery_engine, get_delivery_stats
+
+        hours = max(1, min(int(request.args.get("hours", 24)), 720))
+        stats = get_delivery_stats(since=time() - hours * 3600, partner_id=partner_id)
+
+        return jsonify({
+            "ok": True,
+            "partner_id": partner_id,
+            "hours": hours,
+            "stats": stats["partners"].get(partner_id, {"attempts": 0, "delivered": 0}),
+            "circuit_open": get_delivery_engine().breaker.is_open(partner_id)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "ok": False,
+            "error": "fetch_failed",
+            "message": str(e)
+        }), 500
+
 @bp.patch("/<partner_id>")
 def update_partner(partner_id):
     """
@@ -292,6 +328,11 @@ def update_partner(partner_id):
         db.commit()
         db.close()
         
+        # Verified-only marketplace counts depend on partner verification
+        if "is_verified" in data:
+            from modules.marketplace.search import invalidate_listing_counts
+            invalidate_listing_counts()
+        
         return jsonify({
             "ok": True,
             "message": "Partner updated successfully"
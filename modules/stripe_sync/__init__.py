@@ -0,0 +1,19 @@
+"""
+Stripe Sync Module
+Incremental, paginated copy of Stripe charges into the local `stripe_charges` table
+"""
+from .charges import (
+    init_stripe_sync_tables,
+    sync_charges,
+    ensure_charges_synced,
+    get_charge_totals,
+    iter_charges
+)
+
+__all__ = [
+    "init_stripe_sync_tables",
+    "sync_charges",
+    "ensure_charges_synced",
+    "get_charge_totals",
+    "iter_charges"
+]
@@ -0,0 +1,313 @@
+"""
+Stripe Charge Sync
+Pulls /v1/charges since a stored cursor into `stripe_charges`
+
+sync_charges() covers [cursor - lookback, now): the range is cut into
+time slices fetched concurrently (STRIPE_SYNC_WORKERS), and each slice
+follows `has_more` / `starting_after` to the end, so nothing past the
+first 100 charges is dropped. Pages are upserted as they arrive. The
+cursor only advances once every slice completed, so an interrupted run
+is simply repeated. The lookback (STRIPE_SYNC_LOOKBACK_HOURS) re-reads
+recent charges to pick up late status and refund changes.
+
+Reports read the table (get_charge_totals / iter_charges) after
+ensure_charges_synced(), which only calls Stripe when the last sync is
+older than STRIPE_SYNC_MAX_AGE.
+
+STRIPE_API_BASE (or api_base=) points the client at a local HTTP stub
+for tests.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from time import time, sleep
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+
+log = logging.getLogger("levqor.stripe_sync")
+
+DEFAULT_STRIPE_API_BASE = "https://api.stripe.com"
+STRIPE_SYNC_TIMEOUT = float(os.environ.get("STRIPE_SYNC_TIMEOUT", 10))
+STRIPE_SYNC_WORKERS = int(os.environ.get("STRIPE_SYNC_WORKERS", 4))
+STRIPE_SYNC_PAGE_SIZE = 100
+STRIPE_SYNC_BACKFILL_DAYS = int(os.environ.get("STRIPE_SYNC_BACKFILL_DAYS", 90))
+STRIPE_SYNC_LOOKBACK_HOURS = float(os.environ.get("STRIPE_SYNC_LOOKBACK_HOURS", 72))
+STRIPE_SYNC_MAX_AGE = float(os.environ.get("STRIPE_SYNC_MAX_AGE", 900))
+STRIPE_SYNC_RETRIES = 3
+
+# Smallest time slice worth its own worker
+_MIN_SLICE_SECONDS = 3600
+
+_SYNC_NAME = "charges"
+
+
+def init_stripe_sync_tables(db_connection):
+    """Initialize the local charge copy and the sync cursor"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_charges(
+            id TEXT PRIMARY KEY,
+            created INTEGER NOT NULL,
+            amount INTEGER NOT NULL DEFAULT 0,
+            amount_refunded INTEGER NOT NULL DEFAULT 0,
+            currency TEXT,
+            paid INTEGER NOT NULL DEFAULT 0,
+            refunded INTEGER NOT NULL DEFAULT 0,
+            status TEXT,
+            description TEXT,
+            customer TEXT,
+            metadata TEXT,
+            synced_at REAL NOT NULL
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_stripe_charges_created ON stripe_charges(created)")
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS stripe_sync_state(
+            name TEXT PRIMARY KEY,
+            cursor_created INTEGER NOT NULL DEFAULT 0,
+            last_synced_at REAL,
+            last_error TEXT
+        )
+    """)
+
+
+def _connect(db_path=None):
+    db = sqlite3.connect(db_path or os.environ.get("SQLITE_PATH", "levqor.db"), check_same_thread=False, timeout=30)
+    init_stripe_sync_tables(db)
+    return db
+
+
+def _row(charge: Dict[str, Any], now: float) -> Tuple:
+    return (
+        charge["id"],
+        int(charge.get("created") or 0),
+        int(charge.get("amount") or 0),
+        int(charge.get("amount_refunded") or 0),
+        charge.get("currency"),
+        1 if charge.get("paid") else 0,
+        1 if charge.get("refunded") else 0,
+        charge.get("status"),
+        charge.get("description"),
+        charge.get("customer") if isinstance(charge.get("customer"), str) else None,
+        json.dumps(charge.get("metadata") or {}),
+        now
+    )
+
+
+def _upsert(db, charges) -> int:
+    now = time()
+    db.executemany("""
+        INSERT INTO stripe_charges (id, created, amount, amount_refunded, currency, paid, refunded,
+                                    status, description, customer, metadata, synced_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            amount = excluded.amount,
+            amount_refunded = excluded.amount_refunded,
+            paid = excluded.paid,
+            refunded = excluded.refunded,
+            status = excluded.status,
+            description = excluded.description,
+            metadata = excluded.metadata,
+            synced_at = excluded.synced_at
+    """, [_row(charge, now) for charge in charges])
+    db.commit()
+    return len(charges)
+
+
+def _get_page(session: requests.Session, api_base: str, api_key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """One /v1/charges page, retrying rate limits and server errors"""
+    for attempt in range(STRIPE_SYNC_RETRIES):
+        response = session.get(
+            f"{api_base}/v1/charges",
+            headers={"Authorization": f"Bearer {api_key}"},
+            params=params,
+            timeout=STRIPE_SYNC_TIMEOUT
+        )
+        if response.status_code == 429 or response.status_code >= 500:
+            if attempt < STRIPE_SYNC_RETRIES - 1:
+                sleep(0.5 * 2 ** attempt)
+                continue
+        response.raise_for_status()
+        return response.json()
+
+
+def _fetch_slice(api_base: str, api_key: str, start: int, end: int) -> Iterator[list]:
+    """Pages of charges created in [start, end), newest first"""
+    params = {"created[gte]": start, "created[lt]": end, "limit": STRIPE_SYNC_PAGE_SIZE}
+    with requests.Session() as session:
+        while True:
+            page = _get_page(session, api_base, api_key, params)
+            charges = page.get("data", [])
+            if charges:
+                yield charges
+            if not page.get("has_more") or not charges:
+                return
+            params["starting_after"] = charges[-1]["id"]
+
+
+def _slices(start: int, end: int, workers: int):
+    span = max(end - start, 1)
+    step = max(_MIN_SLICE_SECONDS, -(-span // max(workers, 1)))
+    return [(s, min(s + step, end)) for s in range(start, end, step)]
+
+
+def sync_charges(db_path=None, api_key: Optional[str] = None, full: bool = False,
+                 workers: int = STRIPE_SYNC_WORKERS, api_base: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Pull new and recently changed charges into stripe_charges
+    
+    Args:
+        api_key: Stripe secret key (default STRIPE_SECRET_KEY)
+        full: Ignore the cursor and re-read the whole backfill window
+        api_base: API root (default STRIPE_API_BASE)
+    
+    Returns:
+        dict: since, until, slices, pages, charges
+              (or {"skipped": reason} when no key is configured)
+    """
+    api_key = api_key or os.environ.get("STRIPE_SECRET_KEY", "").strip()
+    if not api_key:
+        return {"skipped": "no_api_key"}
+    api_base = (api_base or os.environ.get("STRIPE_API_BASE") or DEFAULT_STRIPE_API_BASE).rstrip("/")
+    
+    db = _connect(db_path)
+    try:
+        state = db.execute(
+            "SELECT cursor_created FROM stripe_sync_state WHERE name = ?", (_SYNC_NAME,)
+        ).fetchone()
+        until = int(time()) + 1
+        backfill_start = until - STRIPE_SYNC_BACKFILL_DAYS * 86400
+        if state and state[0] and not full:
+            since = max(backfill_start, int(state[0] - STRIPE_SYNC_LOOKBACK_HOURS * 3600))
+        else:
+            since = backfill_start
+        
+        slices = _slices(since, until, workers)
+        write_lock = threading.Lock()
+        totals = {"pages": 0, "charges": 0}
+        
+        def run_slice(bounds):
+            for charges in _fetch_slice(api_base, api_key, *bounds):
+                with write_lock:
+                    totals["charges"] += _upsert(db, charges)
+                    totals["pages"] += 1
+        
+        started = time()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(slices))),
+                                    thread_name_prefix="stripe-sync") as pool:
+                for future in as_completed([pool.submit(run_slice, bounds) for bounds in slices]):
+                    future.result()
+        except Exception as e:
+            log.error(f"Stripe charge sync failed: {e}")
+            db.execute("""
+                INSERT INTO stripe_sync_state (name, last_error) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET last_error = excluded.last_error
+            """, (_SYNC_NAME, str(e)[:500]))
+            db.commit()
+            raise
+        
+        db.execute("""
+            INSERT INTO stripe_sync_state (name, cursor_created, last_synced_at, last_error) VALUES (?, ?, ?, NULL)
+            ON CONFLICT(name) DO UPDATE SET cursor_created = excluded.cursor_created,
+                last_synced_at = excluded.last_synced_at, last_error = NULL
+        """, (_SYNC_NAME, until, time()))
+        db.commit()
+    finally:
+        db.close()
+    
+    log.info(f"Stripe charges synced: {totals['charges']} charges in {totals['pages']} pages "
+             f"({len(slices)} slices) in {time() - started:.1f}s")
+    return dict(totals, since=since, until=until, slices=len(slices))
+
+
+def ensure_charges_synced(db_path=None, max_age: float = STRIPE_SYNC_MAX_AGE) -> bool:
+    """
+    Sync if the last successful sync is older than `max_age` seconds
+    
+    Failures are logged, not raised, so reports fall back to the data
+    already stored.
+    
+    Returns:
+        bool: True if the table is fresh (or was just synced)
+    """
+    db = _connect(db_path)
+    try:
+        row = db.execute(
+            "SELECT last_synced_at FROM stripe_sync_state WHERE name = ?", (_SYNC_NAME,)
+        ).fetchone()
+    finally:
+        db.close()
+    if row and row[0] and time() - row[0] < max_age:
+        return True
+    try:
+        return "skipped" not in sync_charges(db_path)
+    except Exception as e:
+        log.warning(f"Stripe sync unavailable, using stored charges: {e}")
+        return False
+
+
+def get_charge_totals(since: float, until: Optional[float] = None, keywords: Iterable[str] = (),
+                      db_path=None) -> Dict[str, Any]:
+    """
+    Aggregate stored charges created in [since, until)
+    
+    Args:
+        keywords: Description substrings (case-insensitive) to total separately
+    
+    Returns:
+        dict: charges, paid_count, failed_count, revenue_cents (paid),
+              refunded_cents, keyword_cents {keyword: paid cents},
+              any_keyword_cents (paid charges matching any keyword)
+    """
+    keywords = tuple(keywords)
+    until = until if until is not None else time() + 1
+    matches = ["lower(description) LIKE ?" for _ in keywords]
+    keyword_sums = "".join(
+        f", COALESCE(SUM(CASE WHEN paid = 1 AND {match} THEN amount END), 0)" for match in matches
+    )
+    if keywords:
+        keyword_sums += f", COALESCE(SUM(CASE WHEN paid = 1 AND ({' OR '.join(matches)}) THEN amount END), 0)"
+    patterns = [f"%{k.lower()}%" for k in keywords]
+    db = _connect(db_path)
+    try:
+        row = db.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(paid), 0), COALESCE(SUM(1 - paid), 0),
+                   COALESCE(SUM(CASE WHEN paid = 1 THEN amount END), 0),
+                   COALESCE(SUM(amount_refunded), 0){keyword_sums}
+            FROM stripe_charges
+            WHERE created >= ? AND created < ?
+        """, (*patterns, *(patterns if keywords else ()), int(since), int(until))).fetchone()
+    finally:
+        db.close()
+    return {
+        "charges": row[0],
+        "paid_count": row[1],
+        "failed_count": row[2],
+        "revenue_cents": row[3],
+        "refunded_cents": row[4],
+        "keyword_cents": dict(zip(keywords, row[5:5 + len(keywords)])),
+        "any_keyword_cents": row[5 + len(keywords)] if keywords else 0
+    }
+
+
+def iter_charges(since: float, until: Optional[float] = None, db_path=None) -> Iterator[Dict[str, Any]]:
+    """Stored charges created in [since, until), oldest first"""
+    until = until if until is not None else time() + 1
+    db = _connect(db_path)
+    try:
+        cursor = db.execute("""
+            SELECT id, created, amount, amount_refunded, currency, paid, refunded, status, description, customer, metadata
+            FROM stripe_charges WHERE created >= ? AND created < ? ORDER BY created
+        """, (int(since), int(until)))
+        for row in cursor:
+            yield {
+                "id": row[0], "created": row[1], "amount": row[2], "amount_refunded": row[3],
+                "currency": row[4], "paid": bool(row[5]), "refunded": bool(row[6]), "status": row[7],
+                "description": row[8], "customer": row[9], "metadata": json.loads(row[10] or "{}")
+            }
+    finally:
+        db.close()
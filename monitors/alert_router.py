@@ -1,85 +1,329 @@
 """
 Smart alert router - sends alerts to Slack, Telegram, and/or Email
+
+All alerting goes through one AlertRouter:
+- send() never blocks; channel posts run concurrently on a small pool
+- alerts with the same fingerprint inside ALERT_DEDUP_WINDOW are counted,
+  not re-sent
+- each channel has a token bucket; alerts over the budget (and any alert
+  sent with digest=True) are held and delivered as one digest message by
+  flush_digest(), which the scheduler calls every minute
 """
 import os
+import re
+import hashlib
+import threading
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from time import time
+from typing import Dict, Any, Optional, Iterable, List
+
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger("levqor.alerts")
 
+ALERT_DEDUP_WINDOW = float(os.getenv("ALERT_DEDUP_WINDOW", 600))
+ALERT_WORKERS = int(os.getenv("ALERT_WORKERS", 4))
 
-def send_alert(level, message):
-    """
-    Send alert to configured channels (Slack, Telegram, Email).
-    
-    Args:
-        level: Alert level (info, warning, error, critical)
-        message: Alert message text
-    
-    Returns:
-        dict: Status of each channel
-    """
-    results = {}
-    payload = f"[{level.upper()}] {message}"
-    
-    # Slack webhook
-    slack_webhook = os.getenv("SLACK_WEBHOOK_URL")
-    if slack_webhook:
-        try:
-            response = requests.post(
-                slack_webhook,
-                json={"text": payload},
-                timeout=5
-            )
-            results["slack"] = "sent" if response.status_code == 200 else "failed"
-        except Exception as e:
-            logger.error(f"Slack alert failed: {e}")
-            results["slack"] = "failed"
-    
-    # Telegram bot
-    telegram_token = os.getenv("TELEGRAM_BOT_TOKEN")
-    telegram_chat = os.getenv("TELEGRAM_CHAT_ID")
-    
-    if telegram_token and telegram_chat:
-        try:
-            response = requests.post(
-                f"https://api.telegram.org/bot{telegram_token}/sendMessage",
-                data={
-                    "chat_id": telegram_chat,
-                    "text": payload
-                },
+# (messages per minute, burst) per channel
+CHANNEL_LIMITS = {
+    "slack": (float(os.getenv("ALERT_SLACK_PER_MIN", 20)), 5),
+    "telegram": (float(os.getenv("ALERT_TELEGRAM_PER_MIN", 20)), 5),
+    "email": (float(os.getenv("ALERT_EMAIL_PER_MIN", 2)), 2),
+}
+
+_DIGITS = re.compile(r"\d+")
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def fingerprint_for(level: str, message: str) -> str:
+    """Default fingerprint: level + message with numbers masked (ids, counts, timestamps)"""
+    normalized = _DIGITS.sub("#", message.strip().lower())[:300]
+    return hashlib.sha1(f"{level}:{normalized}".encode()).hexdigest()[:16]
+
+
+class TokenBucket:
+    """Non-blocking token bucket; try_acquire() returns False when empty"""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class AlertRouter:
+    """Deduplicating, rate-limited, concurrent alert fan-out"""
+
+    def __init__(self, session: Optional[requests.Session] = None, max_workers: int = ALERT_WORKERS,
+                 dedup_window: float = ALERT_DEDUP_WINDOW):
+        self.session = session or requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alert")
+        self.dedup_window = dedup_window
+        self.buckets = {name: TokenBucket(*limits) for name, limits in CHANNEL_LIMITS.items()}
+        self._groups: Dict[str, Dict[str, Any]] = {}
+        self._digest: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stats = {"received": 0, "deduplicated": 0, "sent": 0, "failed": 0, "deferred": 0, "digests": 0}
+
+    # Channels
+
+    def configured_channels(self) -> List[str]:
+        channels = []
+        if os.getenv("SLACK_WEBHOOK_URL"):
+            channels.append("slack")
+        if os.getenv("TELEGRAM_BOT_TOKEN"):
+            channels.append("telegram")
+        if os.getenv("RESEND_API_KEY") and os.getenv("RECEIVING_EMAIL"):
+            channels.append("email")
+        return channels
+
+    def _post(self, channel: str, level: str, title: str, message: str, options: Dict[str, Any]) -> bool:
+        if channel == "slack":
+            payload = {"text": message if options.get("raw") else f"[{level.upper()}] {message}"}
+            if options.get("attachments"):
+                payload["attachments"] = options["attachments"]
+            response = self.session.post(os.getenv("SLACK_WEBHOOK_URL"), json=payload, timeout=5)
+        elif channel == "telegram":
+            payload = {
+                "chat_id": os.getenv("TELEGRAM_CHAT_ID") or _default_telegram_chat(),
+                "text": message if options.get("raw") else f"[{level.upper()}] {message}"
+            }
+            if options.get("parse_mode"):
+                payload["parse_mode"] = options["parse_mode"]
+            response = self.session.post(
+                f"https://api.telegram.org/bot{os.getenv('TELEGRAM_BOT_TOKEN')}/sendMessage",
+                json=payload,
                 timeout=5
             )
-            results["telegram"] = "sent" if response.status_code == 200 else "failed"
-        except Exception as e:
-            logger.error(f"Telegram alert failed: {e}")
-            results["telegram"] = "failed"
-    
-    # Email via Resend (if configured)
-    resend_key = os.getenv("RESEND_API_KEY")
-    receiving_email = os.getenv("RECEIVING_EMAIL")
-    
-    if resend_key and receiving_email:
-        try:
-            response = requests.post(
+        elif channel == "email":
+            response = self.session.post(
                 "https://api.resend.com/emails",
                 headers={
-                    "Authorization": f"Bearer {resend_key}",
+                    "Authorization": f"Bearer {os.getenv('RESEND_API_KEY')}",
                     "Content-Type": "application/json"
                 },
                 json={
                     "from": "alerts@levqor.ai",
-                    "to": receiving_email,
-                    "subject": f"[{level.upper()}] Levqor Alert",
+                    "to": os.getenv("RECEIVING_EMAIL"),
+                    "subject": f"[{level.upper()}] {title}",
                     "text": message
                 },
                 timeout=10
             )
-            results["email"] = "sent" if response.status_code == 200 else "failed"
+        else:
+            raise ValueError(f"unknown alert channel: {channel}")
+        return response.status_code == 200
+
+    def _deliver(self, channel: str, level: str, title: str, message: str, options: Dict[str, Any]) -> str:
+        try:
+            ok = self._post(channel, level, title, message, options)
         except Exception as e:
-            logger.error(f"Email alert failed: {e}")
-            results["email"] = "failed"
-    
-    logger.info(f"Alert sent ({level}): {message} - Results: {results}")
-    
+            logger.error(f"{channel} alert failed: {e}")
+            ok = False
+        with self._lock:
+            self._stats["sent" if ok else "failed"] += 1
+        return "sent" if ok else "failed"
+
+    def _submit(self, *args):
+        future = self.executor.submit(self._deliver, *args)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    # Public API
+
+    def send(
+        self,
+        level: str,
+        message: str,
+        title: str = "Levqor Alert",
+        fingerprint: Optional[str] = None,
+        channels: Optional[Iterable[str]] = None,
+        digest: bool = False,
+        **options
+    ) -> Dict[str, str]:
+        """
+        Route an alert without blocking the caller
+
+        Args:
+            level: Alert level (info, warning, error, critical)
+            message: Alert message text
+            title: Short title (email subject, digest line)
+            fingerprint: Dedup key (defaults to level + number-masked message)
+            channels: Subset of channels (defaults to every configured one)
+            digest: Hold for the next digest instead of sending now
+            **options: Channel options (parse_mode, raw, attachments)
+
+        Returns:
+            dict: Per-channel status - queued, deferred (rate limited or
+            digest), or deduplicated
+        """
+        fingerprint = fingerprint or fingerprint_for(level, message)
+        configured = self.configured_channels()
+        targets = [c for c in (channels or configured) if c in configured]
+        now = time()
+
+        with self._lock:
+            self._stats["received"] += 1
+            group = self._groups.get(fingerprint)
+            if group and now - group["first_seen"] < self.dedup_window:
+                group["count"] += 1
+                group["last_seen"] = now
+                self._stats["deduplicated"] += 1
+                return {channel: "deduplicated" for channel in targets}
+
+            group = {
+                "fingerprint": fingerprint,
+                "level": level,
+                "title": title,
+                "message": message,
+                "count": 1,
+                "reported": 0,
+                "first_seen": now,
+                "last_seen": now,
+                "channels": targets
+            }
+            self._groups[fingerprint] = group
+
+        results = {}
+        for channel in targets:
+            if not digest and self.buckets[channel].try_acquire():
+                self._submit(channel, level, title, message, options)
+                results[channel] = "queued"
+            else:
+                with self._lock:
+                    self._digest.setdefault(channel, []).append(group)
+                    self._stats["deferred"] += 1
+                results[channel] = "deferred"
+
+        with self._lock:
+            group["reported"] = 1 if "queued" in results.values() else 0
+        return results
+
+    def flush_digest(self) -> Dict[str, int]:
+        """
+        Send one digest per channel covering deferred alerts and repeats
+        suppressed since they were last reported; expire old groups
+
+        Returns:
+            dict: Number of alert groups included per channel
+        """
+        now = time()
+        with self._lock:
+            pending = {channel: list(groups) for channel, groups in self._digest.items()}
+            self._digest.clear()
+
+            # Groups that were sent immediately but kept firing
+            for group in self._groups.values():
+                repeats = group["count"] - group["reported"]
+                if group["reported"] and repeats > 0:
+                    for channel in group["channels"]:
+                        if all(g is not group for g in pending.setdefault(channel, [])):
+                            pending[channel].append(group)
+
+            for fingerprint in [f for f, g in self._groups.items() if now - g["first_seen"] >= self.dedup_window]:
+                del self._groups[fingerprint]
+
+        included = {}
+        for channel, groups in pending.items():
+            if not groups:
+                continue
+            if not self.buckets[channel].try_acquire():
+                # Still over budget: keep them for the next flush
+                with self._lock:
+                    self._digest.setdefault(channel, []).extend(groups)
+                continue
+
+            lines = []
+            total = 0
+            for group in groups:
+                new = group["count"] - group["reported"]
+                total += new
+                lines.append(f"- [{group['level'].upper()}] {group['title']}: {_TAGS.sub('', group['message'])[:160]} (x{new})")
+                group["reported"] = group["count"]
+            text = f"Alert digest: {total} alert(s) in {len(groups)} group(s)\n" + "\n".join(lines)
+
+            self._submit(channel, "digest", "Levqor Alert Digest", text, {"raw": True})
+            included[channel] = len(groups)
+
+        if included:
+            with self._lock:
+                self._stats["digests"] += len(included)
+        return included
+
+    def drain(self, timeout: float = 15) -> None:
+        """Wait for in-flight sends (for short-lived scripts before exit)"""
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            wait_futures(pending, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._stats,
+                active_groups=len(self._groups),
+                deferred_pending=sum(len(g) for g in self._digest.values()),
+                in_flight=len(self._pending)
+            )
+
+
+def _default_telegram_chat():
+    from backend.utils.telegram_helper import TELEGRAM_CHAT_ID
+    return TELEGRAM_CHAT_ID
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_alert_router() -> AlertRouter:
+    """Process-wide router (shared pool, buckets and dedup state)"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = AlertRouter()
+    return _router
+
+
+def send_alert(level, message, **kwargs):
+    """
+    Send alert to configured channels (Slack, Telegram, Email).
+
+    Args:
+        level: Alert level (info, warning, error, critical)
+        message: Alert message text
+        **kwargs: Passed to AlertRouter.send (title, fingerprint, channels, digest, ...)
+
+    Returns:
+        dict: Status of each channel
+    """
+    results = get_alert_router().send(level, message, **kwargs)
+    logger.info(f"Alert routed ({level}): {message} - Results: {results}")
     return results
+
+
+def flush_alert_digest():
+    """Scheduler entry point"""
+    return get_alert_router().flush_digest()
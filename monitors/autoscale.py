@@ -73,23 +73,17 @@ class AutoscaleController:
         Returns margin percentage (0-100).
         """
         try:
-            conn = sqlite3.connect("levqor.db")
-            c = conn.cursor()
-            
-            # Get revenue and costs from KV
-            c.execute("SELECT value FROM kv WHERE key='stripe_revenue_30d'")
-            revenue_row = c.fetchone()
-            revenue = float(revenue_row[0]) if revenue_row else 0.0
-            
-            c.execute("SELECT value FROM kv WHERE key='openai_cost_30d'")
-            openai_row = c.fetchone()
-            openai_cost = float(openai_row[0]) if openai_row else 0.0
+            from modules.kv import get_kv_store
             
-            c.execute("SELECT value FROM kv WHERE key='infra_cost_30d'")
-            infra_row = c.fetchone()
-            infra_cost = float(infra_row[0]) if infra_row else 0.0
-            
-            conn.close()
+            # Get revenue and costs from KV in one batched read
+            values = get_kv_store().get_floats({
+                "stripe_revenue_30d": 0.0,
+                "openai_cost_30d": 0.0,
+                "infra_cost_30d": 0.0
+            })
+            revenue = values["stripe_revenue_30d"]
+            openai_cost = values["openai_cost_30d"]
+            infra_cost = values["infra_cost_30d"]
             
             total_cost = openai_cost + infra_cost
             if revenue == 0:
@@ -4,7 +4,6 @@ Incident Response - Automated recovery and alerting
 import os
 import json
 import logging
-import requests
 from datetime import datetime
 from typing import Dict, Any, Optional
 
@@ -26,23 +25,28 @@ class IncidentResponder:
             log.error(f"Failed to log incident: {e}")
     
     def send_telegram_alert(self, message: str) -> bool:
-        """Send compact alert to Telegram"""
+        """
+        Send compact alert to Telegram
+        
+        Goes through the shared alert router, so it returns as soon as the
+        alert is queued and repeated incidents are deduplicated/digested.
+        """
         if not self.telegram_token or not self.telegram_chat_id:
             log.debug("Telegram not configured, skipping alert")
             return False
         
         try:
-            url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-            response = requests.post(
-                url,
-                json={
-                    "chat_id": self.telegram_chat_id,
-                    "text": f"🚨 Levqor Incident\n\n{message}",
-                    "parse_mode": "Markdown"
-                },
-                timeout=5
+            from monitors.alert_router import send_alert
+            results = send_alert(
+                "critical",
+                f"🚨 Levqor Incident\n\n{message}",
+                title="Levqor Incident",
+                fingerprint="incident:recovery",
+                channels=["telegram"],
+                parse_mode="Markdown",
+                raw=True
             )
-            return response.status_code == 200
+            return results.get("telegram") in ("queued", "deferred", "deduplicated")
         except Exception as e:
             log.warning(f"Failed to send Telegram alert: {e}")
             return False
@@ -4,7 +4,7 @@ Automated Task Scheduler - APScheduler integration for periodic jobs
 import os
 import logging
 import subprocess
-from datetime import datetime
+from datetime import datetime, timedelta
 
 log = logging.getLogger("levqor.scheduler")
 
@@ -218,35 +218,32 @@ def run_cost_prediction():
 
 def update_kv_costs():
     """Persist cost metrics to KV store (hourly)"""
-    import sqlite3
     log.debug("Updating KV cost metrics...")
     
-    def _kv_upsert(key, val):
-        conn = sqlite3.connect('levqor.db')
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO kv (key, value, updated_at) 
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(key) DO UPDATE SET 
-                value = excluded.value,
-                updated_at = CURRENT_TIMESTAMP
-        """, (key, str(val)))
-        conn.commit()
-        conn.close()
-    
     try:
         from scripts.cost_predict import load_cached_forecast
+        from modules.kv import get_kv_store
         forecast = load_cached_forecast()
         
         if forecast:
             breakdown = forecast.get('breakdown', {})
-            _kv_upsert('openai_cost_30d', breakdown.get('openai_estimate', 0))
-            _kv_upsert('infra_cost_30d', sum(breakdown.get('infra_costs', {}).values()))
-            _kv_upsert('stripe_revenue_30d', breakdown.get('stripe_revenue_last_30d', 1))
+            get_kv_store().set_many({
+                'openai_cost_30d': breakdown.get('openai_estimate', 0),
+                'infra_cost_30d': sum(breakdown.get('infra_costs', {}).values()),
+                'stripe_revenue_30d': breakdown.get('stripe_revenue_last_30d', 1)
+            })
             log.debug("✅ KV costs updated")
     except Exception as e:
         log.error(f"KV cost update failed: {e}")
 
+def flush_notion_sync_queue():
+    """Every minute - Push queued Notion writes (rate limited)"""
+    try:
+        from server.notion_queue import flush_notion_queue
+        flush_notion_queue()
+    except Exception as e:
+        log.error(f"Notion sync flush error: {e}")
+
 def run_growth_retention():
     """Daily growth retention aggregation by source"""
     log.info("Running growth retention aggregation...")
@@ -446,106 +443,176 @@ def run_dsar_cleanup():
         log.error(f"DSAR cleanup error: {e}")
 
 def check_critical_errors():
-    """Every 10 minutes - Check for critical errors and send Telegram alerts"""
-    import sqlite3
-    from backend.utils.telegram_helper import send_telegram_notification
+    """Every 10 minutes - Check for critical errors and send Telegram alerts
+    
+    Reads only events added since the previous run (high-water-mark cursor
+    on error_events.id). Errors are grouped by source/service/message so a
+    burst produces one alert per distinct error (with a count) instead of
+    one per row; sends are queued on the alert router and never block the
+    scheduler.
+    """
+    from monitors.alert_router import send_alert
+    from backend.services.error_analytics import fetch_new_events
+    from run import app
     
     log.debug("Checking for critical errors...")
     
     try:
-        db_path = os.getenv("DATABASE_PATH", "levqor.db")
-        db = sqlite3.connect(db_path)
-        db.row_factory = sqlite3.Row
-        cursor = db.cursor()
-        
-        cursor.execute("""
-            SELECT id, created_at, source, service, message, user_email, path_or_screen
-            FROM error_events
-            WHERE severity = 'critical'
-            AND datetime(created_at) > datetime('now', '-10 minutes')
-            ORDER BY created_at DESC
-        """)
-        
-        critical_errors = cursor.fetchall()
-        db.close()
+        with app.app_context():
+            critical_errors = [
+                {
+                    'id': event.id,
+                    'created_at': event.created_at.isoformat() if event.created_at else '',
+                    'source': event.source,
+                    'service': event.service,
+                    'message': event.message,
+                    'count': event.count or 1,
+                    'user_email': event.user_email,
+                    'path_or_screen': event.path_or_screen
+                }
+                # Cursor returns oldest first; alerts show the newest occurrence
+                for event in reversed(fetch_new_events('critical_alerts', severity='critical'))
+            ]
         
         if critical_errors:
-            log.warning(f"Found {len(critical_errors)} critical error(s) in last 10 minutes")
+            log.warning(f"Found {len(critical_errors)} new critical error(s)")
             
+            # Newest first, so the first row of each group is the latest occurrence
+            groups = {}
             for error in critical_errors:
+                key = (error['source'], error['service'], (error['message'] or '')[:200])
+                groups.setdefault(key, []).append(error)
+            
+            for (source, service, text), errors in groups.items():
+                latest = errors[0]
+                occurrences = sum(error['count'] for error in errors)
+                count_line = f"<b>Occurrences:</b> {occurrences} since last check\n" if occurrences > 1 else ""
                 message = f"""
 🚨 <b>CRITICAL ERROR DETECTED</b>
 
-<b>Source:</b> {error['source']}
-<b>Service:</b> {error['service']}
-<b>Time:</b> {error['created_at']}
+<b>Source:</b> {source}
+<b>Service:</b> {service}
+<b>Time:</b> {latest['created_at']}
+{count_line}
+<b>Message:</b> {text}
 
-<b>Message:</b> {error['message'][:200]}
+<b>User:</b> {latest['user_email'] or 'N/A'}
+<b>Path:</b> {latest['path_or_screen'] or 'N/A'}
 
-<b>User:</b> {error['user_email'] or 'N/A'}
-<b>Path:</b> {error['path_or_screen'] or 'N/A'}
-
-Error ID: #{error['id']}
+Error ID: #{latest['id']}
 View details: https://www.levqor.ai/owner/errors
                 """.strip()
                 
-                send_telegram_notification(message)
-                log.info(f"Sent Telegram alert for critical error #{error['id']}")
+                send_alert(
+                    "critical",
+                    message,
+                    title=f"Critical error in {service}",
+                    fingerprint=f"critical_error:{source}:{service}:{text}",
+                    channels=["telegram"],
+                    parse_mode="HTML",
+                    raw=True
+                )
+            log.info(f"Queued {len(groups)} Telegram alert(s) for {len(critical_errors)} critical error(s)")
         
     except Exception as e:
         log.error(f"Critical error check failed: {e}")
 
+def flush_alert_digest():
+    """Every minute - Send digests for rate-limited and repeated alerts"""
+    try:
+        from monitors.alert_router import flush_alert_digest as flush_digest
+        flush_digest()
+    except Exception as e:
+        log.error(f"Alert digest flush error: {e}")
+
+def reconcile_compliance_counters():
+    """Hourly - Correct drift in the compliance dashboard counters
+    
+    Uses its own connection: the reconcile commits and opens a write
+    transaction, which must not touch the request threads' shared one.
+    """
+    try:
+        import sqlite3
+        from compliance.counters import reconcile_compliance_counters as reconcile
+        from run import DB_PATH
+        
+        db = sqlite3.connect(DB_PATH, timeout=30)
+        try:
+            drift = reconcile(db)
+        finally:
+            db.close()
+        if drift:
+            log.warning(f"Compliance counter drift corrected for {len(drift)} counter(s)")
+    except Exception as e:
+        log.error(f"Compliance counter reconciliation error: {e}")
+
+def resume_tos_broadcasts():
+    """Every 5 minutes - Resume TOS update broadcasts whose worker stopped"""
+    try:
+        from backend.services.tos_broadcast import resume_broadcasts
+        resumed = resume_broadcasts()
+        if resumed:
+            log.info(f"Resumed {resumed} TOS broadcast(s)")
+    except Exception as e:
+        log.error(f"TOS broadcast resume error: {e}")
+
+def resume_insights_reports():
+    """Every 10 minutes - Re-submit insights report jobs orphaned by a restart"""
+    try:
+        from modules.data_insights.report_jobs import resume_report_jobs
+        resumed = resume_report_jobs()
+        if resumed:
+            log.info(f"Resumed {resumed} insights report job(s)")
+    except Exception as e:
+        log.error(f"Insights report resume error: {e}")
+
+def sync_stripe_charges():
+    """Every 15 minutes - Pull new and recently changed Stripe charges into stripe_charges"""
+    try:
+        from modules.stripe_sync import sync_charges
+        sync_charges()
+    except Exception as e:
+        log.error(f"Stripe charge sync error: {e}")
+
 def send_daily_error_summary():
-    """Daily at 9 AM UTC - Send email summary of errors"""
-    import sqlite3
+    """Daily at 9 AM UTC - Send email summary of errors
+    
+    Counts come from the per-minute error_event_rollups, so the cost is
+    bounded by the 24h window rather than the size of error_events.
+    """
     from backend.utils.resend_sender import send_email_via_resend
+    from backend.services.error_analytics import get_error_counts, get_recent_events
+    from run import app
     
     log.info("Generating daily error summary...")
     
     try:
-        db_path = os.getenv("DATABASE_PATH", "levqor.db")
-        db = sqlite3.connect(db_path)
-        db.row_factory = sqlite3.Row
-        cursor = db.cursor()
-        
-        cursor.execute("""
-            SELECT severity, COUNT(*) as count
-            FROM error_events
-            WHERE datetime(created_at) > datetime('now', '-24 hours')
-            GROUP BY severity
-            ORDER BY 
-                CASE severity
-                    WHEN 'critical' THEN 1
-                    WHEN 'error' THEN 2
-                    WHEN 'warning' THEN 3
-                    WHEN 'info' THEN 4
-                END
-        """)
-        
-        severity_counts = cursor.fetchall()
-        
-        cursor.execute("""
-            SELECT service, COUNT(*) as count
-            FROM error_events
-            WHERE datetime(created_at) > datetime('now', '-24 hours')
-            GROUP BY service
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        
-        top_services = cursor.fetchall()
-        
-        cursor.execute("""
-            SELECT created_at, source, service, message
-            FROM error_events
-            WHERE severity IN ('critical', 'error')
-            AND datetime(created_at) > datetime('now', '-24 hours')
-            ORDER BY created_at DESC
-            LIMIT 10
-        """)
-        
-        recent_errors = cursor.fetchall()
-        db.close()
+        severity_order = {'critical': 1, 'error': 2, 'warning': 3, 'info': 4}
+        since = datetime.utcnow() - timedelta(hours=24)
+        
+        with app.app_context():
+            severity_counts = [
+                {'severity': severity, 'count': count}
+                for severity, count in sorted(
+                    get_error_counts(since, group_by='severity'),
+                    key=lambda item: severity_order.get(item[0], 5)
+                )
+            ]
+            
+            top_services = [
+                {'service': service, 'count': count}
+                for service, count in get_error_counts(since, group_by='service')[:5]
+            ]
+            
+            recent_errors = [
+                {
+                    'created_at': event.created_at.isoformat() if event.created_at else '',
+                    'source': event.source,
+                    'service': event.service,
+                    'message': event.message or ''
+                }
+                for event in get_recent_events(since, severities=['critical', 'error'], limit=10)
+            ]
         
         severity_html = ""
         total_errors = 0
@@ -677,6 +744,15 @@ def init_scheduler():
             replace_existing=True
         )
         
+        scheduler.add_job(
+            flush_notion_sync_queue,
+            'interval',
+            minutes=1,
+            id='notion_sync_flush',
+            name='Notion write-behind flush',
+            replace_existing=True
+        )
+        
         scheduler.add_job(
             run_growth_retention,
             CronTrigger(hour=0, minute=10, timezone='UTC'),
@@ -831,6 +907,51 @@ def init_scheduler():
             replace_existing=True
         )
         
+        scheduler.add_job(
+            flush_alert_digest,
+            'interval',
+            minutes=1,
+            id='alert_digest_flush',
+            name='Alert digest flush',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            reconcile_compliance_counters,
+            'interval',
+            hours=1,
+            id='compliance_counters_reconcile',
+            name='Compliance counter reconciliation',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            resume_tos_broadcasts,
+            'interval',
+            minutes=5,
+            id='tos_broadcast_resume',
+            name='TOS broadcast resume',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            resume_insights_reports,
+            'interval',
+            minutes=10,
+            id='insights_report_resume',
+            name='Insights report job resume',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            sync_stripe_charges,
+            'interval',
+            minutes=15,
+            id='stripe_charges_sync',
+            name='Stripe charge sync',
+            replace_existing=True
+        )
+        
         scheduler.add_job(
             send_daily_error_summary,
             CronTrigger(hour=9, minute=0, timezone='UTC'),
@@ -840,7 +961,7 @@ def init_scheduler():
         )
         
         scheduler.start()
-        log.info("✅ APScheduler initialized with 21 jobs (including error monitoring, Go/No-Go, DSAR cleanup)")
+        log.info("✅ APScheduler initialized with 27 jobs (including error monitoring, Go/No-Go, DSAR cleanup)")
         return scheduler
         
     except ImportError:
@@ -91,10 +91,11 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
 db.init_app(app)
 
 from backend.models.sales_models import Lead, LeadActivity, DFYOrder, DFYActivity, UpsellLog
-from backend.models.error_event import ErrorEvent
+from backend.models.error_event import ErrorEvent, upgrade_error_events_table
 
 with app.app_context():
     db.create_all()
+    upgrade_error_events_table(db.engine)
 
 from backend.routes.dsar import dsar_bp
 from backend.routes.dsar_admin import dsar_admin_bp
@@ -290,6 +291,10 @@ def get_db():
         _db_connection.execute("CREATE INDEX IF NOT EXISTS idx_listings_verified ON listings(is_verified)")
         _db_connection.execute("CREATE INDEX IF NOT EXISTS idx_listings_category ON listings(category)")
         
+        # Ranking indexes + FTS5 mirror for marketplace search
+        from modules.marketplace.search import init_listing_search
+        init_listing_search(_db_connection)
+        
         _db_connection.execute("""
           CREATE TABLE IF NOT EXISTS marketplace_orders(
             id TEXT PRIMARY KEY,
@@ -312,6 +317,9 @@ def get_db():
         _db_connection.execute("CREATE INDEX IF NOT EXISTS idx_marketplace_orders_partner_id ON marketplace_orders(partner_id)")
         _db_connection.execute("CREATE INDEX IF NOT EXISTS idx_marketplace_orders_status ON marketplace_orders(status)")
         
+        from modules.marketplace.payouts import init_payout_tables
+        init_payout_tables(_db_connection)
+        
         _db_connection.execute("PRAGMA journal_mode=WAL")
         _db_connection.execute("PRAGMA synchronous=NORMAL")
         
@@ -327,6 +335,22 @@ def get_db():
         from dunning.models import init_dunning_tables
         init_dunning_tables(_db_connection)
         
+        # Initialize partner webhook delivery log
+        from modules.partner_api.delivery import init_webhook_delivery_tables
+        init_webhook_delivery_tables(_db_connection)
+        
+        # TOS update broadcast jobs
+        from backend.services.tos_broadcast import init_tos_broadcast_tables
+        init_tos_broadcast_tables(_db_connection)
+        
+        # Insights PDF report jobs and artifacts
+        from modules.data_insights.report_jobs import init_insights_report_tables
+        init_insights_report_tables(_db_connection)
+        
+        # Local copy of Stripe charges for revenue reports
+        from modules.stripe_sync import init_stripe_sync_tables
+        init_stripe_sync_tables(_db_connection)
+        
         # Deletion jobs table
         _db_connection.execute("""
             CREATE TABLE IF NOT EXISTS deletion_jobs(
@@ -494,6 +518,14 @@ def get_db():
         except Exception as e:
             log.warning(f"GDPR opt-out migration warning: {e}")
         
+        # Compliance dashboard counters (triggers need the columns above)
+        from compliance.counters import init_compliance_counters
+        init_compliance_counters(_db_connection)
+        
+        # Daily growth_events rollups for funnel / discount queries
+        from modules.growth import init_growth_rollups
+        init_growth_rollups(_db_connection)
+        
         _db_connection.commit()
     return _db_connection
 
@@ -677,6 +709,7 @@ def audit():
         record_successful_login,
         is_locked_out
     )
+    from modules.audit_log import write_audit_event
     
     if not request.is_json:
         return bad_request("Content-Type must be application/json")
@@ -725,25 +758,20 @@ def audit():
         log_security_event("auth_failed", email=email, ip=ip_address, severity="warning")
     
     # Log to file (legacy format for compatibility)
-    audit_entry = json.dumps({
+    write_audit_event({
         "event": event,
         "email": email,
         "ip": ip_address,
         "user_agent": user_agent,
         "ts": ts
-    }, separators=(',', ':'))
-    
-    audit_file = os.path.join("logs", "audit.log")
-    try:
-        with open(audit_file, "a") as f:
-            f.write(audit_entry + "\n")
-    except Exception as e:
-        log.warning(f"Failed to write audit log: {e}")
+    })
     
     return jsonify({"ok": True}), 200
 
 @app.post("/api/admin/impersonate")
 def admin_impersonate():
+    from modules.audit_log import write_audit_event
+    
     admin_token = request.headers.get("X-ADMIN-TOKEN")
     if not ADMIN_TOKEN or admin_token != ADMIN_TOKEN:
         return jsonify({"error": "forbidden"}), 403
@@ -764,19 +792,12 @@ def admin_impersonate():
         "impersonated": True
     }, JWT_SECRET, algorithm="HS256")
     
-    audit_entry = json.dumps({
+    write_audit_event({
         "event": "admin_impersonate",
         "email": email,
         "admin_ip": request.headers.get("X-Forwarded-For", request.remote_addr),
         "ts": int(time() * 1000)
-    }, separators=(',', ':'))
-    
-    audit_file = os.path.join("logs", "audit.log")
-    try:
-        with open(audit_file, "a") as f:
-            f.write(audit_entry + "\n")
-    except Exception as e:
-        log.warning(f"Failed to write audit log: {e}")
+    })
     
     return jsonify({"token": token}), 200
 
@@ -1721,7 +1742,7 @@ def dsar_download():
     
     if error_reason:
         log_dsar_event(db, None, None, "download_failed", ip_address, user_agent, details=error_reason)
-        return jsonify({"ok": False, "error": error_reason}), 403
+        return jsonify({"ok": False, "error": error_reason}), 429 if error_reason == "OTP_LOCKED" else 403
     
     # Get user info for logging
     cursor = db.cursor()
@@ -1854,6 +1875,10 @@ def delete_my_data():
         
         db.commit()
         
+        # Developer key rows feed the insights KPIs
+        from modules.data_insights.cache import invalidate_kpis
+        invalidate_kpis()
+        
         log_dsar_event(db, user_id, email, "delete_my_data_completed", ip_address, user_agent, 
                       details=f"Deleted {sum(deleted_counts.values())} records")
         
@@ -2403,6 +2428,11 @@ def run_deletions():
             db.commit()
             log.error(f"[DELETION] Failed to delete user {user_id}: {e}")
     
+    if deleted_count:
+        # Developer key rows feed the insights KPIs
+        from modules.data_insights.cache import invalidate_kpis
+        invalidate_kpis()
+    
     return jsonify({"ok": True, "deleted": deleted_count}), 200
 
 
@@ -7,11 +7,11 @@ Alerts if Replit spend > $10
 """
 import os
 import sys
-import requests
 from datetime import datetime, timedelta
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from server.notion_helper import NotionHelper, notion_title, notion_number, notion_checkbox, notion_date
+from modules.stripe_sync import ensure_charges_synced, get_charge_totals
 
 def get_replit_usage():
     """Get Replit usage and costs (mock for now)"""
@@ -36,56 +36,23 @@ def get_stripe_revenue():
         }
     
     try:
-        # Get charges from last 24 hours
-        yesterday = int((datetime.utcnow() - timedelta(days=1)).timestamp())
+        if not ensure_charges_synced():
+            print("⚠️  Stripe sync failed, using stored charges")
         
-        headers = {"Authorization": f"Bearer {stripe_key}"}
-        params = {"created[gte]": yesterday, "limit": 100}
+        # Charges from last 24 hours; add-on revenue = Integrity Pack, Templates, etc.
+        yesterday = (datetime.now() - timedelta(days=1)).timestamp()
+        totals = get_charge_totals(since=yesterday, keywords=("integrity", "template", "api"))
         
-        response = requests.get(
-            "https://api.stripe.com/v1/charges",
-            headers=headers,
-            params=params,
-        )
+        # Calculate Stripe fees (2.9% + $0.30 per transaction)
+        stripe_fees = (totals["revenue_cents"] * 0.029 + 30 * totals["paid_count"]) / 100
         
-        if response.status_code == 200:
-            data = response.json()
-            charges = data.get("data", [])
-            
-            successful = sum(c["amount"] for c in charges if c["paid"]) / 100
-            failed = sum(1 for c in charges if not c["paid"])
-            
-            # Calculate Stripe fees (2.9% + $0.30 per transaction)
-            stripe_fees = sum(
-                (c["amount"] * 0.029 + 30) / 100 
-                for c in charges if c["paid"]
-            )
-            
-            # Track add-on revenue (Integrity Pack, Templates, etc.)
-            addon_charges = [
-                c for c in charges 
-                if c.get("paid") and any(
-                    keyword in c.get("description", "").lower() 
-                    for keyword in ["integrity", "template", "api"]
-                )
-            ]
-            addon_revenue = sum(c["amount"] for c in addon_charges) / 100
-            
-            return {
-                "revenue": successful,
-                "fees": stripe_fees,
-                "addon_revenue": addon_revenue,
-                "failed_payments": failed,
-                "total_transactions": len(charges),
-            }
-        else:
-            print(f"⚠️  Stripe API error: {response.status_code}")
-            return {
-                "revenue": 0.0,
-                "fees": 0.0,
-                "addon_revenue": 0.0,
-                "failed_payments": 0
-            }
+        return {
+            "revenue": totals["revenue_cents"] / 100,
+            "fees": stripe_fees,
+            "addon_revenue": totals["any_keyword_cents"] / 100,
+            "failed_payments": totals["failed_count"],
+            "total_transactions": totals["charges"],
+        }
             
     except Exception as e:
         print(f"❌ Stripe error: {str(e)}")
@@ -5,8 +5,12 @@ Generates and uploads insights PDF to Google Drive
 """
 import requests
 import os
+import time
 from datetime import datetime
 
+POLL_INTERVAL_SECONDS = 5
+POLL_TIMEOUT_SECONDS = 600
+
 def run():
     """Generate quarterly insights report"""
     api_base = os.environ.get("PUBLIC_API", "https://api.levqor.ai")
@@ -20,7 +24,23 @@ def run():
         )
         
         response.raise_for_status()
-        data = response.json()
+        job_id = response.json()["job_id"]
+        
+        # Report is built in the background; poll the job handle
+        deadline = time.time() + POLL_TIMEOUT_SECONDS
+        while True:
+            response = requests.get(f"{api_base}/api/insights/report/{job_id}", timeout=30)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("status") == "completed":
+                break
+            if data.get("status") == "failed":
+                print(f"❌ Insights report job {job_id} failed: {data.get('error')}")
+                return False
+            if time.time() > deadline:
+                print(f"❌ Insights report job {job_id} still {data.get('status')} after {POLL_TIMEOUT_SECONDS}s")
+                return False
+            time.sleep(POLL_INTERVAL_SECONDS)
         
         drive_link = data.get("drive_link", "")
         print(f"✅ Insights report generated successfully")
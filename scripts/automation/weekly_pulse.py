@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from server.notion_helper import NotionHelper, notion_title, notion_number, notion_rich_text, notion_date
+from modules.stripe_sync import ensure_charges_synced, get_charge_totals
 
 def get_expansion_metrics():
     """Collect expansion product metrics"""
@@ -29,39 +30,18 @@ def get_expansion_metrics():
             # TODO: Query Notion for integrity runs count (when DB is set up)
             pass
         
-        # Get Template Pack sales from Stripe
+        # Get Template Pack sales from Stripe (synced copy in stripe_charges)
         stripe_key = os.getenv("STRIPE_SECRET_KEY", "").strip()
         if stripe_key:
             try:
-                headers = {"Authorization": f"Bearer {stripe_key}"}
+                if not ensure_charges_synced():
+                    print("⚠️  Stripe sync failed, using stored charges")
                 
-                # Get charges for template packs (filter by metadata or description)
-                week_ago = int((datetime.utcnow() - timedelta(days=7)).timestamp())
-                params = {"created[gte]": week_ago, "limit": 100}
-                
-                response = requests.get(
-                    "https://api.stripe.com/v1/charges",
-                    headers=headers,
-                    params=params,
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    charges = data.get("data", [])
-                    
-                    # Filter for template pack purchases (by description or metadata)
-                    template_charges = [
-                        c for c in charges 
-                        if c.get("paid") and "template" in c.get("description", "").lower()
-                    ]
-                    metrics["template_sales"] = sum(c["amount"] for c in template_charges) / 100
-                    
-                    # Filter for API tier charges
-                    api_charges = [
-                        c for c in charges 
-                        if c.get("paid") and "api" in c.get("description", "").lower()
-                    ]
-                    metrics["api_revenue"] = sum(c["amount"] for c in api_charges) / 100
+                # Template pack and API tier charges (by description)
+                week_ago = (datetime.now() - timedelta(days=7)).timestamp()
+                totals = get_charge_totals(since=week_ago, keywords=("template", "api"))
+                metrics["template_sales"] = totals["keyword_cents"]["template"] / 100
+                metrics["api_revenue"] = totals["keyword_cents"]["api"] / 100
                     
             except Exception as e:
                 print(f"⚠️  Stripe expansion metrics error: {str(e)}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Growth rollup backfill
+Rebuild growth_daily from growth_events (all days, or from --since)
+
+Usage:
+    python scripts/backfill_growth_rollups.py [--since YYYY-MM-DD]
+
+Safe to re-run: the selected days are deleted and recomputed in one
+transaction while new inserts wait on the write lock.
+"""
+import sys
+import os
+import argparse
+import sqlite3
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.growth import init_growth_rollups, rebuild_growth_rollups
+
+
+def _utc_day(value):
+    """argparse type: a strict YYYY-MM-DD date"""
+    try:
+        if datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d") == value:
+            return value
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily growth_events rollups")
+    parser.add_argument("--since", type=_utc_day, help="First UTC day to rebuild (default: all)")
+    args = parser.parse_args()
+
+    db_path = os.environ.get("SQLITE_PATH", "levqor.db")
+    print(f"Database: {db_path}")
+
+    if not os.path.exists(db_path):
+        print(f"ERROR: Database not found at {db_path}")
+        sys.exit(1)
+
+    db = sqlite3.connect(db_path, timeout=30)
+    try:
+        init_growth_rollups(db)
+        db.commit()
+        rows = rebuild_growth_rollups(db, since_day=args.since)
+        events = db.execute("SELECT COALESCE(SUM(events), 0) FROM growth_daily").fetchone()[0]
+    finally:
+        db.close()
+
+    print(f"✅ Rebuilt {rows:,} rollup rows ({events:,} events) from {args.since or 'start'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Growth Rollup Benchmark
+Compares the raw growth_events scans with the growth_daily rollup reads
+
+Usage:
+    python scripts/benchmark_growth_rollups.py [--events N] [--days D] [--sources S] [--runs R]
+
+Builds a synthetic database in a temp directory (default 10M events over
+90 days), backfills the rollups, then times:
+  - the 30-day funnel (three GROUP BY source scans vs one rollup read)
+  - the 7-day discount preview counts (two scans vs one rollup read)
+  - trigger overhead per insert
+Nothing is written outside the temp directory.
+"""
+
+import sys
+import os
+import time
+import shutil
+import sqlite3
+import argparse
+import statistics
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.growth import init_growth_rollups, rebuild_growth_rollups, get_growth_by_source, get_event_counts
+
+EVENT_MIX = "CASE WHEN r % 100 < 80 THEN 'visit' WHEN r % 100 < 95 THEN 'signup' ELSE 'paid' END"
+
+
+def _populate(db, events, days, sources):
+    """Synthetic events, generated inside SQLite (recursive CTE) for speed"""
+    now = int(time.time())
+    db.execute("""
+        CREATE TABLE growth_events(
+            id INTEGER PRIMARY KEY,
+            ts INTEGER, user_id TEXT, event TEXT, source TEXT, campaign TEXT, plan TEXT,
+            revenue_cents INTEGER DEFAULT 0
+        )
+    """)
+    db.execute(f"""
+        WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < ?),
+        rnd(i, r) AS (SELECT i, abs(random()) FROM seq)
+        INSERT INTO growth_events (ts, user_id, event, source, revenue_cents)
+        SELECT ? - (r % ?), 'u' || (r % 1000000), {EVENT_MIX}, 'src' || (r % ?),
+               CASE WHEN r % 100 >= 95 THEN 900 + (r % 5000) ELSE 0 END
+        FROM rnd
+    """, (events, now, days * 86400, sources))
+    db.commit()
+
+
+def _raw_funnel(db):
+    window_start = int(time.time()) - (30 * 86400)
+    results = []
+    for event, agg in (("visit", "COUNT(*)"), ("signup", "COUNT(*)"), ("paid", "SUM(revenue_cents)")):
+        results.append(dict(db.execute(f"""
+            SELECT source, {agg} FROM growth_events
+            WHERE event = ? AND ts > ? GROUP BY source
+        """, (event, window_start)).fetchall()))
+    return results
+
+
+def _raw_preview(db):
+    week_ago = int(time.time()) - (7 * 86400)
+    return [
+        db.execute("SELECT COUNT(*) FROM growth_events WHERE event = ? AND ts > ?", (event, week_ago)).fetchone()[0]
+        for event in ("signup", "paid")
+    ]
+
+
+def _time_ms(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _insert_us(db, count):
+    now = int(time.time())
+    rows = [(now, f"u{i}", "visit", f"src{i % 10}", 0) for i in range(count)]
+    started = time.perf_counter()
+    db.executemany(
+        "INSERT INTO growth_events (ts, user_id, event, source, revenue_cents) VALUES (?, ?, ?, ?, ?)", rows
+    )
+    db.commit()
+    return (time.perf_counter() - started) * 1e6 / count
+
+
+def run_benchmark(events=10_000_000, days=90, sources=20, runs=5, inserts=100_000):
+    workdir = tempfile.mkdtemp(prefix="growth_bench_")
+    try:
+        db = sqlite3.connect(os.path.join(workdir, "bench.db"))
+        db.execute("PRAGMA journal_mode=WAL")
+
+        started = time.perf_counter()
+        _populate(db, events, days, sources)
+        db.execute("CREATE INDEX idx_growth_events_ts ON growth_events(ts)")
+        db.commit()
+        populate_s = time.perf_counter() - started
+
+        insert_plain_us = _insert_us(db, inserts)
+
+        started = time.perf_counter()
+        init_growth_rollups(db)  # first run backfills
+        db.commit()
+        backfill_s = time.perf_counter() - started
+        rollup_rows = db.execute("SELECT COUNT(*) FROM growth_daily").fetchone()[0]
+
+        insert_trigger_us = _insert_us(db, inserts)
+
+        # Same answers from both paths (rollup windows are whole days, so compare over all data)
+        raw_total = db.execute("SELECT COUNT(*), SUM(revenue_cents) FROM growth_events").fetchone()
+        rollup_total = db.execute("SELECT SUM(events), SUM(revenue_cents) FROM growth_daily").fetchone()
+        assert tuple(raw_total) == tuple(rollup_total), (raw_total, rollup_total)
+
+        return {
+            "events": events + 2 * inserts,
+            "rollup_rows": rollup_rows,
+            "populate_s": populate_s,
+            "backfill_s": backfill_s,
+            "funnel_raw_ms": _time_ms(lambda: _raw_funnel(db), runs),
+            "funnel_rollup_ms": _time_ms(lambda: get_growth_by_source(db, days=30), runs),
+            "preview_raw_ms": _time_ms(lambda: _raw_preview(db), runs),
+            "preview_rollup_ms": _time_ms(lambda: get_event_counts(db, ("signup", "paid"), days=7), runs),
+            "insert_plain_us": insert_plain_us,
+            "insert_trigger_us": insert_trigger_us,
+            "rebuild_30d_s": _time_ms(
+                lambda: rebuild_growth_rollups(db, since_day=time.strftime("%Y-%m-%d", time.gmtime(time.time() - 29 * 86400))), 1
+            ) / 1000,
+        }
+    finally:
+        db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark growth_events rollups against raw scans")
+    parser.add_argument("--events", type=int, default=10_000_000, help="Synthetic events to generate")
+    parser.add_argument("--days", type=int, default=90, help="Days of history the events span")
+    parser.add_argument("--sources", type=int, default=20, help="Distinct sources")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per query (median reported)")
+    parser.add_argument("--inserts", type=int, default=100_000, help="Inserts timed with/without trigger")
+    args = parser.parse_args()
+
+    results = run_benchmark(events=args.events, days=args.days, sources=args.sources,
+                            runs=args.runs, inserts=args.inserts)
+
+    print("=" * 60)
+    print("GROWTH ROLLUP BENCHMARK")
+    print("=" * 60)
+    print(f"Events:          {results['events']:,} over {args.days} days, {args.sources} sources")
+    print(f"Rollup rows:     {results['rollup_rows']:,}")
+    print(f"Populate:        {results['populate_s']:.1f} s")
+    print(f"Backfill:        {results['backfill_s']:.1f} s (last 30 days rebuild: {results['rebuild_30d_s']:.1f} s)")
+    print(f"Funnel 30d:      raw {results['funnel_raw_ms']:.1f} ms  |  rollup {results['funnel_rollup_ms']:.2f} ms")
+    print(f"Preview 7d:      raw {results['preview_raw_ms']:.1f} ms  |  rollup {results['preview_rollup_ms']:.2f} ms")
+    print(f"Insert:          {results['insert_plain_us']:.1f} us plain  |  {results['insert_trigger_us']:.1f} us with trigger")
+    print("=" * 60)
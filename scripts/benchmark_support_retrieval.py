@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Support Retrieval Benchmark
+Measures BM25 index build time and query latency over knowledge-base/
+
+Usage:
+    python scripts/benchmark_support_retrieval.py [--scale N] [--queries N] [--k K]
+
+--scale replicates the corpus N times to estimate behaviour as the
+knowledge base grows. Read-only: nothing is written anywhere.
+"""
+
+import sys
+import os
+import time
+import argparse
+import statistics
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.support_faq_loader import load_support_corpus
+from backend.services.support_retrieval import SupportIndex
+
+SAMPLE_QUESTIONS = [
+    "What is your refund policy?",
+    "How much does DFY Professional cost?",
+    "Do you integrate with HubSpot and Slack?",
+    "How long does delivery take?",
+    "How do I delete my data under GDPR?",
+    "Can I cancel my subscription anytime?",
+    "What is included in the Enterprise plan?",
+    "Is my data secure?",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmark(scale=1, queries=2000, k=4):
+    corpus = load_support_corpus()
+    if scale > 1:
+        corpus = {
+            f"{source}_{i}": text
+            for i in range(scale)
+            for source, text in corpus.items()
+        }
+
+    build_ms = []
+    for _ in range(5):
+        started = time.perf_counter()
+        index = SupportIndex(corpus)
+        build_ms.append((time.perf_counter() - started) * 1000)
+
+    latencies = []
+    for i in range(queries):
+        question = SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)]
+        started = time.perf_counter()
+        index.search(question, k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "corpus_chars": sum(len(t) for t in corpus.values()),
+        "passages": len(index.passages),
+        "terms": len(index.vocab),
+        "build_ms_median": statistics.median(build_ms),
+        "query_ms_p50": percentile(latencies, 50),
+        "query_ms_p95": percentile(latencies, 95),
+        "query_ms_p99": percentile(latencies, 99),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark support KB retrieval")
+    parser.add_argument("--scale", type=int, default=1, help="Replicate the corpus N times")
+    parser.add_argument("--queries", type=int, default=2000, help="Number of timed queries")
+    parser.add_argument("--k", type=int, default=4, help="Passages per query")
+    args = parser.parse_args()
+
+    results = run_benchmark(scale=args.scale, queries=args.queries, k=args.k)
+
+    print("=" * 60)
+    print("SUPPORT RETRIEVAL BENCHMARK")
+    print("=" * 60)
+    print(f"Corpus:        {results['corpus_chars']:,} chars (scale x{args.scale})")
+    print(f"Passages:      {results['passages']:,}")
+    print(f"Vocabulary:    {results['terms']:,} terms")
+    print(f"Index build:   {results['build_ms_median']:.2f} ms (median of 5)")
+    print(f"Query p50:     {results['query_ms_p50']:.3f} ms")
+    print(f"Query p95:     {results['query_ms_p95']:.3f} ms")
+    print(f"Query p99:     {results['query_ms_p99']:.3f} ms")
+    print("=" * 60)
@@ -6,38 +6,27 @@ import os
 import sys
 import json
 import logging
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, Any
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from modules.stripe_sync import ensure_charges_synced, get_charge_totals
+
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("cost_predict")
 
 def get_stripe_charges_last_30d() -> float:
-    """Fetch Stripe charges from last 30 days"""
+    """Paid Stripe charges from last 30 days (synced copy in stripe_charges)"""
     stripe_key = os.environ.get("STRIPE_SECRET_KEY")
     if not stripe_key:
         log.warning("STRIPE_SECRET_KEY not set, using estimate")
         return 0.0
     
     try:
-        url = "https://api.stripe.com/v1/charges"
-        created_after = int((datetime.utcnow() - timedelta(days=30)).timestamp())
-        
-        response = requests.get(
-            url,
-            auth=(stripe_key, ""),
-            params={"created[gte]": created_after, "limit": 100},
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            charges = response.json().get("data", [])
-            total = sum(c.get("amount", 0) for c in charges if c.get("paid")) / 100
-            return total
-        else:
-            log.warning(f"Stripe API returned {response.status_code}")
-            return 0.0
+        if not ensure_charges_synced():
+            log.warning("Stripe sync failed, using stored charges")
+        created_after = (datetime.now() - timedelta(days=30)).timestamp()
+        return get_charge_totals(since=created_after)["revenue_cents"] / 100
     except Exception as e:
         log.warning(f"Failed to fetch Stripe data: {e}")
         return 0.0
@@ -6,7 +6,6 @@ import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, timedelta
-import requests
 import json
 
 # Alert thresholds
@@ -101,13 +100,18 @@ def send_alert(alert_data):
     except Exception as e:
         print(f"⚠️ Could not log alert: {e}")
     
-    # Send to Slack if webhook configured
-    slack_webhook = os.environ.get("SLACK_WEBHOOK_URL")
-    if slack_webhook:
+    # Send to Slack if webhook configured (queued on the shared alert router;
+    # the same metric re-alerting within the dedup window is folded into a digest)
+    if os.environ.get("SLACK_WEBHOOK_URL"):
         try:
-            payload = {
-                "text": f"🚨 Levqor Alert: {alert_data['message']}",
-                "attachments": [{
+            from monitors.alert_router import send_alert as route_alert
+            results = route_alert(
+                "critical",
+                f"🚨 Levqor Alert: {alert_data['message']}",
+                title=f"Go/No-Go: {alert_data['metric']}",
+                fingerprint=f"gonogo:{alert_data['metric']}",
+                channels=["slack"],
+                attachments=[{
                     "color": "danger",
                     "fields": [
                         {"title": "Metric", "value": alert_data['metric'], "short": True},
@@ -115,9 +119,8 @@ def send_alert(alert_data):
                         {"title": "Threshold", "value": str(alert_data.get('threshold', 'N/A')), "short": True},
                     ]
                 }]
-            }
-            requests.post(slack_webhook, json=payload, timeout=5)
-            print("  ✅ Alert sent to Slack")
+            )
+            print(f"  ✅ Alert {results.get('slack', 'skipped')} for Slack")
         except Exception as e:
             print(f"  ⚠️ Slack alert failed: {e}")
 
@@ -144,3 +147,10 @@ def run_alert_checks():
 
 if __name__ == "__main__":
     run_alert_checks()
+    
+    # Alerts are posted in the background; send anything held for the
+    # digest (or deferred by the rate limit) and let it finish before exiting
+    from monitors.alert_router import get_alert_router
+    router = get_alert_router()
+    router.flush_digest()
+    router.drain()
@@ -8,6 +8,11 @@ import requests
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+REQUEST_TIMEOUT = float(os.getenv("NOTION_TIMEOUT", 10))
+
+# One keep-alive session for every helper instance in the process
+_session = requests.Session()
+
 class NotionHelper:
     """Helper class for Notion API interactions"""
     
@@ -45,7 +50,7 @@ class NotionHelper:
             "X_REPLIT_TOKEN": self.repl_token
         }
         
-        response = requests.get(url, params=params, headers=headers)
+        response = _session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
         data = response.json()
@@ -100,7 +105,7 @@ class NotionHelper:
             "properties": properties
         }
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = _session.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
         return response.json()
@@ -129,7 +134,7 @@ class NotionHelper:
         if filter_obj:
             payload["filter"] = filter_obj
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = _session.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
         return response.json()
@@ -0,0 +1,339 @@
+"""
+Notion Write-Behind Queue
+Request handlers enqueue Notion writes here; a scheduler job flushes them in
+rate-limited batches so user-facing endpoints never wait on Notion.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from time import time, sleep
+from uuid import uuid4
+from typing import Dict, Any, Optional, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger("levqor.notion_queue")
+
+NOTION_API = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+# Notion allows an average of 3 requests/second per integration
+RATE_LIMIT_PER_SECOND = float(os.environ.get("NOTION_RATE_LIMIT", 3))
+REQUEST_TIMEOUT = float(os.environ.get("NOTION_TIMEOUT", 10))
+MAX_ATTEMPTS = int(os.environ.get("NOTION_SYNC_MAX_ATTEMPTS", 8))
+BATCH_SIZE = int(os.environ.get("NOTION_SYNC_BATCH_SIZE", 90))
+
+
+def get_db():
+    """Get database connection"""
+    db_path = os.environ.get("SQLITE_PATH", "levqor.db")
+    db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+    init_notion_queue_tables(db)
+    return db
+
+
+def init_notion_queue_tables(db_connection):
+    """Initialize the durable sync queue and the page-id cache"""
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS notion_sync_queue(
+            id TEXT PRIMARY KEY,
+            coalesce_key TEXT NOT NULL,
+            op TEXT NOT NULL,
+            database_id TEXT NOT NULL,
+            lookup_property TEXT,
+            lookup_value TEXT,
+            properties TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_notion_sync_queue_due ON notion_sync_queue(status, next_attempt_at)")
+    db_connection.execute("CREATE INDEX IF NOT EXISTS idx_notion_sync_queue_key ON notion_sync_queue(coalesce_key, status)")
+    db_connection.execute("""
+        CREATE TABLE IF NOT EXISTS notion_sync_pages(
+            coalesce_key TEXT PRIMARY KEY,
+            page_id TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+
+
+def _coalesce_key(database_id: str, lookup_property: str, lookup_value: str) -> str:
+    return f"{database_id}:{lookup_property}:{lookup_value}"
+
+
+def enqueue_create(
+    database_id: str,
+    properties: Dict[str, Any],
+    lookup_property: Optional[str] = None,
+    lookup_value: Optional[str] = None
+) -> Optional[str]:
+    """
+    Queue creation of a page in a Notion database
+
+    When `lookup_property`/`lookup_value` identify the page (e.g. "Key ID"),
+    later updates for the same page are merged into this entry while it is
+    still pending, and the created page id is remembered so updates skip
+    the database query.
+
+    Returns:
+        Queue entry ID, or None if the entry could not be stored
+    """
+    if lookup_property and lookup_value:
+        key = _coalesce_key(database_id, lookup_property, lookup_value)
+    else:
+        key = f"create:{uuid4()}"
+    return _enqueue(key, "create", database_id, properties, lookup_property, lookup_value)
+
+
+def enqueue_update(
+    database_id: str,
+    lookup_property: str,
+    lookup_value: str,
+    properties: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Queue a property update for the page whose rich-text `lookup_property`
+    equals `lookup_value`. Repeated updates to the same page collapse into
+    one pending entry (later values win).
+
+    Returns:
+        Queue entry ID, or None if the entry could not be stored
+    """
+    key = _coalesce_key(database_id, lookup_property, lookup_value)
+    return _enqueue(key, "update", database_id, properties, lookup_property, lookup_value)
+
+
+def _enqueue(key, op, database_id, properties, lookup_property, lookup_value) -> Optional[str]:
+    now = time()
+    try:
+        db = get_db()
+        try:
+            cursor = db.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT id, properties FROM notion_sync_queue
+                WHERE coalesce_key = ? AND status = 'pending'
+                ORDER BY created_at DESC LIMIT 1
+            """, (key,))
+            row = cursor.fetchone()
+
+            if row:
+                # Coalesce: merge into the pending entry, keeping its op
+                # (a pending create absorbs the update)
+                entry_id = row[0]
+                merged = json.loads(row[1])
+                merged.update(properties)
+                cursor.execute("""
+                    UPDATE notion_sync_queue
+                    SET properties = ?, updated_at = ?
+                    WHERE id = ?
+                """, (json.dumps(merged), now, entry_id))
+            else:
+                entry_id = str(uuid4())
+                cursor.execute("""
+                    INSERT INTO notion_sync_queue (
+                        id, coalesce_key, op, database_id, lookup_property, lookup_value,
+                        properties, status, attempts, next_attempt_at, created_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', 0, ?, ?, ?)
+                """, (entry_id, key, op, database_id, lookup_property, lookup_value,
+                      json.dumps(properties), now, now, now))
+
+            db.commit()
+            return entry_id
+        finally:
+            db.close()
+    except Exception as e:
+        log.error(f"Failed to enqueue Notion {op}: {e}")
+        return None
+
+
+class _RateLimiter:
+    """Token bucket shared by all flushes in this process"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            while True:
+                now = time()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                sleep((1 - self.tokens) / self.rate)
+
+
+class NotionRateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class NotionSyncWorker:
+    """Drains due queue entries against the Notion API"""
+
+    def __init__(self, token: Optional[str] = None, session: Optional[requests.Session] = None,
+                 rate: float = RATE_LIMIT_PER_SECOND, api_base: str = NOTION_API):
+        self.token = token if token is not None else os.getenv("NOTION_TOKEN", "").strip()
+        self.api_base = api_base.rstrip("/")
+        self.limiter = _RateLimiter(rate)
+        self.session = session or requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=4))
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json",
+            "Notion-Version": NOTION_VERSION
+        })
+
+    def _call(self, method: str, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.limiter.acquire()
+        response = self.session.request(method, f"{self.api_base}{path}", json=payload, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 429:
+            raise NotionRateLimited(float(response.headers.get("Retry-After", 1)))
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:300]}")
+        return response.json()
+
+    def _find_page(self, db, entry) -> Optional[str]:
+        row = db.execute("SELECT page_id FROM notion_sync_pages WHERE coalesce_key = ?", (entry["coalesce_key"],)).fetchone()
+        if row:
+            return row[0]
+        result = self._call("POST", f"/databases/{entry['database_id']}/query", {
+            "filter": {
+                "property": entry["lookup_property"],
+                "rich_text": {"equals": entry["lookup_value"]}
+            },
+            "page_size": 1
+        })
+        results = result.get("results", [])
+        return results[0]["id"] if results else None
+
+    def _apply(self, db, entry) -> None:
+        properties = json.loads(entry["properties"])
+        if entry["op"] == "create":
+            page = self._call("POST", "/pages", {
+                "parent": {"database_id": entry["database_id"]},
+                "properties": properties
+            })
+            if entry["lookup_property"] and page.get("id"):
+                db.execute("""
+                    INSERT OR REPLACE INTO notion_sync_pages (coalesce_key, page_id, created_at)
+                    VALUES (?, ?, ?)
+                """, (entry["coalesce_key"], page["id"], time()))
+        else:
+            page_id = self._find_page(db, entry)
+            if not page_id:
+                raise RuntimeError(f"page not found for {entry['lookup_property']}={entry['lookup_value']}")
+            self._call("PATCH", f"/pages/{page_id}", {"properties": properties})
+
+    def flush(self, limit: int = BATCH_SIZE) -> Dict[str, int]:
+        """
+        Push up to `limit` due entries to Notion
+
+        Entries are applied oldest first and removed only if unchanged
+        since they were read (updates merged in flight are sent next
+        flush). Failures are rescheduled with
+        exponential backoff until MAX_ATTEMPTS; a 429 stops the batch and
+        pushes the remaining entries past the Retry-After window.
+        """
+        stats = {"synced": 0, "retried": 0, "failed": 0}
+        if not self.token:
+            return stats
+
+        db = get_db()
+        try:
+            db.row_factory = sqlite3.Row
+            now = time()
+            entries = db.execute("""
+                SELECT * FROM notion_sync_queue
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY created_at
+                LIMIT ?
+            """, (now, limit)).fetchall()
+
+            for index, entry in enumerate(entries):
+                try:
+                    self._apply(db, entry)
+                    # Only drop the entry as it was sent: an _enqueue that merged
+                    # new properties meanwhile bumped updated_at, so it stays queued
+                    deleted = db.execute(
+                        "DELETE FROM notion_sync_queue WHERE id = ? AND updated_at = ?",
+                        (entry["id"], entry["updated_at"])
+                    ).rowcount
+                    if not deleted:
+                        # The page exists now; send the merged properties as an update
+                        db.execute("""
+                            UPDATE notion_sync_queue SET op = 'update'
+                            WHERE id = ? AND op = 'create' AND lookup_property IS NOT NULL
+                        """, (entry["id"],))
+                    stats["synced"] += 1
+                except NotionRateLimited as e:
+                    resume_at = time() + e.retry_after
+                    db.executemany(
+                        "UPDATE notion_sync_queue SET next_attempt_at = ? WHERE id = ?",
+                        [(resume_at, rest["id"]) for rest in entries[index:]]
+                    )
+                    db.commit()
+                    log.warning(f"Notion rate limited; deferring {len(entries) - index} entries")
+                    break
+                except Exception as e:
+                    attempts = entry["attempts"] + 1
+                    status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+                    db.execute("""
+                        UPDATE notion_sync_queue
+                        SET attempts = ?, status = ?, last_error = ?, next_attempt_at = ?, updated_at = ?
+                        WHERE id = ?
+                    """, (attempts, status, str(e)[:500], time() + min(30 * (2 ** attempts), 6 * 3600), time(), entry["id"]))
+                    stats["failed" if status == "failed" else "retried"] += 1
+                db.commit()
+        finally:
+            db.close()
+
+        if any(stats.values()):
+            log.info(f"Notion sync flush: {stats}")
+        return stats
+
+
+def get_queue_stats() -> Dict[str, Any]:
+    """Queue depth by status and age of the oldest pending entry"""
+    db = get_db()
+    try:
+        counts = dict(db.execute("SELECT status, COUNT(*) FROM notion_sync_queue GROUP BY status").fetchall())
+        oldest = db.execute("SELECT MIN(created_at) FROM notion_sync_queue WHERE status = 'pending'").fetchone()[0]
+    finally:
+        db.close()
+    return {
+        "pending": counts.get("pending", 0),
+        "failed": counts.get("failed", 0),
+        "oldest_pending_age_s": round(time() - oldest, 1) if oldest else 0
+    }
+
+
+_worker = None
+
+
+def get_sync_worker() -> NotionSyncWorker:
+    """Singleton worker (reuses one HTTP session)"""
+    global _worker
+    if _worker is None:
+        _worker = NotionSyncWorker()
+    return _worker
+
+
+def flush_notion_queue(limit: int = BATCH_SIZE) -> Dict[str, int]:
+    """Flush entry point used by the scheduler"""
+    return get_sync_worker().flush(limit)
@@ -1,11 +1,47 @@
 """
 Adaptive pricing model based on usage, performance, and costs.
 Server-side suggestion only - no auto-application unless flag enabled.
+
+suggest_price() prices one scenario. PricingModel.evaluate_grid() prices
+the cartesian product of runs x p95 x costs in one vectorized NumPy pass
+(same formula), so finance can sweep thousands of scenarios per call.
+Axes left out default to live values: costs from the `kv` cost keys and
+runs / p95 measured from the last 30 days of api_usage_log.
+
+Grid inputs are snapped to buckets (runs to PRICING_RUNS_BUCKET, p95 to
+whole ms, costs to cents) and results are memoized per bucketed grid, so
+repeated or near-identical sweeps are answered from memory.
 """
+import os
 import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from time import time, monotonic
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
 
 logger = logging.getLogger("levqor.pricing")
 
+PRICING_MAX_SCENARIOS = int(os.environ.get("PRICING_MAX_SCENARIOS", 250000))
+PRICING_CACHE_SIZE = int(os.environ.get("PRICING_CACHE_SIZE", 128))
+PRICING_DEFAULTS_TTL = float(os.environ.get("PRICING_DEFAULTS_TTL", 300))
+PRICING_RUNS_BUCKET = int(os.environ.get("PRICING_RUNS_BUCKET", 10))
+
+# Grid axes, in evaluation order
+AXES = ("monthly_runs", "p95_ms", "openai_cost", "infra_cost", "refunds")
+
+# kv keys backing the cost axes, with the fallbacks used across the app
+KV_COST_DEFAULTS = {
+    "openai_cost_30d": 0.0,
+    "infra_cost_30d": 20.0,
+    "refunds_30d": 0.0
+}
+
+# Used when api_usage_log has no rows in the window
+FALLBACK_P95_MS = 120.0
+
 
 def suggest_price(monthly_runs, p95_ms, openai_cost, infra_cost, refunds):
     """
@@ -56,3 +92,211 @@ def suggest_price(monthly_runs, p95_ms, openai_cost, infra_cost, refunds):
     logger.info(f"Pricing suggestion: ${target} (rationale: {rationale})")
     
     return target, rationale
+
+
+def suggest_prices(monthly_runs, p95_ms, openai_cost, infra_cost, refunds) -> Dict[str, np.ndarray]:
+    """
+    suggest_price() over broadcastable arrays.
+    
+    Returns:
+        dict: price, load_factor, perf_bonus, cost_floor arrays
+              (broadcast shape of the inputs)
+    """
+    runs = np.asarray(monthly_runs, dtype=np.float64)
+    p95 = np.asarray(p95_ms, dtype=np.float64)
+    
+    load_factor = np.minimum(2.0, 0.5 + runs / 1000.0)
+    perf_bonus = np.where(p95 < 80, -2.0, np.where(p95 < 150, 0.0, 2.0))
+    
+    runs_k = np.maximum(1.0, runs / 1000.0)
+    total_costs = np.add(np.add(openai_cost, infra_cost, dtype=np.float64), refunds)
+    cost_floor = (total_costs * 1.3) / runs_k
+    
+    target = 19.0 * load_factor + perf_bonus
+    price = np.round(np.maximum(target, np.maximum(9.0, cost_floor)), 2)
+    return {
+        "price": price,
+        "load_factor": load_factor,
+        "perf_bonus": perf_bonus,
+        "cost_floor": cost_floor
+    }
+
+
+def _bucket(axis: str, values) -> Tuple[float, ...]:
+    """Snap one axis to its bucket grid (sorted, de-duplicated)"""
+    arr = np.atleast_1d(np.asarray(values, dtype=np.float64)).ravel()
+    if not np.all(np.isfinite(arr)):
+        raise ValueError(f"{axis} must be finite numbers")
+    if np.any(arr < 0):
+        raise ValueError(f"{axis} must not be negative")
+    if axis == "monthly_runs":
+        arr = np.round(arr / PRICING_RUNS_BUCKET) * PRICING_RUNS_BUCKET
+    elif axis == "p95_ms":
+        arr = np.round(arr)
+    else:
+        arr = np.round(arr, 2)
+    return tuple(np.unique(arr).tolist())
+
+
+class PricingModel:
+    """
+    Grid pricing with live defaults and memoized results.
+    
+    Defaults (kv costs, measured runs/p95) are refreshed every
+    PRICING_DEFAULTS_TTL seconds; evaluated grids are kept in an LRU of
+    PRICING_CACHE_SIZE entries keyed by their bucketed axes.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, cache_size: int = PRICING_CACHE_SIZE,
+                 defaults_ttl: float = PRICING_DEFAULTS_TTL):
+        self.db_path = db_path or os.environ.get("SQLITE_PATH", "levqor.db")
+        self.cache_size = cache_size
+        self.defaults_ttl = defaults_ttl
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._defaults: Optional[Tuple[Dict[str, float], float]] = None
+        self.hits = 0
+        self.misses = 0
+    
+    def _measure_usage(self, days: int = 30) -> Tuple[int, float]:
+        """(requests, p95 response_time_ms) from api_usage_log over `days`"""
+        since = time() - days * 86400
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            runs, timed = db.execute("""
+                SELECT COUNT(*), COUNT(response_time_ms) FROM api_usage_log WHERE created_at >= ?
+            """, (since,)).fetchone()
+            if not timed:
+                return runs, FALLBACK_P95_MS
+            # Nearest-rank p95 without loading the column
+            row = db.execute("""
+                SELECT response_time_ms FROM api_usage_log
+                WHERE created_at >= ? AND response_time_ms IS NOT NULL
+                ORDER BY response_time_ms LIMIT 1 OFFSET ?
+            """, (since, max(0, int(np.ceil(0.95 * timed)) - 1))).fetchone()
+            return runs, float(row[0])
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Pricing usage measurement unavailable: {e}")
+            return 0, FALLBACK_P95_MS
+        finally:
+            db.close()
+    
+    def defaults(self, refresh: bool = False) -> Dict[str, float]:
+        """Live values for every axis (cached for defaults_ttl seconds)"""
+        with self._lock:
+            if not refresh and self._defaults and monotonic() - self._defaults[1] < self.defaults_ttl:
+                return dict(self._defaults[0])
+        
+        from modules.kv import get_kv_store
+        costs = get_kv_store().get_floats(KV_COST_DEFAULTS)
+        runs, p95 = self._measure_usage()
+        values = {
+            "monthly_runs": runs,
+            "p95_ms": p95,
+            "openai_cost": costs["openai_cost_30d"],
+            "infra_cost": costs["infra_cost_30d"],
+            "refunds": costs["refunds_30d"]
+        }
+        with self._lock:
+            self._defaults = (values, monotonic())
+        return dict(values)
+    
+    def evaluate_grid(self, **axes: Union[float, Iterable[float], None]) -> Dict[str, Any]:
+        """
+        Price every combination of the given axes.
+        
+        Args:
+            monthly_runs, p95_ms, openai_cost, infra_cost, refunds:
+                A value or list of values per axis; omitted (None) axes
+                use the live default.
+        
+        Returns:
+            dict: axes (bucketed values), shape, scenarios, price and
+                  cost_floor (nested lists indexed in AXES order),
+                  summary, defaults used, cached flag
+        
+        Raises:
+            ValueError: Unknown axis, bad values or grid over PRICING_MAX_SCENARIOS
+        """
+        unknown = set(axes) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unknown pricing axes: {sorted(unknown)}")
+        
+        used_defaults = {}
+        if any(axes.get(axis) is None for axis in AXES):
+            live = self.defaults()
+            used_defaults = {axis: live[axis] for axis in AXES if axes.get(axis) is None}
+        grid = tuple(
+            _bucket(axis, used_defaults[axis] if axis in used_defaults else axes[axis])
+            for axis in AXES
+        )
+        shape = tuple(len(values) for values in grid)
+        scenarios = int(np.prod(shape))
+        if scenarios == 0:
+            raise ValueError("Every axis needs at least one value")
+        if scenarios > PRICING_MAX_SCENARIOS:
+            raise ValueError(f"{scenarios} scenarios exceeds the limit of {PRICING_MAX_SCENARIOS}")
+        
+        with self._lock:
+            result = self._results.get(grid)
+            cached = result is not None
+            if cached:
+                self._results.move_to_end(grid)
+                self.hits += 1
+        if not cached:
+            result = self._compute(grid, shape)
+            with self._lock:
+                self.misses += 1
+                self._results[grid] = result
+                while len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        
+        return dict(result, defaults=used_defaults, cached=cached)
+    
+    def _compute(self, grid, shape) -> Dict[str, Any]:
+        # One broadcast axis per input: (n, 1, 1, 1, 1), (1, m, 1, 1, 1), ...
+        ndim = len(grid)
+        columns = [
+            np.asarray(values).reshape([-1 if i == axis else 1 for i in range(ndim)])
+            for axis, values in enumerate(grid)
+        ]
+        out = suggest_prices(*columns)
+        price = np.broadcast_to(out["price"], shape)
+        cost_floor = np.broadcast_to(np.round(out["cost_floor"], 2), shape)
+        return {
+            "axes": {axis: list(values) for axis, values in zip(AXES, grid)},
+            "shape": list(shape),
+            "scenarios": int(price.size),
+            "price": price.tolist(),
+            "cost_floor": cost_floor.tolist(),
+            "summary": {
+                "min_price": float(price.min()),
+                "max_price": float(price.max()),
+                "mean_price": round(float(price.mean()), 2),
+                "floor_bound_share": round(float(np.mean(cost_floor >= price)), 4)
+            }
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"cached_grids": len(self._results), "hits": self.hits, "misses": self.misses}
+    
+    def invalidate(self) -> None:
+        """Drop memoized grids and cached defaults"""
+        with self._lock:
+            self._results.clear()
+            self._defaults = None
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_pricing_model() -> PricingModel:
+    """Singleton model instance"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = PricingModel()
+    return _model
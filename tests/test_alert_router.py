@@ -0,0 +1,144 @@
+"""
+Tests for the deduplicating, rate-limited alert router
+"""
+import threading
+import time
+
+import pytest
+
+from monitors import alert_router
+from monitors.alert_router import AlertRouter, TokenBucket
+
+
+class StubSession:
+    """requests.Session stand-in recording posts; `gate` holds them in flight"""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.posts = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json=None, **kwargs):
+        self.gate.wait(5)
+        with self._lock:
+            self.posts.append((url, json))
+        return type("Response", (), {"status_code": self.status})()
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setenv("SLACK_WEBHOOK_URL", "https://hooks.example/slack")
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    monkeypatch.delenv("RESEND_API_KEY", raising=False)
+    return StubSession()
+
+
+@pytest.fixture
+def router(session):
+    router = AlertRouter(session=session, max_workers=2, dedup_window=600)
+    yield router
+    router.executor.shutdown(wait=True)
+
+
+def texts(session):
+    return [payload["text"] for _, payload in session.posts]
+
+
+def test_repeats_are_deduplicated_by_masked_message(router, session):
+    assert router.send("error", "Job 17 failed") == {"slack": "queued"}
+    assert router.send("error", "Job 18 failed") == {"slack": "deduplicated"}
+    assert router.send("error", "Other failure") == {"slack": "queued"}
+    router.drain()
+
+    assert sorted(texts(session)) == ["[ERROR] Job 17 failed", "[ERROR] Other failure"]
+    stats = router.stats()
+    assert (stats["received"], stats["deduplicated"], stats["sent"]) == (3, 1, 2)
+
+
+def test_rate_limited_alerts_are_deferred_to_the_digest(router, session):
+    router.buckets["slack"] = TokenBucket(per_minute=0, burst=2)
+
+    results = [router.send("warning", f"disk {name} full", fingerprint=name)["slack"] for name in "abcd"]
+    router.drain()
+
+    assert results == ["queued", "queued", "deferred", "deferred"]
+    assert len(session.posts) == 2
+    assert router.stats()["deferred_pending"] == 2
+
+    # Still over budget: the digest waits for the next flush
+    assert router.flush_digest() == {}
+    assert router.stats()["deferred_pending"] == 2
+
+    router.buckets["slack"] = TokenBucket(per_minute=0, burst=1)
+    assert router.flush_digest() == {"slack": 2}
+    router.drain()
+
+    digest = texts(session)[-1]
+    assert digest.startswith("Alert digest: 2 alert(s) in 2 group(s)")
+    assert "disk c full (x1)" in digest and "disk d full (x1)" in digest
+    assert router.stats()["deferred_pending"] == 0
+
+
+def test_digest_batches_held_alerts_and_suppressed_repeats(router, session):
+    router.send("info", "<b>nightly</b> report ready", digest=True)
+    router.send("error", "payment webhook 500")
+    for _ in range(3):
+        router.send("error", "payment webhook 500")
+    router.drain()
+    assert texts(session) == ["[ERROR] payment webhook 500"]
+
+    assert router.flush_digest() == {"slack": 2}
+    router.drain()
+
+    digest = texts(session)[-1]
+    assert "Alert digest: 4 alert(s) in 2 group(s)" in digest
+    assert "[INFO] Levqor Alert: nightly report ready (x1)" in digest
+    assert "payment webhook 500 (x3)" in digest
+
+    # Everything reported: nothing left for the next digest
+    assert router.flush_digest() == {}
+
+
+def test_old_groups_expire_on_flush(router, session, monkeypatch):
+    router.send("error", "queue stalled")
+    router.drain()
+    monkeypatch.setattr(alert_router, "time", lambda: time.time() + 601)
+
+    router.flush_digest()
+
+    assert router.stats()["active_groups"] == 0
+    assert router.send("error", "queue stalled") == {"slack": "queued"}
+
+
+def test_send_does_not_block_and_drain_waits(router, session):
+    session.gate.clear()
+
+    started = time.monotonic()
+    router.send("critical", "database down")
+    assert time.monotonic() - started < 1
+    assert router.stats()["in_flight"] == 1
+
+    threading.Timer(0.1, session.gate.set).start()
+    router.drain(timeout=5)
+
+    assert texts(session) == ["[CRITICAL] database down"]
+    assert router.stats()["sent"] == 1
+
+
+def test_failed_posts_are_counted(router, session):
+    session.status = 500
+
+    router.send("error", "slack is down")
+    router.drain()
+
+    assert router.stats()["failed"] == 1 and router.stats()["sent"] == 0
+
+
+def test_unconfigured_channels_are_skipped(router, session):
+    assert router.send("error", "email only", channels=["email"]) == {}
+    assert session.posts == []
@@ -0,0 +1,121 @@
+"""
+Tests for the rotating, indexed audit log store
+"""
+import gzip
+import json
+import os
+from time import time
+
+import pytest
+
+from modules.audit_log import AuditLog
+
+
+@pytest.fixture
+def make_log(tmp_path):
+    logs = []
+
+    def make(**kwargs):
+        kwargs.setdefault("flush_interval", 3600)  # keep the background thread idle
+        kwargs.setdefault("compress_grace", 0)
+        audit = AuditLog(path=str(tmp_path / "audit.log"), **kwargs)
+        logs.append(audit)
+        return audit
+
+    yield make
+    for audit in logs:
+        audit.close()
+
+
+def events(audit, **kwargs):
+    return [(e["event"], e["n"]) for e in audit.query(**kwargs)]
+
+
+def test_query_returns_latest_events_oldest_first(make_log):
+    audit = make_log(block_bytes=200)
+    for n in range(20):
+        audit.write({"event": "login" if n % 2 else "logout", "n": n})
+
+    assert events(audit, limit=3) == [("login", 17), ("logout", 18), ("login", 19)]
+    assert events(audit, limit=2, event_type="logout") == [("logout", 16), ("logout", 18)]
+    assert audit.stats()["buffered_events"] == 0
+
+
+def test_since_until_filters_on_event_ts(make_log):
+    audit = make_log(block_bytes=100)
+    base = 1_700_000_000
+    for n in range(10):
+        audit.write({"event": "tick", "n": n, "ts": (base + n * 60) * 1000})
+
+    assert events(audit, since=base + 7 * 60) == [("tick", 7), ("tick", 8), ("tick", 9)]
+    assert events(audit, until=base + 60) == [("tick", 0), ("tick", 1)]
+    assert events(audit, since=base + 120, until=base + 180) == [("tick", 2), ("tick", 3)]
+    assert events(audit, since=base + 3600) == []
+
+
+def test_rotation_and_compression_keep_events_queryable(make_log, tmp_path):
+    audit = make_log(max_bytes=300, block_bytes=120)
+    for n in range(10):
+        audit.write({"event": "a", "n": n})
+    sealed = audit.maybe_rotate()
+    assert sealed and os.path.exists(sealed + ".idx")
+    assert audit.maybe_rotate() is None  # active segment is empty again
+
+    for n in range(10, 15):
+        audit.write({"event": "b", "n": n})
+
+    compressed = audit.compress_sealed()
+    assert compressed == [sealed + ".gz"]
+    assert not os.path.exists(sealed)
+    with gzip.open(compressed[0], "rt") as f:
+        assert [json.loads(line)["n"] for line in f] == list(range(10))
+
+    assert [n for _, n in events(audit, limit=100)] == list(range(15))
+    assert events(audit, limit=2, event_type="a") == [("a", 8), ("a", 9)]
+    assert audit.stats()["compressed_segments"] == 1
+
+
+def test_rotation_by_age(make_log):
+    audit = make_log(max_age=60)
+    audit.write({"event": "old", "n": 0, "ts": int((time() - 120) * 1000)})
+    audit.flush()
+
+    assert audit.maybe_rotate() is not None
+
+
+def test_writer_reopens_after_another_process_rotates(make_log):
+    first = make_log(max_bytes=1)
+    second = make_log(max_bytes=1)
+
+    second.write({"event": "x", "n": 0})
+    second.flush()
+    assert first.maybe_rotate() is not None
+    assert second.maybe_rotate() is None  # already sealed by `first`
+
+    second.write({"event": "x", "n": 1})
+    second.flush()
+
+    assert events(first) == [("x", 0), ("x", 1)]
+    with open(first.path) as f:
+        assert [json.loads(line)["n"] for line in f] == [1]
+
+
+def test_security_events_are_flushed_immediately(make_log):
+    audit = make_log()
+    audit.write({"event": "sign_in", "n": 0})
+    assert audit.stats()["buffered_events"] == 1
+
+    audit.write({"event": "admin_impersonate", "n": 1})
+
+    assert audit.stats()["buffered_events"] == 0
+    with open(audit.path) as f:
+        assert [json.loads(line)["n"] for line in f] == [0, 1]
+
+
+def test_existing_unindexed_log_is_indexed_on_open(tmp_path, make_log):
+    path = tmp_path / "audit.log"
+    path.write_text("".join(json.dumps({"event": "legacy", "n": n, "ts": n}) + "\n" for n in range(3)))
+
+    audit = make_log(block_bytes=50)
+
+    assert events(audit, event_type="legacy") == [("legacy", 0), ("legacy", 1), ("legacy", 2)]
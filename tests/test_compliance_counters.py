@@ -0,0 +1,127 @@
+"""
+Tests for the trigger-maintained compliance dashboard counters
+"""
+import sqlite3
+import sys
+from time import time
+from types import SimpleNamespace
+
+import pytest
+
+from compliance.counters import (
+    get_compliance_counters, init_compliance_counters, reconcile_compliance_counters
+)
+from monitors import scheduler
+
+DAY = 86400
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "compliance.db")
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE users(
+            id TEXT PRIMARY KEY,
+            terms_accepted_at REAL,
+            marketing_double_opt_in INTEGER DEFAULT 0,
+            gdpr_opt_out_all INTEGER DEFAULT 0
+        );
+        CREATE TABLE dsar_requests(id TEXT PRIMARY KEY, status TEXT NOT NULL DEFAULT 'pending');
+        CREATE TABLE risk_blocks(id TEXT PRIMARY KEY, created_at REAL NOT NULL);
+    """)
+    db.commit()
+    db.close()
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    db = sqlite3.connect(db_path)
+    init_compliance_counters(db)
+    db.commit()
+    yield db
+    db.close()
+
+
+def counters(db):
+    values = get_compliance_counters(db)
+    return {k: v for k, v in values.items() if v}
+
+
+def test_user_triggers_track_insert_update_delete(db):
+    db.execute("INSERT INTO users (id, terms_accepted_at) VALUES ('a', 1)")
+    db.execute("INSERT INTO users (id, marketing_double_opt_in) VALUES ('b', 1)")
+    db.execute("INSERT INTO users (id) VALUES ('c')")
+    assert counters(db) == {"users_total": 3, "tos_accepted": 1, "marketing_consented": 1}
+
+    db.execute("UPDATE users SET terms_accepted_at = 2, gdpr_opt_out_all = 1 WHERE id = 'c'")
+    db.execute("UPDATE users SET marketing_double_opt_in = 0 WHERE id = 'b'")
+    db.execute("UPDATE users SET terms_accepted_at = 5 WHERE id = 'a'")  # no flag change
+    assert counters(db) == {"users_total": 3, "tos_accepted": 2, "gdpr_opted_out": 1}
+
+    db.execute("DELETE FROM users WHERE id IN ('a', 'c')")
+    assert counters(db) == {"users_total": 1}
+
+
+def test_dsar_triggers_track_pending_transitions(db):
+    db.execute("INSERT INTO dsar_requests (id) VALUES ('r1')")
+    db.execute("INSERT INTO dsar_requests (id) VALUES ('r2')")
+    db.execute("INSERT INTO dsar_requests (id, status) VALUES ('r3', 'completed')")
+    assert counters(db) == {"dsar_pending": 2}
+
+    db.execute("UPDATE dsar_requests SET status = 'completed' WHERE id = 'r1'")
+    db.execute("UPDATE dsar_requests SET status = 'pending' WHERE id = 'r3'")
+    db.execute("UPDATE dsar_requests SET status = 'processing' WHERE id = 'r2'")
+    assert counters(db) == {"dsar_pending": 1}
+
+    db.execute("DELETE FROM dsar_requests")
+    assert counters(db) == {}
+
+
+def test_risk_block_triggers_count_per_day_and_window(db):
+    now = time()
+    db.executemany("INSERT INTO risk_blocks (id, created_at) VALUES (?, ?)", [
+        ("today", now), ("yesterday", now - DAY), ("old", now - 45 * DAY)
+    ])
+    assert counters(db) == {"risk_blocks_window": 2}
+    assert get_compliance_counters(db, risk_window_days=60)["risk_blocks_window"] == 3
+
+    db.execute("DELETE FROM risk_blocks WHERE id = 'yesterday'")
+    assert counters(db) == {"risk_blocks_window": 1}
+
+
+def test_reconcile_corrects_drift(db):
+    db.execute("INSERT INTO users (id, gdpr_opt_out_all) VALUES ('a', 1)")
+    db.execute("INSERT INTO risk_blocks (id, created_at) VALUES ('b', ?)", (time(),))
+    db.execute("UPDATE compliance_counters SET value = 99")
+    db.commit()
+
+    drift = reconcile_compliance_counters(db)
+
+    assert drift["users_total"] == (99, 1)
+    assert counters(db) == {"users_total": 1, "gdpr_opted_out": 1, "risk_blocks_window": 1}
+    assert reconcile_compliance_counters(db) == {}
+
+
+def test_first_init_seeds_from_existing_rows(db_path):
+    db = sqlite3.connect(db_path)
+    db.execute("INSERT INTO users (id, terms_accepted_at) VALUES ('a', 1)")
+    db.execute("INSERT INTO dsar_requests (id) VALUES ('r1')")
+    db.commit()
+
+    init_compliance_counters(db)
+
+    assert counters(db) == {"users_total": 1, "tos_accepted": 1, "dsar_pending": 1}
+    db.close()
+
+
+def test_scheduler_job_reconciles_on_its_own_connection(db, db_path, monkeypatch):
+    db.execute("UPDATE compliance_counters SET value = 7 WHERE name = 'users_total'")
+    db.commit()
+    # Only DB_PATH is available: touching run's shared connection would fail the job
+    monkeypatch.setitem(sys.modules, "run", SimpleNamespace(DB_PATH=db_path))
+
+    scheduler.reconcile_compliance_counters()
+
+    assert counters(db) == {}
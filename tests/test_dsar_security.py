@@ -0,0 +1,148 @@
+"""
+Tests for DSAR download OTPs: HMAC scheme, attempt lockout and migration
+"""
+import hashlib
+import sqlite3
+from time import time
+
+import pytest
+
+from dsar import security
+from dsar.models import init_dsar_tables
+from dsar.security import create_download_token_and_otp, verify_download_token_and_otp, verify_otp
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("CREATE TABLE users(id TEXT PRIMARY KEY, email TEXT)")
+    init_dsar_tables(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def add_export(db, token, otp_hash, export_id="exp-1"):
+    now = time()
+    db.execute("""
+        INSERT INTO dsar_exports (id, request_id, user_id, created_at, expires_at, storage_path,
+                                  download_token, download_token_expires_at, otp_hash, otp_expires_at)
+        VALUES (?, 'req-1', 'u-1', ?, ?, '/missing/export.zip', ?, ?, ?, ?)
+    """, (export_id, now, now + 3600, token, now + 3600, otp_hash, now + 600))
+    db.commit()
+
+
+def issue(db):
+    token, otp, otp_hash = create_download_token_and_otp()
+    add_export(db, token, otp_hash)
+    return token, otp
+
+
+def wrong(otp):
+    return str((int(otp) + 1) % 1000000).zfill(6)
+
+
+def test_hmac_hash_uses_per_export_salt_and_token():
+    token, otp, otp_hash = create_download_token_and_otp()
+    scheme, salt, mac = otp_hash.split("$")
+
+    assert scheme == "hmac-sha256" and len(salt) == 32 and len(mac) == 64
+    assert verify_otp(otp, otp_hash, download_token=token)
+    assert not verify_otp(otp, otp_hash, download_token="other-token")
+    assert not verify_otp(wrong(otp), otp_hash, download_token=token)
+
+    # Same code, different exports: different salts and MACs
+    other = f"{scheme}${'0' * 32}${security._otp_mac(otp, '0' * 32, token)}"
+    assert other != otp_hash and verify_otp(otp, other, download_token=token)
+
+
+def test_hmac_hash_depends_on_server_key(monkeypatch):
+    token, otp, otp_hash = create_download_token_and_otp()
+
+    monkeypatch.setenv("DSAR_OTP_SECRET", "rotated")
+    assert not verify_otp(otp, otp_hash, download_token=token)
+
+
+def test_whitespace_in_input_is_ignored():
+    token, otp, otp_hash = create_download_token_and_otp()
+
+    assert verify_otp(f" {otp[:3]} {otp[3:]}\n", otp_hash, download_token=token)
+    assert not verify_otp("", otp_hash, download_token=token)
+
+
+def test_legacy_pbkdf2_hashes_still_verify(db):
+    legacy = hashlib.pbkdf2_hmac("sha256", b"123456", b"levqor-dsar", 100000).hex()
+
+    assert verify_otp("123 456", legacy)
+    assert not verify_otp("654321", legacy)
+
+    add_export(db, "legacy-token", legacy)
+    export, error = verify_download_token_and_otp(db, "legacy-token", "123456")
+    assert error is None and export["export_id"] == "exp-1"
+
+
+def test_lockout_after_max_attempts(db, monkeypatch):
+    monkeypatch.setattr(security, "DSAR_OTP_MAX_ATTEMPTS", 3)
+    token, otp = issue(db)
+
+    results = [verify_download_token_and_otp(db, token, wrong(otp))[1] for _ in range(3)]
+    assert results == ["INVALID_OTP"] * 3
+
+    # Locked: even the right code is refused
+    assert verify_download_token_and_otp(db, token, otp) == (None, "OTP_LOCKED")
+    attempts, locked_until = db.execute("SELECT otp_attempts, otp_locked_until FROM dsar_exports").fetchone()
+    assert attempts == 3 and locked_until > time()
+
+
+def test_unlocks_after_lockout_expires(db, monkeypatch):
+    monkeypatch.setattr(security, "DSAR_OTP_MAX_ATTEMPTS", 2)
+    token, otp = issue(db)
+    for _ in range(2):
+        verify_download_token_and_otp(db, token, wrong(otp))
+
+    db.execute("UPDATE dsar_exports SET otp_locked_until = ?", (time() - 1,))
+    db.commit()
+
+    assert verify_download_token_and_otp(db, token, wrong(otp))[1] == "INVALID_OTP"
+    assert db.execute("SELECT otp_attempts, otp_locked_until FROM dsar_exports").fetchone() == (1, None)
+    export, error = verify_download_token_and_otp(db, token, otp)
+    assert error is None and export["user_id"] == "u-1"
+    assert db.execute("SELECT otp_attempts FROM dsar_exports").fetchone()[0] == 0
+
+
+def test_migration_adds_attempt_columns():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE dsar_exports(
+            id TEXT PRIMARY KEY, request_id TEXT NOT NULL, user_id TEXT NOT NULL,
+            created_at REAL NOT NULL, expires_at REAL NOT NULL, storage_path TEXT NOT NULL,
+            download_token TEXT UNIQUE NOT NULL, download_token_expires_at REAL NOT NULL,
+            otp_hash TEXT NOT NULL, otp_expires_at REAL NOT NULL, downloaded_at REAL, data_categories TEXT
+        )
+    """)
+    add_export(conn, "old-token", "abc")
+
+    init_dsar_tables(conn)
+    init_dsar_tables(conn)
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(dsar_exports)")}
+    assert {"otp_attempts", "otp_locked_until"} <= columns
+    assert conn.execute("SELECT otp_attempts, otp_locked_until FROM dsar_exports").fetchone() == (0, None)
+
+
+def test_download_route_returns_429_when_locked(db, monkeypatch, tmp_path):
+    # Keep run's import-time setup off the working database
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "levqor.db"))
+    run = pytest.importorskip("run")
+    monkeypatch.setattr(run, "get_db", lambda: db)
+    monkeypatch.setattr(security, "DSAR_OTP_MAX_ATTEMPTS", 2)
+    token, otp = issue(db)
+    client = run.app.test_client()
+
+    codes = [client.post("/api/data-export/download", json={"token": token, "otp": wrong(otp)}).status_code
+             for _ in range(2)]
+    locked = client.post("/api/data-export/download", json={"token": token, "otp": otp})
+
+    assert codes == [403, 403]
+    assert locked.status_code == 429
+    assert locked.get_json()["error"] == "OTP_LOCKED"
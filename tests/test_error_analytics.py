@@ -0,0 +1,150 @@
+"""
+Tests for error_events rollups, the stats endpoint and consumer cursors
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app import db
+from backend.models.error_event import ErrorEvent, ErrorEventRollup, ErrorMonitorSeen
+from backend.routes.error_logging import error_logging_bp
+from backend.services import error_analytics
+from backend.services.error_analytics import (
+    backfill_rollups, error_fingerprint, fetch_new_events, get_error_counts, record_rollup
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'errors.db'}"
+    db.init_app(app)
+    app.register_blueprint(error_logging_bp)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def add_event(message="boom", severity="error", created_at=None, count=1, id=None, rollup=True):
+    event = ErrorEvent(
+        id=id, source="backend", service="billing", severity=severity, message=message,
+        count=count, created_at=created_at or datetime.utcnow()
+    )
+    db.session.add(event)
+    db.session.flush()
+    if rollup:
+        record_rollup(event.created_at, event.source, event.service, event.severity, event.message, count=count)
+    db.session.commit()
+    return event
+
+
+def rollup_total():
+    return sum(row.count for row in ErrorEventRollup.query.all())
+
+
+def test_fingerprint_masks_numbers_and_ids():
+    assert error_fingerprint("backend", "billing", "Timeout after 30s for 9f8e7d6c5b4a") == \
+        error_fingerprint("backend", "billing", "timeout after 45s for 0123456789ab")
+    assert error_fingerprint("backend", "billing", "boom") != error_fingerprint("frontend", "billing", "boom")
+
+
+def test_record_rollup_upserts_per_minute_bucket(app):
+    minute = datetime(2026, 1, 1, 12, 0)
+    add_event("Timeout after 30s", created_at=minute + timedelta(seconds=5))
+    add_event("Timeout after 31s", created_at=minute + timedelta(seconds=50), count=3)
+    add_event("Timeout after 32s", created_at=minute + timedelta(seconds=65))
+
+    rows = ErrorEventRollup.query.order_by(ErrorEventRollup.bucket).all()
+
+    assert [(row.bucket, row.count) for row in rows] == [(minute, 4), (minute + timedelta(minutes=1), 1)]
+    assert get_error_counts(minute, group_by="service") == [("billing", 5)]
+
+
+def test_backfill_rebuilds_rollups_without_double_counting(app):
+    now = datetime.utcnow()
+    add_event("old", created_at=now - timedelta(hours=2), rollup=False)
+    add_event("recent", created_at=now - timedelta(minutes=5), count=4, rollup=False)
+    add_event("critical", severity="critical", created_at=now, rollup=False)
+
+    assert backfill_rollups(batch_size=2) == 6
+    assert rollup_total() == 6
+
+    # Re-running for a recent window only recounts those buckets
+    assert backfill_rollups(since=now - timedelta(minutes=30)) == 5
+    assert rollup_total() == 6
+    assert dict(get_error_counts(now - timedelta(minutes=30))) == {"error": 4, "critical": 1}
+
+
+def test_stats_endpoint(app, monkeypatch):
+    monkeypatch.setenv("INTERNAL_SECRET", "s3cret")
+    add_event("boom", count=2)
+    add_event("down", severity="critical")
+    client = app.test_client()
+
+    assert client.get("/api/errors/stats").status_code == 401
+    assert client.get("/api/errors/stats?by=nope", headers={"X-Internal-Secret": "s3cret"}).status_code == 400
+
+    response = client.get("/api/errors/stats?series=1", headers={"X-Internal-Secret": "s3cret"})
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert body["total"] == 3
+    assert {row["severity"]: row["count"] for row in body["counts"]} == {"error": 2, "critical": 1}
+    assert sum(point["count"] for point in body["series"]) == 3
+
+
+def test_cursor_returns_each_event_once(app):
+    first = add_event("a")
+    assert [e.id for e in fetch_new_events("test")] == [first.id]
+
+    second = add_event("b")
+    third = add_event("c", severity="critical")
+    assert [e.id for e in fetch_new_events("test")] == [second.id, third.id]
+    assert fetch_new_events("test") == []
+
+
+def test_cursor_respects_limit(app):
+    ids = [add_event(str(n)).id for n in range(5)]
+
+    assert [e.id for e in fetch_new_events("test", limit=3)] == ids[:3]
+    assert [e.id for e in fetch_new_events("test", limit=3)] == ids[3:]
+
+
+def test_cursor_picks_up_rows_committed_out_of_id_order(app):
+    fetch_new_events("test")
+    add_event("first", id=10)
+    assert [e.id for e in fetch_new_events("test")] == [10]
+
+    # id 7 was allocated earlier but its transaction committed after id 10
+    add_event("late", id=7)
+    assert [e.id for e in fetch_new_events("test", severity="error")] == [7]
+    assert fetch_new_events("test") == []
+
+
+def test_seen_markers_are_pruned_after_the_overlap(app, monkeypatch):
+    fetch_new_events("test")
+    add_event("x")
+    fetch_new_events("test")
+    assert ErrorMonitorSeen.query.count() == 1
+
+    monkeypatch.setattr(error_analytics, "ERROR_CURSOR_OVERLAP_SECONDS", 0)
+    assert fetch_new_events("test") == []
+    assert ErrorMonitorSeen.query.count() == 0
+
+
+def test_recent_pages_by_before_id_and_rejects_bad_values(app, monkeypatch):
+    monkeypatch.setenv("INTERNAL_SECRET", "s3cret")
+    ids = [add_event(f"boom {i}").id for i in range(3)]
+    client = app.test_client()
+    headers = {"X-Internal-Secret": "s3cret"}
+
+    first = client.get("/api/errors/recent?limit=2", headers=headers).get_json()
+    assert [e["id"] for e in first["errors"]] == ids[:0:-1]
+    page = client.get(f"/api/errors/recent?limit=2&before_id={first['next_before_id']}", headers=headers).get_json()
+    assert [e["id"] for e in page["errors"]] == ids[:1]
+
+    response = client.get("/api/errors/recent?before_id=abc", headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["ok"] is False
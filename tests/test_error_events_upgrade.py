@@ -0,0 +1,83 @@
+"""
+Tests for upgrading an error_events table created before grouping columns
+"""
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from app import db
+from backend.models.error_event import ErrorEvent, upgrade_error_events_table
+from backend.routes.error_logging import error_logging_bp
+
+LEGACY_SCHEMA = """
+    CREATE TABLE error_events (
+        id INTEGER NOT NULL PRIMARY KEY,
+        created_at DATETIME NOT NULL,
+        source VARCHAR(50) NOT NULL,
+        service VARCHAR(100) NOT NULL,
+        path_or_screen VARCHAR(500),
+        user_email VARCHAR(255),
+        severity VARCHAR(20) NOT NULL,
+        message TEXT NOT NULL,
+        stack TEXT
+    );
+    INSERT INTO error_events (created_at, source, service, severity, message)
+    VALUES ('2026-01-01 12:00:00.000000', 'backend', 'billing', 'critical', 'old row');
+"""
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def app(legacy_db, monkeypatch):
+    monkeypatch.setenv("INTERNAL_SECRET", "s3cret")
+    monkeypatch.setattr("backend.routes.error_logging.ERROR_BUFFER_ENABLED", False)
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{legacy_db}"
+    db.init_app(app)
+    app.register_blueprint(error_logging_bp)
+    with app.app_context():
+        # Same boot sequence as run.py
+        db.create_all()
+        upgrade_error_events_table(db.engine)
+        yield app
+        db.session.remove()
+
+
+def test_boot_adds_missing_columns_and_indexes(app, legacy_db):
+    conn = sqlite3.connect(legacy_db)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(error_events)")}
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(error_events)")}
+    conn.close()
+
+    assert {"fingerprint", "count", "first_seen", "last_seen"} <= columns
+    assert "ix_error_events_fingerprint" in indexes
+    assert "ix_error_events_severity_created_at" in indexes
+
+    old = ErrorEvent.query.one()
+    assert old.count == 1 and old.fingerprint is None
+
+
+def test_upgrade_is_idempotent(app):
+    upgrade_error_events_table(db.engine)
+    assert ErrorEvent.query.count() == 1
+
+
+def test_logging_and_reading_work_after_upgrade(app):
+    client = app.test_client()
+
+    response = client.post("/api/errors/log", json={"service": "billing", "message": "new row"})
+    assert response.status_code in (200, 201)
+
+    recent = client.get("/api/errors/recent", headers={"X-Internal-Secret": "s3cret"})
+    assert recent.status_code == 200
+    assert {"old row", "new row"} <= {e["message"] for e in recent.get_json()["errors"]}
@@ -0,0 +1,102 @@
+"""
+Tests for the deduplicating error ingestion buffer
+"""
+import time
+
+import pytest
+from flask import Flask
+
+from app import db
+from backend.models.error_event import ErrorEvent, ErrorEventRollup
+from backend.routes import error_logging
+from backend.routes.error_logging import error_logging_bp
+from backend.services.error_ingest import ErrorIngestBuffer, ingest_fingerprint
+
+STACK = 'Traceback:\n  File "/srv/app/run.py", line {}, in handler\n  File "/srv/billing.py", line 9, in charge\n'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'errors.db'}"
+    db.init_app(app)
+    app.register_blueprint(error_logging_bp)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    buffer = ErrorIngestBuffer(max_groups=2, flush_interval=3600, batch_size=100)
+    # Flush explicitly; the background thread is covered by the critical test
+    monkeypatch.setattr(buffer, "_ensure_flusher", lambda: None)
+    return buffer
+
+
+def submit(buffer, app, message, severity="error", line=1):
+    return buffer.submit(app, "backend", "billing", message, severity=severity, stack=STACK.format(line))
+
+
+def test_repeats_collapse_into_one_group(app, buffer):
+    for order_id in range(5):
+        assert submit(buffer, app, f"Order {order_id} failed for 'cus_{order_id}'", line=order_id)
+
+    stats = buffer.stats()
+    assert stats["pending_groups"] == 1
+    assert (stats["received"], stats["merged"]) == (5, 4)
+
+
+def test_full_buffer_drops_new_groups_and_route_returns_503(app, buffer, monkeypatch):
+    submit(buffer, app, "first")
+    submit(buffer, app, "second")
+
+    assert submit(buffer, app, "third") is False
+    assert submit(buffer, app, "first") is True
+    assert buffer.stats()["dropped"] == 1
+
+    monkeypatch.setattr(error_logging, "ERROR_BUFFER_ENABLED", True)
+    monkeypatch.setattr(error_logging, "get_error_buffer", lambda: buffer)
+    client = app.test_client()
+    response = client.post("/api/errors/log", json={"service": "billing", "message": "fourth"})
+
+    assert response.status_code == 503
+    assert client.post("/api/errors/log", json={"service": "billing", "message": "second",
+                                                 "stack": STACK.format(7)}).status_code == 200
+    assert buffer.stats()["dropped"] == 2
+
+
+def test_flush_writes_counts_and_rollups(app, buffer):
+    for _ in range(4):
+        submit(buffer, app, "card declined")
+    submit(buffer, app, "gateway down", severity="critical")
+
+    assert buffer.flush() == 2
+
+    rows = {row.message: row for row in ErrorEvent.query.all()}
+    assert rows["card declined"].count == 4
+    assert rows["card declined"].fingerprint == ingest_fingerprint("backend", "billing", "error", "card declined",
+                                                                   STACK.format(1))
+    assert rows["card declined"].first_seen <= rows["card declined"].last_seen
+    assert rows["gateway down"].count == 1
+    assert {r.severity: r.count for r in ErrorEventRollup.query.all()} == {"error": 4, "critical": 1}
+    assert buffer.stats()["pending_groups"] == 0 and buffer.stats()["rows_written"] == 2
+    assert buffer.flush() == 0
+
+
+def test_critical_error_flushes_early(app):
+    buffer = ErrorIngestBuffer(max_groups=10, flush_interval=3600, batch_size=100)
+
+    submit(buffer, app, "slow query")
+    time.sleep(0.1)
+    assert buffer.stats()["pending_groups"] == 1
+
+    submit(buffer, app, "database unreachable", severity="critical")
+    deadline = time.monotonic() + 5
+    while buffer.stats()["rows_written"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert buffer.stats()["rows_written"] == 2
+    db.session.remove()
+    assert {row.message for row in ErrorEvent.query.all()} == {"slow query", "database unreachable"}
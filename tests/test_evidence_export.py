@@ -0,0 +1,144 @@
+"""
+Tests for streamed evidence report exports (PDF, JSON, HTML)
+"""
+import io
+import json
+import re
+
+import pytest
+
+from modules.integrity_pack import evidence_export
+from modules.integrity_pack.evidence_export import (
+    EvidenceExporter, TABLE_CHUNK_ROWS, _FlowableStream, generate_evidence_report
+)
+
+pytest.importorskip("reportlab")
+from reportlab.lib.pagesizes import letter  # noqa: E402
+from reportlab.platypus import SimpleDocTemplate, Table  # noqa: E402
+
+CATEGORIES = ("api", "billing", "security")
+
+
+def integrity_results(n=150):
+    results = [
+        {
+            "test": f"check_{i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "status": "failed" if i % 17 == 0 else "passed",
+            "latency_ms": i
+        }
+        for i in range(n)
+    ]
+    results[1]["test"] = "<script>alert(1)</script>"
+    failed = sum(1 for r in results if r["status"] == "failed")
+    return {
+        "summary": {"total": n, "passed": n - failed, "failed": failed, "success_rate": 90},
+        "results": results
+    }
+
+
+def finalizer_results(n=20):
+    return {
+        "summary": {"total": n, "passed": n, "failed": 0, "deployment_ready": True},
+        "validations": [
+            {"check": f"final_{i}", "category": "deploy", "status": "passed", "purpose": "Ready"} for i in range(n)
+        ]
+    }
+
+
+def streamed(results):
+    """Same results as a one-shot iterator, grouped by category as the PDF expects"""
+    return dict(results, results=iter(sorted(results["results"], key=lambda r: r["category"])))
+
+
+def page_count(pdf_bytes):
+    return len(re.findall(rb"/Type /Page\b", pdf_bytes))
+
+
+def test_flowable_stream_pulls_lazily_and_supports_build_operations():
+    pulled = []
+
+    def source():
+        for i in range(20):
+            pulled.append(i)
+            yield i
+
+    stream = _FlowableStream(source())
+    assert pulled == []
+    assert stream[0] == 0 and len(pulled) == 1
+    assert len(stream) == evidence_export.FLOWABLE_LOOKAHEAD
+
+    del stream[0]
+    stream.insert(0, "split")
+    assert stream[0:3] == ["split", 1, 2]
+    stream[0] = "replaced"
+    del stream[:2]
+    assert stream[0] == 2
+
+    remaining = []
+    while len(stream):
+        remaining.append(stream[0])
+        del stream[0]
+    assert remaining == list(range(2, 20))
+
+
+def test_category_tables_are_chunked_with_repeated_header():
+    rows = integrity_results(200)["results"]
+    tables = [f for f in EvidenceExporter()._category_tables(
+        rows, ["Test", "Status", "Details"], evidence_export._integrity_row, "#4CAF50"
+    ) if isinstance(f, Table)]
+
+    assert all(t._nrows <= TABLE_CHUNK_ROWS + 1 and t.repeatRows == 1 for t in tables)
+    assert sum(t._nrows - 1 for t in tables) == 200
+    per_category = -(-67 // TABLE_CHUNK_ROWS) * 2 + -(-66 // TABLE_CHUNK_ROWS)
+    assert len(tables) == per_category
+
+
+def test_pdf_from_list_and_iterator_match_a_plain_build():
+    exporter = EvidenceExporter()
+    integrity, finalizer = integrity_results(), finalizer_results()
+
+    from_list, from_iter, plain = io.BytesIO(), io.BytesIO(), io.BytesIO()
+    assert exporter.export_to_pdf(integrity, finalizer, from_list) is from_list
+    exporter.export_to_pdf(streamed(integrity), finalizer, from_iter)
+    SimpleDocTemplate(plain, pagesize=letter).build(list(exporter._story(integrity, finalizer)))
+
+    pages = page_count(from_list.getvalue())
+    assert from_list.getvalue().startswith(b"%PDF")
+    assert pages > 5
+    assert page_count(from_iter.getvalue()) == pages
+    assert page_count(plain.getvalue()) == pages
+
+
+def test_json_export_round_trips_rows():
+    integrity, finalizer = integrity_results(), finalizer_results()
+    out = io.StringIO()
+
+    EvidenceExporter().export_to_json(streamed(integrity), finalizer, out)
+    report = json.loads(out.getvalue())
+
+    assert report["overall_passed"] is False
+    assert report["integrity"]["summary"] == integrity["summary"]
+    assert sorted(r["test"] for r in report["integrity"]["results"]) == sorted(r["test"] for r in integrity["results"])
+    assert report["finalizer"]["validations"] == finalizer["validations"]
+    assert report["recommendations"][0].startswith("Address")
+
+
+def test_html_export_escapes_and_groups_rows():
+    out = io.StringIO()
+
+    EvidenceExporter().export_to_html(integrity_results(), finalizer_results(), out)
+    page = out.getvalue()
+
+    assert "<script>" not in page and "&lt;script&gt;" in page
+    assert [h for h in re.findall(r"<h3>(.*?)</h3>", page)] == ["Api", "Billing", "Security", "Deploy"]
+    assert page.count("<tr><td>check_") + page.count("<tr><td>&lt;script") == 150
+    assert page.rstrip().endswith("</html>")
+
+
+def test_generate_evidence_report_formats(tmp_path):
+    path = generate_evidence_report(integrity_results(10), finalizer_results(3), str(tmp_path), fmt="json")
+    assert path.endswith(".json") and json.load(open(path))["integrity"]["summary"]["total"] == 10
+
+    with pytest.raises(ValueError):
+        generate_evidence_report({}, {}, str(tmp_path), fmt="docx")
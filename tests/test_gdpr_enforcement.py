@@ -0,0 +1,116 @@
+"""
+Tests for the cached GDPR opt-out checks
+"""
+import sqlite3
+import time
+
+import pytest
+
+from backend.services import gdpr_enforcement
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "gdpr.db")
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE users(
+            id TEXT PRIMARY KEY,
+            gdpr_opt_out_marketing INTEGER DEFAULT 0,
+            gdpr_opt_out_profiling INTEGER DEFAULT 0,
+            gdpr_opt_out_automation INTEGER DEFAULT 0,
+            gdpr_opt_out_analytics INTEGER DEFAULT 0,
+            gdpr_opt_out_all INTEGER DEFAULT 0
+        );
+        CREATE TABLE gdpr_objection_log(id TEXT PRIMARY KEY, user_id TEXT, scope TEXT, created_at REAL);
+        INSERT INTO users (id, gdpr_opt_out_marketing) VALUES ('42', 1);
+        INSERT INTO users (id, gdpr_opt_out_all) VALUES ('u-all', 1);
+        INSERT INTO users (id) VALUES ('u-ok');
+    """)
+    db.commit()
+    db.close()
+    monkeypatch.setattr(gdpr_enforcement, "DB_PATH", path)
+    monkeypatch.setattr(gdpr_enforcement, "_opt_out_sets", None)
+    monkeypatch.setattr(gdpr_enforcement, "OPT_OUT_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(gdpr_enforcement, "OPT_OUT_CACHE_TTL", 3600)
+    return path
+
+
+def opt_out_elsewhere(path, user_id, scope, log=True):
+    """Simulate an opt-out handled by another worker process"""
+    db = sqlite3.connect(path)
+    db.execute(f"UPDATE users SET gdpr_opt_out_{scope} = 1 WHERE id = ?", (user_id,))
+    if log:
+        db.execute(
+            "INSERT INTO gdpr_objection_log (id, user_id, scope, created_at) VALUES (?, ?, ?, ?)",
+            (f"log-{user_id}-{scope}", user_id, scope, time.time())
+        )
+    db.commit()
+    db.close()
+
+
+def test_scopes_and_all(db_path):
+    assert gdpr_enforcement.check_opt_out("42", "marketing") is True
+    assert gdpr_enforcement.check_opt_out("42", "analytics") is False
+    assert gdpr_enforcement.check_opt_out("u-all", "profiling") is True
+    assert gdpr_enforcement.check_opt_out("u-ok", "marketing") is False
+    assert gdpr_enforcement.check_opt_out("unknown", "marketing") is False
+
+
+def test_int_user_ids_match_text_ids(db_path):
+    assert gdpr_enforcement.check_opt_out(42, "marketing") is True
+    assert gdpr_enforcement.should_send_marketing_email(42) is False
+
+
+def test_unknown_scope_fails_safe(db_path):
+    assert gdpr_enforcement.check_opt_out("u-ok", "nonsense") is True
+
+
+def test_other_workers_opt_outs_seen_via_objection_log(db_path):
+    assert gdpr_enforcement.should_run_automation("u-ok") is True
+
+    opt_out_elsewhere(db_path, "u-ok", "automation")
+
+    assert gdpr_enforcement.should_run_automation("u-ok") is False
+
+
+def test_unlogged_writes_wait_for_ttl(db_path, monkeypatch):
+    assert gdpr_enforcement.should_track_analytics("u-ok") is True
+    opt_out_elsewhere(db_path, "u-ok", "analytics", log=False)
+
+    assert gdpr_enforcement.should_track_analytics("u-ok") is True
+
+    monkeypatch.setattr(gdpr_enforcement, "OPT_OUT_CACHE_TTL", 0)
+    assert gdpr_enforcement.should_track_analytics("u-ok") is False
+
+
+def test_refresh_reloads_in_process(db_path, monkeypatch):
+    monkeypatch.setattr(gdpr_enforcement, "OPT_OUT_CHECK_INTERVAL", 3600)
+    assert gdpr_enforcement.should_apply_profiling("u-ok") is True
+    opt_out_elsewhere(db_path, "u-ok", "profiling", log=False)
+
+    gdpr_enforcement.refresh_opt_out_cache()
+
+    assert gdpr_enforcement.should_apply_profiling("u-ok") is False
+
+
+def test_filter_allowed_users_matches_int_and_text_ids(db_path):
+    allowed = gdpr_enforcement.filter_allowed_users([42, "u-all", "u-ok", "unknown", None, ""], "marketing")
+
+    assert allowed == {"u-ok", "unknown"}
+    assert gdpr_enforcement.filter_allowed_users([42, "u-ok"], "analytics") == {42, "u-ok"}
+
+
+def test_filter_allowed_users_accepts_iterators_across_chunks(db_path):
+    ids = (user_id for user_id in ["42", "u-all", "u-ok", "x1", "x2", "u-ok", "x3"])
+
+    allowed = gdpr_enforcement.filter_allowed_users(ids, "profiling", chunk_size=2)
+
+    assert allowed == {"42", "u-ok", "x1", "x2", "x3"}
+
+
+def test_filter_allowed_users_fails_safe(db_path, monkeypatch):
+    assert gdpr_enforcement.filter_allowed_users(["u-ok"], "nonsense") == set()
+
+    monkeypatch.setattr(gdpr_enforcement, "DB_PATH", str(db_path) + ".missing/db")
+    assert gdpr_enforcement.filter_allowed_users(["u-ok"], "marketing") == set()
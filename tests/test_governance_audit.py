@@ -0,0 +1,166 @@
+"""
+Tests for the set-based partner governance audit and review cycle
+"""
+import sqlite3
+from time import time
+
+import pytest
+
+from modules.governance import audit
+from modules.governance.audit import _partner_stats, compute_audit_results, get_latest_audit_results
+from modules.governance.review_cycle import get_partners_due_for_review, mark_partner_reviewed
+
+DAY = 86400
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "governance.db")
+    # review_cycle and get_latest_audit_results open their own connections
+    monkeypatch.setenv("SQLITE_PATH", path)
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE partners(
+            id TEXT PRIMARY KEY, name TEXT, email TEXT, webhook_url TEXT,
+            is_verified INTEGER, is_active INTEGER, created_at REAL, updated_at REAL
+        );
+        CREATE TABLE listings(
+            id TEXT PRIMARY KEY, partner_id TEXT, downloads INTEGER, rating REAL, is_active INTEGER
+        );
+        CREATE TABLE marketplace_orders(id TEXT PRIMARY KEY, partner_id TEXT, amount_cents INTEGER);
+    """)
+    now = time()
+    db.executemany("INSERT INTO partners VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+        ("p1", "Busy", "p1@x.io", "https://p1.io/hook", 1, 1, now - 100 * DAY, None),
+        ("p2", "Quiet", "p2@x.io", "http://p2.io/hook", 0, 1, now - 10 * DAY, now - DAY),
+        ("p3", "Orders only", "p3@x.io", None, 1, 1, now - 5 * DAY, None),
+        ("p4", "Inactive", "p4@x.io", None, 1, 0, now - 400 * DAY, None),
+    ])
+    db.executemany("INSERT INTO listings VALUES (?, ?, ?, ?, ?)", [
+        ("l1", "p1", 10, 4.5, 1),
+        ("l2", "p1", 5, 3.0, 1),
+        ("l3", "p1", 99, 1.0, 0),  # inactive listings don't count
+        ("l4", "p2", None, None, 1),
+        ("l5", "p4", 7, 2.0, 1),
+    ])
+    db.executemany("INSERT INTO marketplace_orders VALUES (?, ?, ?)", [
+        ("o1", "p1", 1000), ("o2", "p1", 2500), ("o3", "p3", 499), ("o4", "p4", 100),
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+
+def old_per_partner_stats(cursor, partner_id):
+    """The two per-partner queries audit_partner ran before the grouped join"""
+    cursor.execute("""
+        SELECT COUNT(*), SUM(downloads), AVG(rating)
+        FROM listings
+        WHERE partner_id = ? AND is_active = 1
+    """, (partner_id,))
+    listings = cursor.fetchone()
+    cursor.execute("""
+        SELECT COUNT(*), SUM(amount_cents)
+        FROM marketplace_orders
+        WHERE partner_id = ?
+    """, (partner_id,))
+    sales = cursor.fetchone()
+    return (listings[0] or 0, listings[1] or 0, listings[2], sales[0] or 0, sales[1] or 0)
+
+
+def test_grouped_stats_match_old_per_partner_queries(db):
+    cursor = db.cursor()
+    rows = _partner_stats(cursor)
+
+    assert sorted(row[0] for row in rows) == ["p1", "p2", "p3"]  # active partners only
+    for row in rows:
+        assert tuple(row[8:]) == old_per_partner_stats(cursor, row[0]), row[0]
+
+
+def test_single_partner_stats_match_including_inactive(db):
+    cursor = db.cursor()
+
+    for partner_id in ("p1", "p2", "p3", "p4"):
+        (row,) = _partner_stats(cursor, partner_id)
+        assert row[0] == partner_id
+        assert tuple(row[8:]) == old_per_partner_stats(cursor, partner_id)
+
+    assert _partner_stats(cursor, "missing") == []
+
+
+def audit_rows(db):
+    return db.execute("""
+        SELECT audit_id, partner_id, status, review_due, total_revenue_cents FROM audit_results ORDER BY partner_id
+    """).fetchall()
+
+
+def test_compute_audit_results_stores_one_row_per_active_partner(db):
+    audit_id, reports = compute_audit_results(db, "audit_1")
+
+    assert audit_id == "audit_1"
+    assert audit_rows(db) == [
+        ("audit_1", "p1", "compliant", 1, 3500),
+        ("audit_1", "p2", "issues_found", 0, 0),
+        ("audit_1", "p3", "compliant", 0, 499),
+    ]
+    assert {r["partner_id"]: r["compliance_issues"] for r in reports}["p2"] == ["Webhook URL not using HTTPS"]
+
+
+def test_old_audit_runs_are_pruned(db, monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_RESULTS_KEEP", 2)
+
+    for n in range(4):
+        compute_audit_results(db, f"audit_{n}")
+
+    assert {row[0] for row in audit_rows(db)} == {"audit_2", "audit_3"}
+
+
+def test_latest_results_are_reused_while_fresh(db):
+    compute_audit_results(db, "audit_fresh")
+    db.execute("UPDATE partners SET webhook_url = 'http://p1.io/hook' WHERE id = 'p1'")
+    db.commit()
+
+    results = get_latest_audit_results()
+
+    assert {r["audit_id"] for r in results} == {"audit_fresh"}
+    assert {r["partner_id"]: r["status"] for r in results}["p1"] == "compliant"
+    assert {r["partner_id"]: r["compliance_issues"] for r in results}["p2"] == ["Webhook URL not using HTTPS"]
+
+
+def test_stale_results_are_recomputed(db):
+    compute_audit_results(db, "audit_stale")
+    db.execute("UPDATE audit_results SET audited_at = audited_at - 2 * ?", (audit.AUDIT_RESULTS_MAX_AGE,))
+    db.execute("UPDATE partners SET webhook_url = 'http://p1.io/hook' WHERE id = 'p1'")
+    db.commit()
+
+    results = get_latest_audit_results(db)
+
+    assert {r["audit_id"] for r in results} != {"audit_stale"}
+    assert {r["partner_id"]: r["status"] for r in results}["p1"] == "issues_found"
+
+
+def test_partners_due_for_review_come_from_audit_results(db):
+    due = get_partners_due_for_review()
+
+    assert [p["id"] for p in due] == ["p1"]
+    assert due[0]["days_since_review"] == 100
+    assert due[0]["review_overdue_by_days"] == 10
+
+
+def test_mark_partner_reviewed_updates_stored_results(db):
+    compute_audit_results(db, "audit_1")
+
+    assert mark_partner_reviewed("p1") is True
+
+    row = db.execute("""
+        SELECT review_due, days_since_review, last_review_at FROM audit_results WHERE partner_id = 'p1'
+    """).fetchone()
+    assert row[:2] == (0, 0) and row[2] > time() - 60
+    assert db.execute("SELECT updated_at FROM partners WHERE id = 'p1'").fetchone()[0] == row[2]
+    assert get_partners_due_for_review() == []
+    assert mark_partner_reviewed("missing") is False
+
+
+def test_mark_partner_reviewed_before_any_audit(db):
+    assert mark_partner_reviewed("p2") is True
+    assert [p["id"] for p in get_partners_due_for_review()] == ["p1"]
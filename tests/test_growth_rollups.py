@@ -0,0 +1,160 @@
+"""
+Tests for trigger-maintained growth rollups and the endpoints reading them
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+from time import time
+
+import pytest
+from flask import Flask
+
+from modules.growth import get_event_counts, get_growth_by_source, init_growth_rollups, rebuild_growth_rollups
+
+DAY = 86400
+
+
+@pytest.fixture
+def db(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "levqor.db"))
+    init_growth_rollups(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def add_event(db, event, source=None, revenue_cents=0, days_ago=0):
+    db.execute(
+        "INSERT INTO growth_events (ts, user_id, event, source, revenue_cents) VALUES (?, ?, ?, ?, ?)",
+        (int(time()) - days_ago * DAY, "u1", event, source, revenue_cents)
+    )
+    db.commit()
+
+
+def rollups(db):
+    return db.execute(
+        "SELECT day, event, source, events, revenue_cents FROM growth_daily WHERE events != 0 ORDER BY 1, 2, 3"
+    ).fetchall()
+
+
+def raw_counts(db):
+    return db.execute("""
+        SELECT date(ts, 'unixepoch'), event, COALESCE(source, ''), COUNT(*), SUM(revenue_cents)
+        FROM growth_events GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+    """).fetchall()
+
+
+def seed(db):
+    for days_ago in range(10):
+        add_event(db, "visit", "google", days_ago=days_ago)
+        add_event(db, "visit", None, days_ago=days_ago)
+        add_event(db, "signup", "google", days_ago=days_ago)
+    add_event(db, "paid", "google", revenue_cents=2900)
+    add_event(db, "paid", "google", revenue_cents=900, days_ago=40)
+
+
+def test_triggers_track_insert_update_and_delete(db):
+    add_event(db, "paid", "google", revenue_cents=1000)
+    add_event(db, "paid", "google", revenue_cents=500)
+    assert [row[1:] for row in rollups(db)] == [("paid", "google", 2, 1500)]
+
+    db.execute("UPDATE growth_events SET source = 'bing' WHERE revenue_cents = 500")
+    assert [row[1:] for row in rollups(db)] == [("paid", "bing", 1, 500), ("paid", "google", 1, 1000)]
+
+    db.execute("DELETE FROM growth_events WHERE source = 'google'")
+    assert [row[1:] for row in rollups(db)] == [("paid", "bing", 1, 500)]
+
+
+def test_growth_by_source_and_event_counts(db):
+    seed(db)
+
+    by_source = get_growth_by_source(db, days=30)
+    assert by_source["visit"] == {"google": {"events": 10, "revenue_cents": 0}, None: {"events": 10, "revenue_cents": 0}}
+    assert by_source["paid"] == {"google": {"events": 1, "revenue_cents": 2900}}
+
+    assert get_event_counts(db, ("signup", "paid", "refund"), days=7) == {"signup": 7, "paid": 1, "refund": 0}
+    assert get_event_counts(db, ("paid",), days=60) == {"paid": 2}
+
+
+def test_full_rebuild_matches_raw_events(db):
+    seed(db)
+    db.execute("DROP TRIGGER growth_daily_ai")
+    add_event(db, "visit", "direct")
+    db.execute("DELETE FROM growth_daily WHERE event = 'signup'")
+    db.commit()
+
+    written = rebuild_growth_rollups(db)
+
+    assert [row[:5] for row in rollups(db)] == raw_counts(db)
+    assert written == len(raw_counts(db))
+
+
+def test_partial_rebuild_keeps_older_days(db):
+    seed(db)
+    old_day = db.execute("SELECT MIN(day) FROM growth_daily").fetchone()[0]
+    db.execute("UPDATE growth_daily SET events = 99 WHERE day = ?", (old_day,))
+    since_day = db.execute("SELECT date('now', '-3 days')").fetchone()[0]
+    db.execute("UPDATE growth_daily SET events = 99 WHERE day >= ?", (since_day,))
+    db.commit()
+
+    rebuild_growth_rollups(db, since_day=since_day)
+
+    assert db.execute("SELECT events FROM growth_daily WHERE day = ?", (old_day,)).fetchone()[0] == 99
+    recent = [row for row in rollups(db) if row[0] >= since_day]
+    assert recent == [row for row in raw_counts(db) if row[0] >= since_day]
+
+
+@pytest.mark.parametrize("since_day", ["2026-10-1", "10/01/2026", "2026-13-01", "yesterday"])
+def test_malformed_since_day_deletes_nothing(db, since_day):
+    seed(db)
+    before = rollups(db)
+
+    with pytest.raises(ValueError):
+        rebuild_growth_rollups(db, since_day=since_day)
+
+    assert rollups(db) == before
+
+
+def test_backfill_cli_rejects_malformed_since(tmp_path):
+    script = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "backfill_growth_rollups.py")
+    result = subprocess.run([sys.executable, script, "--since", "2026-10-1"], capture_output=True, text=True,
+                            env={"SQLITE_PATH": str(tmp_path / "missing.db")})
+
+    assert result.returncode == 2
+    assert "expected YYYY-MM-DD" in result.stderr
+
+
+@pytest.fixture
+def app_db(db, tmp_path, monkeypatch):
+    # The endpoints open ./levqor.db
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    seed(db)
+    return db
+
+
+def test_admin_growth_endpoint_reads_rollups(app_db):
+    from api.admin.growth import bp
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    client = app.test_client()
+
+    assert client.get("/api/admin/growth").status_code == 401
+    body = client.get("/api/admin/growth", headers={"Authorization": "Bearer secret"}).get_json()
+
+    assert body["summary"] == {"total_visits": 20, "total_signups": 10, "total_revenue_usd": 29.0,
+                               "overall_conversion_pct": 50.0}
+    assert body["sources"][0]["source"] == "google" and body["sources"][0]["revenue_usd"] == 29.0
+
+
+def test_discount_preview_uses_weekly_counts(app_db):
+    from api.billing.discounts import bp
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+
+    body = app.test_client().get("/billing/discounts/preview").get_json()
+
+    # 7 signups but a single conversion in the last 7 days
+    assert body["reason"] == "low_conversions"
+    assert body["auto_apply_enabled"] is False
@@ -0,0 +1,161 @@
+"""
+Tests for background insights report jobs, their routes and the KPI cache
+"""
+from time import time
+
+import pytest
+from flask import Flask
+
+from api.routes.insights.report import bp as report_bp
+from modules.data_insights import cache, report_jobs
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args[0])
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "insights.db"))
+    state = {"kpis": {"period_days": 90, "api_usage": {"calls": 10}}, "built": 0, "uploads": [], "link": "https://drive/1"}
+
+    def build_pdf(kpis):
+        state["built"] += 1
+        return b"%PDF-1.4 " + repr(sorted(kpis["api_usage"].items())).encode()
+
+    def upload_pdf(pdf_bytes, filename):
+        state["uploads"].append(filename)
+        return state["link"]
+
+    monkeypatch.setattr(report_jobs, "get_kpis", lambda period_days: dict(state["kpis"], generated_at=str(time())))
+    monkeypatch.setattr(report_jobs, "build_pdf", build_pdf)
+    monkeypatch.setattr(report_jobs, "upload_pdf", upload_pdf)
+    executor = FakeExecutor()
+    monkeypatch.setattr(report_jobs, "_get_executor", lambda: executor)
+    state["executor"] = executor
+    return state
+
+
+def run_new_job():
+    job = report_jobs.submit_report_job(run=False)
+    return report_jobs.run_report_job(job["job_id"])
+
+
+def test_identical_kpis_reuse_the_artifact(env):
+    first = run_new_job()
+    second = run_new_job()
+
+    assert first["status"] == second["status"] == "completed"
+    assert (first["reused_artifact"], second["reused_artifact"]) == (False, True)
+    assert first["sha256"] == second["sha256"]
+    assert second["drive_link"] == "https://drive/1"
+    assert env["built"] == 1 and len(env["uploads"]) == 1
+
+    env["kpis"] = {"period_days": 90, "api_usage": {"calls": 11}}
+    third = run_new_job()
+    assert not third["reused_artifact"] and third["sha256"] != first["sha256"]
+    assert env["built"] == 2
+
+
+def test_failed_upload_is_retried_by_the_next_job(env):
+    env["link"] = None
+    first = run_new_job()
+    assert first["status"] == "completed" and first["drive_link"] is None
+
+    env["link"] = "https://drive/2"
+    second = run_new_job()
+    assert second["reused_artifact"] and second["drive_link"] == "https://drive/2"
+    assert env["built"] == 1 and len(env["uploads"]) == 2
+
+
+def test_build_failure_marks_job_failed(env, monkeypatch):
+    def broken(kpis):
+        raise RuntimeError("reportlab exploded")
+
+    monkeypatch.setattr(report_jobs, "build_pdf", broken)
+
+    job = run_new_job()
+
+    assert job["status"] == "failed" and "exploded" in job["error"]
+    assert report_jobs.get_report_pdf(job["job_id"]) == (None, None)
+
+
+def test_job_is_claimed_once_unless_stale(env, monkeypatch):
+    job_id = report_jobs.submit_report_job(run=False)["job_id"]
+    db = report_jobs._connect()
+
+    assert report_jobs._claim(db, job_id) is True
+    assert report_jobs._claim(db, job_id) is False
+    assert report_jobs.run_report_job(job_id) is None
+
+    monkeypatch.setattr(report_jobs, "INSIGHTS_REPORT_TIMEOUT", -1)
+    assert report_jobs._claim(db, job_id) is True
+    db.close()
+
+    assert report_jobs.run_report_job(job_id)["status"] == "completed"
+    assert report_jobs.run_report_job(job_id) is None  # finished jobs are never re-run
+
+
+def test_resume_resubmits_queued_and_stale_jobs(env, monkeypatch):
+    queued = report_jobs.submit_report_job(run=False)["job_id"]
+    running = report_jobs.submit_report_job(run=False)["job_id"]
+    done = run_new_job()["job_id"]
+    db = report_jobs._connect()
+    report_jobs._claim(db, running)
+    db.close()
+
+    assert report_jobs.resume_report_jobs() == 1
+    assert env["executor"].submitted == [queued]
+
+    monkeypatch.setattr(report_jobs, "INSIGHTS_REPORT_TIMEOUT", -1)
+    env["executor"].submitted.clear()
+    assert report_jobs.resume_report_jobs() == 2
+    assert sorted(env["executor"].submitted) == sorted([queued, running])
+    assert done not in env["executor"].submitted
+
+
+@pytest.fixture
+def client(env):
+    app = Flask(__name__)
+    app.register_blueprint(report_bp)
+    return app.test_client()
+
+
+def test_report_routes(client, env):
+    response = client.post("/api/insights/report")
+    assert response.status_code == 202
+    handle = response.get_json()
+    job_id = handle["job_id"]
+    assert env["executor"].submitted == [job_id]
+    assert handle["status_url"] == f"/api/insights/report/{job_id}"
+
+    queued = client.get(handle["status_url"]).get_json()
+    assert queued["status"] == "queued" and "pdf_url" not in queued
+    assert client.get(f"/api/insights/report/{job_id}/pdf").status_code == 404
+
+    report_jobs.run_report_job(job_id)
+
+    done = client.get(handle["status_url"]).get_json()
+    assert done["ok"] and done["status"] == "completed"
+    assert done["kpis"]["api_usage"] == {"calls": 10}
+    pdf = client.get(done["pdf_url"])
+    assert pdf.status_code == 200 and pdf.mimetype == "application/pdf"
+    assert pdf.data.startswith(b"%PDF") and len(pdf.data) == done["size_bytes"]
+    assert done["filename"] in pdf.headers["Content-Disposition"]
+
+    assert client.get("/api/insights/report/nope").status_code == 404
+
+
+def test_kpi_cache_serves_until_invalidated(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cache, "aggregate", lambda period_days: calls.append(period_days) or {"n": len(calls)})
+    monkeypatch.setattr(cache, "_cache", cache.KPICache(ttl=60, stale_ttl=0))
+
+    assert cache.get_kpis(30) == cache.get_kpis(30) == {"n": 1}
+    cache.invalidate_kpis()
+    assert cache.get_kpis(30) == {"n": 2}
+    assert calls == [30, 30]
@@ -0,0 +1,84 @@
+"""
+Tests for the concurrent integrity check runner against a local Flask app
+"""
+import time
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from modules.integrity_pack.integrity_test import IntegrityTester, Check
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "integrity.db")
+    db = sqlite3.connect(path)
+    for table in ("users", "sessions", "referrals"):
+        db.execute(f"CREATE TABLE {table}(id TEXT)")
+    db.commit()
+    db.close()
+    return path
+
+
+def make_app(delay=0.3, healthy=True):
+    app = Flask("integrity_target")
+    
+    for path in ("/health", "/public/metrics", "/ops/uptime", "/ops/queue_health", "/billing/health"):
+        def endpoint(path=path):
+            time.sleep(delay)
+            return ("ok", 200) if healthy else ("down", 503)
+        app.add_url_rule(path, path, endpoint)
+    
+    @app.after_request
+    def security_headers(response):
+        response.headers["X-Frame-Options"] = "DENY"
+        return response
+    
+    return app
+
+
+def offline_tester(app, db_path):
+    tester = IntegrityTester(app=app, db_path=db_path, offline=True)
+    # The scheduler check inspects this process, not the target
+    tester.checks = [c for c in tester.checks if c.category != "workflow"]
+    return tester
+
+
+def test_checks_run_concurrently_and_offline(db_path):
+    tester = offline_tester(make_app(delay=0.3), db_path)
+    
+    started = time.perf_counter()
+    summary = tester.run_all_tests()
+    elapsed = time.perf_counter() - started
+    
+    # Main health, then the four dependent endpoints in parallel: ~2 x 0.3s, not 5 x 0.3s
+    assert elapsed < 1.2
+    assert summary["summary"]["failed"] == 0
+    statuses = {r["test"]: r["status"] for r in summary["results"]}
+    assert statuses["External API: Stripe"] == "skipped"
+    assert statuses["Database: Schema Validation"] == "passed"
+    assert statuses["Security: Clickjacking Protection"] == "passed"
+    assert summary["latency_histograms"]["Backend: Ops Uptime"]["count"] == 1
+
+
+def test_dependents_of_failed_check_are_skipped(db_path):
+    summary = offline_tester(make_app(delay=0, healthy=False), db_path).run_all_tests()
+    
+    statuses = {r["test"]: r["status"] for r in summary["results"]}
+    assert statuses["Backend: Main Health"] == "failed"
+    assert statuses["Backend: Billing Health"] == "skipped"
+    assert statuses["Database: Read Users"] == "passed"
+
+
+def test_slow_check_times_out(db_path):
+    tester = offline_tester(make_app(delay=0), db_path)
+    tester.checks.append(Check("Slow", "backend_health", lambda: time.sleep(2) or {"status": "passed"}, timeout=0.2))
+    
+    started = time.perf_counter()
+    summary = tester.run_all_tests()
+    
+    assert time.perf_counter() - started < 1.5
+    slow = next(r for r in summary["results"] if r["test"] == "Slow")
+    assert slow["status"] == "failed"
+    assert "Timed out" in slow["error"]
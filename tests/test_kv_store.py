@@ -0,0 +1,56 @@
+"""
+Tests for the cached KV store layer
+"""
+import sqlite3
+import pytest
+from modules.kv import KVStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    kv = KVStore(db_path=str(tmp_path / "kv.db"), ttl=60)
+    yield kv
+    kv.close()
+
+
+def test_set_many_and_get_floats(store):
+    store.set_many({"stripe_revenue_30d": 100, "openai_cost_30d": 12.5})
+    
+    values = store.get_floats({
+        "stripe_revenue_30d": 0.0,
+        "openai_cost_30d": 0.0,
+        "infra_cost_30d": 20.0
+    })
+    
+    assert values == {"stripe_revenue_30d": 100.0, "openai_cost_30d": 12.5, "infra_cost_30d": 20.0}
+
+
+def test_reads_are_cached_until_invalidated(store):
+    store.set("infra_cost_30d", 5)
+    store.get_many(["infra_cost_30d"])
+    
+    # Out-of-band write (e.g. another worker) is not visible until the TTL/invalidate
+    conn = sqlite3.connect(store.db_path)
+    conn.execute("UPDATE kv SET value='9' WHERE key='infra_cost_30d'")
+    conn.commit()
+    conn.close()
+    
+    assert store.get("infra_cost_30d", cast=float) == 5.0
+    store.invalidate(["infra_cost_30d"])
+    assert store.get("infra_cost_30d", cast=float) == 9.0
+
+
+def test_invalid_values_fall_back_to_default(store):
+    store.set("openai_cost_30d", "not-a-number")
+    assert store.get("openai_cost_30d", 0.0, cast=float) == 0.0
+
+
+def test_history_filters_by_time_range(store):
+    store.set_many({"stripe_revenue_30d": 10})
+    store.set_many({"stripe_revenue_30d": 20})
+    
+    series = store.history(["stripe_revenue_30d", "infra_cost_30d"], since=0, cast=float)
+    
+    assert [value for _, value in series["stripe_revenue_30d"]] == [10.0, 20.0]
+    assert series["infra_cost_30d"] == []
+    assert store.history(["stripe_revenue_30d"], since=4102444800)["stripe_revenue_30d"] == []
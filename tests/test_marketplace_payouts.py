@@ -0,0 +1,123 @@
+"""
+Tests for batched marketplace payouts against a local Stripe stub
+"""
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+import stripe
+
+from modules.marketplace import payouts
+
+
+class StripeStub(BaseHTTPRequestHandler):
+    """Minimal /v1/transfers endpoint that honours Idempotency-Key"""
+    transfers = {}
+    requests = []
+    
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        key = self.headers.get("Idempotency-Key")
+        self.requests.append((body["destination"], int(body["amount"]), key))
+        
+        if body["destination"] == "acct_rejected":
+            self._reply(400, {"error": {"type": "invalid_request_error", "message": "No such destination"}})
+            return
+        
+        transfer = self.transfers.setdefault(key, {
+            "id": f"tr_{len(self.transfers) + 1}",
+            "object": "transfer",
+            "amount": int(body["amount"]),
+            "destination": body["destination"],
+            "created": 0
+        })
+        self._reply(200, transfer)
+    
+    def _reply(self, status, payload):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stripe_stub(monkeypatch):
+    StripeStub.transfers = {}
+    StripeStub.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StripeStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(stripe, "api_base", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(stripe, "api_key", "sk_test_stub")
+    yield StripeStub
+    server.shutdown()
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "payouts.db")
+    monkeypatch.setenv("SQLITE_PATH", path)
+    
+    db = sqlite3.connect(path)
+    db.execute("""
+        CREATE TABLE partners(id TEXT PRIMARY KEY, name TEXT, is_verified INTEGER,
+                              is_active INTEGER, stripe_connect_id TEXT)
+    """)
+    db.execute("""
+        CREATE TABLE marketplace_orders(id TEXT PRIMARY KEY, listing_id TEXT, partner_id TEXT,
+                                        partner_share_cents INTEGER, status TEXT)
+    """)
+    db.executemany("INSERT INTO partners VALUES (?, ?, 1, 1, ?)", [
+        ("p1", "Partner 1", "acct_1"),
+        ("p2", "Partner 2", "acct_2"),
+        ("p3", "Partner 3", "acct_rejected"),
+    ])
+    db.executemany("INSERT INTO marketplace_orders VALUES (?, 'l1', ?, ?, 'completed')", [
+        (f"o{i}", f"p{i % 3 + 1}", 700) for i in range(30)
+    ])
+    db.commit()
+    db.close()
+    return path
+
+
+def test_orders_are_batched_into_one_transfer_per_partner(stripe_stub, db_path):
+    results = payouts.process_pending_payouts()
+    
+    assert results["transfers"] == 3
+    assert len(stripe_stub.requests) == 3
+    assert results["successful"] == 20
+    assert results["failed"] == 10
+    assert results["total_paid_cents"] == 20 * 700
+    assert {amount for _, amount, _ in stripe_stub.requests} == {10 * 700}
+    assert all(key for _, _, key in stripe_stub.requests)
+    
+    db = sqlite3.connect(db_path)
+    statuses = dict(db.execute("SELECT status, COUNT(*) FROM marketplace_orders GROUP BY status").fetchall())
+    assert statuses == {"paid_out": 20, "completed": 10}
+
+
+def test_interrupted_payout_is_retried_with_same_idempotency_key(stripe_stub, db_path, monkeypatch):
+    original = payouts._transfer_create
+    
+    def flaky_transfer(**params):
+        original(**params)
+        raise stripe.error.APIConnectionError("connection reset")
+    
+    monkeypatch.setattr(payouts, "_transfer_create", flaky_transfer)
+    first = payouts.process_pending_payouts()
+    assert first["deferred"] == 20
+    
+    monkeypatch.setattr(payouts, "_transfer_create", original)
+    second = payouts.process_pending_payouts()
+    assert second["successful"] == 20
+    
+    # Same keys on both runs, so the stub created each transfer only once
+    keys = [key for dest, _, key in stripe_stub.requests if dest != "acct_rejected"]
+    assert len(keys) == 4 and len(set(keys)) == 2
+    assert len(stripe_stub.transfers) == 2
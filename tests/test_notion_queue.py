@@ -0,0 +1,135 @@
+"""
+Tests for the Notion write-behind queue against a local Notion stub
+"""
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from time import time
+
+import pytest
+from server import notion_queue
+from server.notion_queue import NotionSyncWorker, enqueue_create, enqueue_update
+
+
+class StubNotion:
+    """Records requests; answers with `status` (and Retry-After on 429)"""
+    
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                stub.requests.append((self.command, self.path, body))
+                self.send_response(stub.status)
+                if stub.status == 429:
+                    self.send_header("Retry-After", "30")
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                page_id = f"page-{len(stub.requests)}"
+                self.wfile.write(json.dumps({"id": page_id, "results": [{"id": page_id}]}).encode())
+            
+            do_POST = do_PATCH = _handle
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "notion.db"))
+    notion = StubNotion()
+    yield notion
+    notion.server.shutdown()
+
+
+@pytest.fixture
+def worker(stub):
+    return NotionSyncWorker(token="secret", rate=1000, api_base=stub.url)
+
+
+def _rows():
+    db = notion_queue.get_db()
+    db.row_factory = sqlite3.Row
+    rows = [dict(r) for r in db.execute("SELECT * FROM notion_sync_queue")]
+    db.close()
+    return rows
+
+
+def test_updates_coalesce_into_pending_create(stub, worker):
+    enqueue_create("db1", {"Name": "a", "Status": "new"}, "Key ID", "k1")
+    enqueue_update("db1", "Key ID", "k1", {"Status": "active"})
+    
+    assert len(_rows()) == 1
+    assert worker.flush()["synced"] == 1
+    assert stub.requests == [("POST", "/pages", {
+        "parent": {"database_id": "db1"}, "properties": {"Name": "a", "Status": "active"}
+    })]
+    
+    # The created page id is cached, so later updates skip the database query
+    enqueue_update("db1", "Key ID", "k1", {"Status": "revoked"})
+    worker.flush()
+    assert stub.requests[-1] == ("PATCH", "/pages/page-1", {"properties": {"Status": "revoked"}})
+    assert _rows() == []
+
+
+def test_update_merged_while_in_flight_is_not_lost(stub, worker):
+    enqueue_create("db1", {"Name": "a"}, "Key ID", "k1")
+    apply = worker._apply
+    
+    def apply_with_concurrent_enqueue(db, entry):
+        # Merged after the entry was read, while the create is being sent
+        enqueue_update("db1", "Key ID", "k1", {"Status": "active"})
+        apply(db, entry)
+    
+    worker._apply = apply_with_concurrent_enqueue
+    worker.flush()
+    worker._apply = apply
+    
+    (row,) = _rows()
+    assert row["op"] == "update"
+    assert json.loads(row["properties"])["Status"] == "active"
+    
+    worker.flush()
+    assert stub.requests[-1] == ("PATCH", "/pages/page-1", {"properties": {"Name": "a", "Status": "active"}})
+    assert _rows() == []
+
+
+def test_rate_limit_defers_remaining_entries(stub, worker):
+    enqueue_create("db1", {"Name": "a"})
+    enqueue_create("db1", {"Name": "b"})
+    stub.status = 429
+    
+    stats = worker.flush()
+    
+    assert stats == {"synced": 0, "retried": 0, "failed": 0}
+    assert len(stub.requests) == 1
+    for row in _rows():
+        assert row["attempts"] == 0
+        assert row["next_attempt_at"] >= time() + 25
+
+
+def test_failures_back_off_then_fail(stub, worker, monkeypatch):
+    monkeypatch.setattr(notion_queue, "MAX_ATTEMPTS", 2)
+    enqueue_create("db1", {"Name": "a"})
+    stub.status = 500
+    
+    assert worker.flush()["retried"] == 1
+    (row,) = _rows()
+    assert row["status"] == "pending"
+    assert row["next_attempt_at"] >= time() + 55
+    
+    db = notion_queue.get_db()
+    db.execute("UPDATE notion_sync_queue SET next_attempt_at = 0")
+    db.commit()
+    db.close()
+    
+    assert worker.flush()["failed"] == 1
+    assert _rows()[0]["status"] == "failed"
@@ -0,0 +1,102 @@
+"""
+Tests for partner webhook signing and the delivery engine
+"""
+import hmac
+import hashlib
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from modules.partner_api.auth import generate_partner_token, get_webhook_secret
+from modules.partner_api.delivery import CircuitBreaker, WebhookDeliveryEngine
+
+
+class WebhookReceiver:
+    """Local endpoint answering each path with a scripted list of status codes"""
+    
+    def __init__(self, scripts):
+        self.scripts = {path: list(codes) for path, codes in scripts.items()}
+        self.received = []
+        receiver = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                receiver.received.append((self.path, dict(self.headers), body))
+                codes = receiver.scripts.get(self.path, [200])
+                self.send_response(codes.pop(0) if len(codes) > 1 else codes[0])
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def receiver():
+    stub = WebhookReceiver({"/ok": [200], "/flaky": [503, 503, 200], "/down": [500], "/gone": [404]})
+    yield stub
+    stub.server.shutdown()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return WebhookDeliveryEngine(max_workers=4, max_attempts=3, backoff_base=0, timeout=2,
+                                 breaker=CircuitBreaker(threshold=3, cooldown=60),
+                                 db_path=str(tmp_path / "webhooks.db"))
+
+
+def _partner(receiver, pid, path):
+    return {"id": pid, "webhook_url": receiver.url + path}
+
+
+def test_retry_rounds_and_delivery_log(engine, receiver):
+    partners = [_partner(receiver, "p-ok", "/ok"), _partner(receiver, "p-flaky", "/flaky"),
+                _partner(receiver, "p-gone", "/gone"), {"id": "p-none", "webhook_url": None}]
+    
+    summary = engine.deliver_many(partners, "order.created", {"order_id": "o1"})
+    
+    assert summary["total"] == 3
+    assert summary["delivered"] == 2
+    assert summary["results"]["p-flaky"] == {"status": "delivered", "http_status": 200, "attempt": 3}
+    # 404 is not retryable
+    assert summary["results"]["p-gone"]["attempt"] == 1
+    assert summary["attempts"] == 5
+    
+    rows = sqlite3.connect(engine.db_path).execute(
+        "SELECT partner_id, attempt, status, http_status FROM partner_webhook_deliveries ORDER BY partner_id, attempt"
+    ).fetchall()
+    assert rows == [
+        ("p-flaky", 1, "failed", 503), ("p-flaky", 2, "failed", 503), ("p-flaky", 3, "delivered", 200),
+        ("p-gone", 1, "failed", 404), ("p-ok", 1, "delivered", 200)
+    ]
+
+
+def test_circuit_breaker_stops_sending(engine, receiver):
+    partner = _partner(receiver, "p-down", "/down")
+    
+    first = engine.deliver(partner, "ping", {})
+    sent = len(receiver.received)
+    second = engine.deliver_many([partner], "ping", {})
+    
+    assert not first
+    assert sent == 3
+    assert engine.breaker.is_open("p-down")
+    assert second["results"]["p-down"]["status"] == "circuit_open"
+    assert len(receiver.received) == sent
+
+
+def test_signature_uses_per_partner_secret(engine, receiver):
+    engine.deliver(_partner(receiver, "p-ok", "/ok"), "ping", {})
+    _, headers, body = receiver.received[-1]
+    
+    t, v1 = (part.split("=", 1)[1] for part in headers["X-Levqor-Signature"].split(","))
+    expected = hmac.new(get_webhook_secret("p-ok").encode(), f"{t}.".encode() + body, hashlib.sha256).hexdigest()
+    assert v1 == expected
+    # The webhook secret is not the token-minting signature
+    assert get_webhook_secret("p-ok") != get_webhook_secret("p-other")
+    assert get_webhook_secret("p-ok")[6:] != generate_partner_token("p-ok").split(":")[1]
@@ -0,0 +1,85 @@
+"""
+Tests for the vectorized pricing grid
+"""
+import itertools
+from services.pricing_model import PricingModel, suggest_price
+
+
+def test_grid_matches_scalar_model(tmp_path):
+    model = PricingModel(db_path=str(tmp_path / "pricing.db"))
+    axes = {
+        "monthly_runs": [0, 500, 1000, 3000, 20000],
+        "p95_ms": [50, 80, 149, 150, 400],
+        "openai_cost": [0, 3.33, 100],
+        "infra_cost": [0, 20],
+        "refunds": [0, 5]
+    }
+    
+    result = model.evaluate_grid(**axes)
+    
+    assert result["shape"] == [5, 5, 3, 2, 2]
+    for idx in itertools.product(*(range(n) for n in result["shape"])):
+        inputs = [axes[axis][i] for axis, i in zip(axes, idx)]
+        price = result["price"]
+        for i in idx:
+            price = price[i]
+        assert price == suggest_price(*inputs)[0]
+
+
+def test_grid_results_are_memoized_by_bucket(tmp_path):
+    model = PricingModel(db_path=str(tmp_path / "pricing.db"))
+    grid = {"p95_ms": [60, 120], "openai_cost": 0, "infra_cost": 20, "refunds": 0}
+    
+    first = model.evaluate_grid(monthly_runs=[1000, 2000], **grid)
+    # 1003 runs falls in the same 10-run bucket as 1000
+    second = model.evaluate_grid(monthly_runs=[1003, 2000], **grid)
+    
+    assert not first["cached"]
+    assert second["cached"]
+    assert second["price"] == first["price"]
+    assert model.stats()["hits"] == 1
+
+
+class LiveModel:
+    """get_pricing_model() stand-in with recognisable live defaults"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def defaults(self):
+        self.calls += 1
+        return {"monthly_runs": 54321, "p95_ms": 987, "openai_cost": 4321, "infra_cost": 765, "refunds": 12}
+
+
+def pricing_client(monkeypatch, model):
+    from flask import Flask
+    from api.billing import pricing
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(pricing, "get_pricing_model", lambda: model)
+    app = Flask(__name__)
+    app.register_blueprint(pricing.bp)
+    return app.test_client()
+
+
+def test_public_model_uses_constant_defaults(monkeypatch):
+    model = LiveModel()
+    client = pricing_client(monkeypatch, model)
+
+    body = client.get("/billing/pricing/model?runs=500").get_json()
+
+    assert model.calls == 0
+    assert body["price"] == suggest_price(500, 120, 0, 20, 0)[0]
+    assert body["rationale"] == suggest_price(500, 120, 0, 20, 0)[1]
+    assert client.get("/billing/pricing/model", headers={"Authorization": "Bearer wrong"}).get_json()["rationale"] \
+        == suggest_price(0, 120, 0, 20, 0)[1]
+
+
+def test_admin_model_fills_live_defaults(monkeypatch):
+    model = LiveModel()
+    client = pricing_client(monkeypatch, model)
+
+    body = client.get("/billing/pricing/model?runs=500", headers={"Authorization": "Bearer secret"}).get_json()
+
+    assert model.calls == 1
+    assert body["rationale"] == suggest_price(500, 987, 4321, 765, 12)[1]
@@ -0,0 +1,93 @@
+"""
+Tests for the Stripe charge sync against a local HTTP stub
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from time import time
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+from modules.stripe_sync import sync_charges, get_charge_totals
+
+
+class StubStripe:
+    """Minimal /v1/charges: created filters, limit, starting_after, has_more"""
+    
+    def __init__(self, charges):
+        self.charges = charges
+        self.requests = []
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                stub.requests.append(query)
+                if self.headers.get("Authorization") != "Bearer sk_test":
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                matching = sorted(
+                    (c for c in stub.charges
+                     if int(query["created[gte]"]) <= c["created"] < int(query["created[lt]"])),
+                    key=lambda c: (-c["created"], c["id"])
+                )
+                if "starting_after" in query:
+                    ids = [c["id"] for c in matching]
+                    matching = matching[ids.index(query["starting_after"]) + 1:]
+                limit = int(query["limit"])
+                body = json.dumps({"data": matching[:limit], "has_more": len(matching) > limit}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def stripe_stub():
+    now = int(time())
+    charges = [
+        {"id": f"ch_{i}", "created": now - i * 600, "amount": 1000, "paid": i % 10 != 0,
+         "description": "Template pack" if i % 3 == 0 else "Subscription"}
+        for i in range(350)
+    ]
+    stub = StubStripe(charges)
+    yield stub
+    stub.server.shutdown()
+
+
+def test_sync_follows_pagination_past_first_page(tmp_path, stripe_stub):
+    db_path = str(tmp_path / "stripe.db")
+    
+    result = sync_charges(db_path, api_key="sk_test", api_base=stripe_stub.url, workers=3)
+    totals = get_charge_totals(since=0, keywords=("template",), db_path=db_path)
+    
+    assert result["charges"] == 350
+    assert result["pages"] > result["slices"]
+    assert totals["charges"] == 350
+    assert totals["failed_count"] == 35
+    assert totals["revenue_cents"] == 315 * 1000
+    assert totals["keyword_cents"]["template"] == sum(
+        1000 for i in range(350) if i % 3 == 0 and i % 10 != 0
+    )
+
+
+def test_incremental_sync_uses_cursor_and_updates_changed_charges(tmp_path, stripe_stub):
+    db_path = str(tmp_path / "stripe.db")
+    sync_charges(db_path, api_key="sk_test", api_base=stripe_stub.url)
+    stripe_stub.requests.clear()
+    
+    # A recent charge is refunded after the first sync
+    stripe_stub.charges[1]["amount_refunded"] = 1000
+    result = sync_charges(db_path, api_key="sk_test", api_base=stripe_stub.url)
+    
+    assert result["since"] > int(time()) - 4 * 86400
+    assert all(int(q["created[gte]"]) >= result["since"] for q in stripe_stub.requests)
+    assert get_charge_totals(since=0, db_path=db_path)["refunded_cents"] == 1000
@@ -0,0 +1,74 @@
+"""
+Tests for the public support chat response cache
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import support_ai, support_cache
+from backend.services.support_cache import ResponseCache, normalize_question
+
+
+class StubClient:
+    """Minimal stand-in for the OpenAI client's chat.completions API"""
+
+    def __init__(self, reply="Levqor automates your workflows.", escalation=False):
+        self.calls = 0
+        self.content = json.dumps({"reply": reply, "escalationSuggested": escalation})
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(support_cache, "_public_cache", ResponseCache(max_entries=10, ttl_seconds=60))
+
+
+def test_normalize_question_ignores_case_punctuation_and_filler():
+    assert normalize_question("How much does Levqor cost?") == normalize_question("how much, how much Levqor cost")
+    assert normalize_question("How much does Levqor cost?") == "how much levqor cost"
+    assert normalize_question("Hi!!") == ""
+
+
+def test_normalize_question_keeps_word_order():
+    assert normalize_question("Switch annual to monthly") != normalize_question("switch monthly to annual")
+
+
+def test_repeated_question_is_served_from_cache():
+    client = StubClient()
+
+    first = support_ai.run_public_chat("What does Levqor do?", client=client)
+    second = support_ai.run_public_chat("what does levqor do", client=client)
+
+    assert client.calls == 1
+    assert second["reply"] == first["reply"]
+    assert second["conversationId"] != first["conversationId"]
+
+    stats = support_cache.get_public_response_cache().stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_escalations_are_not_cached():
+    client = StubClient(reply="Let me get a human.", escalation=True)
+
+    support_ai.run_public_chat("I need a real person", client=client)
+    support_ai.run_public_chat("I need a real person", client=client)
+
+    assert client.calls == 2
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
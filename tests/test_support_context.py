@@ -0,0 +1,128 @@
+"""
+Tests for the cached support user context and its invalidation
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app import db
+from backend.models.sales_models import DFYOrder
+from backend.services import support_cache, support_tickets
+from backend.utils import support_context
+
+
+@pytest.fixture(autouse=True)
+def fresh_context_cache(monkeypatch):
+    monkeypatch.setattr(support_context, "_context_cache", support_cache.ResponseCache(max_entries=10, ttl_seconds=60))
+    monkeypatch.setattr(support_context, "_get_tickets_for_email", lambda email: [{"id": "t1", "status": "open"}])
+
+
+@pytest.fixture
+def no_orders(monkeypatch):
+    monkeypatch.setattr(support_context, "_register_order_listeners", lambda: None)
+    monkeypatch.setattr(support_context, "_get_orders_for_email", lambda email: [])
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'orders.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def add_order(email, tier="starter", days_ago=0, **fields):
+    at = datetime.utcnow() - timedelta(days=days_ago)
+    order = DFYOrder(customer_id="c1", customer_email=email, tier=tier, created_at=at, updated_at=at, **fields)
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+
+def order_ids(email):
+    return [o["id"] for o in support_context.get_user_context(email)["orders"]]
+
+
+def test_cached_context_is_returned_as_a_copy(no_orders):
+    first = support_context.get_user_context("a@example.com")
+    first["tickets"].append({"id": "injected"})
+    first["email"] = "mutated"
+
+    second = support_context.get_user_context("a@example.com")
+
+    assert second["email"] == "a@example.com"
+    assert second["tickets"] == [{"id": "t1", "status": "open"}]
+    assert support_context.get_context_cache_stats()["hits"] == 1
+
+
+def test_changing_ticket_email_invalidates_both_addresses(no_orders, tmp_path, monkeypatch):
+    monkeypatch.setattr(support_tickets, "DB_PATH", str(tmp_path / "tickets.db"))
+    monkeypatch.setattr(support_tickets, "migrate_json_tickets", lambda db: None)
+    invalidated = []
+    monkeypatch.setattr(support_tickets, "_invalidate_context", invalidated.append)
+
+    ticket = support_tickets.create_ticket("old@example.com", "Where is my order?")
+    invalidated.clear()
+
+    updated = support_tickets.update_ticket(ticket["id"], {"email": "new@example.com"})
+
+    assert updated["email"] == "new@example.com"
+    assert sorted(invalidated) == ["new@example.com", "old@example.com"]
+
+    invalidated.clear()
+    support_tickets.update_ticket(ticket["id"], {"status": "closed"})
+    assert invalidated == ["new@example.com"]
+
+
+def test_orders_are_loaded_for_the_customer_only(app):
+    first = add_order("a@example.com", tier="growth", days_ago=30, files_url="https://files/1")
+    second = add_order("a@example.com", days_ago=2, revisions_left=0)
+    add_order("b@example.com")
+
+    context = support_context.get_user_context("a@example.com")
+
+    assert [o["id"] for o in context["orders"]] == [first.id, second.id]
+    assert context["orders"][0] == {
+        "id": first.id, "tier": "growth", "status": "NEW",
+        "created_at": first.created_at.isoformat(), "updated_at": first.updated_at.isoformat(),
+        "deadline": None, "revisions_left": 1, "files_url": "https://files/1"
+    }
+    assert context["account_age_days"] == 30
+    assert context["last_activity"] == second.updated_at.isoformat()
+    assert context["tickets"] == [{"id": "t1", "status": "open"}]
+
+
+def test_committed_order_writes_invalidate_cached_context(app):
+    order = add_order("a@example.com")
+    assert order_ids("a@example.com") == [order.id]
+    assert order_ids("c@example.com") == []
+
+    new = add_order("a@example.com")
+    assert order_ids("a@example.com") == [order.id, new.id]
+
+    # Moving an order invalidates both the old and the new customer
+    order.customer_email = "c@example.com"
+    db.session.commit()
+    assert order_ids("a@example.com") == [new.id]
+    assert order_ids("c@example.com") == [order.id]
+
+    db.session.delete(new)
+    db.session.commit()
+    assert order_ids("a@example.com") == []
+
+
+def test_rolled_back_order_writes_keep_cached_context(app):
+    order = add_order("a@example.com")
+    assert order_ids("a@example.com") == [order.id]
+
+    order.status = "DONE"
+    db.session.flush()
+    db.session.rollback()
+    add_order("b@example.com")
+
+    assert support_context.get_user_context("a@example.com")["orders"][0]["status"] == "NEW"
+    assert support_context.get_context_cache_stats()["hits"] == 1
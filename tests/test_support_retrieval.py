@@ -0,0 +1,83 @@
+"""
+Tests for knowledge base chunking and BM25 ranking
+"""
+from backend.services.support_retrieval import SupportIndex, chunk_markdown, format_passages, tokenize
+
+
+KB = {
+    "pricing": """# Pricing
+
+## DFY Starter
+The Starter plan costs £99 and includes one automated workflow.
+
+## DFY Pro
+The Pro plan costs £249 and includes three workflows with priority support.
+""",
+    "faq": """# FAQ
+
+## Refunds
+Refunds are available within 14 days of purchase.
+
+### Exceptions
+Custom integrations are not refundable once delivery has started.
+
+---
+
+## Security
+All data is encrypted at rest and in transit.
+"""
+}
+
+
+def test_chunks_carry_heading_trail():
+    chunks = chunk_markdown("faq", KB["faq"])
+    
+    assert [c["heading"] for c in chunks] == ["FAQ > Refunds", "FAQ > Refunds > Exceptions", "FAQ > Security"]
+    assert chunks[1]["text"] == "Custom integrations are not refundable once delivery has started."
+    # Horizontal rules are dropped, not kept as content
+    assert all("---" not in c["text"] for c in chunks)
+
+
+def test_long_sections_split_on_paragraphs():
+    text = "# Big\n\n" + "\n\n".join(f"Paragraph {i} " + "x" * 60 for i in range(10))
+    
+    chunks = chunk_markdown("big", text, max_chars=200)
+    
+    assert len(chunks) > 1
+    assert all(c["heading"] == "Big" for c in chunks)
+    assert all(len(c["text"]) <= 200 for c in chunks)
+    assert "".join(c["text"] for c in chunks).count("Paragraph") == 10
+
+
+def test_ranking_prefers_matching_section():
+    index = SupportIndex(KB)
+    
+    results = index.search("How much does the Pro plan cost?")
+    
+    assert results[0]["heading"] == "Pricing > DFY Pro"
+    assert results == sorted(results, key=lambda r: -r["score"])
+    assert all(r["score"] > 0 for r in results)
+
+
+def test_heading_terms_count_and_sources_filter():
+    index = SupportIndex(KB)
+    
+    # "exceptions" only appears in a heading
+    assert index.search("exceptions")[0]["heading"] == "FAQ > Refunds > Exceptions"
+    assert {r["source"] for r in index.search("plan refunds", sources=["faq"])} == {"faq"}
+
+
+def test_no_match_returns_nothing():
+    index = SupportIndex(KB)
+    
+    assert index.search("what is the") == []
+    assert tokenize("What is the Pro plan?") == ["pro", "plan"]
+    assert index.search("kubernetes") == []
+    assert SupportIndex({}).search("pricing") == []
+
+
+def test_format_passages_labels_source_and_heading():
+    passages = [{"source": "faq", "heading": "FAQ > Security", "text": "Encrypted."},
+                {"source": "misc", "heading": "", "text": "No heading."}]
+    
+    assert format_passages(passages) == "[faq: FAQ > Security]\nEncrypted.\n\n[misc]\nNo heading."
@@ -0,0 +1,187 @@
+"""
+Tests for streamed support chat replies (parser, fallbacks and SSE route)
+"""
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from backend.routes.support_chat import support_chat_bp
+from backend.services import support_ai, support_cache
+from backend.services.support_ai import ReplyStreamParser
+from backend.services.support_cache import ResponseCache
+
+COMPLETION = json.dumps(
+    {"reply": 'Line one\nSays "hi" \\ café \U0001F600 done', "escalationSuggested": False}
+)
+EXPECTED = json.loads(COMPLETION)["reply"]
+
+
+class StreamingClient:
+    """chat.completions stand-in that streams `pieces` (or answers in one go)"""
+
+    def __init__(self, pieces, delay=0.0):
+        self.pieces = list(pieces)
+        self.delay = delay
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, stream=False, **kwargs):
+        self.calls += 1
+        if not stream:
+            message = SimpleNamespace(content="".join(self.pieces))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream()
+
+    def _stream(self):
+        for piece in self.pieces:
+            if self.delay:
+                time.sleep(self.delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(support_cache, "_public_cache", ResponseCache(max_entries=10, ttl_seconds=60))
+    monkeypatch.setattr(support_ai, "log_exception", lambda **kwargs: None)
+
+
+def feed_all(pieces):
+    parser = ReplyStreamParser()
+    text = "".join(parser.feed(piece) for piece in pieces)
+    return parser, text
+
+
+def test_parser_decodes_reply_fed_one_character_at_a_time():
+    parser, text = feed_all(COMPLETION)
+
+    assert text == EXPECTED
+    assert parser.escalation is False
+
+
+def test_parser_handles_every_split_point():
+    # Covers splits inside \n, \", \\, é and the 😀 surrogate pair
+    for cut in range(1, len(COMPLETION)):
+        _, text = feed_all([COMPLETION[:cut], COMPLETION[cut:]])
+        assert text == EXPECTED, cut
+
+
+def test_parser_never_emits_lone_surrogates():
+    _, text = feed_all(['{"reply": "a \\ud83d', '\\ude00 b \\ud83d x"}'])
+
+    assert text == "a \U0001F600 b � x"
+
+
+def test_parser_passes_plain_text_through():
+    parser, text = feed_all(["  Sure, ", "Levqor runs ", "{workflows}."])
+
+    assert text == "Sure, Levqor runs {workflows}."
+    assert parser.escalation is None
+
+
+def test_parser_reports_escalation_before_reply():
+    parser = ReplyStreamParser()
+
+    assert parser.feed('{"escalationSuggested": true, "re') == ""
+    assert parser.escalation is True
+    assert parser.feed('ply": "Connecting you"}') == "Connecting you"
+
+
+def test_stream_events_order_and_done_reply():
+    client = StreamingClient([COMPLETION[i:i + 7] for i in range(0, len(COMPLETION), 7)])
+
+    events = list(support_ai.stream_public_chat("What does Levqor do?", "c-1", client=client))
+    names = [name for name, _ in events]
+
+    assert names[0] == "meta" and names[-1] == "done"
+    assert names.count("escalation") == 1
+    assert set(names[1:-1]) == {"token", "escalation"}
+    assert "".join(data["text"] for name, data in events if name == "token") == EXPECTED
+    assert events[-1][1] == {"reply": EXPECTED, "escalationSuggested": False, "conversationId": "c-1"}
+
+
+def test_malformed_completion_keeps_decoded_text():
+    client = StreamingClient(['{"reply": "Half an ans', 'wer'])
+
+    events = list(support_ai.stream_public_chat("What does Levqor do?", client=client))
+    done = events[-1][1]
+
+    assert "".join(data["text"] for name, data in events if name == "token") == "Half an answer"
+    assert done["reply"] == "Half an answer"
+
+
+def test_busy_when_no_llm_slot_frees_up(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(support_ai, "_llm_slots", slots)
+    monkeypatch.setattr(support_ai, "SUPPORT_LLM_QUEUE_TIMEOUT", 0.01)
+    client = StreamingClient([COMPLETION])
+
+    events = list(support_ai.stream_public_chat("What does Levqor do?", "c-2", client=client))
+
+    assert client.calls == 0
+    assert events[-1] == ("done", {"reply": support_ai.BUSY_REPLY, "escalationSuggested": False, "conversationId": "c-2"})
+    assert support_ai.run_public_chat("What does Levqor do?", client=client)["reply"] == support_ai.BUSY_REPLY
+
+
+def test_slow_stream_times_out_with_fallback_and_frees_slot(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(support_ai, "_llm_slots", slots)
+    monkeypatch.setattr(support_ai, "SUPPORT_LLM_TIMEOUT", 0.05)
+    client = StreamingClient(['{"reply": "one', ' two', ' three"}'], delay=0.04)
+
+    events = list(support_ai.stream_public_chat("What does Levqor do?", client=client))
+    done = events[-1][1]
+
+    assert events[-1][0] == "done"
+    assert done["reply"].startswith("I'm having trouble right now")
+    assert done["escalationSuggested"] is True
+    assert slots.acquire(blocking=False)
+
+
+def test_without_client_reply_is_unavailable(monkeypatch):
+    monkeypatch.setattr(support_ai, "OPENAI_AVAILABLE", False)
+
+    events = list(support_ai.stream_public_chat("hello", "c-3"))
+
+    assert [name for name, _ in events] == ["meta", "done"]
+    assert events[-1][1]["reply"].startswith("I'm currently unavailable")
+    assert support_ai.run_public_chat("hello")["escalationSuggested"] is True
+
+
+@pytest.fixture
+def client_app(monkeypatch):
+    stub = StreamingClient([COMPLETION[:20], COMPLETION[20:]])
+    monkeypatch.setattr(support_ai, "_default_client", lambda client: client or stub)
+    app = Flask(__name__)
+    app.register_blueprint(support_chat_bp, url_prefix="/api/support")
+    return app.test_client()
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_public_route_streams_sse(client_app):
+    response = client_app.post("/api/support/public?stream=1", json={"message": "What does Levqor do?"})
+
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    events = parse_sse(response.get_data(as_text=True))
+    assert events[0][0] == "meta"
+    assert "".join(data["text"] for name, data in events if name == "token") == EXPECTED
+    assert events[-1][1]["reply"] == EXPECTED
+
+
+def test_public_route_without_stream_returns_json(client_app):
+    response = client_app.post("/api/support/public", json={"message": "What does Levqor do?"})
+
+    assert response.status_code == 200
+    assert response.get_json()["reply"] == EXPECTED
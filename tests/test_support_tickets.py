@@ -0,0 +1,94 @@
+"""
+Tests for the SQLite support ticket store
+"""
+import json
+import os
+import sqlite3
+
+import pytest
+
+from backend.services import support_tickets
+from backend.services.support_tickets import migrate_json_tickets
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    path = str(tmp_path / "tickets.db")
+    monkeypatch.setattr(support_tickets, "DB_PATH", path)
+    # Leave the repo's legacy JSON file alone; migration is tested explicitly
+    monkeypatch.setattr(support_tickets, "migrate_json_tickets", lambda db: 0)
+    monkeypatch.setattr(support_tickets, "_invalidate_context", lambda email: None)
+    return path
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    path = tmp_path / "support_tickets.json"
+    path.write_text(json.dumps([
+        {"id": "old1", "email": "a@example.com", "message": "Help", "status": "closed",
+         "created_at": "2026-01-01T10:00:00", "notes": [{"author": "ops", "note": "done"}], "resolution": "Fixed"},
+        {"id": "old2", "email": "b@example.com", "message": "Refund?", "created_at": "2026-01-02T10:00:00"},
+    ]))
+    return path
+
+
+def test_migrate_json_tickets_imports_once(store, legacy_file):
+    db = sqlite3.connect(store)
+    support_tickets.init_support_ticket_tables(db)
+
+    assert migrate_json_tickets(db, path=str(legacy_file)) == 2
+    assert not legacy_file.exists()
+    assert os.path.exists(f"{legacy_file}.migrated")
+
+    # Second run: file already moved, nothing re-imported
+    assert migrate_json_tickets(db, path=str(legacy_file)) == 0
+
+    # A restored copy of the file doesn't duplicate existing ids
+    os.replace(f"{legacy_file}.migrated", legacy_file)
+    assert migrate_json_tickets(db, path=str(legacy_file)) == 0
+    assert db.execute("SELECT COUNT(*) FROM support_tickets").fetchone()[0] == 2
+    db.close()
+
+    old1 = support_tickets.get_ticket("old1")
+    assert old1["status"] == "closed" and old1["resolution"] == "Fixed"
+    assert old1["notes"] == [{"author": "ops", "note": "done"}]
+    old2 = support_tickets.get_ticket("old2")
+    assert old2["status"] == "open" and old2["updated_at"] == old2["created_at"] and old2["notes"] == []
+
+
+def test_migrate_ignores_unreadable_file(store, tmp_path):
+    bad = tmp_path / "broken.json"
+    bad.write_text("{not json")
+    db = sqlite3.connect(store)
+    support_tickets.init_support_ticket_tables(db)
+
+    assert migrate_json_tickets(db, path=str(bad)) == 0
+    assert bad.exists()
+    db.close()
+
+
+def test_tickets_for_email_returns_latest_oldest_first(store):
+    ids = []
+    for n in range(4):
+        ticket = support_tickets.create_ticket("a@example.com", f"Question {n}")
+        ids.append(ticket["id"])
+    support_tickets.create_ticket("b@example.com", "Other customer")
+
+    recent = support_tickets.get_tickets_for_email("a@example.com", limit=3)
+
+    assert [t["id"] for t in recent] == ids[1:]
+    assert [t["message"] for t in recent] == ["Question 1", "Question 2", "Question 3"]
+    assert len(support_tickets.get_tickets_for_email("a@example.com")) == 4
+    assert support_tickets.get_tickets_for_email("nobody@example.com") == []
+
+
+def test_add_ticket_note_appends(store):
+    ticket = support_tickets.create_ticket("a@example.com", "Login broken")
+
+    assert support_tickets.add_ticket_note(ticket["id"], "Looking into it", author="agent-1")
+    assert support_tickets.add_ticket_note(ticket["id"], "Fixed")
+
+    stored = support_tickets.get_ticket(ticket["id"])
+    assert [(n["author"], n["note"]) for n in stored["notes"]] == [("agent-1", "Looking into it"), ("system", "Fixed")]
+    assert stored["updated_at"] >= ticket["updated_at"]
+    assert support_tickets.add_ticket_note("missing", "nope") is False
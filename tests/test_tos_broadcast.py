@@ -0,0 +1,258 @@
+"""
+Tests for resumable TOS update broadcasts
+"""
+import sqlite3
+import threading
+from time import sleep, time
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from backend.routes import legal_enhanced
+from backend.services import tos_broadcast
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "broadcast.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE users(email TEXT, name TEXT, terms_version TEXT)")
+    db.executemany("INSERT INTO users VALUES (?, ?, ?)", [
+        (f"user{n}@example.com", f"User {n}", "old" if n % 5 else "v2") for n in range(25)
+    ])
+    db.commit()
+    db.close()
+    monkeypatch.setattr(tos_broadcast, "_rate_limiter", tos_broadcast.RateLimiter(0))
+    monkeypatch.setattr(tos_broadcast, "TOS_BROADCAST_CHUNK", 8)
+    return path
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+    lock = threading.Lock()
+
+    def send(email, **kwargs):
+        with lock:
+            sent.append(email)
+        return not email.startswith("user7@")
+
+    monkeypatch.setattr(legal_enhanced, "send_tos_update_email", send)
+    return sent
+
+
+def test_broadcast_sends_each_recipient_once(db_path, sent):
+    started = tos_broadcast.start_broadcast("v2", db_path=db_path, run=False)
+    assert started["total"] == 20 and started["status"] == "queued"
+
+    status = tos_broadcast.run_broadcast(started["id"], db_path)
+
+    assert status["status"] == "completed"
+    assert (status["sent"], status["failed"], status["remaining"]) == (19, 1, 0)
+    assert len(sent) == len(set(sent)) == 20
+    # A finished broadcast is not picked up again
+    assert tos_broadcast.run_broadcast(started["id"], db_path) is None
+    assert tos_broadcast.resume_broadcasts(db_path) == 0
+
+
+def test_lease_is_renewed_while_a_chunk_is_sending(db_path, monkeypatch):
+    # One chunk takes ~0.4s, twice the lease
+    monkeypatch.setattr(tos_broadcast, "TOS_BROADCAST_LEASE_SECONDS", 0.2)
+    monkeypatch.setattr(tos_broadcast, "TOS_BROADCAST_WORKERS", 1)
+    broadcast_id = tos_broadcast.start_broadcast("v2", db_path=db_path, run=False)["id"]
+    stolen = []
+
+    def slow_send(email, **kwargs):
+        sleep(0.05)
+        other = sqlite3.connect(db_path, timeout=30)
+        try:
+            stolen.append(tos_broadcast._claim(other, broadcast_id))
+        finally:
+            other.close()
+        return True
+
+    monkeypatch.setattr(legal_enhanced, "send_tos_update_email", slow_send)
+
+    status = tos_broadcast.run_broadcast(broadcast_id, db_path)
+
+    assert status["status"] == "completed" and status["sent"] == 20
+    assert stolen and not any(stolen)
+
+
+class ExplodingPool:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, items):
+        raise RuntimeError("mail pool exploded")
+
+
+def test_interrupted_broadcast_is_resumable_then_gives_up(db_path, sent, monkeypatch):
+    monkeypatch.setattr(tos_broadcast, "TOS_BROADCAST_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(tos_broadcast, "ThreadPoolExecutor", ExplodingPool)
+    monkeypatch.setattr(tos_broadcast, "_spawn", lambda broadcast_id, db_path=None: None)
+    broadcast_id = tos_broadcast.start_broadcast("v2", db_path=db_path, run=False)["id"]
+
+    for attempt in (1, 2):
+        status = tos_broadcast.run_broadcast(broadcast_id, db_path)
+        assert (status["status"], status["attempts"]) == ("running", attempt)
+        assert "exploded" in status["error"]
+        assert tos_broadcast.resume_broadcasts(db_path) == 1
+
+    status = tos_broadcast.run_broadcast(broadcast_id, db_path)
+
+    assert status["status"] == "failed" and status["finished_at"]
+    assert tos_broadcast.resume_broadcasts(db_path) == 0
+    assert sent == []
+
+
+def test_successful_chunk_resets_attempts(db_path, sent, monkeypatch):
+    broadcast_id = tos_broadcast.start_broadcast("v2", db_path=db_path, run=False)["id"]
+    db = sqlite3.connect(db_path)
+    db.execute("UPDATE tos_broadcasts SET attempts = 4 WHERE id = ?", (broadcast_id,))
+    db.commit()
+    db.close()
+
+    status = tos_broadcast.run_broadcast(broadcast_id, db_path)
+
+    assert status["status"] == "completed" and status["attempts"] == 0
+
+
+def test_existing_table_gets_attempts_column(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "old.db"))
+    db.execute("CREATE TABLE tos_broadcasts(id TEXT PRIMARY KEY, tos_version TEXT, status TEXT)")
+
+    tos_broadcast.init_tos_broadcast_tables(db)
+
+    assert "attempts" in [col[1] for col in db.execute("PRAGMA table_info(tos_broadcasts)")]
+    db.close()
+
+
+def test_existing_recipients_table_gets_retry_columns(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "old.db"))
+    db.execute("CREATE TABLE tos_broadcast_recipients(broadcast_id TEXT, seq INTEGER, email TEXT, status TEXT)")
+
+    tos_broadcast.init_tos_broadcast_tables(db)
+    tos_broadcast.init_tos_broadcast_tables(db)
+
+    columns = [col[1] for col in db.execute("PRAGMA table_info(tos_broadcast_recipients)")]
+    assert {"attempts", "retry_at"} <= set(columns)
+    db.close()
+
+
+class ResendStub(BaseAdapter):
+    """Transport answering Resend calls from a per-email script of status codes"""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = script
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        email = requests.compat.json.loads(request.body)["to"][0]
+        with self._lock:
+            self.calls.append(email)
+            codes = self.script.get(email, [200])
+            status = codes.pop(0) if len(codes) > 1 else codes[0]
+        response = requests.Response()
+        response.status_code = status
+        if status == 429:
+            response.headers["Retry-After"] = "0.05"
+        response._content = b"{}"
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def resend(db_path, monkeypatch):
+    monkeypatch.setenv("RESEND_API_KEY", "re_test")
+    monkeypatch.setattr(tos_broadcast, "TOS_BROADCAST_RETRY_SECONDS", 0.01)
+    stub = ResendStub({})
+    build = tos_broadcast._build_session
+
+    def build_with_stub():
+        session = build()
+        session.mount("https://api.resend.com", stub)
+        return session
+
+    monkeypatch.setattr(tos_broadcast, "_build_session", build_with_stub)
+    return stub
+
+
+def recipient(db_path, email):
+    db = sqlite3.connect(db_path)
+    try:
+        return db.execute(
+            "SELECT status, attempts, retry_at, error FROM tos_broadcast_recipients WHERE email = ?", (email,)
+        ).fetchone()
+    finally:
+        db.close()
+
+
+def test_rate_limited_and_5xx_sends_are_retried(db_path, resend, monkeypatch):
+    resend.script.update({
+        "user1@example.com": [429, 429, 200],
+        "user2@example.com": [503, 200],
+        "user3@example.com": [400],
+    })
+    paused = []
+    monkeypatch.setattr(tos_broadcast._rate_limiter, "pause", paused.append)
+    broadcast_id = tos_broadcast.start_broadcast("v2", db_path=db_path, run=False)["id"]
+
+    status = tos_broadcast.run_broadcast(broadcast_id, db_path)
+
+    assert status["status"] == "completed"
+    assert (status["sent"], status["failed"], status["remaining"]) == (19, 1, 0)
+    assert resend.calls.count("user1@example.com") == 3
+    assert resend.calls.count("user2@example.com") == 2
+    assert resend.calls.count("user3@example.com") == 1
+    assert paused == [0.05, 0.05]
+    assert recipient(db_path, "user1@example.com")[:3] == ("sent", 3, None)
+    assert recipient(db_path, "user3@example.com") == ("failed", 1, None, "HTTP 400")
+
+
+def test_persistent_5xx_fails_after_max_attempts(db_path, resend, monkeypatch):
+    monkeypatch.setattr(tos_broadcast, "TOS_BROADCAST_MAX_ATTEMPTS", 3)
+    resend.script["user4@example.com"] = [502]
+    broadcast_id = tos_broadcast.start_broadcast("v2", db_path=db_path, run=False)["id"]
+
+    status = tos_broadcast.run_broadcast(broadcast_id, db_path)
+
+    assert (status["status"], status["sent"], status["failed"]) == ("completed", 19, 1)
+    assert resend.calls.count("user4@example.com") == 3
+    assert recipient(db_path, "user4@example.com") == ("failed", 3, None, "HTTP 502 after 3 attempts")
+
+
+def test_backed_off_recipients_survive_a_restart(db_path, resend, monkeypatch):
+    resend.script["user6@example.com"] = [429, 200]
+    monkeypatch.setattr(tos_broadcast, "_retry_delay", lambda attempts, retry_after: 3600)
+    monkeypatch.setattr(tos_broadcast._rate_limiter, "pause", lambda seconds: None)
+    broadcast_id = tos_broadcast.start_broadcast("v2", db_path=db_path, run=False)["id"]
+    # Stop waiting for the hour-long backoff: simulate the worker dying
+    monkeypatch.setattr(tos_broadcast, "sleep", lambda seconds: (_ for _ in ()).throw(RuntimeError("worker died")))
+
+    interrupted = tos_broadcast.run_broadcast(broadcast_id, db_path)
+
+    assert (interrupted["status"], interrupted["sent"], interrupted["remaining"]) == ("running", 19, 1)
+    assert recipient(db_path, "user6@example.com")[:2] == ("pending", 1)
+
+    db = sqlite3.connect(db_path)
+    db.execute("UPDATE tos_broadcast_recipients SET retry_at = ? WHERE email = 'user6@example.com'", (time() - 1,))
+    db.commit()
+    db.close()
+
+    status = tos_broadcast.run_broadcast(broadcast_id, db_path)
+
+    assert (status["status"], status["sent"], status["failed"]) == ("completed", 20, 0)
+    assert resend.calls.count("user6@example.com") == 2